@@ -0,0 +1,9 @@
+"""Microbenchmarks for autogen-core.
+
+Run from the autogen-core package directory::
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare base.json results.json
+
+Each benchmark records the time per operation of several samples. Results are written as JSON together with the
+commit and machine they were measured on, and two result files can be compared by median time per operation."""
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from . import bench_routed_agent, bench_runtime, bench_serialization, bench_subscriptions
+from ._harness import Suite, compare, write_results
+
+MODULES = (bench_runtime, bench_routed_agent, bench_subscriptions, bench_serialization)
+
+
+async def run_all(suite: Suite) -> None:
+    for module in MODULES:
+        await module.run(suite)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the autogen-core microbenchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--output", type=Path, help="Write the results as JSON to this file.")
+    run_parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="Only run the benchmarks whose name matches this glob, for example 'runtime.*'. May be repeated.",
+    )
+    run_parser.add_argument("--repeat", type=int, default=5, help="Number of timed samples per benchmark.")
+    run_parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplier for the number of operations per sample."
+    )
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files.")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("head", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Fraction of the base time by which a benchmark must change to be reported as slower or faster.",
+    )
+    compare_parser.add_argument(
+        "--fail-on-regression", action="store_true", help="Exit with status 1 if any benchmark is slower."
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        suite = Suite(repeat=args.repeat, scale=args.scale, patterns=args.filter)
+        asyncio.run(run_all(suite))
+        if args.output is not None:
+            write_results(args.output, suite)
+        return 0
+
+    lines, regressions = compare(args.base, args.head, args.threshold)
+    print("\n".join(lines))
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
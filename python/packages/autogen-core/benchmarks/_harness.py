@@ -0,0 +1,197 @@
+"""Timing, result recording and comparison shared by the benchmarks."""
+
+import fnmatch
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Sequence, Tuple
+
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """The timings of one benchmark with one set of parameters.
+
+    Args:
+        name (str): Dotted name of the benchmark, for example ``runtime.send_message``.
+        params (Dict[str, Any]): Parameters the benchmark was run with.
+        iterations (int): Number of operations timed in each sample.
+        samples (List[float]): Seconds per operation, one value per repeat.
+    """
+
+    name: str
+    params: Dict[str, Any]
+    iterations: int
+    samples: List[float]
+
+    @property
+    def key(self) -> str:
+        """Identifies the benchmark and its parameters across runs."""
+        if not self.params:
+            return self.name
+        return f"{self.name}[{','.join(f'{key}={value}' for key, value in sorted(self.params.items()))}]"
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "name": self.name,
+            "params": self.params,
+            "iterations": self.iterations,
+            "unit": "seconds/op",
+            "min": min(self.samples),
+            "median": self.median,
+            "mean": statistics.fmean(self.samples),
+            "stdev": statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0,
+            "ops_per_sec": 1 / self.median if self.median > 0 else None,
+            "samples": self.samples,
+        }
+
+
+@dataclass
+class Suite:
+    """Runs benchmarks and collects their results.
+
+    Args:
+        repeat (int): Number of timed samples per benchmark. The median is used for comparisons.
+        scale (float): Multiplier for the number of operations per sample. Use less than 1 for a quick run.
+        patterns (Sequence[str]): Glob patterns of the benchmark names to run. Runs every benchmark if empty.
+    """
+
+    repeat: int = 5
+    scale: float = 1.0
+    patterns: Sequence[str] = ()
+    results: List[BenchmarkResult] = field(default_factory=list)
+
+    def enabled(self, name: str) -> bool:
+        return not self.patterns or any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    async def measure(
+        self,
+        name: str,
+        run: Callable[[int], Awaitable[None]],
+        *,
+        iterations: int,
+        params: Mapping[str, Any] | None = None,
+        setup: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """Time `run`, which performs the given number of operations, and record the time per operation.
+
+        Args:
+            name (str): Dotted name of the benchmark.
+            run (Callable[[int], Awaitable[None]]): Performs the operation the given number of times.
+            iterations (int): Number of operations per sample, before scaling.
+            params (Mapping[str, Any], optional): Parameters to record with the result.
+            setup (Callable[[], Awaitable[None]], optional): Called before every sample, untimed.
+        """
+        if not self.enabled(name):
+            return
+        iterations = max(1, int(iterations * self.scale))
+        if setup is not None:
+            await setup()
+        # Warm up caches and lazily created state.
+        await run(max(1, iterations // 10))
+        samples: List[float] = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                await setup()
+            gc.collect()
+            start = time.perf_counter()
+            await run(iterations)
+            samples.append((time.perf_counter() - start) / iterations)
+        result = BenchmarkResult(name=name, params=dict(params or {}), iterations=iterations, samples=samples)
+        self.results.append(result)
+        print(f"{result.key:<70} {format_duration(result.median):>12}/op")
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def _git(*args: str) -> str | None:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the commit and machine the benchmarks ran on."""
+    try:
+        package_version: str | None = version("autogen-core")
+    except PackageNotFoundError:
+        package_version = None
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "autogen_core_version": package_version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def write_results(path: Path, suite: Suite) -> None:
+    document = {
+        "schema_version": SCHEMA_VERSION,
+        "environment": environment(),
+        "repeat": suite.repeat,
+        "scale": suite.scale,
+        "results": [result.to_json() for result in suite.results],
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    document = json.loads(path.read_text())
+    if document.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{path} has schema version {document.get('schema_version')}, expected {SCHEMA_VERSION}")
+    return {result["key"]: result for result in document["results"]}
+
+
+def compare(base: Path, head: Path, threshold: float) -> Tuple[List[str], List[str]]:
+    """Compare the median time per operation of two result files.
+
+    Returns:
+        Tuple[List[str], List[str]]: The report lines, and the keys of the benchmarks that are slower in `head`
+        by more than `threshold`, a fraction of the base time.
+    """
+    base_results = load_results(base)
+    head_results = load_results(head)
+    lines = [f"{'benchmark':<70} {'base':>12} {'head':>12} {'change':>8}"]
+    regressions: List[str] = []
+    for key in sorted(base_results.keys() | head_results.keys()):
+        if key not in base_results or key not in head_results:
+            side = "head" if key in head_results else "base"
+            lines.append(f"{key:<70} only in {side}")
+            continue
+        base_median = base_results[key]["median"]
+        head_median = head_results[key]["median"]
+        change = head_median / base_median - 1
+        marker = ""
+        if change > threshold:
+            marker = "  slower"
+            regressions.append(key)
+        elif change < -threshold:
+            marker = "  faster"
+        lines.append(
+            f"{key:<70} {format_duration(base_median):>12} {format_duration(head_median):>12} {change:>+8.1%}{marker}"
+        )
+    return lines, regressions
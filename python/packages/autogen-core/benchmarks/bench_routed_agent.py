@@ -0,0 +1,67 @@
+"""Benchmarks for dispatching a message to the handler of a RoutedAgent."""
+
+from dataclasses import make_dataclass
+from typing import Any, Callable, Coroutine, Dict, List
+
+from autogen_core.application import SingleThreadedAgentRuntime
+from autogen_core.base import AgentId, CancellationToken, MessageContext
+from autogen_core.components import RoutedAgent, message_handler
+
+from ._harness import Suite
+
+HANDLER_COUNTS = (1, 10, 100)
+
+
+def _handler(message_type: type[Any]) -> Callable[[Any, Any, MessageContext], Coroutine[Any, Any, None]]:
+    async def handler(self: Any, message: Any, ctx: MessageContext) -> None:
+        pass
+
+    handler.__annotations__ = {"message": message_type, "ctx": MessageContext, "return": None}
+    return handler
+
+
+def _init(self: RoutedAgent) -> None:
+    RoutedAgent.__init__(self, "An agent with many message handlers.")
+
+
+def make_agent_class(num_handlers: int, *, same_type: bool) -> tuple[type[RoutedAgent], List[Any]]:
+    """Create an agent class with `num_handlers` handlers and return it with one message per handler.
+
+    With `same_type`, all handlers take the same message type and are selected by a match function on the message
+    value, otherwise each handler takes its own message type."""
+    namespace: Dict[str, Any] = {"__init__": _init}
+    messages: List[Any] = []
+    if same_type:
+        message_type = make_dataclass("Routed", [("index", int)])
+        for index in range(num_handlers):
+            namespace[f"on_message_{index}"] = message_handler(
+                match=lambda message, ctx, index=index: message.index == index  # type: ignore[misc]
+            )(_handler(message_type))
+            messages.append(message_type(index=index))
+    else:
+        for index in range(num_handlers):
+            message_type = make_dataclass(f"Message{index}", [("index", int)])
+            namespace[f"on_message_{index}"] = message_handler(_handler(message_type))
+            messages.append(message_type(index=index))
+    return type(f"RoutedAgent{num_handlers}", (RoutedAgent,), namespace), messages
+
+
+async def run(suite: Suite) -> None:
+    for same_type in (False, True):
+        name = "routed_agent.dispatch_by_match" if same_type else "routed_agent.dispatch_by_type"
+        if not suite.enabled(name):
+            continue
+        for num_handlers in HANDLER_COUNTS:
+            agent_class, messages = make_agent_class(num_handlers, same_type=same_type)
+            runtime = SingleThreadedAgentRuntime()
+            await agent_class.register(runtime, "routed", agent_class)
+            agent = await runtime.try_get_underlying_agent_instance(AgentId("routed", "default"), type=agent_class)
+            ctx = MessageContext(sender=None, topic_id=None, is_rpc=False, cancellation_token=CancellationToken())
+            # The last handler is the most expensive one to find when handlers are matched in order.
+            message = messages[-1]
+
+            async def dispatch(iterations: int) -> None:
+                for _ in range(iterations):
+                    await agent.on_message(message, ctx)  # noqa: B023
+
+            await suite.measure(name, dispatch, iterations=50000, params={"handlers": num_handlers})
@@ -0,0 +1,98 @@
+"""Benchmarks for message delivery through the SingleThreadedAgentRuntime."""
+
+from dataclasses import dataclass
+from typing import Any
+
+from autogen_core.application import SingleThreadedAgentRuntime
+from autogen_core.base import AgentId, MessageContext, TopicId
+from autogen_core.base.intervention import DefaultInterventionHandler
+from autogen_core.components import RoutedAgent, TypeSubscription, message_handler
+
+from ._harness import Suite
+
+FAN_OUT_SUBSCRIBERS = (1, 10, 100, 1000)
+INTERVENTION_HANDLERS = (0, 1, 10)
+
+
+@dataclass
+class Ping:
+    content: str
+
+
+class EchoAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Replies with the message it receives.")
+
+    @message_handler
+    async def on_ping(self, message: Ping, ctx: MessageContext) -> Ping:
+        return message
+
+
+class SinkAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Discards every message.")
+
+    @message_handler
+    async def on_ping(self, message: Ping, ctx: MessageContext) -> None:
+        pass
+
+
+class PassThroughHandler(DefaultInterventionHandler):
+    async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any:
+        return message
+
+
+async def bench_send_message(suite: Suite) -> None:
+    for num_handlers in INTERVENTION_HANDLERS:
+        name = "runtime.send_message" if num_handlers == 0 else "runtime.intervention"
+        if not suite.enabled(name):
+            continue
+        runtime = SingleThreadedAgentRuntime(
+            intervention_handlers=[PassThroughHandler() for _ in range(num_handlers)] or None
+        )
+        await EchoAgent.register(runtime, "echo", EchoAgent)
+        runtime.start()
+        recipient = AgentId("echo", "default")
+        message = Ping(content="ping")
+
+        async def send(iterations: int) -> None:
+            for _ in range(iterations):
+                await runtime.send_message(message, recipient)  # noqa: B023
+
+        params = {} if num_handlers == 0 else {"handlers": num_handlers}
+        await suite.measure(name, send, iterations=5000, params=params)
+        await runtime.stop()
+
+
+async def bench_publish_fan_out(suite: Suite) -> None:
+    name = "runtime.publish_fan_out"
+    if not suite.enabled(name):
+        return
+    for num_subscribers in FAN_OUT_SUBSCRIBERS:
+        runtime = SingleThreadedAgentRuntime()
+        for index in range(num_subscribers):
+            await SinkAgent.register(runtime, f"sink{index}", SinkAgent, skip_class_subscriptions=True)
+            await runtime.add_subscription(TypeSubscription("fan_out", f"sink{index}"))
+        topic_id = TopicId("fan_out", "default")
+        message = Ping(content="ping")
+
+        async def setup() -> None:
+            runtime.start()  # noqa: B023
+
+        async def publish(iterations: int) -> None:
+            for _ in range(iterations):
+                await runtime.publish_message(message, topic_id)  # noqa: B023
+            await runtime.stop_when_idle()  # noqa: B023
+
+        await suite.measure(
+            name,
+            publish,
+            iterations=max(5, 20000 // num_subscribers),
+            params={"subscribers": num_subscribers},
+            setup=setup,
+        )
+
+
+async def run(suite: Suite) -> None:
+    await bench_send_message(suite)
+    await bench_publish_fan_out(suite)
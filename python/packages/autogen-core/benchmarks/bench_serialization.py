@@ -0,0 +1,149 @@
+"""Benchmarks for serializing messages with the known serializers of dataclass, Pydantic and protobuf types."""
+
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+
+from autogen_core.application._payload_compression import (
+    available_payload_encodings,
+    compress_payload,
+    decompress_payload,
+)
+from autogen_core.application.protos import agent_worker_pb2
+from autogen_core.base import MessageSerializer, OrjsonCodec, try_get_known_serializers_for_type
+from autogen_core.base._serialization import DataclassJsonMessageSerializer, PydanticJsonMessageSerializer
+from autogen_core.components import FunctionCall
+from autogen_core.components.models import AssistantMessage, LLMMessage, SystemMessage, UserMessage
+from pydantic import BaseModel
+
+from ._harness import Suite
+
+PAYLOAD_SIZES = (64, 4096, 262144)
+CONVERSATION_LENGTHS = (1, 10, 100)
+
+
+@dataclass
+class DataclassMessage:
+    source: str
+    content: str
+    round: int
+
+
+class PydanticMessage(BaseModel):
+    source: str
+    content: str
+    round: int
+
+
+@dataclass
+class Conversation:
+    """A dataclass with nested dataclasses and unions, like the messages agents exchange about a chat."""
+
+    messages: List[LLMMessage]
+    request_halt: bool = False
+
+
+class PydanticConversation(BaseModel):
+    messages: List[LLMMessage]
+    request_halt: bool = False
+
+
+def _conversation(length: int) -> List[LLMMessage]:
+    messages: List[LLMMessage] = [SystemMessage(content="You are a helpful assistant.")]
+    for index in range(length - 1):
+        if index % 2 == 0:
+            messages.append(UserMessage(content=f"Question {index}", source="user"))
+        else:
+            call = FunctionCall(id=str(index), arguments='{"query": "weather"}', name="search")
+            messages.append(AssistantMessage(content=[call], source="assistant"))
+    return messages
+
+
+def _serializers(size: int) -> List[Tuple[str, MessageSerializer[Any], Any]]:
+    """The kind of each serializer, the serializer and a message for it with `size` bytes of content."""
+    content = "x" * size
+    dataclass_message = DataclassMessage(source="user", content=content, round=1)
+    pydantic_message = PydanticMessage(source="user", content=content, round=1)
+    protobuf_message = agent_worker_pb2.Payload(data_type="text", data_content_type="text/plain", data=content.encode())
+    return [
+        ("dataclass", try_get_known_serializers_for_type(DataclassMessage)[0], dataclass_message),
+        (
+            "dataclass_orjson",
+            DataclassJsonMessageSerializer(DataclassMessage, json_codec=OrjsonCodec()),
+            dataclass_message,
+        ),
+        ("pydantic", try_get_known_serializers_for_type(PydanticMessage)[0], pydantic_message),
+        ("protobuf", try_get_known_serializers_for_type(agent_worker_pb2.Payload)[0], protobuf_message),
+    ]
+
+
+async def bench_nested_round_trip(suite: Suite) -> None:
+    name = "serialization.nested_round_trip"
+    if not suite.enabled(name):
+        return
+    for length in CONVERSATION_LENGTHS:
+        messages = _conversation(length)
+        cases: List[Tuple[str, MessageSerializer[Any], Any]] = [
+            ("dataclass", DataclassJsonMessageSerializer(Conversation), Conversation(messages=messages)),
+            (
+                "dataclass_orjson",
+                DataclassJsonMessageSerializer(Conversation, json_codec=OrjsonCodec()),
+                Conversation(messages=messages),
+            ),
+            ("pydantic", PydanticJsonMessageSerializer(PydanticConversation), PydanticConversation(messages=messages)),
+        ]
+        for kind, serializer, message in cases:
+
+            async def round_trip(iterations: int) -> None:
+                for _ in range(iterations):
+                    serializer.deserialize(serializer.serialize(message))  # noqa: B023
+
+            await suite.measure(
+                name, round_trip, iterations=max(20, 20000 // length), params={"kind": kind, "messages": length}
+            )
+
+
+async def bench_payload_compression(suite: Suite) -> None:
+    name = "serialization.payload_compression"
+    if not suite.enabled(name):
+        return
+    for length in CONVERSATION_LENGTHS:
+        data = DataclassJsonMessageSerializer(Conversation).serialize(Conversation(messages=_conversation(length)))
+        for encoding in available_payload_encodings():
+            compressed = compress_payload(data, encoding)
+
+            async def round_trip(iterations: int) -> None:
+                for _ in range(iterations):
+                    decompress_payload(compress_payload(data, encoding), encoding)  # noqa: B023
+
+            await suite.measure(
+                name,
+                round_trip,
+                iterations=max(20, 20000 // length),
+                params={
+                    "encoding": encoding,
+                    "messages": length,
+                    "bytes": len(data),
+                    "compressed_bytes": len(compressed),
+                },
+            )
+
+
+async def run(suite: Suite) -> None:
+    await bench_nested_round_trip(suite)
+    await bench_payload_compression(suite)
+    for size in PAYLOAD_SIZES:
+        for kind, serializer, message in _serializers(size):
+            params = {"kind": kind, "bytes": size}
+            data = serializer.serialize(message)
+
+            async def serialize(iterations: int) -> None:
+                for _ in range(iterations):
+                    serializer.serialize(message)  # noqa: B023
+
+            async def deserialize(iterations: int) -> None:
+                for _ in range(iterations):
+                    serializer.deserialize(data)  # noqa: B023
+
+            iterations = max(100, 2_000_000 // size)
+            await suite.measure("serialization.serialize", serialize, iterations=iterations, params=params)
+            await suite.measure("serialization.deserialize", deserialize, iterations=iterations, params=params)
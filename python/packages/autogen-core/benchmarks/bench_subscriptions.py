@@ -0,0 +1,86 @@
+"""Benchmarks for resolving the recipients of a topic with the SubscriptionManager."""
+
+import itertools
+from typing import List
+
+from autogen_core.application._helpers import SubscriptionManager
+from autogen_core.base import TopicId
+from autogen_core.components import TypePrefixSubscription, TypeSubscription
+
+from ._harness import Suite
+
+TOPIC_COUNTS = (100, 1000, 10000)
+
+
+async def _subscription_manager(topics: List[TopicId]) -> SubscriptionManager:
+    """Create a manager with one type subscription per topic, each of which has been looked up once."""
+    manager = SubscriptionManager()
+    for index, topic in enumerate(topics):
+        await manager.add_subscription(TypeSubscription(topic.type, f"agent{index}"))
+    for topic in topics:
+        await manager.get_subscribed_recipients(topic)
+    return manager
+
+
+async def _prefix_subscription_manager(topics: List[TopicId]) -> SubscriptionManager:
+    """Create a manager with one type prefix subscription per topic, matching that topic and its subtypes."""
+    manager = SubscriptionManager()
+    for index, topic in enumerate(topics):
+        await manager.add_subscription(TypePrefixSubscription(topic.type, f"agent{index}"))
+    return manager
+
+
+async def run(suite: Suite) -> None:
+    for num_topics in TOPIC_COUNTS:
+        topics = [TopicId(f"topic{index}", "default") for index in range(num_topics)]
+
+        if suite.enabled("subscriptions.lookup_seen_topic"):
+            manager = await _subscription_manager(topics)
+
+            async def lookup_seen(iterations: int) -> None:
+                for topic in itertools.islice(itertools.cycle(topics), iterations):  # noqa: B023
+                    await manager.get_subscribed_recipients(topic)  # noqa: B023
+
+            await suite.measure(
+                "subscriptions.lookup_seen_topic", lookup_seen, iterations=20000, params={"topics": num_topics}
+            )
+
+        if suite.enabled("subscriptions.lookup_new_topic"):
+            manager = await _subscription_manager(topics)
+            # Every lookup is for a source that has not been seen, as when each conversation has its own source.
+            sources = itertools.count()
+
+            async def lookup_new(iterations: int) -> None:
+                for topic in itertools.islice(itertools.cycle(topics), iterations):  # noqa: B023
+                    await manager.get_subscribed_recipients(TopicId(topic.type, f"source{next(sources)}"))  # noqa: B023
+
+            await suite.measure(
+                "subscriptions.lookup_new_topic", lookup_new, iterations=500, params={"topics": num_topics}
+            )
+
+        if suite.enabled("subscriptions.lookup_new_topic_by_prefix"):
+            manager = await _prefix_subscription_manager(topics)
+            sources = itertools.count()
+
+            async def lookup_new_by_prefix(iterations: int) -> None:
+                for topic in itertools.islice(itertools.cycle(topics), iterations):  # noqa: B023
+                    topic_id = TopicId(f"{topic.type}.event", f"source{next(sources)}")  # noqa: B023
+                    await manager.get_subscribed_recipients(topic_id)  # noqa: B023
+
+            await suite.measure(
+                "subscriptions.lookup_new_topic_by_prefix",
+                lookup_new_by_prefix,
+                iterations=500,
+                params={"topics": num_topics},
+            )
+
+        if suite.enabled("subscriptions.add_remove"):
+            manager = await _subscription_manager(topics)
+
+            async def churn(iterations: int) -> None:
+                for index in range(iterations):
+                    subscription = TypeSubscription("churn", f"agent{index}")
+                    await manager.add_subscription(subscription)  # noqa: B023
+                    await manager.remove_subscription(subscription.id)  # noqa: B023
+
+            await suite.measure("subscriptions.add_remove", churn, iterations=1000, params={"topics": num_topics})
@@ -0,0 +1,374 @@
+"""Load generator for the gRPC host and worker runtimes.
+
+Starts a WorkerAgentRuntimeHost and a number of WorkerAgentRuntime worker processes on localhost. Every worker hosts
+an echo agent type that replies to requests and sink agent types that subscribe to a shared topic. Driver processes,
+each with their own WorkerAgentRuntime, then send a configurable mix of RPC requests to the echo agents and
+publishes to the shared topic, with a bounded number of operations in flight.
+
+Reports the number of messages delivered per second, the p50 and p99 latency of RPC round trips and of publish
+delivery, and the CPU and memory used by the host process. Run from the autogen-core package directory::
+
+    python -m benchmarks.load_worker_runtime --workers 4 --drivers 2 --operations 20000 --rpc-ratio 0.5
+
+Pass ``--no-batching`` to send every message between the runtimes and the host in its own write, and
+``--direct-rpc`` to have the drivers send their requests to the workers directly once the host has given their
+addresses.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import resource
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from autogen_core.application import MessageBatchingPolicy, WorkerAgentRuntime, WorkerAgentRuntimeHost
+from autogen_core.base import AgentId, MessageContext, TopicId, try_get_known_serializers_for_type
+from autogen_core.components import RoutedAgent, TypeSubscription, message_handler
+
+from ._harness import environment
+
+LOAD_TOPIC_TYPE = "load"
+
+
+@dataclass
+class LoadMessage:
+    sent_at: float
+    payload: str
+
+
+class EchoAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Replies with the message it receives.")
+
+    @message_handler
+    async def on_load(self, message: LoadMessage, ctx: MessageContext) -> LoadMessage:
+        return message
+
+
+class SinkAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Records the delivery latency of published messages.")
+        self.latencies: List[float] = []
+        self.last_delivery = 0.0
+
+    @message_handler
+    async def on_load(self, message: LoadMessage, ctx: MessageContext) -> None:
+        self.last_delivery = time.time()
+        self.latencies.append(self.last_delivery - message.sent_at)
+
+
+@dataclass(frozen=True, kw_only=True)
+class LoadConfig:
+    """Parameters of a load run, shared with the worker and driver processes."""
+
+    address: str
+    workers: int
+    drivers: int
+    sinks_per_worker: int
+    keys: int
+    operations: int
+    concurrency: int
+    rpc_ratio: float
+    payload_bytes: int
+    batching: bool = True
+    batch_linger: float = 0.0
+    direct_rpc: bool = False
+
+    @property
+    def message_batching(self) -> MessageBatchingPolicy | None:
+        return MessageBatchingPolicy(linger=self.batch_linger) if self.batching else None
+
+
+@dataclass
+class DriverResult:
+    rpc_latencies: List[float] = field(default_factory=list)
+    publishes: int = 0
+    errors: int = 0
+
+
+def _process_stats() -> Dict[str, float]:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rss = 0
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        pass
+    return {
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        "rss_bytes": rss,
+        # ru_maxrss is in kilobytes on Linux.
+        "max_rss_bytes": usage.ru_maxrss * 1024,
+    }
+
+
+def _add_serializers(runtime: WorkerAgentRuntime) -> None:
+    runtime.add_message_serializer(try_get_known_serializers_for_type(LoadMessage))
+
+
+async def _receive(connection: Connection) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(None, connection.recv)
+
+
+async def _host_main(config: LoadConfig, connection: Connection) -> None:
+    host = WorkerAgentRuntimeHost(
+        address=config.address, log_message_payloads=False, message_batching=config.message_batching
+    )
+    host.start()
+    connection.send("ready")
+    while (command := await _receive(connection)) != "stop":
+        assert command == "stats"
+        connection.send(_process_stats())
+    await host.stop()
+
+
+async def _worker_main(config: LoadConfig, index: int, connection: Connection) -> None:
+    runtime = WorkerAgentRuntime(
+        host_address=config.address,
+        log_message_payloads=False,
+        message_batching=config.message_batching,
+        peer_address="localhost:0" if config.direct_rpc else None,
+    )
+    _add_serializers(runtime)
+    runtime.start()
+    await EchoAgent.register(runtime, f"echo{index}", EchoAgent)
+    sinks: List[str] = []
+    for sink in range(config.sinks_per_worker):
+        sink_type = f"sink{index}_{sink}"
+        await SinkAgent.register(runtime, sink_type, SinkAgent, skip_class_subscriptions=True)
+        await runtime.add_subscription(TypeSubscription(LOAD_TOPIC_TYPE, sink_type))
+        sinks.append(sink_type)
+    connection.send("ready")
+    while (command := await _receive(connection)) != "stop":
+        assert command == "stats"
+        latencies: List[float] = []
+        last_delivery = 0.0
+        for sink_type in sinks:
+            agent = await runtime.try_get_underlying_agent_instance(AgentId(sink_type, "default"), type=SinkAgent)
+            latencies.extend(agent.latencies)
+            last_delivery = max(last_delivery, agent.last_delivery)
+        connection.send({"latencies": latencies, "last_delivery": last_delivery})
+    await runtime.stop()
+
+
+async def _driver_main(config: LoadConfig, index: int, connection: Connection) -> None:
+    runtime = WorkerAgentRuntime(
+        host_address=config.address, log_message_payloads=False, message_batching=config.message_batching
+    )
+    _add_serializers(runtime)
+    runtime.start()
+    # Make sure the connection to the host is established before the clock starts.
+    await runtime.add_subscription(TypeSubscription(f"driver{index}", f"driver{index}"))
+    connection.send("ready")
+    await _receive(connection)
+
+    operations = config.operations // config.drivers + (1 if index < config.operations % config.drivers else 0)
+    rng = random.Random(index)
+    payload = "x" * config.payload_bytes
+    topic_id = TopicId(LOAD_TOPIC_TYPE, "default")
+    result = DriverResult()
+    semaphore = asyncio.Semaphore(config.concurrency)
+
+    async def operation() -> None:
+        try:
+            message = LoadMessage(sent_at=time.time(), payload=payload)
+            if rng.random() < config.rpc_ratio:
+                recipient = AgentId(f"echo{rng.randrange(config.workers)}", str(rng.randrange(config.keys)))
+                start = time.perf_counter()
+                await runtime.send_message(message, recipient)
+                result.rpc_latencies.append(time.perf_counter() - start)
+            else:
+                await runtime.publish_message(message, topic_id)
+                result.publishes += 1
+        except Exception:
+            result.errors += 1
+        finally:
+            semaphore.release()
+
+    tasks: List[asyncio.Task[None]] = []
+    for _ in range(operations):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(operation()))
+    await asyncio.gather(*tasks)
+    connection.send({"result": result.__dict__, "finished_at": time.time()})
+    await _receive(connection)
+    await runtime.stop()
+
+
+def _run_host(config: LoadConfig, connection: Connection) -> None:
+    asyncio.run(_host_main(config, connection))
+
+
+def _run_worker(config: LoadConfig, index: int, connection: Connection) -> None:
+    asyncio.run(_worker_main(config, index, connection))
+
+
+def _run_driver(config: LoadConfig, index: int, connection: Connection) -> None:
+    asyncio.run(_driver_main(config, index, connection))
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Any]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_seconds": _percentile(values, 0.5),
+        "p99_seconds": _percentile(values, 0.99),
+        "max_seconds": values[-1] if values else None,
+    }
+
+
+def run_load(config: LoadConfig, *, delivery_timeout: float = 60.0) -> Dict[str, Any]:
+    """Run the load and return the measured throughput, latencies and host resource usage."""
+    context = multiprocessing.get_context("spawn")
+    processes: List[Any] = []
+
+    def start(target: Any, *args: Any) -> Connection:
+        parent, child = context.Pipe()
+        process = context.Process(target=target, args=(config, *args, child), daemon=True)
+        process.start()
+        processes.append(process)
+        assert parent.recv() == "ready"
+        return parent
+
+    try:
+        host = start(_run_host)
+        workers = [start(_run_worker, index) for index in range(config.workers)]
+        drivers = [start(_run_driver, index) for index in range(config.drivers)]
+
+        host.send("stats")
+        host_before = host.recv()
+        started_at = time.time()
+        for driver in drivers:
+            driver.send("go")
+        driver_results = [driver.recv() for driver in drivers]
+        finished_at = max(result["finished_at"] for result in driver_results)
+
+        # Wait for every published message to reach every sink.
+        publishes = sum(result["result"]["publishes"] for result in driver_results)
+        expected_deliveries = publishes * config.workers * config.sinks_per_worker
+        give_up_at = time.monotonic() + delivery_timeout
+        while True:
+            sink_stats: List[Dict[str, Any]] = []
+            for worker in workers:
+                worker.send("stats")
+                sink_stats.append(worker.recv())
+            deliveries = sum(len(stats["latencies"]) for stats in sink_stats)
+            if deliveries >= expected_deliveries or time.monotonic() > give_up_at:
+                break
+            time.sleep(0.05)
+        host.send("stats")
+        host_after = host.recv()
+
+        for connection in (*drivers, *workers, host):
+            connection.send("stop")
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    last_delivery = max((stats["last_delivery"] for stats in sink_stats), default=0.0)
+    elapsed = max(finished_at, last_delivery) - started_at
+    rpc_latencies = [latency for result in driver_results for latency in result["result"]["rpc_latencies"]]
+    errors = sum(result["result"]["errors"] for result in driver_results)
+    # A request and its response are two messages through the host.
+    messages = 2 * len(rpc_latencies) + publishes + deliveries
+    return {
+        "config": config.__dict__,
+        "elapsed_seconds": elapsed,
+        "operations_per_sec": (len(rpc_latencies) + publishes) / elapsed,
+        "messages_per_sec": messages / elapsed,
+        "rpc": _latency_summary(rpc_latencies),
+        "publish_delivery": {
+            **_latency_summary([latency for stats in sink_stats for latency in stats["latencies"]]),
+            "expected": expected_deliveries,
+        },
+        "errors": errors,
+        "host": {
+            "cpu_percent": 100 * (host_after["cpu_seconds"] - host_before["cpu_seconds"]) / elapsed,
+            "rss_bytes": host_after["rss_bytes"],
+            "max_rss_bytes": host_after["max_rss_bytes"],
+        },
+    }
+
+
+def _format_latency(seconds: float | None) -> str:
+    return "n/a" if seconds is None else f"{seconds * 1000:.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate load on a gRPC host and its workers on localhost.")
+    parser.add_argument("--port", type=int, default=50300, help="Port of the host.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes hosting agents.")
+    parser.add_argument("--drivers", type=int, default=1, help="Number of processes generating load.")
+    parser.add_argument("--sinks-per-worker", type=int, default=1, help="Subscriber agent types on each worker.")
+    parser.add_argument("--keys", type=int, default=16, help="Number of distinct keys of each echo agent type.")
+    parser.add_argument("--operations", type=int, default=10000, help="Total number of sends and publishes.")
+    parser.add_argument("--concurrency", type=int, default=64, help="Operations in flight per driver.")
+    parser.add_argument("--rpc-ratio", type=float, default=0.5, help="Fraction of operations that are RPCs.")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="Size of the payload of each message.")
+    parser.add_argument(
+        "--no-batching", action="store_true", help="Send every message to and from the host in its own write."
+    )
+    parser.add_argument(
+        "--batch-linger-ms", type=float, default=0.0, help="Time to wait for more messages to fill a batch."
+    )
+    parser.add_argument(
+        "--direct-rpc", action="store_true", help="Send requests to the workers directly rather than through the host."
+    )
+    parser.add_argument("--output", type=Path, help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        address=f"localhost:{args.port}",
+        workers=args.workers,
+        drivers=args.drivers,
+        sinks_per_worker=args.sinks_per_worker,
+        keys=args.keys,
+        operations=args.operations,
+        concurrency=args.concurrency,
+        rpc_ratio=args.rpc_ratio,
+        payload_bytes=args.payload_bytes,
+        batching=not args.no_batching,
+        batch_linger=args.batch_linger_ms / 1000,
+        direct_rpc=args.direct_rpc,
+    )
+    results = run_load(config)
+
+    print(f"elapsed:           {results['elapsed_seconds']:.2f} s")
+    print(f"operations/sec:    {results['operations_per_sec']:,.0f}")
+    print(f"messages/sec:      {results['messages_per_sec']:,.0f}")
+    print(
+        f"rpc p50/p99:       {_format_latency(results['rpc']['p50_seconds'])} / "
+        f"{_format_latency(results['rpc']['p99_seconds'])}"
+    )
+    delivery = results["publish_delivery"]
+    print(
+        f"publish p50/p99:   {_format_latency(delivery['p50_seconds'])} / {_format_latency(delivery['p99_seconds'])}"
+        f" ({delivery['count']} of {delivery['expected']} delivered)"
+    )
+    print(f"errors:            {results['errors']}")
+    print(f"host cpu:          {results['host']['cpu_percent']:.0f}% of one core")
+    print(
+        f"host rss:          {results['host']['rss_bytes'] / 2**20:.1f} MiB "
+        f"(peak {results['host']['max_rss_bytes'] / 2**20:.1f} MiB)"
+    )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({"environment": environment(), **results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
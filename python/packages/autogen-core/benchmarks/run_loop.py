@@ -0,0 +1,67 @@
+"""Benchmark for the SingleThreadedAgentRuntime run loop.
+
+Measures the CPU used by an idle runtime and the publish throughput of a runtime
+delivering to a single no-op subscriber."""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+
+from autogen_core.application import SingleThreadedAgentRuntime
+from autogen_core.base import MessageContext
+from autogen_core.components import DefaultTopicId, RoutedAgent, default_subscription, message_handler
+
+
+@dataclass
+class Ping: ...
+
+
+@default_subscription
+class SinkAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("An agent that discards every message.")
+
+    @message_handler
+    async def on_ping(self, message: Ping, ctx: MessageContext) -> None:
+        pass
+
+
+async def idle_cpu(seconds: float) -> float:
+    """Return the fraction of one core used by a started runtime with nothing to do."""
+    runtime = SingleThreadedAgentRuntime()
+    await SinkAgent.register(runtime, "sink", SinkAgent)
+    runtime.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    await runtime.stop()
+    return cpu / wall
+
+
+async def publish_throughput(num_messages: int) -> float:
+    """Return the number of published messages delivered per second."""
+    runtime = SingleThreadedAgentRuntime()
+    await SinkAgent.register(runtime, "sink", SinkAgent)
+    runtime.start()
+    start = time.perf_counter()
+    for _ in range(num_messages):
+        await runtime.publish_message(Ping(), topic_id=DefaultTopicId())
+    await runtime.stop_when_idle()
+    return num_messages / (time.perf_counter() - start)
+
+
+async def main(idle_seconds: float, num_messages: int) -> None:
+    idle_cpu_fraction = await idle_cpu(idle_seconds)
+    print(f"idle cpu: {idle_cpu_fraction * 100:.1f}% of one core")
+    print(f"publish throughput: {await publish_throughput(num_messages):,.0f} msgs/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SingleThreadedAgentRuntime run loop.")
+    parser.add_argument("--idle-seconds", type=float, default=2.0, help="How long to measure the idle runtime.")
+    parser.add_argument("--messages", type=int, default=20000, help="Number of messages to publish.")
+    args = parser.parse_args()
+    asyncio.run(main(args.idle_seconds, args.messages))
@@ -2,8 +2,34 @@
 The :mod:`autogen_core.application` module provides implementations of core components that are used to compose an application
 """
 
+from ._agent_instance_cache import AgentEvictionPolicy
+from ._agent_scheduler import AgentSchedulingPolicy
+from ._agent_state_store import AgentStateStore, InMemoryAgentStateStore
+from ._blob_store import BlobStore, BlobTransportPolicy, FileSystemBlobStore, InMemoryBlobStore
+from ._message_batching import MessageBatchingPolicy
+from ._message_store import MessageStore, SqliteMessageStore, StoredEnvelope
+from ._payload_compression import PayloadCompressionPolicy
+from ._sharded_agent_runtime import ShardedAgentRuntime
 from ._single_threaded_agent_runtime import SingleThreadedAgentRuntime
 from ._worker_runtime import WorkerAgentRuntime
 from ._worker_runtime_host import WorkerAgentRuntimeHost
 
-__all__ = ["SingleThreadedAgentRuntime", "WorkerAgentRuntime", "WorkerAgentRuntimeHost"]
+__all__ = [
+    "AgentEvictionPolicy",
+    "AgentSchedulingPolicy",
+    "AgentStateStore",
+    "BlobStore",
+    "BlobTransportPolicy",
+    "FileSystemBlobStore",
+    "InMemoryAgentStateStore",
+    "InMemoryBlobStore",
+    "MessageBatchingPolicy",
+    "MessageStore",
+    "PayloadCompressionPolicy",
+    "ShardedAgentRuntime",
+    "SingleThreadedAgentRuntime",
+    "SqliteMessageStore",
+    "StoredEnvelope",
+    "WorkerAgentRuntime",
+    "WorkerAgentRuntimeHost",
+]
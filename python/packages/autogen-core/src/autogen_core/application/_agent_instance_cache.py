@@ -0,0 +1,238 @@
+import asyncio
+import contextlib
+import logging
+import time
+from asyncio import Future
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, DefaultDict, Dict, Iterable, Iterator, List, Set
+
+from ..base import Agent, AgentId, BaseAgent
+from ._agent_state_store import AgentStateStore, InMemoryAgentStateStore
+
+logger = logging.getLogger("autogen_core")
+
+
+@dataclass(frozen=True, kw_only=True)
+class AgentEvictionPolicy:
+    """Limits on the agent instances a runtime keeps in memory.
+
+    When an agent instance is evicted its state is saved to the runtime's :class:`AgentStateStore` and
+    it is loaded back into a new instance the next time the agent receives a message. Agents that are
+    handling a message are never evicted. The default state store keeps the state of evicted agents in memory, so
+    the memory used by agents is only bounded with a store that writes it elsewhere, such as a
+    :class:`SqliteMessageStore`.
+
+    Args:
+        max_instances_per_type (int, optional): Maximum number of instances kept for each agent type. When the
+            limit is exceeded the least recently used instances are evicted. Defaults to no limit.
+        idle_ttl (float, optional): Number of seconds an instance may go without handling a message before
+            it is evicted. Expired instances are evicted the next time the runtime looks up an agent.
+            Defaults to no limit.
+    """
+
+    max_instances_per_type: int | None = None
+    idle_ttl: float | None = None
+
+
+class AgentInstanceCache:
+    """The instantiated agents of a runtime, in least recently used order per agent type."""
+
+    def __init__(self, policy: AgentEvictionPolicy | None = None, state_store: AgentStateStore | None = None) -> None:
+        self._policy = policy or AgentEvictionPolicy()
+        # A store created by the cache only holds the state of evicted agents, which is removed once it is loaded.
+        self._own_state_store: InMemoryAgentStateStore | None = None
+        if state_store is None:
+            state_store = self._own_state_store = InMemoryAgentStateStore()
+        self._state_store = state_store
+        # agent type -> agent id -> agent, least recently used first.
+        self._agents: DefaultDict[str, OrderedDict[AgentId, Agent]] = defaultdict(OrderedDict)
+        self._last_used: Dict[AgentId, float] = {}
+        self._in_use: DefaultDict[AgentId, int] = defaultdict(int)
+        # Agents being created, so that concurrent lookups of the same agent share one instance.
+        self._creating: Dict[AgentId, Future[Agent]] = {}
+        # Agents that have handled a message since their state was last saved.
+        self._dirty: Set[AgentId] = set()
+
+    @property
+    def state_store(self) -> AgentStateStore:
+        return self._state_store
+
+    def __contains__(self, agent_id: AgentId) -> bool:
+        return agent_id in self._agents.get(agent_id.type, ())
+
+    def __iter__(self) -> Iterator[AgentId]:
+        for agents in list(self._agents.values()):
+            yield from list(agents.keys())
+
+    def __len__(self) -> int:
+        return sum(len(agents) for agents in self._agents.values())
+
+    def get(self, agent_id: AgentId) -> Agent | None:
+        """Get an instantiated agent and mark it as most recently used."""
+        agents = self._agents.get(agent_id.type)
+        if agents is None or agent_id not in agents:
+            return None
+        self._touch(agent_id)
+        return agents[agent_id]
+
+    async def get_or_create(self, agent_id: AgentId, create: Callable[[AgentId], Awaitable[Agent]]) -> Agent:
+        """Get an instantiated agent, creating and adding it if it is not instantiated.
+
+        Concurrent calls for the same agent wait for a single call to `create`."""
+        await self.evict_expired()
+        agent = self.get(agent_id)
+        if agent is not None:
+            return agent
+        creating = self._creating.get(agent_id)
+        if creating is not None:
+            # Shielded so that a cancelled lookup does not cancel the creation other lookups are waiting for.
+            return await asyncio.shield(creating)
+        creating = asyncio.get_running_loop().create_future()
+        self._creating[agent_id] = creating
+        try:
+            agent = await create(agent_id)
+            await self.add(agent)
+        except BaseException as e:
+            creating.set_exception(e)
+            # Only the concurrent lookups, if any, need to see the exception.
+            creating.exception()
+            raise
+        else:
+            creating.set_result(agent)
+            return agent
+        finally:
+            del self._creating[agent_id]
+
+    async def warm_up(self, agent_ids: Iterable[AgentId], create: Callable[[AgentId], Awaitable[Agent]]) -> None:
+        """Create the given agents concurrently. Agents that fail to be created are logged and skipped."""
+        agent_ids = list(agent_ids)
+        results = await asyncio.gather(
+            *(self.get_or_create(agent_id, create) for agent_id in agent_ids), return_exceptions=True
+        )
+        for agent_id, result in zip(agent_ids, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error("Failed to warm up agent %s", agent_id, exc_info=result)
+
+    async def add(self, agent: Agent) -> None:
+        """Add a newly instantiated agent, restoring any state saved for it when it was last evicted and then
+        starting it."""
+        state = await self._state_store.load(agent.id)
+        if state is not None:
+            await agent.load_state(state)
+            if self._own_state_store is not None:
+                await self._own_state_store.delete(agent.id)
+        if isinstance(agent, BaseAgent):
+            await agent.on_start()
+        self._agents[agent.id.type][agent.id] = agent
+        self._last_used[agent.id] = time.monotonic()
+        await self._evict_over_capacity(agent.id.type, keep=agent.id)
+
+    @contextlib.contextmanager
+    def in_use(self, agent_id: AgentId) -> Iterator[None]:
+        """Prevent an agent from being evicted while the block runs and mark its state as changed."""
+        self._in_use[agent_id] += 1
+        try:
+            yield
+        finally:
+            self._in_use[agent_id] -= 1
+            if self._in_use[agent_id] == 0:
+                del self._in_use[agent_id]
+            if agent_id in self:
+                self._touch(agent_id)
+                self._dirty.add(agent_id)
+
+    def mark_dirty(self, agent_id: AgentId) -> None:
+        """Mark the state of an instantiated agent as changed since it was last saved."""
+        if agent_id in self:
+            self._dirty.add(agent_id)
+
+    async def checkpoint(self, agent_ids: Iterable[AgentId] | None = None) -> int:
+        """Save the state of the agents marked as changed to the state store.
+
+        Args:
+            agent_ids (Iterable[AgentId], optional): Only save the state of these agents, if they are marked as
+                changed. Defaults to every agent.
+
+        Returns:
+            int: The number of agents whose state was saved.
+        """
+        if agent_ids is None:
+            dirty = self._dirty
+            self._dirty = set()
+        else:
+            dirty = self._dirty.intersection(agent_ids)
+            self._dirty -= dirty
+        saved = 0
+        for agent_id in dirty:
+            agent = self._agents[agent_id.type].get(agent_id)
+            if agent is None:
+                # Evicted, which saved its state.
+                continue
+            if type(agent).save_state is BaseAgent.save_state:
+                # Agents that do not implement save_state have no state to save.
+                continue
+            try:
+                state = await agent.save_state()
+                await self._state_store.save(agent_id, state)
+            except BaseException:
+                # Retry on the next checkpoint.
+                self._dirty.add(agent_id)
+                raise
+            saved += 1
+        return saved
+
+    async def evict_expired(self) -> None:
+        """Evict the agents that have been idle for longer than the policy's TTL."""
+        if self._policy.idle_ttl is None:
+            return
+        deadline = time.monotonic() - self._policy.idle_ttl
+        for agents in list(self._agents.values()):
+            expired: List[AgentId] = []
+            # Instances are kept in least recently used order so only the front needs to be checked.
+            for agent_id in agents:
+                if self._last_used[agent_id] > deadline:
+                    break
+                expired.append(agent_id)
+            for agent_id in expired:
+                await self._evict(agent_id)
+
+    def _touch(self, agent_id: AgentId) -> None:
+        self._agents[agent_id.type].move_to_end(agent_id)
+        self._last_used[agent_id] = time.monotonic()
+
+    async def _evict_over_capacity(self, agent_type: str, keep: AgentId) -> None:
+        max_instances = self._policy.max_instances_per_type
+        if max_instances is None:
+            return
+        agents = self._agents[agent_type]
+        candidates = [agent_id for agent_id in agents if agent_id != keep and agent_id not in self._in_use]
+        for agent_id in candidates[: max(0, len(agents) - max_instances)]:
+            await self._evict(agent_id)
+
+    async def _evict(self, agent_id: AgentId) -> None:
+        agents = self._agents.get(agent_id.type)
+        if agents is None or agent_id not in agents or agent_id in self._in_use:
+            return
+        agent = agents[agent_id]
+        last_used = self._last_used[agent_id]
+        self._dirty.discard(agent_id)
+        # Agents that do not implement save_state have no state to save.
+        if type(agent).save_state is not BaseAgent.save_state:
+            try:
+                state = await agent.save_state()
+                await self._state_store.save(agent_id, state)
+            except Exception:
+                # The agent is kept, as the most recently used, so that it is evicted again later instead of on the
+                # next lookup of another agent.
+                logger.error(f"Failed to save the state of agent {agent_id}, it is not evicted", exc_info=True)
+                self._dirty.add(agent_id)
+                if agents.get(agent_id) is agent:
+                    self._touch(agent_id)
+                return
+        # The agent may have been used while its state was being saved, in which case it is kept.
+        if agent_id in self._in_use or self._last_used.get(agent_id) != last_used or agents.get(agent_id) is not agent:
+            return
+        del agents[agent_id]
+        del self._last_used[agent_id]
+        logger.info("Evicted agent %s", agent_id)
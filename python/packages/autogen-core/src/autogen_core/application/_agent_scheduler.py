@@ -0,0 +1,236 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+from asyncio import Future
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Mapping, Tuple, TypeVar
+
+from ..base import AgentId, CancellationToken
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, kw_only=True)
+class AgentSchedulingPolicy:
+    """How a runtime schedules message handler invocations across agents.
+
+    Every agent has its own mailbox. A message handler runs once its agent has fewer than its concurrency limit of
+    handlers running, and, when `max_concurrent_handlers` is set, once a slot is free. Free slots go to the
+    mailboxes in weighted fair queuing order, so an agent that receives many messages cannot starve the others.
+    Messages whose cancellation token is cancelled while waiting are removed from their mailbox immediately.
+
+    A handler gives up its slot while it waits for the response to a message it sent, and waits for a slot again
+    before it continues. Chains of requests deeper than the limits, and requests back to an agent that is limited
+    to one handler, therefore run instead of waiting for each other forever. The limits bound the handlers that are
+    running, not those waiting for responses.
+
+    Args:
+        max_concurrency_per_agent (int, optional): Maximum number of message handlers that run at the same time on
+            each agent. Defaults to no limit.
+        agent_type_max_concurrency (Mapping[str, int], optional): Per agent type overrides of
+            `max_concurrency_per_agent`.
+        agent_type_weights (Mapping[str, float], optional): Share of the handler slots given to each agent of an
+            agent type relative to other agents. Agents of types not listed have a weight of 1.
+        max_concurrent_handlers (int, optional): Maximum number of message handlers that run at the same time
+            across all agents. Defaults to no limit.
+    """
+
+    max_concurrency_per_agent: int | None = None
+    agent_type_max_concurrency: Mapping[str, int] = field(default_factory=dict)
+    agent_type_weights: Mapping[str, float] = field(default_factory=dict)
+    max_concurrent_handlers: int | None = None
+
+
+@dataclass(eq=False)
+class _Mailbox:
+    max_concurrency: int | None
+    weight: float
+    waiters: Deque[Tuple[float, Future[None]]] = field(default_factory=deque)
+    running: int = 0
+    last_finish_tag: float = 0.0
+    ready: bool = False
+
+    def can_run(self) -> bool:
+        return self.max_concurrency is None or self.running < self.max_concurrency
+
+
+@dataclass(eq=False)
+class _RunningHandler:
+    scheduler: "AgentScheduler"
+    agent_id: AgentId
+    mailbox: _Mailbox
+    cancellation_token: CancellationToken
+    # Whether the handler holds its slot, which it gives up while waiting for nested requests.
+    holding: bool = True
+    nested_requests: int = 0
+
+
+# The message handler running in the current context, if it was run by a scheduler.
+_running_handler: ContextVar[_RunningHandler | None] = ContextVar("_running_handler", default=None)
+
+
+class AgentScheduler:
+    """Runs message handlers through per-agent mailboxes according to an :class:`AgentSchedulingPolicy`."""
+
+    def __init__(self, policy: AgentSchedulingPolicy | None = None) -> None:
+        self._policy = policy or AgentSchedulingPolicy()
+        self._mailboxes: Dict[AgentId, _Mailbox] = {}
+        # Mailboxes with a waiting handler that may run, ordered by the finish tag of their first waiter.
+        self._ready: List[Tuple[float, int, AgentId]] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._running = 0
+
+    @property
+    def running(self) -> int:
+        """Number of message handlers currently running."""
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        """Number of message handlers waiting in a mailbox."""
+        return sum(len(mailbox.waiters) for mailbox in self._mailboxes.values())
+
+    async def run(
+        self, agent_id: AgentId, handler: Callable[[], Awaitable[T]], cancellation_token: CancellationToken
+    ) -> T:
+        """Run a message handler of an agent once the agent's mailbox is scheduled.
+
+        Raises:
+            asyncio.CancelledError: If the cancellation token is cancelled before the handler starts.
+        """
+        running = _RunningHandler(self, agent_id, await self._acquire(agent_id, cancellation_token), cancellation_token)
+        reset_token = _running_handler.set(running)
+        try:
+            return await handler()
+        finally:
+            _running_handler.reset(reset_token)
+            if running.holding:
+                running.holding = False
+                self._finish(agent_id, running.mailbox)
+
+    @contextlib.asynccontextmanager
+    async def nested_request(self) -> AsyncIterator[None]:
+        """Give up the slot of the message handler running in the current context while it waits for a request.
+
+        The handler waits for a slot again on exit. Does nothing outside of the message handlers run by this
+        scheduler.
+
+        Raises:
+            asyncio.CancelledError: If the handler's cancellation token is cancelled while it waits for a slot again.
+        """
+        running = _running_handler.get()
+        if running is None or running.scheduler is not self:
+            yield
+            return
+        if running.nested_requests == 0 and running.holding:
+            running.holding = False
+            self._finish(running.agent_id, running.mailbox)
+        running.nested_requests += 1
+        try:
+            yield
+        finally:
+            running.nested_requests -= 1
+            if running.nested_requests == 0 and not running.holding:
+                running.mailbox = await self._acquire(running.agent_id, running.cancellation_token)
+                running.holding = True
+
+    async def _acquire(self, agent_id: AgentId, cancellation_token: CancellationToken) -> _Mailbox:
+        mailbox = self._mailbox(agent_id)
+        if not mailbox.waiters and mailbox.can_run() and self._has_free_slot():
+            self._start(mailbox)
+        else:
+            await self._wait(agent_id, mailbox, cancellation_token)
+        return mailbox
+
+    def _mailbox(self, agent_id: AgentId) -> _Mailbox:
+        mailbox = self._mailboxes.get(agent_id)
+        if mailbox is None:
+            max_concurrency = self._policy.agent_type_max_concurrency.get(
+                agent_id.type, self._policy.max_concurrency_per_agent
+            )
+            weight = self._policy.agent_type_weights.get(agent_id.type, 1.0)
+            mailbox = _Mailbox(max_concurrency=max_concurrency, weight=weight)
+            self._mailboxes[agent_id] = mailbox
+        return mailbox
+
+    def _has_free_slot(self) -> bool:
+        max_concurrent = self._policy.max_concurrent_handlers
+        return max_concurrent is None or self._running < max_concurrent
+
+    def _start(self, mailbox: _Mailbox) -> None:
+        mailbox.running += 1
+        self._running += 1
+
+    async def _wait(self, agent_id: AgentId, mailbox: _Mailbox, cancellation_token: CancellationToken) -> None:
+        waiter: Future[None] = asyncio.get_running_loop().create_future()
+        # Weighted fair queuing: each waiter is tagged with the virtual time at which it would finish if every
+        # backlogged mailbox were served at a rate proportional to its weight.
+        finish_tag = max(self._virtual_time, mailbox.last_finish_tag) + 1.0 / mailbox.weight
+        mailbox.last_finish_tag = finish_tag
+        mailbox.waiters.append((finish_tag, waiter))
+
+        def cancel() -> None:
+            waiter.cancel()
+
+        cancellation_token.add_callback(cancel)
+        self._mark_ready(agent_id, mailbox)
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed to this handler but it will not run, so give it to the next waiter.
+                self._finish(agent_id, mailbox)
+            else:
+                self._remove_waiter(agent_id, mailbox, waiter)
+            raise
+        finally:
+            cancellation_token.remove_callback(cancel)
+
+    def _remove_waiter(self, agent_id: AgentId, mailbox: _Mailbox, waiter: Future[None]) -> None:
+        for index, (_, queued) in enumerate(mailbox.waiters):
+            if queued is waiter:
+                del mailbox.waiters[index]
+                break
+        self._discard_if_idle(agent_id, mailbox)
+
+    def _mark_ready(self, agent_id: AgentId, mailbox: _Mailbox) -> None:
+        if not mailbox.ready and mailbox.waiters and mailbox.can_run():
+            mailbox.ready = True
+            heapq.heappush(self._ready, (mailbox.waiters[0][0], next(self._sequence), agent_id))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._ready and self._has_free_slot():
+            _, _, agent_id = heapq.heappop(self._ready)
+            mailbox = self._mailboxes[agent_id]
+            mailbox.ready = False
+            # Skip the waiters that were cancelled while queued.
+            while mailbox.waiters and mailbox.waiters[0][1].done():
+                mailbox.waiters.popleft()
+            if not mailbox.waiters or not mailbox.can_run():
+                self._discard_if_idle(agent_id, mailbox)
+                continue
+            finish_tag, waiter = mailbox.waiters.popleft()
+            self._virtual_time = max(self._virtual_time, finish_tag - 1.0 / mailbox.weight)
+            self._start(mailbox)
+            waiter.set_result(None)
+            if mailbox.waiters and mailbox.can_run():
+                mailbox.ready = True
+                heapq.heappush(self._ready, (mailbox.waiters[0][0], next(self._sequence), agent_id))
+
+    def _finish(self, agent_id: AgentId, mailbox: _Mailbox) -> None:
+        mailbox.running -= 1
+        self._running -= 1
+        if mailbox.waiters:
+            self._mark_ready(agent_id, mailbox)
+        else:
+            self._discard_if_idle(agent_id, mailbox)
+            self._dispatch()
+
+    def _discard_if_idle(self, agent_id: AgentId, mailbox: _Mailbox) -> None:
+        if mailbox.running == 0 and not mailbox.waiters and not mailbox.ready:
+            self._mailboxes.pop(agent_id, None)
@@ -0,0 +1,67 @@
+import copy
+from typing import Any, Dict, List, Mapping, Protocol
+
+from ..base import AgentId
+
+__all__ = [
+    "AgentStateStore",
+    "InMemoryAgentStateStore",
+]
+
+
+class AgentStateStore(Protocol):
+    """A store for the saved state of agents, keyed by agent id.
+
+    Runtimes write the state of an agent to the store when the agent instance is evicted and read it back
+    when the agent is instantiated again."""
+
+    async def save(self, agent_id: AgentId, state: Mapping[str, Any]) -> None:
+        """Save the state of an agent, replacing any previously saved state.
+
+        Args:
+            agent_id (AgentId): ID of the agent.
+            state (Mapping[str, Any]): State returned by the agent's `save_state`.
+        """
+        ...
+
+    async def load(self, agent_id: AgentId) -> Mapping[str, Any] | None:
+        """Load the saved state of an agent.
+
+        Args:
+            agent_id (AgentId): ID of the agent.
+
+        Returns:
+            Mapping[str, Any] | None: The saved state, or None if no state was saved for the agent.
+        """
+        ...
+
+    async def agent_ids(self) -> List[AgentId]:
+        """Get the IDs of all agents that have saved state."""
+        ...
+
+
+class InMemoryAgentStateStore(AgentStateStore):
+    """An :class:`AgentStateStore` that keeps saved state in a dictionary in the current process.
+
+    The state is deep copied when it is saved and loaded, so that the saved state is not changed by the agent
+    afterwards. Immutable values such as ``bytes``, for example the segments of a
+    :class:`~autogen_core.components.model_context.MessageLog`, are shared rather than copied. The saved state is
+    kept in memory, so a store that writes it elsewhere, such as a :class:`SqliteMessageStore`, is needed to bound
+    the memory used by evicted agents."""
+
+    def __init__(self) -> None:
+        self._states: Dict[AgentId, Mapping[str, Any]] = {}
+
+    async def save(self, agent_id: AgentId, state: Mapping[str, Any]) -> None:
+        self._states[agent_id] = copy.deepcopy(state)
+
+    async def load(self, agent_id: AgentId) -> Mapping[str, Any] | None:
+        state = self._states.get(agent_id)
+        return copy.deepcopy(state) if state is not None else None
+
+    async def delete(self, agent_id: AgentId) -> None:
+        """Remove the saved state of an agent, if any."""
+        self._states.pop(agent_id, None)
+
+    async def agent_ids(self) -> List[AgentId]:
+        return list(self._states.keys())
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+__all__ = [
+    "BlobStore",
+    "BlobTransportPolicy",
+    "FileSystemBlobStore",
+    "InMemoryBlobStore",
+]
+
+
+class BlobStore(Protocol):
+    """A content-addressed store for large binary values, such as images, that messages reference by ID.
+
+    The ID of a blob is the hex encoded SHA-256 digest of its data."""
+
+    async def put(self, blob_id: str, data: bytes) -> None:
+        """Store a blob. Storing a blob that is already stored does nothing.
+
+        Args:
+            blob_id (str): ID of the blob.
+            data (bytes): Data of the blob.
+        """
+        ...
+
+    async def get(self, blob_id: str) -> bytes | None:
+        """Get the data of a blob, or None if it is not stored."""
+        ...
+
+
+class InMemoryBlobStore(BlobStore):
+    """A :class:`BlobStore` that keeps blobs in memory in the current process.
+
+    Args:
+        max_bytes (int, optional): Maximum total size of the stored blobs. The least recently used blobs are
+            removed first when it is exceeded. Defaults to no limit.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self._max_bytes = max_bytes
+        self._blobs: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the stored blobs."""
+        return self._size
+
+    async def put(self, blob_id: str, data: bytes) -> None:
+        if blob_id in self._blobs:
+            self._blobs.move_to_end(blob_id)
+            return
+        self._blobs[blob_id] = data
+        self._size += len(data)
+        if self._max_bytes is not None:
+            # The blob just stored is kept even if it is larger than the limit on its own.
+            while self._size > self._max_bytes and len(self._blobs) > 1:
+                _, evicted = self._blobs.popitem(last=False)
+                self._size -= len(evicted)
+
+    async def get(self, blob_id: str) -> bytes | None:
+        data = self._blobs.get(blob_id)
+        if data is not None:
+            self._blobs.move_to_end(blob_id)
+        return data
+
+
+class FileSystemBlobStore(BlobStore):
+    """A :class:`BlobStore` that keeps each blob in a file named by its ID.
+
+    Worker runtimes on the same machine that share a directory read the blobs written by each other without
+    fetching them from the host. A directory on a memory-backed file system, such as ``/dev/shm`` on Linux, keeps
+    the blobs in shared memory. Blobs are never removed from the directory by the store.
+
+    Args:
+        directory (str | Path): Directory of the blob files. It is created if it does not exist.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, blob_id: str) -> Path:
+        if not blob_id.isalnum():
+            raise ValueError(f"Invalid blob ID {blob_id!r}")
+        return self._directory / blob_id
+
+    async def put(self, blob_id: str, data: bytes) -> None:
+        path = self._path(blob_id)
+        if path.exists():
+            return
+        await asyncio.to_thread(self._write, path, data)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        # Write to a temporary file first, so that readers never see a partly written blob.
+        fd, temporary = tempfile.mkstemp(dir=self._directory, prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    async def get(self, blob_id: str) -> bytes | None:
+        path = self._path(blob_id)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+
+@dataclass(frozen=True, kw_only=True)
+class BlobTransportPolicy:
+    """How a :class:`WorkerAgentRuntime` sends large binary values, such as images, out of band.
+
+    Values at least `threshold` bytes long are replaced in the serialized message by a reference to a blob. The
+    blob is uploaded to the host before the first message that references it is sent. For later messages, the
+    runtime asks the host which of the blobs it has sent or received before are no longer stored, and only uploads
+    those. The runtimes that receive the message fetch it from the host, or from a :class:`BlobStore` shared with the
+    sender, the first time they see it.
+
+    Args:
+        threshold (int, optional): Minimum size in bytes of the values sent as blobs. Defaults to 64 KiB.
+        cache_size (int, optional): Maximum total size in bytes of the blobs a runtime keeps in memory after
+            sending or receiving them. Defaults to 256 MiB.
+    """
+
+    threshold: int = 64 * 1024
+    cache_size: int = 256 * 1024 * 1024
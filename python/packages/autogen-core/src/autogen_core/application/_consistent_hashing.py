@@ -0,0 +1,79 @@
+import bisect
+import hashlib
+from typing import Dict, Generic, Hashable, Iterator, List, TypeVar
+
+NodeT = TypeVar("NodeT", bound=Hashable)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing(Generic[NodeT]):
+    """Assigns keys to a changing set of nodes, so that adding or removing a node only moves the keys assigned to it.
+
+    Each node is placed at a number of points on a ring of hashes, and a key is assigned to the node of the first
+    point at or after the hash of the key. A node that joins takes about ``1 / len(ring)`` of the keys from the other
+    nodes, and the keys of a node that leaves are spread over the remaining ones.
+
+    Args:
+        virtual_nodes (int, optional): Number of points per node. More points spread the keys more evenly, at the
+            cost of a larger ring. Defaults to 128.
+    """
+
+    def __init__(self, virtual_nodes: int = 128) -> None:
+        self._virtual_nodes = virtual_nodes
+        self._nodes: Dict[NodeT, None] = {}
+        # Sorted hashes of the points on the ring, and the node of each point.
+        self._points: List[int] = []
+        self._point_nodes: List[NodeT] = []
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._nodes
+
+    def __iter__(self) -> Iterator[NodeT]:
+        return iter(self._nodes)
+
+    def add(self, node: NodeT) -> None:
+        if node in self._nodes:
+            return
+        self._nodes[node] = None
+        self._rebuild()
+
+    def remove(self, node: NodeT) -> None:
+        if node not in self._nodes:
+            return
+        del self._nodes[node]
+        self._rebuild()
+
+    def copy(self) -> "ConsistentHashRing[NodeT]":
+        """A ring with the same nodes, which can be changed without changing this one."""
+        ring = ConsistentHashRing[NodeT](self._virtual_nodes)
+        ring._nodes = dict(self._nodes)
+        ring._points = list(self._points)
+        ring._point_nodes = list(self._point_nodes)
+        return ring
+
+    def get(self, key: str) -> NodeT:
+        """The node that `key` is assigned to.
+
+        Raises:
+            LookupError: If the ring has no nodes.
+        """
+        if len(self._nodes) == 1:
+            return next(iter(self._nodes))
+        if not self._points:
+            raise LookupError("The ring has no nodes.")
+        index = bisect.bisect_left(self._points, _hash(key))
+        return self._point_nodes[index % len(self._points)]
+
+    def _rebuild(self) -> None:
+        points = sorted(
+            ((_hash(f"{node}#{replica}"), node) for node in self._nodes for replica in range(self._virtual_nodes)),
+            key=lambda point: point[0],
+        )
+        self._points = [point for point, _ in points]
+        self._point_nodes = [node for _, node in points]
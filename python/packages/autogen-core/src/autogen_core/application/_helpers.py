@@ -1,11 +1,16 @@
-from collections import defaultdict
-from typing import Awaitable, Callable, DefaultDict, List, Set
+import asyncio
+import inspect
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, Iterable, List, Set, Tuple
 
-from ..base._agent import Agent
 from ..base._agent_id import AgentId
 from ..base._agent_type import AgentType
+from ..base._message_handler_context import MessageHandlerContext
 from ..base._subscription import Subscription
 from ..base._topic import TopicId
+from ..components._type_prefix_subscription import TypePrefixSubscription
+from ..components._type_subscription import TypeSubscription
 
 
 async def get_impl(
@@ -13,7 +18,7 @@ async def get_impl(
     id_or_type: AgentId | AgentType | str,
     key: str,
     lazy: bool,
-    instance_getter: Callable[[AgentId], Awaitable[Agent]],
+    instance_getter: Callable[[AgentId], Awaitable[object]],
 ) -> AgentId:
     if isinstance(id_or_type, AgentId):
         if not lazy:
@@ -29,46 +34,219 @@ async def get_impl(
     return id
 
 
-class SubscriptionManager:
+class _PrefixTrie:
+    """Type prefix subscriptions keyed by the characters of their prefix."""
+
+    __slots__ = ("children", "subscriptions")
+
     def __init__(self) -> None:
-        self._subscriptions: List[Subscription] = []
-        self._seen_topics: Set[TopicId] = set()
-        self._subscribed_recipients: DefaultDict[TopicId, List[AgentId]] = defaultdict(list)
+        self.children: Dict[str, _PrefixTrie] = {}
+        # Subscriptions whose prefix ends at this node, keyed by id.
+        self.subscriptions: Dict[str, Subscription] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.children or self.subscriptions)
+
+    def find(self, prefix: str) -> Dict[str, Subscription]:
+        node = self
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return {}
+            node = child
+        return node.subscriptions
+
+    def add(self, prefix: str, subscription: Subscription) -> None:
+        node = self
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _PrefixTrie()
+            node = child
+        node.subscriptions[subscription.id] = subscription
+
+    def remove(self, prefix: str, id: str) -> None:
+        path: List[Tuple[_PrefixTrie, str]] = []
+        node = self
+        for char in prefix:
+            path.append((node, char))
+            node = node.children[char]
+        del node.subscriptions[id]
+        # Prune the nodes that no longer lead to a subscription.
+        for parent, char in reversed(path):
+            if parent.children[char]:
+                break
+            del parent.children[char]
+
+    def match(self, topic_type: str) -> List[Subscription]:
+        """The subscriptions whose prefix is a prefix of `topic_type`."""
+        matches = list(self.subscriptions.values())
+        node = self
+        for char in topic_type:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            matches.extend(node.subscriptions.values())
+        return matches
+
+
+class SubscriptionManager:
+    """Resolves the agents subscribed to a topic.
+
+    Type subscriptions are indexed by topic type and type prefix subscriptions are indexed in a trie, so resolving
+    a topic only evaluates the subscriptions that can match its type and the subscriptions of other kinds. Resolved
+    recipients are cached for the most recently used topics, and adding or removing a subscription only updates the
+    cached topics that the subscription can match.
+
+    Args:
+        max_cached_topics (int, optional): Maximum number of topics whose recipients are cached. The least recently
+            used topics are evicted first. Defaults to 10000.
+    """
+
+    def __init__(self, max_cached_topics: int = 10_000) -> None:
+        self._max_cached_topics = max_cached_topics
+        # Subscription id -> subscription, in the order subscriptions were added.
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = 0
+        # Topic type -> subscriptions that match exactly that type, keyed by id.
+        self._by_topic_type: DefaultDict[str, Dict[str, Subscription]] = defaultdict(dict)
+        # Subscriptions that match every topic type starting with a prefix.
+        self._by_prefix = _PrefixTrie()
+        # Subscriptions that are not indexed and are evaluated for every topic, keyed by id.
+        self._unindexed: Dict[str, Subscription] = {}
+        # Topic -> recipients, least recently used first.
+        self._subscribed_recipients: OrderedDict[TopicId, List[AgentId]] = OrderedDict()
+        self._cached_topics_by_type: DefaultDict[str, Set[TopicId]] = defaultdict(set)
 
     async def add_subscription(self, subscription: Subscription) -> None:
+        topic_type = self._indexed_topic_type(subscription)
+        prefix = self._indexed_prefix(subscription)
+        if topic_type is not None:
+            candidates = self._by_topic_type.get(topic_type, {})
+        elif prefix is not None:
+            candidates = self._by_prefix.find(prefix)
+        else:
+            candidates = self._unindexed
         # Check if the subscription already exists
-        if any(sub == subscription for sub in self._subscriptions):
+        if any(sub == subscription for sub in candidates.values()):
             raise ValueError("Subscription already exists")
 
-        self._subscriptions.append(subscription)
-        self._rebuild_subscriptions(self._seen_topics)
+        self._subscriptions[subscription.id] = subscription
+        self._sequence[subscription.id] = self._next_sequence
+        self._next_sequence += 1
+        if topic_type is not None:
+            self._by_topic_type[topic_type][subscription.id] = subscription
+        elif prefix is not None:
+            self._by_prefix.add(prefix, subscription)
+        else:
+            self._unindexed[subscription.id] = subscription
+
+        # The new subscription is the most recent, so its recipient goes last.
+        for topic in self._affected_topics(topic_type, prefix):
+            if subscription.is_match(topic):
+                self._subscribed_recipients[topic] = [
+                    *self._subscribed_recipients[topic],
+                    subscription.map_to_agent(topic),
+                ]
 
     async def remove_subscription(self, id: str) -> None:
         # Check if the subscription exists
-        if not any(sub.id == id for sub in self._subscriptions):
+        subscription = self._subscriptions.pop(id, None)
+        if subscription is None:
             raise ValueError("Subscription does not exist")
 
-        def is_not_sub(x: Subscription) -> bool:
-            return x.id != id
-
-        self._subscriptions = list(filter(is_not_sub, self._subscriptions))
-
-        # Rebuild the subscriptions
-        self._rebuild_subscriptions(self._seen_topics)
+        del self._sequence[id]
+        topic_type = self._indexed_topic_type(subscription)
+        prefix = self._indexed_prefix(subscription)
+        if topic_type is not None:
+            subscriptions = self._by_topic_type[topic_type]
+            del subscriptions[id]
+            if not subscriptions:
+                del self._by_topic_type[topic_type]
+        elif prefix is not None:
+            self._by_prefix.remove(prefix, id)
+        else:
+            del self._unindexed[id]
+
+        for topic in self._affected_topics(topic_type, prefix):
+            if subscription.is_match(topic):
+                # Lists already returned to callers are left unchanged.
+                recipients = list(self._subscribed_recipients[topic])
+                recipients.remove(subscription.map_to_agent(topic))
+                self._subscribed_recipients[topic] = recipients
 
     async def get_subscribed_recipients(self, topic: TopicId) -> List[AgentId]:
-        if topic not in self._seen_topics:
-            self._build_for_new_topic(topic)
-        return self._subscribed_recipients[topic]
-
-    # TODO: optimize this...
-    def _rebuild_subscriptions(self, topics: Set[TopicId]) -> None:
-        self._subscribed_recipients.clear()
-        for topic in topics:
-            self._build_for_new_topic(topic)
-
-    def _build_for_new_topic(self, topic: TopicId) -> None:
-        self._seen_topics.add(topic)
-        for subscription in self._subscriptions:
-            if subscription.is_match(topic):
-                self._subscribed_recipients[topic].append(subscription.map_to_agent(topic))
+        recipients = self._subscribed_recipients.get(topic)
+        if recipients is not None:
+            self._subscribed_recipients.move_to_end(topic)
+            return recipients
+        recipients = self._resolve(topic)
+        self._subscribed_recipients[topic] = recipients
+        self._cached_topics_by_type[topic.type].add(topic)
+        if len(self._subscribed_recipients) > self._max_cached_topics:
+            evicted, _ = self._subscribed_recipients.popitem(last=False)
+            cached_topics = self._cached_topics_by_type[evicted.type]
+            cached_topics.discard(evicted)
+            if not cached_topics:
+                del self._cached_topics_by_type[evicted.type]
+        return recipients
+
+    @staticmethod
+    def _indexed_topic_type(subscription: Subscription) -> str | None:
+        """The topic type a subscription is indexed under, or None if it is not indexed by topic type."""
+        # Subclasses that change how topics are matched cannot be indexed.
+        if isinstance(subscription, TypeSubscription) and type(subscription).is_match is TypeSubscription.is_match:
+            return subscription.topic_type
+        return None
+
+    @staticmethod
+    def _indexed_prefix(subscription: Subscription) -> str | None:
+        """The prefix a subscription is indexed under, or None if it is not indexed by prefix."""
+        if (
+            isinstance(subscription, TypePrefixSubscription)
+            and type(subscription).is_match is TypePrefixSubscription.is_match
+        ):
+            return subscription.topic_type_prefix
+        return None
+
+    def _affected_topics(self, topic_type: str | None, prefix: str | None) -> Iterable[TopicId]:
+        """The cached topics that a subscription indexed under `topic_type` or `prefix` may match."""
+        if topic_type is not None:
+            return list(self._cached_topics_by_type.get(topic_type, ()))
+        if prefix is not None:
+            return [
+                topic
+                for cached_type, topics in self._cached_topics_by_type.items()
+                if cached_type.startswith(prefix)
+                for topic in topics
+            ]
+        return list(self._subscribed_recipients)
+
+    def _resolve(self, topic: TopicId) -> List[AgentId]:
+        matches = list(self._by_topic_type.get(topic.type, {}).values())
+        prefix_matches = self._by_prefix.match(topic.type) if self._by_prefix else []
+        unindexed_matches = [sub for sub in self._unindexed.values() if sub.is_match(topic)]
+        if prefix_matches or unindexed_matches:
+            matches.extend(prefix_matches)
+            matches.extend(unindexed_matches)
+            # Keep the recipients in the order their subscriptions were added.
+            matches.sort(key=lambda sub: self._sequence[sub.id])
+        return [sub.map_to_agent(topic) for sub in matches]
+
+
+def get_deadline(timeout: float | None) -> float | None:
+    """Return the deadline, in seconds since the epoch, of a message sent with `timeout`.
+
+    A message sent from within a message handler never gets a later deadline than the message being handled."""
+    inherited = MessageHandlerContext.deadline()
+    if timeout is None:
+        return inherited
+    deadline = time.time() + timeout
+    return deadline if inherited is None else min(deadline, inherited)
+
+
+def call_at_deadline(deadline: float, callback: Callable[[], None]) -> asyncio.TimerHandle:
+    """Call `callback` on the running event loop once the deadline, in seconds since the epoch, has passed."""
+    return asyncio.get_running_loop().call_later(max(0.0, deadline - time.time()), callback)
@@ -0,0 +1,44 @@
+from typing import Any, Dict, Sequence, Tuple, get_args
+
+from ..base.intervention import DefaultInterventionHandler, InterventionHandler, InterventionKind
+
+
+def _intercepts_kind(handler: InterventionHandler, kind: InterventionKind) -> bool:
+    envelope_kinds: Sequence[InterventionKind] | None = getattr(handler, "envelope_kinds", None)
+    if envelope_kinds is not None:
+        return kind in envelope_kinds
+    # The methods of DefaultInterventionHandler return the message unchanged, so there is no need to call them.
+    method = f"on_{kind}"
+    return not (
+        isinstance(handler, DefaultInterventionHandler)
+        and getattr(type(handler), method) is getattr(DefaultInterventionHandler, method)
+    )
+
+
+def _intercepts_type(handler: InterventionHandler, message_type: type[Any]) -> bool:
+    message_types: Sequence[type[Any]] | None = getattr(handler, "message_types", None)
+    return message_types is None or issubclass(message_type, tuple(message_types))
+
+
+class InterventionChains:
+    """The intervention handlers of a runtime that intercept each kind of envelope and message type.
+
+    The chain for a message type is computed the first time a message of that type is seen, so messages that no
+    handler intercepts skip interception with a single dictionary lookup."""
+
+    def __init__(self, handlers: Sequence[InterventionHandler] | None) -> None:
+        handlers = list(handlers or [])
+        self._by_kind: Dict[InterventionKind, Tuple[InterventionHandler, ...]] = {
+            kind: tuple(handler for handler in handlers if _intercepts_kind(handler, kind))
+            for kind in get_args(InterventionKind)
+        }
+        self._chains: Dict[Tuple[InterventionKind, type[Any]], Tuple[InterventionHandler, ...]] = {}
+
+    def get(self, kind: InterventionKind, message: Any) -> Tuple[InterventionHandler, ...]:
+        """Get the handlers, in order, that intercept a message in an envelope of the given kind."""
+        key = (kind, type(message))
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = tuple(handler for handler in self._by_kind[kind] if _intercepts_type(handler, type(message)))
+            self._chains[key] = chain
+        return chain
@@ -0,0 +1,102 @@
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Sequence
+
+from .protos import agent_worker_pb2
+
+__all__ = ["MessageBatchingPolicy"]
+
+# Metadata key under which the worker and the host state that they can receive batches of messages, when a worker
+# opens its channel to the host.
+MESSAGE_BATCHING_METADATA_KEY = "x-agent-message-batching"
+
+
+@dataclass(frozen=True, kw_only=True)
+class MessageBatchingPolicy:
+    """How the messages queued on a connection between a worker runtime and its host are sent in batches.
+
+    Each batch is a single write to the gRPC stream, so broadcasts and bursts of requests pay the per-message
+    framing and scheduling overhead once per batch. Batches are only sent to peers that can receive them, as
+    negotiated when the worker connects.
+
+    Args:
+        max_messages (int, optional): Maximum number of messages in a batch. Defaults to 128.
+        max_bytes (int, optional): Maximum total size in bytes of the messages in a batch. A message larger than
+            this is sent on its own. Defaults to 1 MiB.
+        linger (float, optional): Time in seconds to wait for more messages before sending a batch that is not
+            full. Defaults to 0, which batches only the messages that are already queued and never delays one.
+    """
+
+    max_messages: int = 128
+    max_bytes: int = 1024 * 1024
+    linger: float = 0.0
+
+
+class MessageBatcher(AsyncIterator[agent_worker_pb2.Message]):
+    """Takes the messages from a send queue, coalesced into batches by the policy if it is set.
+
+    Iterating over the batcher yields the messages or batches of messages to write to the stream.
+
+    Args:
+        queue (asyncio.Queue[agent_worker_pb2.Message]): Queue of the messages to send.
+        policy (MessageBatchingPolicy | None): How to batch the messages, or None to send them one at a time. It
+            may be changed between calls to :meth:`next`.
+    """
+
+    def __init__(
+        self, queue: asyncio.Queue[agent_worker_pb2.Message], policy: MessageBatchingPolicy | None = None
+    ) -> None:
+        self.policy = policy
+        self._queue = queue
+        # A message taken from the queue that did not fit in the previous batch.
+        self._carried: agent_worker_pb2.Message | None = None
+
+    def __aiter__(self) -> AsyncIterator[agent_worker_pb2.Message]:
+        return self
+
+    async def __anext__(self) -> agent_worker_pb2.Message:
+        return await self.next()
+
+    async def next(self) -> agent_worker_pb2.Message:
+        """Wait for the next message or batch of messages to send."""
+        if self._carried is not None:
+            first, self._carried = self._carried, None
+        else:
+            first = await self._queue.get()
+        policy = self.policy
+        if policy is None or policy.max_messages <= 1:
+            return first
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + policy.linger
+        messages = [first]
+        size = 0
+        while len(messages) < policy.max_messages:
+            try:
+                message = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = give_up_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if size == 0:
+                # The size of the first message is only computed once there is a second one to batch it with.
+                size = first.ByteSize()
+            message_size = message.ByteSize()
+            if size + message_size > policy.max_bytes:
+                self._carried = message
+                break
+            messages.append(message)
+            size += message_size
+        if len(messages) == 1:
+            return first
+        return agent_worker_pb2.Message(batch=agent_worker_pb2.MessageBatch(messages=messages))
+
+
+def unbatch(message: agent_worker_pb2.Message) -> Sequence[agent_worker_pb2.Message]:
+    """The messages sent in a message, which may be a batch."""
+    if message.WhichOneof("message") == "batch":
+        return message.batch.messages
+    return (message,)
@@ -0,0 +1,127 @@
+import asyncio
+from asyncio import Future
+from collections import deque
+from typing import Callable, Deque, Generic, Literal, Sequence, TypeVar
+
+from ..base.exceptions import MessageQueueFullException
+
+T = TypeVar("T")
+
+QueueFullPolicy = Literal["block", "drop_oldest", "reject"]
+"""What to do when an item is put into a full :class:`MessageQueue`:
+
+- ``"block"``: wait until there is free space.
+- ``"drop_oldest"``: drop the oldest sheddable item to make room. If no queued item can be shed, wait for free space.
+- ``"reject"``: raise :class:`~autogen_core.base.exceptions.MessageQueueFullException`.
+"""
+
+
+class MessageQueue(Generic[T]):
+    """A FIFO queue backed by a :class:`collections.deque` with an optional capacity.
+
+    Items put with ``priority=True`` go into a separate lane that is always drained first and is not counted
+    against the capacity.
+
+    Args:
+        maxsize (int, optional): Maximum number of items in the queue. If less than or equal to zero, the queue
+            is unbounded. Defaults to 0.
+        full_policy (QueueFullPolicy, optional): What to do when an item is put into a full queue. Defaults to "block".
+        is_sheddable (Callable[[T], bool], optional): Returns True if a queued item may be dropped under the
+            "drop_oldest" policy. Defaults to every item being sheddable.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        *,
+        full_policy: QueueFullPolicy = "block",
+        is_sheddable: Callable[[T], bool] | None = None,
+    ) -> None:
+        self._maxsize = maxsize
+        self._full_policy: QueueFullPolicy = full_policy
+        self._is_sheddable = is_sheddable
+        self._items: Deque[T] = deque()
+        self._priority_items: Deque[T] = deque()
+        self._putters: Deque[Future[None]] = deque()
+
+    @property
+    def items(self) -> Sequence[T]:
+        """The queued items in the order they will be returned."""
+        if self._priority_items:
+            return [*self._priority_items, *self._items]
+        return self._items
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def __len__(self) -> int:
+        return len(self._priority_items) + len(self._items)
+
+    def full(self) -> bool:
+        return self._maxsize > 0 and len(self._items) >= self._maxsize
+
+    async def put(self, item: T) -> T | None:
+        """Put an item into the queue, applying the full policy if the queue is at capacity.
+
+        Returns:
+            T | None: The item that was dropped to make room, if any.
+        """
+        dropped: T | None = None
+        if self.full():
+            if self._full_policy == "reject":
+                raise MessageQueueFullException(f"Message queue is full (maxsize={self._maxsize}).")
+            if self._full_policy == "drop_oldest":
+                dropped = self._drop_oldest()
+            while self.full():
+                putter = asyncio.get_running_loop().create_future()
+                self._putters.append(putter)
+                try:
+                    await putter
+                except BaseException:
+                    putter.cancel()
+                    try:
+                        self._putters.remove(putter)
+                    except ValueError:
+                        pass
+                    # Pass the wakeup on if we were woken but are not going to use the free slot.
+                    if not self.full():
+                        self._wakeup_next()
+                    raise
+        self._items.append(item)
+        return dropped
+
+    def put_nowait(self, item: T, *, priority: bool = False) -> None:
+        """Put an item into the queue regardless of its capacity.
+
+        Args:
+            item (T): The item to put.
+            priority (bool, optional): Put the item into the priority lane, ahead of all regular items.
+                Defaults to False.
+        """
+        if priority:
+            self._priority_items.append(item)
+        else:
+            self._items.append(item)
+
+    def get_nowait(self) -> T:
+        """Remove and return the item at the front of the queue. Raises IndexError if the queue is empty."""
+        if self._priority_items:
+            return self._priority_items.popleft()
+        item = self._items.popleft()
+        self._wakeup_next()
+        return item
+
+    def _drop_oldest(self) -> T | None:
+        for index, queued in enumerate(self._items):
+            if self._is_sheddable is None or self._is_sheddable(queued):
+                del self._items[index]
+                return queued
+        return None
+
+    def _wakeup_next(self) -> None:
+        while self._putters:
+            putter = self._putters.popleft()
+            if not putter.done():
+                putter.set_result(None)
+                break
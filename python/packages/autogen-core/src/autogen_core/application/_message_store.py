@@ -0,0 +1,274 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Literal, Mapping, Protocol, Tuple, TypeVar
+
+from ..base import AgentId, TopicId
+from ._agent_state_store import AgentStateStore
+
+__all__ = [
+    "MessageStore",
+    "SqliteMessageStore",
+    "StoredEnvelope",
+]
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, kw_only=True)
+class StoredEnvelope:
+    """A sent or published message as written to a :class:`MessageStore`.
+
+    Args:
+        kind (Literal["send", "publish"]): Whether the message was sent to an agent or published to a topic.
+        sender (AgentId | None): Agent that sent the message, if any.
+        recipient (AgentId | None): Recipient of a sent message.
+        topic_id (TopicId | None): Topic of a published message.
+        data_type (str): Type name of the serialized message.
+        data_content_type (str): Content type of the serialized message.
+        data (bytes): The serialized message.
+        cause (int | None): ID of the stored envelope whose handler sent or published this message, if any.
+    """
+
+    kind: Literal["send", "publish"]
+    sender: AgentId | None
+    recipient: AgentId | None = None
+    topic_id: TopicId | None = None
+    data_type: str
+    data_content_type: str
+    data: bytes
+    cause: int | None = None
+
+
+def _encode_bytes(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_bytes(value: Dict[str, Any]) -> Any:
+    if value.keys() == {"__bytes__"}:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def _split_chunks(value: Any, path: List[Any], chunks: Dict[str, List[bytes]]) -> Any:
+    """Replace the non-empty lists of ``bytes`` in a state with references to `chunks`, keyed by their path."""
+    if isinstance(value, Mapping):
+        return {key: _split_chunks(item, [*path, key], chunks) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, bytes) for item in value):
+            key = json.dumps(path)
+            chunks[key] = list(value)
+            return {"__chunks__": key}
+        return [_split_chunks(item, [*path, index], chunks) for index, item in enumerate(value)]
+    return value
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class MessageStore(AgentStateStore, Protocol):
+    """A durable store for the queued messages and the agent state of a runtime.
+
+    A runtime appends every sent and published message to the store when it is queued and acknowledges it once its
+    handlers have completed. Messages that were not acknowledged, for example because the process died, are
+    delivered again when a runtime using the same store starts. Before a message is acknowledged, the state of the
+    agents that handled it is checkpointed to the store, unless it was saved since, so that restarted agents resume
+    where they left off."""
+
+    async def append(self, envelope: StoredEnvelope) -> int:
+        """Durably store a message.
+
+        Args:
+            envelope (StoredEnvelope): The message to store.
+
+        Returns:
+            int: The ID of the stored envelope. IDs increase in the order messages are appended.
+        """
+        ...
+
+    async def ack(self, envelope_id: int) -> None:
+        """Remove a message whose handlers have completed.
+
+        Args:
+            envelope_id (int): ID returned by `append`.
+        """
+        ...
+
+    async def pending(self) -> List[Tuple[int, StoredEnvelope]]:
+        """Get the messages that were appended and not acknowledged, in the order they were appended."""
+        ...
+
+
+class SqliteMessageStore(MessageStore):
+    """A :class:`MessageStore` backed by a SQLite database in write-ahead logging mode.
+
+    Messages are written in their serialized form, so every message type must have a serializer registered with the
+    runtime. Agent state is stored as JSON, with ``bytes`` values encoded as base64. Lists of ``bytes`` values, such
+    as the segments of a :class:`~autogen_core.components.model_context.MessageLog`, are treated as append-only and
+    stored one element per row: saving the state again only writes the elements appended since it was last saved,
+    and the whole list is only written again if its last saved element was changed. The database is accessed from
+    a single thread owned by the store, so that writes, and the fsyncs they may wait for, do not block the event
+    loop.
+
+    Args:
+        path (str | os.PathLike[str]): Path of the database file. It is created if it does not exist.
+        synchronous (Literal["OFF", "NORMAL", "FULL"], optional): SQLite ``synchronous`` setting. ``"NORMAL"`` keeps
+            the database consistent after a crash of the process, ``"FULL"`` also after a power loss at the cost
+            of an fsync per message. Defaults to ``"NORMAL"``.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], *, synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    ) -> None:
+        # The connection is only used by the executor's thread once it is set up.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SqliteMessageStore")
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS envelopes ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, sender TEXT, recipient TEXT, "
+            "topic_type TEXT, topic_source TEXT, data_type TEXT NOT NULL, data_content_type TEXT NOT NULL, "
+            "data BLOB NOT NULL, cause INTEGER)"
+        )
+        self._connection.execute("CREATE TABLE IF NOT EXISTS agent_states (agent_id TEXT PRIMARY KEY, state TEXT)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS agent_state_chunks (agent_id TEXT NOT NULL, path TEXT NOT NULL, "
+            "position INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (agent_id, path, position))"
+        )
+        # (agent id, path) -> number of stored elements and digest of the last one, for the lists of bytes written
+        # or read by the store.
+        self._stored_chunks: Dict[Tuple[str, str], Tuple[int, str]] = {}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._executor.submit(self._connection.close).result()
+        self._executor.shutdown()
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def append(self, envelope: StoredEnvelope) -> int:
+        return await self._run(self._append, envelope)
+
+    def _append(self, envelope: StoredEnvelope) -> int:
+        cursor = self._connection.execute(
+            "INSERT INTO envelopes (kind, sender, recipient, topic_type, topic_source, data_type, data_content_type, "
+            "data, cause) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                envelope.kind,
+                str(envelope.sender) if envelope.sender is not None else None,
+                str(envelope.recipient) if envelope.recipient is not None else None,
+                envelope.topic_id.type if envelope.topic_id is not None else None,
+                envelope.topic_id.source if envelope.topic_id is not None else None,
+                envelope.data_type,
+                envelope.data_content_type,
+                envelope.data,
+                envelope.cause,
+            ),
+        )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    async def ack(self, envelope_id: int) -> None:
+        await self._run(self._connection.execute, "DELETE FROM envelopes WHERE id = ?", (envelope_id,))
+
+    async def pending(self) -> List[Tuple[int, StoredEnvelope]]:
+        return await self._run(self._pending)
+
+    def _pending(self) -> List[Tuple[int, StoredEnvelope]]:
+        rows = self._connection.execute(
+            "SELECT id, kind, sender, recipient, topic_type, topic_source, data_type, data_content_type, data, cause "
+            "FROM envelopes ORDER BY id"
+        ).fetchall()
+        return [
+            (
+                id,
+                StoredEnvelope(
+                    kind=kind,
+                    sender=AgentId.from_str(sender) if sender is not None else None,
+                    recipient=AgentId.from_str(recipient) if recipient is not None else None,
+                    topic_id=TopicId(topic_type, topic_source) if topic_type is not None else None,
+                    data_type=data_type,
+                    data_content_type=data_content_type,
+                    data=data,
+                    cause=cause,
+                ),
+            )
+            for id, kind, sender, recipient, topic_type, topic_source, data_type, data_content_type, data, cause in rows
+        ]
+
+    async def save(self, agent_id: AgentId, state: Mapping[str, Any]) -> None:
+        # Encoded on the event loop, so that the agent cannot change the state while it is being written.
+        chunks: Dict[str, List[bytes]] = {}
+        encoded = json.dumps(_split_chunks(state, [], chunks), default=_encode_bytes)
+        await self._run(self._save, str(agent_id), encoded, chunks)
+
+    def _save(self, agent_id: str, encoded: str, chunks: Dict[str, List[bytes]]) -> None:
+        stored: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._connection.execute("BEGIN")
+        try:
+            for path, values in chunks.items():
+                count, last_digest = self._stored_chunks.get((agent_id, path), (0, ""))
+                if count == 0 or count > len(values) or _digest(values[count - 1]) != last_digest:
+                    count = 0
+                    self._connection.execute(
+                        "DELETE FROM agent_state_chunks WHERE agent_id = ? AND path = ?", (agent_id, path)
+                    )
+                self._connection.executemany(
+                    "INSERT INTO agent_state_chunks (agent_id, path, position, data) VALUES (?, ?, ?, ?)",
+                    [(agent_id, path, position, values[position]) for position in range(count, len(values))],
+                )
+                stored[(agent_id, path)] = (len(values), _digest(values[-1]))
+            self._connection.execute(
+                f"DELETE FROM agent_state_chunks WHERE agent_id = ? AND path NOT IN ({', '.join('?' * len(chunks))})",
+                (agent_id, *chunks),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO agent_states (agent_id, state) VALUES (?, ?)", (agent_id, encoded)
+            )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        for key in [key for key in self._stored_chunks if key[0] == agent_id]:
+            del self._stored_chunks[key]
+        self._stored_chunks.update(stored)
+
+    async def load(self, agent_id: AgentId) -> Mapping[str, Any] | None:
+        return await self._run(self._load, str(agent_id))
+
+    def _load(self, agent_id: str) -> Mapping[str, Any] | None:
+        row = self._connection.execute("SELECT state FROM agent_states WHERE agent_id = ?", (agent_id,)).fetchone()
+        if row is None:
+            return None
+        chunks: Dict[str, List[bytes]] = {}
+        for path, data in self._connection.execute(
+            "SELECT path, data FROM agent_state_chunks WHERE agent_id = ? ORDER BY path, position", (agent_id,)
+        ):
+            chunks.setdefault(path, []).append(data)
+        for path, values in chunks.items():
+            self._stored_chunks[(agent_id, path)] = (len(values), _digest(values[-1]))
+
+        def decode(value: Dict[str, Any]) -> Any:
+            if value.keys() == {"__chunks__"}:
+                return chunks[value["__chunks__"]]
+            return _decode_bytes(value)
+
+        state: Mapping[str, Any] = json.loads(row[0], object_hook=decode)
+        return state
+
+    async def agent_ids(self) -> List[AgentId]:
+        rows = await self._run(self._fetch_all, "SELECT agent_id FROM agent_states")
+        return [AgentId.from_str(agent_id) for (agent_id,) in rows]
+
+    def _fetch_all(self, sql: str) -> List[Any]:
+        return self._connection.execute(sql).fetchall()
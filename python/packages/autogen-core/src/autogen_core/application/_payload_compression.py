@@ -0,0 +1,83 @@
+import functools
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+__all__ = ["PayloadCompressionPolicy"]
+
+GZIP_ENCODING = "gzip"
+ZSTD_ENCODING = "zstd"
+
+# Metadata key under which the worker and the host list the payload encodings they can decode, when a worker opens
+# its channel to the host.
+PAYLOAD_ENCODINGS_METADATA_KEY = "x-agent-payload-encodings"
+
+
+def _gzip_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    def compress(data: bytes) -> bytes:
+        # A raw gzip stream, compressed at a level that favours latency over ratio.
+        compressor = zlib.compressobj(level=1, wbits=31)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(data: bytes) -> bytes:
+        return zlib.decompress(data, wbits=31)
+
+    return compress, decompress
+
+
+def _zstd_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=3)
+    decompressor = zstandard.ZstdDecompressor()
+    return compressor.compress, decompressor.decompress
+
+
+@functools.lru_cache(maxsize=None)
+def _codecs() -> Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    codecs = {GZIP_ENCODING: _gzip_codec()}
+    try:
+        codecs[ZSTD_ENCODING] = _zstd_codec()
+    except ImportError:
+        pass
+    return codecs
+
+
+def available_payload_encodings() -> List[str]:
+    """The payload encodings this process can compress and decompress, in order of preference."""
+    return [encoding for encoding in (ZSTD_ENCODING, GZIP_ENCODING) if encoding in _codecs()]
+
+
+def compress_payload(data: bytes, encoding: str) -> bytes:
+    try:
+        compress, _ = _codecs()[encoding]
+    except KeyError:
+        raise ValueError(f"Unsupported payload encoding {encoding}") from None
+    return compress(data)
+
+
+def decompress_payload(data: bytes, encoding: str) -> bytes:
+    try:
+        _, decompress = _codecs()[encoding]
+    except KeyError:
+        raise ValueError(f"Unsupported payload encoding {encoding}") from None
+    return decompress(data)
+
+
+@dataclass(frozen=True, kw_only=True)
+class PayloadCompressionPolicy:
+    """How a :class:`WorkerAgentRuntime` compresses the serialized messages it sends to the host.
+
+    The runtime compresses with the first of `encodings` that the host can decode, as negotiated when the runtime
+    connects. The host decompresses messages for the runtimes that cannot decode them. zstd is only available when
+    the ``zstandard`` package is installed, with ``pip install autogen-core[zstd]``.
+
+    Args:
+        encodings (Sequence[str], optional): Encodings to compress with, in order of preference. Defaults to
+            ``zstd``, if available, then ``gzip``.
+        threshold (int, optional): Minimum size in bytes of the serialized messages that are compressed. Smaller
+            messages are not worth the time it takes to compress them. Defaults to 4 KiB.
+    """
+
+    encodings: Sequence[str] = field(default_factory=available_payload_encodings)
+    threshold: int = 4 * 1024
@@ -0,0 +1,76 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List
+
+import grpc
+
+from autogen_core.base._type_helpers import ChannelArgumentType
+
+from .protos import agent_worker_pb2, agent_worker_pb2_grpc
+
+if TYPE_CHECKING:
+    from .protos.agent_worker_pb2_grpc import AgentPeerAsyncStub
+
+# Metadata key under which a worker gives the address it accepts requests from other workers on, when it opens its
+# channel to the host.
+PEER_ADDRESS_METADATA_KEY = "x-agent-peer-address"
+
+
+class PeerRequestServicer(agent_worker_pb2_grpc.AgentPeerServicer):
+    """Serves the requests that other workers send directly to the agents of a worker runtime.
+
+    Args:
+        handle_request (Callable[[agent_worker_pb2.RpcRequest], Awaitable[agent_worker_pb2.RpcResponse | None]]):
+            Handles a request and returns its response, or None if the runtime does not host the target agent type.
+    """
+
+    def __init__(
+        self,
+        handle_request: Callable[[agent_worker_pb2.RpcRequest], Awaitable[agent_worker_pb2.RpcResponse | None]],
+    ) -> None:
+        self._handle_request = handle_request
+
+    async def SendRequest(  # type: ignore
+        self,
+        request: agent_worker_pb2.RpcRequest,
+        context: grpc.aio.ServicerContext[agent_worker_pb2.RpcRequest, agent_worker_pb2.RpcResponse],
+    ) -> agent_worker_pb2.RpcResponse:
+        response = await self._handle_request(request)
+        if response is None:
+            # The sender's endpoint is stale, and it sends the request through the host instead.
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Agent type {request.target.type} is not hosted at this address.")
+            return agent_worker_pb2.RpcResponse()
+        return response
+
+
+class PeerConnections:
+    """Channels to the workers that requests are sent to directly, opened on first use and kept open until closed.
+
+    Args:
+        options (ChannelArgumentType): Options of the gRPC channels.
+    """
+
+    def __init__(self, options: ChannelArgumentType) -> None:
+        self._options = options
+        self._channels: List[grpc.aio.Channel] = []  # type: ignore
+        self._stubs: Dict[str, "AgentPeerAsyncStub"] = {}
+
+    async def send_request(
+        self, address: str, request: agent_worker_pb2.RpcRequest, timeout: float | None = None
+    ) -> agent_worker_pb2.RpcResponse:
+        """Send a request to the worker at `address` and wait for its response.
+
+        Raises:
+            grpc.aio.AioRpcError: If the worker is unreachable, does not host the target agent type, or does not
+                respond within `timeout` seconds.
+        """
+        if address not in self._stubs:
+            channel = grpc.aio.insecure_channel(address, options=self._options)
+            self._channels.append(channel)
+            self._stubs[address] = agent_worker_pb2_grpc.AgentPeerStub(channel)  # type: ignore
+        response: agent_worker_pb2.RpcResponse = await self._stubs[address].SendRequest(request, timeout=timeout)  # type: ignore
+        return response
+
+    async def close(self) -> None:
+        channels, self._channels, self._stubs = self._channels, [], {}
+        await asyncio.gather(*(channel.close() for channel in channels))
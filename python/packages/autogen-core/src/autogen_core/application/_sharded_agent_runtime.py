@@ -0,0 +1,797 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import pickle
+import socket
+import time
+import warnings
+import zlib
+from asyncio import Future, StreamReader, StreamWriter, Task
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Sequence, Set, Tuple, Type, TypeVar
+
+from typing_extensions import deprecated
+
+from ..base import (
+    JSON_DATA_CONTENT_TYPE,
+    Agent,
+    AgentId,
+    AgentMetadata,
+    AgentRuntime,
+    AgentType,
+    CancellationToken,
+    MessageSerializer,
+    Subscription,
+    SubscriptionInstantiationContext,
+    TopicId,
+)
+from ..base._serialization import SerializationRegistry
+from ..base.exceptions import NotAccessibleError
+from ..base.intervention import InterventionHandler
+from ._agent_instance_cache import AgentEvictionPolicy
+from ._agent_scheduler import AgentSchedulingPolicy
+from ._helpers import SubscriptionManager, call_at_deadline, get_deadline, get_impl
+from ._single_threaded_agent_runtime import SingleThreadedAgentRuntime
+
+logger = logging.getLogger("autogen_core")
+
+T = TypeVar("T", bound=Agent)
+
+# Shard index used for requests that originate in the parent process.
+_PARENT = -1
+
+# Frames are pickled tuples whose first element is the frame kind. Only these kinds carry agent messages;
+# they are counted on both ends of every connection to detect when all shards are idle.
+_MESSAGE_FRAMES = ("send", "response", "publish")
+
+# A registration replayed in every shard: (agent type, factory, expected class or None for `register`).
+_Registration = Tuple[str, Callable[..., Any], "type[Agent] | None"]
+
+# An exception raised in another process: (exception type, message).
+_RemoteError = Tuple["type[Exception]", str]
+
+
+def shard_for_agent(agent_id: AgentId, num_shards: int) -> int:
+    """Return the index of the shard that hosts an agent.
+
+    The placement only depends on the agent ID, so it is the same in every process."""
+    return zlib.crc32(f"{agent_id.type}/{agent_id.key}".encode()) % num_shards
+
+
+async def _write_frame(writer: StreamWriter, frame: Tuple[Any, ...]) -> None:
+    data = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(len(data).to_bytes(4, "big") + data)
+    await writer.drain()
+
+
+async def _read_frame(reader: StreamReader) -> Tuple[Any, ...] | None:
+    try:
+        header = await reader.readexactly(4)
+        data = await reader.readexactly(int.from_bytes(header, "big"))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    frame: Tuple[Any, ...] = pickle.loads(data)
+    return frame
+
+
+def _serialize(registry: SerializationRegistry, message: Any) -> Tuple[str | None, bytes]:
+    if message is None:
+        return None, b""
+    type_name = registry.type_name(message)
+    return type_name, registry.serialize(message, type_name=type_name, data_content_type=JSON_DATA_CONTENT_TYPE)
+
+
+def _deserialize(registry: SerializationRegistry, type_name: str | None, data: bytes) -> Any:
+    if type_name is None:
+        return None
+    return registry.deserialize(data, type_name=type_name, data_content_type=JSON_DATA_CONTENT_TYPE)
+
+
+def _encode_error(error: BaseException) -> _RemoteError:
+    error_type: type[Exception] = type(error) if isinstance(error, Exception) else Exception
+    try:
+        # Exception types are pickled by reference, so types that cannot be imported by name are sent as Exception.
+        pickle.dumps(error_type, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        error_type = Exception
+    return error_type, str(error) or type(error).__name__
+
+
+def _decode_error(error: _RemoteError) -> Exception:
+    error_type, message = error
+    try:
+        return error_type(message)
+    except Exception:
+        return Exception(message)
+
+
+def _resolve_response(
+    future: Future[Any],
+    registry: SerializationRegistry,
+    type_name: str | None,
+    data: bytes,
+    error: _RemoteError | None,
+) -> None:
+    if error is not None:
+        future.set_exception(_decode_error(error))
+        return
+    try:
+        future.set_result(_deserialize(registry, type_name, data))
+    except Exception as e:
+        future.set_exception(e)
+
+
+def _expire_at_deadline(deadline: float | None, future: Future[Any], recipient: AgentId) -> asyncio.TimerHandle | None:
+    # The shard hosting the recipient cancels the handler itself; this only stops the sender from waiting.
+    if deadline is None:
+        return None
+
+    def expire() -> None:
+        if not future.done():
+            future.set_exception(TimeoutError(f"No response from {recipient} before the deadline."))
+
+    return call_at_deadline(deadline, expire)
+
+
+@dataclass
+class _ShardOptions:
+    intervention_handlers: List[InterventionHandler] | None
+    max_queue_size: int
+    log_message_payloads: bool
+    eviction_policy: AgentEvictionPolicy | None
+    scheduling_policy: AgentSchedulingPolicy | None
+
+
+class _ShardSubscriptionManager(SubscriptionManager):
+    """Resolves the recipients of a topic to the subscribed agents hosted by one shard."""
+
+    def __init__(self, shard_index: int, num_shards: int) -> None:
+        super().__init__()
+        self._shard_index = shard_index
+        self._num_shards = num_shards
+
+    async def get_subscribed_recipients(self, topic: TopicId) -> List[AgentId]:
+        recipients = await super().get_subscribed_recipients(topic)
+        return [agent_id for agent_id in recipients if shard_for_agent(agent_id, self._num_shards) == self._shard_index]
+
+
+class _ShardRuntime(SingleThreadedAgentRuntime):
+    """The runtime of a child process of a :class:`ShardedAgentRuntime`.
+
+    Messages for agents hosted by other shards are serialized and sent to the parent process, which forwards
+    them to the shard that hosts the recipient."""
+
+    def __init__(self, shard_index: int, num_shards: int, writer: StreamWriter, options: _ShardOptions) -> None:
+        super().__init__(
+            intervention_handlers=options.intervention_handlers,
+            max_queue_size=options.max_queue_size,
+            log_message_payloads=options.log_message_payloads,
+            eviction_policy=options.eviction_policy,
+            scheduling_policy=options.scheduling_policy,
+        )
+        self._shard_index = shard_index
+        self._num_shards = num_shards
+        self._writer = writer
+        self._subscription_manager = _ShardSubscriptionManager(shard_index, num_shards)
+        self._next_request_id = 0
+        self._pending_requests: Dict[int, Future[Any]] = {}
+        # (origin shard, request id) -> cancellation token of a request from another shard.
+        self._remote_requests: Dict[Tuple[int, int], CancellationToken] = {}
+        self._frames_sent = 0
+        self._frames_received = 0
+        self._tasks: Set[Task[Any]] = set()
+
+    async def send_message(
+        self,
+        message: Any,
+        recipient: AgentId,
+        *,
+        sender: AgentId | None = None,
+        cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        if shard_for_agent(recipient, self._num_shards) == self._shard_index:
+            return await super().send_message(
+                message, recipient, sender=sender, cancellation_token=cancellation_token, timeout=timeout
+            )
+        if cancellation_token is None:
+            cancellation_token = CancellationToken()
+        type_name, data = _serialize(self._serialization_registry, message)
+        deadline = get_deadline(timeout)
+        self._next_request_id += 1
+        request_id = self._next_request_id
+        future: Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending_requests[request_id] = future
+        await self._send_frame(("send", self._shard_index, request_id, recipient, sender, type_name, data, deadline))
+
+        def cancel() -> None:
+            if request_id in self._pending_requests:
+                self._spawn(self._send_frame(("cancel", self._shard_index, request_id, recipient)))
+            future.cancel()
+
+        cancellation_token.add_callback(cancel)
+        deadline_timer = _expire_at_deadline(deadline, future, recipient)
+        try:
+            async with self._scheduler.nested_request():
+                return await future
+        finally:
+            cancellation_token.remove_callback(cancel)
+            self._pending_requests.pop(request_id, None)
+            if deadline_timer is not None:
+                deadline_timer.cancel()
+
+    async def publish_message(
+        self,
+        message: Any,
+        topic_id: TopicId,
+        *,
+        sender: AgentId | None = None,
+        cancellation_token: CancellationToken | None = None,
+    ) -> None:
+        # Deliver to the local subscribers directly and let the parent forward the message to the other shards. The
+        # message is serialized first, so that it is delivered to no subscriber if it cannot be sent to them all.
+        type_name, data = _serialize(self._serialization_registry, message)
+        await super().publish_message(message, topic_id, sender=sender, cancellation_token=cancellation_token)
+        await self._send_frame(("publish", self._shard_index, topic_id, sender, type_name, data))
+
+    async def add_subscription(self, subscription: Subscription) -> None:
+        await super().add_subscription(subscription)
+        await self._send_frame(("add_subscription", self._shard_index, subscription))
+
+    async def remove_subscription(self, id: str) -> None:
+        await super().remove_subscription(id)
+        await self._send_frame(("remove_subscription", self._shard_index, id))
+
+    async def serve(self, reader: StreamReader) -> None:
+        """Handle the frames sent by the parent process until it asks the shard to stop."""
+        while True:
+            frame = await _read_frame(reader)
+            if frame is None:
+                break
+            kind = frame[0]
+            if kind in _MESSAGE_FRAMES:
+                self._frames_received += 1
+            match frame:
+                case ("send", origin, request_id, recipient, sender, type_name, data, deadline):
+                    try:
+                        message = _deserialize(self._serialization_registry, type_name, data)
+                    except Exception as e:
+                        logger.error("Failed to deserialize a request for %s", recipient, exc_info=e)
+                        self._spawn(self._send_frame(("response", origin, request_id, None, b"", _encode_error(e))))
+                    else:
+                        self._spawn(self._handle_remote_send(origin, request_id, recipient, sender, message, deadline))
+                case ("response", _, request_id, type_name, data, error):
+                    future = self._pending_requests.get(request_id)
+                    if future is not None and not future.done():
+                        _resolve_response(future, self._serialization_registry, type_name, data, error)
+                case ("cancel", origin, request_id, _):
+                    token = self._remote_requests.get((origin, request_id))
+                    if token is not None:
+                        token.cancel()
+                case ("publish", _, topic_id, sender, type_name, data):
+                    try:
+                        message = _deserialize(self._serialization_registry, type_name, data)
+                    except Exception as e:
+                        logger.error("Failed to deserialize a message published to %s", topic_id, exc_info=e)
+                    else:
+                        # Enqueued in a task, since a bounded message queue only drains once the running handlers
+                        # receive the responses that this loop reads.
+                        self._spawn(SingleThreadedAgentRuntime.publish_message(self, message, topic_id, sender=sender))
+                case ("add_subscription", _, subscription):
+                    await SingleThreadedAgentRuntime.add_subscription(self, subscription)
+                case ("remove_subscription", _, id):
+                    await SingleThreadedAgentRuntime.remove_subscription(self, id)
+                case ("call", request_id, "status", _):
+                    # Answered inline so that messages received before the call are already queued or running.
+                    idle = self.idle and not self._tasks
+                    await self._send_frame(
+                        ("result", request_id, (idle, self._frames_sent, self._frames_received), None)
+                    )
+                case ("call", request_id, method, args):
+                    self._spawn(self._handle_call(request_id, method, args))
+                case ("stop",):
+                    break
+                case _:
+                    logger.error("Shard %s received an unknown frame: %s", self._shard_index, kind)
+        for future in self._pending_requests.values():
+            if not future.done():
+                future.set_exception(RuntimeError("The sharded runtime was stopped."))
+        await self.stop()
+
+    async def _handle_remote_send(
+        self,
+        origin: int,
+        request_id: int,
+        recipient: AgentId,
+        sender: AgentId | None,
+        message: Any,
+        deadline: float | None,
+    ) -> None:
+        token = CancellationToken()
+        self._remote_requests[(origin, request_id)] = token
+        type_name: str | None = None
+        data = b""
+        error: _RemoteError | None = None
+        try:
+            timeout = deadline - time.time() if deadline is not None else None
+            result = await super().send_message(
+                message, recipient, sender=sender, cancellation_token=token, timeout=timeout
+            )
+            type_name, data = _serialize(self._serialization_registry, result)
+        except BaseException as e:
+            error = _encode_error(e)
+        finally:
+            del self._remote_requests[(origin, request_id)]
+        await self._send_frame(("response", origin, request_id, type_name, data, error))
+
+    async def _handle_call(self, request_id: int, method: str, args: Tuple[Any, ...]) -> None:
+        result: Any = None
+        error: _RemoteError | None = None
+        try:
+            match method:
+                case "save_state":
+                    result = dict(await self.save_state())
+                case "load_state":
+                    (state,) = args
+                    local_state = {
+                        key: value
+                        for key, value in state.items()
+                        if shard_for_agent(AgentId.from_str(key), self._num_shards) == self._shard_index
+                    }
+                    await self.load_state(local_state)
+                case "agent_metadata":
+                    result = await self.agent_metadata(*args)
+                case "agent_save_state":
+                    result = dict(await self.agent_save_state(*args))
+                case "agent_load_state":
+                    await self.agent_load_state(*args)
+                case "instantiate":
+                    await self._get_agent(*args)
+                case _:
+                    raise ValueError(f"Unknown method {method}")
+        except BaseException as e:
+            error = _encode_error(e)
+        await self._send_frame(("result", request_id, result, error))
+
+    async def _send_frame(self, frame: Tuple[Any, ...]) -> None:
+        if frame[0] in _MESSAGE_FRAMES:
+            self._frames_sent += 1
+        await _write_frame(self._writer, frame)
+
+    def _spawn(self, coroutine: Awaitable[Any]) -> None:
+        task: Task[Any] = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+async def _serve_shard(
+    shard_index: int,
+    num_shards: int,
+    sock: socket.socket,
+    registrations: List[_Registration],
+    subscriptions: List[Subscription],
+    serializers: List[MessageSerializer[Any]],
+    options: _ShardOptions,
+) -> None:
+    reader, writer = await asyncio.open_connection(sock=sock)
+    runtime = _ShardRuntime(shard_index, num_shards, writer, options)
+    runtime.add_message_serializer(serializers)
+    for type, factory, expected_class in registrations:
+        if expected_class is None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                await runtime.register(type, factory)
+        else:
+            await runtime.register_factory(type=AgentType(type), agent_factory=factory, expected_class=expected_class)
+    for subscription in subscriptions:
+        await SingleThreadedAgentRuntime.add_subscription(runtime, subscription)
+    runtime.start()
+    try:
+        await runtime.serve(reader)
+    finally:
+        writer.close()
+
+
+def _run_shard(
+    shard_index: int,
+    num_shards: int,
+    sock: socket.socket,
+    inherited_sockets: List[socket.socket],
+    registrations: List[_Registration],
+    subscriptions: List[Subscription],
+    serializers: List[MessageSerializer[Any]],
+    options: _ShardOptions,
+) -> None:
+    # Close the parent's ends of the connections to the other shards that were inherited by the fork.
+    for inherited_socket in inherited_sockets:
+        inherited_socket.close()
+    asyncio.run(_serve_shard(shard_index, num_shards, sock, registrations, subscriptions, serializers, options))
+
+
+@dataclass
+class _Shard:
+    process: BaseProcess
+    reader: StreamReader | None = None
+    writer: StreamWriter | None = None
+    read_task: Task[None] | None = None
+    frames_sent: int = 0
+    frames_received: int = 0
+
+
+class ShardedAgentRuntime(AgentRuntime):
+    """An agent runtime that spreads agents over several child processes, each running its own event loop.
+
+    Every agent is hosted by exactly one shard, chosen from a hash of its :class:`~autogen_core.base.AgentId`.
+    Messages between agents in different shards are serialized with the runtime's message serializers and
+    forwarded by the parent process, so every message type sent between agents must have a registered serializer
+    (registering an agent with :meth:`~autogen_core.base.BaseAgent.register` registers the serializers of the
+    message types it handles).
+
+    Exceptions raised by the handlers of other shards are raised again with the same type when it can be imported
+    by name, and as :class:`Exception` otherwise. The agent instances are not accessible from the parent process, so
+    :meth:`try_get_underlying_agent_instance` raises :class:`~autogen_core.base.exceptions.NotAccessibleError`.
+
+    Agent types, subscriptions and message serializers must be registered before :meth:`start`. The child processes
+    are forked from the parent, so agent factories do not need to be picklable. This requires the ``"fork"``
+    multiprocessing start method, which is not available on Windows.
+
+    Args:
+        num_shards (int, optional): Number of child processes. Defaults to the number of CPUs.
+        intervention_handlers (List[InterventionHandler], optional): Intervention handlers used by every shard.
+            Defaults to None.
+        max_queue_size (int, optional): Maximum size of the message queue of each shard. Defaults to 0 (unbounded).
+        log_message_payloads (bool, optional): Whether message payloads are included in the message events logged
+            by the shards. Defaults to True.
+        eviction_policy (AgentEvictionPolicy, optional): Agent eviction policy used by every shard. Defaults to None.
+        scheduling_policy (AgentSchedulingPolicy, optional): Scheduling policy used by every shard. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        num_shards: int | None = None,
+        *,
+        intervention_handlers: List[InterventionHandler] | None = None,
+        max_queue_size: int = 0,
+        log_message_payloads: bool = True,
+        eviction_policy: AgentEvictionPolicy | None = None,
+        scheduling_policy: AgentSchedulingPolicy | None = None,
+    ) -> None:
+        self._num_shards = num_shards or os.cpu_count() or 1
+        self._options = _ShardOptions(
+            intervention_handlers=intervention_handlers,
+            max_queue_size=max_queue_size,
+            log_message_payloads=log_message_payloads,
+            eviction_policy=eviction_policy,
+            scheduling_policy=scheduling_policy,
+        )
+        self._registrations: List[_Registration] = []
+        self._subscriptions: List[Subscription] = []
+        self._serializers: List[MessageSerializer[Any]] = []
+        self._serialization_registry = SerializationRegistry()
+        self._shards: List[_Shard] = []
+        self._connected: Future[None] | None = None
+        self._next_request_id = 0
+        self._pending_requests: Dict[int, Future[Any]] = {}
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
+
+    @property
+    def _known_agent_names(self) -> Set[str]:
+        return {type for type, _, _ in self._registrations}
+
+    def start(self) -> None:
+        """Start the child processes."""
+        if self._connected is not None:
+            raise RuntimeError("Runtime is already started")
+        context = multiprocessing.get_context("fork")
+        parent_sockets: List[socket.socket] = []
+        for shard_index in range(self._num_shards):
+            parent_socket, child_socket = socket.socketpair()
+            process = context.Process(
+                target=_run_shard,
+                args=(
+                    shard_index,
+                    self._num_shards,
+                    child_socket,
+                    parent_sockets[:],
+                    self._registrations,
+                    self._subscriptions,
+                    self._serializers,
+                    self._options,
+                ),
+                name=f"ShardedAgentRuntime-{shard_index}",
+                daemon=True,
+            )
+            process.start()
+            child_socket.close()
+            parent_sockets.append(parent_socket)
+            self._shards.append(_Shard(process=process))
+        self._connected = asyncio.get_running_loop().create_future()
+        asyncio.ensure_future(self._connect(parent_sockets))
+
+    async def _connect(self, parent_sockets: List[socket.socket]) -> None:
+        assert self._connected is not None
+        for shard, parent_socket in zip(self._shards, parent_sockets, strict=True):
+            shard.reader, shard.writer = await asyncio.open_connection(sock=parent_socket)
+            shard.read_task = asyncio.create_task(self._route(shard))
+        self._connected.set_result(None)
+
+    async def stop(self) -> None:
+        """Stop the child processes immediately."""
+        if self._connected is None:
+            raise RuntimeError("Runtime is not started")
+        await self._connected
+        for shard in self._shards:
+            assert shard.writer is not None
+            try:
+                await _write_frame(shard.writer, ("stop",))
+            except ConnectionError:
+                pass
+        for shard in self._shards:
+            await asyncio.to_thread(shard.process.join)
+            if shard.read_task is not None:
+                await shard.read_task
+            if shard.writer is not None:
+                shard.writer.close()
+        for future in self._pending_requests.values():
+            if not future.done():
+                future.set_exception(RuntimeError("The sharded runtime was stopped."))
+        self._pending_requests.clear()
+        self._shards = []
+        self._connected = None
+
+    async def stop_when_idle(self, poll_interval: float = 0.01) -> None:
+        """Stop the child processes when no shard has a message queued or being processed and no message is in
+        transit between shards."""
+        if self._connected is None:
+            raise RuntimeError("Runtime is not started")
+        await self._connected
+        previous: Tuple[int, ...] | None = None
+        while True:
+            statuses = await asyncio.gather(*(self._call(index, "status") for index in range(self._num_shards)))
+            counts = tuple(count for shard in self._shards for count in (shard.frames_sent, shard.frames_received))
+            counts += tuple(count for _, sent, received in statuses for count in (sent, received))
+            in_transit = sum(shard.frames_sent for shard in self._shards) != sum(
+                received for _, _, received in statuses
+            ) or sum(shard.frames_received for shard in self._shards) != sum(sent for _, sent, _ in statuses)
+            # Two identical idle snapshots in a row mean that nothing happened in between.
+            if all(idle for idle, _, _ in statuses) and not in_transit and counts == previous:
+                break
+            previous = counts
+            await asyncio.sleep(poll_interval)
+        await self.stop()
+
+    async def send_message(
+        self,
+        message: Any,
+        recipient: AgentId,
+        *,
+        sender: AgentId | None = None,
+        cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        if self._connected is None:
+            raise RuntimeError("Runtime is not started")
+        if recipient.type not in self._known_agent_names:
+            raise Exception("Recipient not found")
+        await self._connected
+        if cancellation_token is None:
+            cancellation_token = CancellationToken()
+        type_name, data = _serialize(self._serialization_registry, message)
+        deadline = get_deadline(timeout)
+        shard_index = shard_for_agent(recipient, self._num_shards)
+        request_id, future = self._new_request()
+        await self._send_frame(shard_index, ("send", _PARENT, request_id, recipient, sender, type_name, data, deadline))
+
+        def cancel() -> None:
+            if request_id in self._pending_requests:
+                asyncio.ensure_future(self._send_frame(shard_index, ("cancel", _PARENT, request_id, recipient)))
+            future.cancel()
+
+        cancellation_token.add_callback(cancel)
+        deadline_timer = _expire_at_deadline(deadline, future, recipient)
+        try:
+            return await future
+        finally:
+            cancellation_token.remove_callback(cancel)
+            self._pending_requests.pop(request_id, None)
+            if deadline_timer is not None:
+                deadline_timer.cancel()
+
+    async def publish_message(
+        self,
+        message: Any,
+        topic_id: TopicId,
+        *,
+        sender: AgentId | None = None,
+        cancellation_token: CancellationToken | None = None,
+    ) -> None:
+        if self._connected is None:
+            raise RuntimeError("Runtime is not started")
+        await self._connected
+        type_name, data = _serialize(self._serialization_registry, message)
+        for shard_index in range(self._num_shards):
+            await self._send_frame(shard_index, ("publish", _PARENT, topic_id, sender, type_name, data))
+
+    async def _route(self, shard: _Shard) -> None:
+        assert shard.reader is not None
+        while True:
+            frame = await _read_frame(shard.reader)
+            if frame is None:
+                break
+            if frame[0] in _MESSAGE_FRAMES:
+                shard.frames_received += 1
+            match frame:
+                case ("send", _, _, recipient, _, _, _, _):
+                    await self._send_frame(shard_for_agent(recipient, self._num_shards), frame)
+                case ("response", origin, request_id, type_name, data, error):
+                    if origin != _PARENT:
+                        await self._send_frame(origin, frame)
+                        continue
+                    future = self._pending_requests.get(request_id)
+                    if future is not None and not future.done():
+                        _resolve_response(future, self._serialization_registry, type_name, data, error)
+                case ("cancel", _, _, recipient):
+                    await self._send_frame(shard_for_agent(recipient, self._num_shards), frame)
+                case ("publish", origin, *_):
+                    await self._broadcast(frame, exclude=origin)
+                case ("add_subscription", origin, subscription):
+                    self._subscriptions.append(subscription)
+                    await self._broadcast(frame, exclude=origin)
+                case ("remove_subscription", origin, id):
+                    self._subscriptions = [
+                        subscription for subscription in self._subscriptions if subscription.id != id
+                    ]
+                    await self._broadcast(frame, exclude=origin)
+                case ("result", request_id, result, error):
+                    future = self._pending_requests.get(request_id)
+                    if future is not None and not future.done():
+                        if error is not None:
+                            future.set_exception(_decode_error(error))
+                        else:
+                            future.set_result(result)
+                case _:
+                    logger.error("Received an unknown frame from a shard: %s", frame[0])
+
+    async def _broadcast(self, frame: Tuple[Any, ...], *, exclude: int | None = None) -> None:
+        for shard_index in range(self._num_shards):
+            if shard_index != exclude:
+                await self._send_frame(shard_index, frame)
+
+    async def _send_frame(self, shard_index: int, frame: Tuple[Any, ...]) -> None:
+        shard = self._shards[shard_index]
+        assert shard.writer is not None
+        if frame[0] in _MESSAGE_FRAMES:
+            shard.frames_sent += 1
+        await _write_frame(shard.writer, frame)
+
+    def _new_request(self) -> Tuple[int, Future[Any]]:
+        self._next_request_id += 1
+        future: Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending_requests[self._next_request_id] = future
+        return self._next_request_id, future
+
+    async def _call(self, shard_index: int, method: str, *args: Any) -> Any:
+        if self._connected is None:
+            raise RuntimeError("Runtime is not started")
+        await self._connected
+        request_id, future = self._new_request()
+        await self._send_frame(shard_index, ("call", request_id, method, args))
+        try:
+            return await future
+        finally:
+            self._pending_requests.pop(request_id, None)
+
+    async def save_state(self) -> Mapping[str, Any]:
+        state: Dict[str, Any] = {}
+        for shard_state in await asyncio.gather(
+            *(self._call(index, "save_state") for index in range(self._num_shards))
+        ):
+            state.update(shard_state)
+        return state
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        await asyncio.gather(*(self._call(index, "load_state", dict(state)) for index in range(self._num_shards)))
+
+    async def agent_metadata(self, agent: AgentId) -> AgentMetadata:
+        metadata: AgentMetadata = await self._call(shard_for_agent(agent, self._num_shards), "agent_metadata", agent)
+        return metadata
+
+    async def agent_save_state(self, agent: AgentId) -> Mapping[str, Any]:
+        state: Mapping[str, Any] = await self._call(shard_for_agent(agent, self._num_shards), "agent_save_state", agent)
+        return state
+
+    async def agent_load_state(self, agent: AgentId, state: Mapping[str, Any]) -> None:
+        await self._call(shard_for_agent(agent, self._num_shards), "agent_load_state", agent, dict(state))
+
+    @deprecated(
+        "Use your agent's `register` method directly instead of this method. See documentation for latest usage."
+    )
+    async def register(
+        self,
+        type: str,
+        agent_factory: Callable[[], T | Awaitable[T]] | Callable[[AgentRuntime, AgentId], T | Awaitable[T]],
+        subscriptions: Callable[[], list[Subscription] | Awaitable[list[Subscription]]]
+        | list[Subscription]
+        | None = None,
+    ) -> AgentType:
+        self._check_not_started()
+        if type in self._known_agent_names:
+            raise ValueError(f"Agent with type {type} already exists.")
+
+        if subscriptions is not None:
+            if callable(subscriptions):
+                with SubscriptionInstantiationContext.populate_context(AgentType(type)):
+                    subscriptions_list_result = subscriptions()
+                    if inspect.isawaitable(subscriptions_list_result):
+                        subscriptions_list = await subscriptions_list_result
+                    else:
+                        subscriptions_list = subscriptions_list_result
+            else:
+                subscriptions_list = subscriptions
+
+            for subscription in subscriptions_list:
+                await self.add_subscription(subscription)
+
+        self._registrations.append((type, agent_factory, None))
+        return AgentType(type)
+
+    async def register_factory(
+        self,
+        *,
+        type: AgentType,
+        agent_factory: Callable[[], T | Awaitable[T]],
+        expected_class: type[T],
+    ) -> AgentType:
+        self._check_not_started()
+        if type.type in self._known_agent_names:
+            raise ValueError(f"Agent with type {type} already exists.")
+        self._registrations.append((type.type, agent_factory, expected_class))
+        return type
+
+    # TODO: uncomment out the following type ignore when this is fixed in mypy: https://github.com/python/mypy/issues/3737
+    async def try_get_underlying_agent_instance(self, id: AgentId, type: Type[T] = Agent) -> T:  # type: ignore[assignment]
+        if id.type not in self._known_agent_names:
+            raise LookupError(f"Agent with name {id.type} not found.")
+        raise NotAccessibleError("Agents of a ShardedAgentRuntime are hosted by child processes.")
+
+    async def add_subscription(self, subscription: Subscription) -> None:
+        self._subscriptions.append(subscription)
+        if self._connected is not None:
+            await self._connected
+            await self._broadcast(("add_subscription", _PARENT, subscription))
+
+    async def remove_subscription(self, id: str) -> None:
+        if not any(subscription.id == id for subscription in self._subscriptions):
+            raise ValueError(f"Subscription with id {id} not found")
+        self._subscriptions = [subscription for subscription in self._subscriptions if subscription.id != id]
+        if self._connected is not None:
+            await self._connected
+            await self._broadcast(("remove_subscription", _PARENT, id))
+
+    async def get(
+        self, id_or_type: AgentId | AgentType | str, /, key: str = "default", *, lazy: bool = True
+    ) -> AgentId:
+        async def instantiate(agent_id: AgentId) -> None:
+            await self._call(shard_for_agent(agent_id, self._num_shards), "instantiate", agent_id)
+
+        return await get_impl(id_or_type=id_or_type, key=key, lazy=lazy, instance_getter=instantiate)
+
+    def add_message_serializer(self, serializer: MessageSerializer[Any] | Sequence[MessageSerializer[Any]]) -> None:
+        self._check_not_started()
+        self._serialization_registry.add_serializer(serializer)
+        if isinstance(serializer, Sequence):
+            self._serializers.extend(serializer)
+        else:
+            self._serializers.append(serializer)
+
+    def _check_not_started(self) -> None:
+        if self._connected is not None:
+            raise RuntimeError("Agents and message serializers must be registered before the runtime is started.")
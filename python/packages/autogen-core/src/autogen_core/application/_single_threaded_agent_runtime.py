@@ -1,20 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
 import inspect
 import logging
 import threading
+import time
 import warnings
 from asyncio import CancelledError, Future, Task
 from collections.abc import Sequence
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Awaitable, Callable, Dict, List, Mapping, ParamSpec, Set, Type, TypeVar, cast
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, ParamSpec, Set, Tuple, Type, TypeVar, cast
 
+from opentelemetry.metrics import MeterProvider
 from opentelemetry.trace import TracerProvider
 from typing_extensions import deprecated
 
-from autogen_core.base._serialization import MessageSerializer, SerializationRegistry
+from autogen_core.base._serialization import JsonCodec, MessageSerializer, SerializationRegistry
 
 from ..base import (
     Agent,
@@ -23,6 +28,7 @@ from ..base import (
     AgentMetadata,
     AgentRuntime,
     AgentType,
+    BaseAgent,
     CancellationToken,
     MessageContext,
     MessageHandlerContext,
@@ -32,8 +38,21 @@ from ..base import (
 )
 from ..base.exceptions import MessageDroppedException
 from ..base.intervention import DropMessage, InterventionHandler
-from ._helpers import SubscriptionManager, get_impl
-from .telemetry import EnvelopeMetadata, MessageRuntimeTracingConfig, TraceHelper, get_telemetry_envelope_metadata
+from ._agent_instance_cache import AgentEvictionPolicy, AgentInstanceCache
+from ._agent_scheduler import AgentScheduler, AgentSchedulingPolicy
+from ._agent_state_store import AgentStateStore
+from ._helpers import SubscriptionManager, call_at_deadline, get_deadline, get_impl
+from ._intervention_chains import InterventionChains
+from ._message_queue import MessageQueue, QueueFullPolicy
+from ._message_store import MessageStore, StoredEnvelope
+from .logging.events import DeliveryStage, MessageEvent, MessageKind
+from .telemetry import (
+    EnvelopeMetadata,
+    MessageRuntimeTracingConfig,
+    MetricsHelper,
+    TraceHelper,
+    get_telemetry_envelope_metadata,
+)
 
 logger = logging.getLogger("autogen_core")
 event_logger = logging.getLogger("autogen_core.events")
@@ -53,6 +72,7 @@ class PublishMessageEnvelope:
     sender: AgentId | None
     topic_id: TopicId
     metadata: EnvelopeMetadata | None = None
+    stored_id: int | None = None
 
 
 @dataclass(kw_only=True)
@@ -65,7 +85,12 @@ class SendMessageEnvelope:
     recipient: AgentId
     future: Future[Any]
     cancellation_token: CancellationToken
+    deadline: float | None = None
     metadata: EnvelopeMetadata | None = None
+    stored_id: int | None = None
+
+    def expired(self) -> bool:
+        return self.deadline is not None and self.deadline <= time.time()
 
 
 @dataclass(kw_only=True)
@@ -82,6 +107,9 @@ class ResponseMessageEnvelope:
 P = ParamSpec("P")
 T = TypeVar("T", bound=Agent)
 
+# ID in the message store of the envelope whose handler is running, recorded as the cause of the messages it sends.
+_handled_envelope_id: ContextVar[int | None] = ContextVar("_handled_envelope_id", default=None)
+
 
 class Counter:
     def __init__(self) -> None:
@@ -112,32 +140,41 @@ class RunContext:
         self._runtime = runtime
         self._run_state = RunContext.RunState.RUNNING
         self._end_condition: Callable[[], bool] = self._stop_when_cancelled
+        self._wakeup = asyncio.Event()
         self._run_task = asyncio.create_task(self._run())
-        self._lock = asyncio.Lock()
+
+    def notify(self) -> None:
+        """Wake the run loop so that it processes newly queued messages and re-checks its end condition."""
+        self._wakeup.set()
 
     async def _run(self) -> None:
         while True:
-            async with self._lock:
-                if self._end_condition():
-                    return
+            if self._end_condition():
+                return
+
+            if len(self._runtime._message_queue) == 0:
+                # Sleep until a message is queued, a task finishes or the end condition changes.
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
 
-                await self._runtime.process_next()
+            await self._runtime.process_next()
 
     async def stop(self) -> None:
-        async with self._lock:
-            self._run_state = RunContext.RunState.CANCELLED
-            self._end_condition = self._stop_when_cancelled
+        self._run_state = RunContext.RunState.CANCELLED
+        self._end_condition = self._stop_when_cancelled
+        self.notify()
         await self._run_task
 
     async def stop_when_idle(self) -> None:
-        async with self._lock:
-            self._run_state = RunContext.RunState.UNTIL_IDLE
-            self._end_condition = self._stop_when_idle
+        self._run_state = RunContext.RunState.UNTIL_IDLE
+        self._end_condition = self._stop_when_idle
+        self.notify()
         await self._run_task
 
     async def stop_when(self, condition: Callable[[], bool]) -> None:
-        async with self._lock:
-            self._end_condition = condition
+        self._end_condition = condition
+        self.notify()
         await self._run_task
 
     def _stop_when_cancelled(self) -> bool:
@@ -148,31 +185,128 @@ class RunContext:
 
 
 class SingleThreadedAgentRuntime(AgentRuntime):
+    """A single-threaded agent runtime that processes all messages using a single asyncio queue.
+
+    Args:
+        intervention_handlers (List[InterventionHandler], optional): A list of intervention handlers that can intercept
+            messages before they are sent or published. A handler is only called for the message types and kinds of
+            envelope it intercepts, see :class:`~autogen_core.base.intervention.InterventionHandler`. Defaults to None.
+        tracer_provider (TracerProvider, optional): The tracer provider to use for tracing. Defaults to None.
+        meter_provider (MeterProvider, optional): The meter provider used to report the runtime's metrics: message
+            queue depth, outstanding tasks, processed messages by envelope kind, message handler and intervention
+            handler durations, and the number of instantiated agents. Defaults to None.
+        metrics_agent_keys (bool, optional): Whether message handler durations are also reported per agent key,
+            rather than per agent type only. Every key adds a time series, so only enable this when the number of
+            agent keys is small. Defaults to False.
+        max_queue_size (int, optional): Maximum number of sent and published messages waiting in the message queue.
+            If less than or equal to zero, the queue is unbounded. Responses are never counted against this limit.
+            Defaults to 0.
+        queue_full_policy (QueueFullPolicy, optional): What :meth:`send_message` and :meth:`publish_message` do when
+            the message queue is full. ``"block"`` waits for free space, ``"drop_oldest"`` drops the oldest queued
+            published message (waiting for free space if there is none), and ``"reject"`` raises
+            :class:`~autogen_core.base.exceptions.MessageQueueFullException`. Defaults to "block".
+        log_message_payloads (bool, optional): Whether message payloads are included in the
+            :class:`~autogen_core.application.logging.events.MessageEvent` records emitted on the
+            ``autogen_core.events`` logger. Set to False to never render payloads. Defaults to True.
+        eviction_policy (AgentEvictionPolicy, optional): Limits on the number of agent instances kept in memory and
+            on how long they may stay idle. Evicted agents have their state saved to `state_store` and are
+            re-created with that state on their next message. Defaults to never evicting agents.
+        state_store (AgentStateStore, optional): Where the state of evicted agents and the state saved by
+            :meth:`checkpoint` is kept. Defaults to
+            `message_store` if it is set, otherwise to an :class:`InMemoryAgentStateStore`.
+        message_store (MessageStore, optional): Durable store for queued messages. Sent and published messages are
+            written to it when they are queued and acknowledged once their handlers complete, and the state of an
+            agent is checkpointed to `state_store` after each of its handlers completes. When the runtime starts,
+            messages left unacknowledged by a previous run are delivered again, except for those sent by a handler
+            whose own message is delivered again, since that handler sends them anew. Delivery is at least once:
+            a message whose handler completed just before a crash may be handled again. Messages sent to
+            the runtime must have registered serializers to be stored. Defaults to keeping messages in memory only.
+        scheduling_policy (AgentSchedulingPolicy, optional): Per-agent concurrency limits and weights used to
+            schedule message handlers fairly across agents. Defaults to running every handler as soon as its message
+            is processed. Responses are always delivered ahead of queued messages.
+        warm_agents (Sequence[AgentId], optional): Agents to instantiate ahead of their first message. They are
+            created concurrently when the runtime starts, or when their agent type is registered on a started
+            runtime. Defaults to creating every agent on its first message.
+        json_codec (JsonCodec, optional): The codec used by the dataclass JSON serializers added to the runtime,
+            for example :class:`~autogen_core.base.OrjsonCodec`. Defaults to the standard library's :mod:`json`.
+    """
+
     def __init__(
         self,
         *,
         intervention_handlers: List[InterventionHandler] | None = None,
         tracer_provider: TracerProvider | None = None,
+        meter_provider: MeterProvider | None = None,
+        metrics_agent_keys: bool = False,
+        max_queue_size: int = 0,
+        queue_full_policy: QueueFullPolicy = "block",
+        log_message_payloads: bool = True,
+        eviction_policy: AgentEvictionPolicy | None = None,
+        state_store: AgentStateStore | None = None,
+        scheduling_policy: AgentSchedulingPolicy | None = None,
+        warm_agents: Sequence[AgentId] | None = None,
+        message_store: MessageStore | None = None,
+        json_codec: JsonCodec | None = None,
     ) -> None:
         self._tracer_helper = TraceHelper(tracer_provider, MessageRuntimeTracingConfig("SingleThreadedAgentRuntime"))
-        self._message_queue: List[PublishMessageEnvelope | SendMessageEnvelope | ResponseMessageEnvelope] = []
+        self._message_queue: MessageQueue[PublishMessageEnvelope | SendMessageEnvelope | ResponseMessageEnvelope] = (
+            MessageQueue(
+                max_queue_size,
+                full_policy=queue_full_policy,
+                is_sheddable=lambda envelope: isinstance(envelope, PublishMessageEnvelope),
+            )
+        )
         # (namespace, type) -> List[AgentId]
+        # Agent type -> factory and its number of parameters, which is only inspected once.
         self._agent_factories: Dict[
-            str, Callable[[], Agent | Awaitable[Agent]] | Callable[[AgentRuntime, AgentId], Agent | Awaitable[Agent]]
+            str,
+            Tuple[
+                Callable[[], Agent | Awaitable[Agent]] | Callable[[AgentRuntime, AgentId], Agent | Awaitable[Agent]],
+                int,
+            ],
         ] = {}
-        self._instantiated_agents: Dict[AgentId, Agent] = {}
-        self._intervention_handlers = intervention_handlers
+        self._agent_instances = AgentInstanceCache(
+            eviction_policy, state_store if state_store is not None else message_store
+        )
+        self._message_store = message_store
+        self._recovery: Task[None] | None = None
+        self._unstored_types: Set[str] = set()
+        self._scheduler = AgentScheduler(scheduling_policy)
+        self._warm_agents = list(warm_agents or [])
+        self._intervention_chains = InterventionChains(intervention_handlers)
         self._outstanding_tasks = Counter()
         self._background_tasks: Set[Task[Any]] = set()
         self._subscription_manager = SubscriptionManager()
         self._run_context: RunContext | None = None
-        self._serialization_registry = SerializationRegistry()
+        self._serialization_registry = SerializationRegistry(json_codec)
+        self._log_message_payloads = log_message_payloads
+        self._metrics_helper = MetricsHelper(
+            meter_provider, "SingleThreadedAgentRuntime", record_agent_keys=metrics_agent_keys
+        )
+        self._metrics_helper.observe_gauge(
+            "runtime.queue.depth",
+            lambda: len(self._message_queue),
+            unit="{message}",
+            description="Number of messages waiting in the message queue.",
+        )
+        self._metrics_helper.observe_gauge(
+            "runtime.outstanding_tasks",
+            self._outstanding_tasks.get,
+            unit="{task}",
+            description="Number of messages being processed.",
+        )
+        self._metrics_helper.observe_gauge(
+            "runtime.agent_instances",
+            lambda: len(self._agent_instances),
+            unit="{agent}",
+            description="Number of instantiated agents.",
+        )
 
     @property
     def unprocessed_messages(
         self,
     ) -> Sequence[PublishMessageEnvelope | SendMessageEnvelope | ResponseMessageEnvelope]:
-        return self._message_queue
+        return self._message_queue.items
 
     @property
     def outstanding_tasks(self) -> int:
@@ -190,19 +324,14 @@ class SingleThreadedAgentRuntime(AgentRuntime):
         *,
         sender: AgentId | None = None,
         cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
     ) -> Any:
         if cancellation_token is None:
             cancellation_token = CancellationToken()
 
-        # event_logger.info(
-        #     MessageEvent(
-        #         payload=message,
-        #         sender=sender,
-        #         receiver=recipient,
-        #         kind=MessageKind.DIRECT,
-        #         delivery_stage=DeliveryStage.SEND,
-        #     )
-        # )
+        self._log_message_event(
+            message, sender=sender, receiver=recipient, kind=MessageKind.DIRECT, delivery_stage=DeliveryStage.SEND
+        )
 
         with self._tracer_helper.trace_block(
             "create",
@@ -214,23 +343,50 @@ class SingleThreadedAgentRuntime(AgentRuntime):
             if recipient.type not in self._known_agent_names:
                 future.set_exception(Exception("Recipient not found"))
 
-            content = message.__dict__ if hasattr(message, "__dict__") else message
-            logger.info(f"Sending message of type {type(message).__name__} to {recipient.type}: {content}")
-
-            self._message_queue.append(
-                SendMessageEnvelope(
-                    message=message,
-                    recipient=recipient,
-                    future=future,
-                    cancellation_token=cancellation_token,
-                    sender=sender,
-                    metadata=get_telemetry_envelope_metadata(),
+            deadline = get_deadline(timeout)
+            handler_cancellation_token = cancellation_token
+            deadline_timer: asyncio.TimerHandle | None = None
+            if deadline is not None:
+                # The handler gets its own token so that the deadline does not cancel the caller's token.
+                handler_cancellation_token = CancellationToken()
+                deadline_timer = call_at_deadline(
+                    deadline, functools.partial(self._expire, future, handler_cancellation_token, recipient)
                 )
-            )
 
-            cancellation_token.link_future(future)
+            def cancel() -> None:
+                future.cancel()
+                if handler_cancellation_token is not cancellation_token:
+                    handler_cancellation_token.cancel()
+
+            # The callback is removed once the request completes, so that a long-lived token does not keep the
+            # callbacks of every request made with it.
+            cancellation_token.add_callback(cancel)
+            try:
+                # A handler sending the message gives up its scheduling slot until the response arrives, so that the
+                # recipient, and the agents it sends messages to in turn, can run.
+                async with self._scheduler.nested_request():
+                    await self._enqueue(
+                        SendMessageEnvelope(
+                            message=message,
+                            recipient=recipient,
+                            future=future,
+                            cancellation_token=handler_cancellation_token,
+                            sender=sender,
+                            deadline=deadline,
+                            metadata=get_telemetry_envelope_metadata(),
+                        )
+                    )
+                    return await future
+            finally:
+                cancellation_token.remove_callback(cancel)
+                if deadline_timer is not None:
+                    deadline_timer.cancel()
 
-            return await future
+    @staticmethod
+    def _expire(future: Future[Any], cancellation_token: CancellationToken, recipient: AgentId) -> None:
+        if not future.done():
+            future.set_exception(TimeoutError(f"No response from {recipient} before the deadline."))
+        cancellation_token.cancel()
 
     async def publish_message(
         self,
@@ -248,20 +404,11 @@ class SingleThreadedAgentRuntime(AgentRuntime):
         ):
             if cancellation_token is None:
                 cancellation_token = CancellationToken()
-            content = message.__dict__ if hasattr(message, "__dict__") else message
-            logger.info(f"Publishing message of type {type(message).__name__} to all subscribers: {content}")
-
-            # event_logger.info(
-            #     MessageEvent(
-            #         payload=message,
-            #         sender=sender,
-            #         receiver=None,
-            #         kind=MessageKind.PUBLISH,
-            #         delivery_stage=DeliveryStage.SEND,
-            #     )
-            # )
-
-            self._message_queue.append(
+            self._log_message_event(
+                message, sender=sender, receiver=None, kind=MessageKind.PUBLISH, delivery_stage=DeliveryStage.SEND
+            )
+
+            await self._enqueue(
                 PublishMessageEnvelope(
                     message=message,
                     cancellation_token=cancellation_token,
@@ -271,74 +418,289 @@ class SingleThreadedAgentRuntime(AgentRuntime):
                 )
             )
 
+    async def _enqueue(self, message_envelope: PublishMessageEnvelope | SendMessageEnvelope) -> None:
+        if self._message_store is not None:
+            # Messages left over from a previous run are queued ahead of new ones.
+            await self._recover()
+            await self._store(message_envelope)
+        dropped = await self._message_queue.put(message_envelope)
+        if dropped is not None:
+            logger.warning(
+                f"Message queue is full, dropped the oldest queued message of type {type(dropped.message).__name__}."
+            )
+        self._notify_run_context()
+
+    async def _store(self, message_envelope: PublishMessageEnvelope | SendMessageEnvelope) -> None:
+        assert self._message_store is not None
+        message = message_envelope.message
+        type_name = self._serialization_registry.type_name(message)
+        if not self._serialization_registry.content_types(type_name):
+            if type_name not in self._unstored_types:
+                self._unstored_types.add(type_name)
+                logger.warning(f"No serializer registered for message type {type_name}, its messages are not stored.")
+            return
+        data_content_type = self._serialization_registry.preferred_content_type(type_name)
+        data = self._serialization_registry.serialize(message, type_name=type_name, data_content_type=data_content_type)
+        if isinstance(message_envelope, SendMessageEnvelope):
+            stored = StoredEnvelope(
+                kind="send",
+                sender=message_envelope.sender,
+                recipient=message_envelope.recipient,
+                data_type=type_name,
+                data_content_type=data_content_type,
+                data=data,
+                cause=_handled_envelope_id.get(),
+            )
+        else:
+            stored = StoredEnvelope(
+                kind="publish",
+                sender=message_envelope.sender,
+                topic_id=message_envelope.topic_id,
+                data_type=type_name,
+                data_content_type=data_content_type,
+                data=data,
+                cause=_handled_envelope_id.get(),
+            )
+        message_envelope.stored_id = await self._message_store.append(stored)
+
+    async def _ack(self, message_envelope: PublishMessageEnvelope | SendMessageEnvelope) -> None:
+        if self._message_store is not None and message_envelope.stored_id is not None:
+            await self._message_store.ack(message_envelope.stored_id)
+
+    async def _checkpoint(self, agent_ids: Iterable[AgentId]) -> None:
+        # The agents that handled a message before it is acknowledged, skipping those whose state was saved since.
+        if self._message_store is None:
+            return
+        try:
+            await self._agent_instances.checkpoint(agent_ids)
+        except Exception:
+            logger.error("Failed to checkpoint the state of agents", exc_info=True)
+
+    def _start_recovery(self) -> Task[None]:
+        if self._recovery is None:
+            self._outstanding_tasks.increment()
+            self._recovery = asyncio.create_task(self._redeliver())
+            self._recovery.add_done_callback(self._on_recovery_done)
+        return self._recovery
+
+    async def _recover(self) -> None:
+        await asyncio.wait([self._start_recovery()])
+
+    def _on_recovery_done(self, task: Task[None]) -> None:
+        self._outstanding_tasks.decrement()
+        self._notify_run_context()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Failed to redeliver stored messages", exc_info=task.exception())
+
+    async def _redeliver(self) -> None:
+        assert self._message_store is not None
+        pending = await self._message_store.pending()
+        pending_ids = {envelope_id for envelope_id, _ in pending}
+        redelivered = 0
+        # Messages that cannot be redelivered now, which are left in the store for the next start.
+        skipped: Set[int] = set()
+        for envelope_id, stored in pending:
+            if stored.cause in skipped:
+                # Sent by the handler of a skipped message, which sends it anew once it is redelivered.
+                skipped.add(envelope_id)
+                continue
+            if stored.cause in pending_ids:
+                # The handler that sent this message is run again and sends it anew.
+                await self._message_store.ack(envelope_id)
+                continue
+            try:
+                message = self._serialization_registry.deserialize(
+                    stored.data, type_name=stored.data_type, data_content_type=stored.data_content_type
+                )
+            except Exception:
+                logger.error(
+                    f"Failed to deserialize stored message {envelope_id} of type {stored.data_type}, "
+                    "it is left in the store",
+                    exc_info=True,
+                )
+                skipped.add(envelope_id)
+                continue
+            envelope: PublishMessageEnvelope | SendMessageEnvelope
+            if stored.kind == "publish":
+                assert stored.topic_id is not None
+                envelope = PublishMessageEnvelope(
+                    message=message,
+                    cancellation_token=CancellationToken(),
+                    sender=stored.sender,
+                    topic_id=stored.topic_id,
+                    stored_id=envelope_id,
+                )
+            else:
+                assert stored.recipient is not None
+                # Nobody is waiting for the response to a message sent before the restart.
+                future: Future[Any] = asyncio.get_running_loop().create_future()
+                future.add_done_callback(self._on_redelivered_response)
+                envelope = SendMessageEnvelope(
+                    message=message,
+                    sender=stored.sender,
+                    recipient=stored.recipient,
+                    future=future,
+                    cancellation_token=CancellationToken(),
+                    stored_id=envelope_id,
+                )
+            await self._message_queue.put(envelope)
+            self._notify_run_context()
+            redelivered += 1
+        if redelivered > 0:
+            logger.info(f"Redelivering {redelivered} stored messages.")
+        if skipped:
+            logger.warning(f"Left {len(skipped)} stored messages that cannot be redelivered in the store.")
+
+    @staticmethod
+    def _on_redelivered_response(future: Future[Any]) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Error handling a redelivered message", exc_info=future.exception())
+
+    def _log_message_event(
+        self,
+        message: Any,
+        *,
+        sender: AgentId | None,
+        receiver: AgentId | None,
+        kind: MessageKind,
+        delivery_stage: DeliveryStage,
+    ) -> None:
+        # Check the level first so that nothing is built on the hot path unless a handler will emit the record.
+        # The payload itself is only rendered when the record is formatted.
+        if event_logger.isEnabledFor(logging.INFO):
+            event_logger.info(
+                MessageEvent(
+                    payload=message if self._log_message_payloads else None,
+                    sender=sender,
+                    receiver=receiver,
+                    kind=kind,
+                    delivery_stage=delivery_stage,
+                )
+            )
+
+    def _notify_run_context(self) -> None:
+        if self._run_context is not None:
+            self._run_context.notify()
+
+    def _on_background_task_done(self, task: Task[Any]) -> None:
+        self._background_tasks.discard(task)
+        self._notify_run_context()
+
     async def save_state(self) -> Mapping[str, Any]:
         state: Dict[str, Dict[str, Any]] = {}
-        for agent_id in self._instantiated_agents:
+        for agent_id in list(self._agent_instances):
             state[str(agent_id)] = dict(await (await self._get_agent(agent_id)).save_state())
+        # Include the agents that have been evicted and not re-created since.
+        state_store = self._agent_instances.state_store
+        for agent_id in await state_store.agent_ids():
+            if str(agent_id) not in state:
+                saved_state = await state_store.load(agent_id)
+                if saved_state is not None:
+                    state[str(agent_id)] = dict(saved_state)
         return state
 
     async def load_state(self, state: Mapping[str, Any]) -> None:
+        """Load the state of the runtime's agents.
+
+        Agents that are instantiated load their state immediately. The state of other agents is written to the
+        state store and loaded when they are first instantiated."""
         for agent_id_str in state:
             agent_id = AgentId.from_str(agent_id_str)
-            if agent_id.type in self._known_agent_names:
-                await (await self._get_agent(agent_id)).load_state(state[str(agent_id)])
+            if agent_id.type not in self._known_agent_names:
+                continue
+            agent = self._agent_instances.get(agent_id)
+            if agent is None:
+                await self._agent_instances.state_store.save(agent_id, state[agent_id_str])
+            else:
+                await agent.load_state(state[agent_id_str])
+                self._agent_instances.mark_dirty(agent_id)
+
+    async def checkpoint(self) -> int:
+        """Save the state of the agents that have handled a message or loaded state since the last checkpoint to
+        the runtime's state store.
+
+        Agents whose state has not changed are skipped, so a checkpoint costs in proportion to the number of agents
+        that were active since the previous one. Changes made to an agent instance outside of its message handlers,
+        for example through :meth:`try_get_underlying_agent_instance`, are not tracked. A runtime created with the
+        same state store restores each agent from its checkpoint when the agent is first instantiated.
+
+        Returns:
+            int: The number of agents whose state was saved.
+        """
+        return await self._agent_instances.checkpoint()
 
     async def _process_send(self, message_envelope: SendMessageEnvelope) -> None:
         with self._tracer_helper.trace_block("send", message_envelope.recipient, parent=message_envelope.metadata):
             recipient = message_envelope.recipient
+            _handled_envelope_id.set(message_envelope.stored_id)
             # todo: check if recipient is in the known namespaces
             # assert recipient in self._agents
 
             try:
                 # TODO use id
-                sender_name = message_envelope.sender.type if message_envelope.sender is not None else "Unknown"
                 logger.info(
-                    f"Calling message handler for {recipient} with message type {type(message_envelope.message).__name__} sent by {sender_name}"
+                    "Calling message handler for %s with message type %s sent by %s",
+                    recipient,
+                    type(message_envelope.message).__name__,
+                    message_envelope.sender.type if message_envelope.sender is not None else "Unknown",
+                )
+                self._log_message_event(
+                    message_envelope.message,
+                    sender=message_envelope.sender,
+                    receiver=recipient,
+                    kind=MessageKind.DIRECT,
+                    delivery_stage=DeliveryStage.DELIVER,
                 )
-                # event_logger.info(
-                #     MessageEvent(
-                #         payload=message_envelope.message,
-                #         sender=message_envelope.sender,
-                #         receiver=recipient,
-                #         kind=MessageKind.DIRECT,
-                #         delivery_stage=DeliveryStage.DELIVER,
-                #     )
-                # )
                 recipient_agent = await self._get_agent(recipient)
                 message_context = MessageContext(
                     sender=message_envelope.sender,
                     topic_id=None,
                     is_rpc=True,
                     cancellation_token=message_envelope.cancellation_token,
+                    deadline=message_envelope.deadline,
                 )
-                with MessageHandlerContext.populate_context(recipient_agent.id):
-                    response = await recipient_agent.on_message(
-                        message_envelope.message,
-                        ctx=message_context,
+                with (
+                    self._agent_instances.in_use(recipient),
+                    MessageHandlerContext.populate_context(recipient_agent.id, message_envelope.deadline),
+                ):
+                    response = await self._scheduler.run(
+                        recipient,
+                        functools.partial(
+                            self._call_message_handler, recipient_agent, message_envelope.message, message_context
+                        ),
+                        message_envelope.cancellation_token,
                     )
-            except CancelledError as e:
-                if not message_envelope.future.cancelled():
-                    message_envelope.future.set_exception(e)
-                self._outstanding_tasks.decrement()
-                return
+                await self._checkpoint([recipient])
             except BaseException as e:
-                message_envelope.future.set_exception(e)
+                # The future is already done if the sender was cancelled or the deadline passed.
+                if not message_envelope.future.done():
+                    message_envelope.future.set_exception(e)
+                await self._ack(message_envelope)
                 self._outstanding_tasks.decrement()
                 return
 
-            self._message_queue.append(
+            await self._ack(message_envelope)
+
+            # Responses bypass the queue capacity and are delivered ahead of queued messages so that in-flight
+            # requests complete without waiting behind new work.
+            self._message_queue.put_nowait(
                 ResponseMessageEnvelope(
                     message=response,
                     future=message_envelope.future,
                     sender=message_envelope.recipient,
                     recipient=message_envelope.sender,
                     metadata=get_telemetry_envelope_metadata(),
-                )
+                ),
+                priority=True,
             )
             self._outstanding_tasks.decrement()
 
     async def _process_publish(self, message_envelope: PublishMessageEnvelope) -> None:
         with self._tracer_helper.trace_block("publish", message_envelope.topic_id, parent=message_envelope.metadata):
+            # Recipients are kept from being evicted until every one of them has handled the message.
+            pinned_agents = contextlib.ExitStack()
+            _handled_envelope_id.set(message_envelope.stored_id)
+            recipients: List[AgentId] = []
             try:
                 responses: List[Awaitable[Any]] = []
                 recipients = await self._subscription_manager.get_subscribed_recipients(message_envelope.topic_id)
@@ -347,22 +709,19 @@ class SingleThreadedAgentRuntime(AgentRuntime):
                     if message_envelope.sender is not None and agent_id == message_envelope.sender:
                         continue
 
-                    sender_agent = (
-                        await self._get_agent(message_envelope.sender) if message_envelope.sender is not None else None
-                    )
-                    sender_name = str(sender_agent.id) if sender_agent is not None else "Unknown"
                     logger.info(
-                        f"Calling message handler for {agent_id.type} with message type {type(message_envelope.message).__name__} published by {sender_name}"
+                        "Calling message handler for %s with message type %s published by %s",
+                        agent_id.type,
+                        type(message_envelope.message).__name__,
+                        message_envelope.sender if message_envelope.sender is not None else "Unknown",
+                    )
+                    self._log_message_event(
+                        message_envelope.message,
+                        sender=message_envelope.sender,
+                        receiver=agent_id,
+                        kind=MessageKind.PUBLISH,
+                        delivery_stage=DeliveryStage.DELIVER,
                     )
-                    # event_logger.info(
-                    #     MessageEvent(
-                    #         payload=message_envelope.message,
-                    #         sender=message_envelope.sender,
-                    #         receiver=agent,
-                    #         kind=MessageKind.PUBLISH,
-                    #         delivery_stage=DeliveryStage.DELIVER,
-                    #     )
-                    # )
                     message_context = MessageContext(
                         sender=message_envelope.sender,
                         topic_id=message_envelope.topic_id,
@@ -370,14 +729,19 @@ class SingleThreadedAgentRuntime(AgentRuntime):
                         cancellation_token=message_envelope.cancellation_token,
                     )
                     agent = await self._get_agent(agent_id)
+                    pinned_agents.enter_context(self._agent_instances.in_use(agent_id))
 
                     async def _on_message(agent: Agent, message_context: MessageContext) -> Any:
                         with self._tracer_helper.trace_block("process", agent.id, parent=None):
                             with MessageHandlerContext.populate_context(agent.id):
-                                return await agent.on_message(
-                                    message_envelope.message,
-                                    ctx=message_context,
+                                response = await self._scheduler.run(
+                                    agent.id,
+                                    functools.partial(
+                                        self._call_message_handler, agent, message_envelope.message, message_context
+                                    ),
+                                    message_context.cancellation_token,
                                 )
+                                return response
 
                     future = _on_message(agent, message_context)
                     responses.append(future)
@@ -389,30 +753,27 @@ class SingleThreadedAgentRuntime(AgentRuntime):
                     return
                 logger.error("Error processing publish message", exc_info=True)
             finally:
+                pinned_agents.close()
+                await self._checkpoint(recipients)
+                await self._ack(message_envelope)
                 self._outstanding_tasks.decrement()
             # TODO if responses are given for a publish
 
+    async def _call_message_handler(self, agent: Agent, message: Any, ctx: MessageContext) -> Any:
+        with self._metrics_helper.measure_handler(agent.id, message):
+            return await agent.on_message(message, ctx=ctx)
+
     async def _process_response(self, message_envelope: ResponseMessageEnvelope) -> None:
         with self._tracer_helper.trace_block("ack", message_envelope.recipient, parent=message_envelope.metadata):
-            content = (
-                message_envelope.message.__dict__
-                if hasattr(message_envelope.message, "__dict__")
-                else message_envelope.message
+            self._log_message_event(
+                message_envelope.message,
+                sender=message_envelope.sender,
+                receiver=message_envelope.recipient,
+                kind=MessageKind.RESPOND,
+                delivery_stage=DeliveryStage.DELIVER,
             )
-            logger.info(
-                f"Resolving response with message type {type(message_envelope.message).__name__} for recipient {message_envelope.recipient} from {message_envelope.sender.type}: {content}"
-            )
-            # event_logger.info(
-            #     MessageEvent(
-            #         payload=message_envelope.message,
-            #         sender=message_envelope.sender,
-            #         receiver=message_envelope.recipient,
-            #         kind=MessageKind.RESPOND,
-            #         delivery_stage=DeliveryStage.DELIVER,
-            #     )
-            # )
             self._outstanding_tasks.decrement()
-            if not message_envelope.future.cancelled():
+            if not message_envelope.future.done():
                 message_envelope.future.set_result(message_envelope.message)
 
     async def process_next(self) -> None:
@@ -422,70 +783,95 @@ class SingleThreadedAgentRuntime(AgentRuntime):
             # Yield control to the event loop to allow other tasks to run
             await asyncio.sleep(0)
             return
-        message_envelope = self._message_queue.pop(0)
+        message_envelope = self._message_queue.get_nowait()
 
         match message_envelope:
             case SendMessageEnvelope(message=message, sender=sender, recipient=recipient, future=future):
-                if self._intervention_handlers is not None:
-                    for handler in self._intervention_handlers:
-                        with self._tracer_helper.trace_block(
-                            "intercept", handler.__class__.__name__, parent=message_envelope.metadata
-                        ):
-                            try:
+                self._metrics_helper.record_message("send")
+                if message_envelope.cancellation_token.is_cancelled():
+                    # The sender has already been cancelled, so there is no point in delivering the message.
+                    if not future.done():
+                        future.cancel()
+                    await self._ack(message_envelope)
+                    return
+                if message_envelope.expired():
+                    # Nobody is waiting for the response any more.
+                    self._expire(future, message_envelope.cancellation_token, recipient)
+                    await self._ack(message_envelope)
+                    return
+                for handler in self._intervention_chains.get("send", message):
+                    with self._tracer_helper.trace_block(
+                        "intercept", handler.__class__.__name__, parent=message_envelope.metadata
+                    ):
+                        try:
+                            with self._metrics_helper.measure_intervention(handler, "send"):
                                 temp_message = await handler.on_send(message, sender=sender, recipient=recipient)
-                            except BaseException as e:
+                        except BaseException as e:
+                            if not future.done():
                                 future.set_exception(e)
-                                return
-                            if temp_message is DropMessage or isinstance(temp_message, DropMessage):
+                            await self._ack(message_envelope)
+                            return
+                        if temp_message is DropMessage or isinstance(temp_message, DropMessage):
+                            if not future.done():
                                 future.set_exception(MessageDroppedException())
-                                return
+                            await self._ack(message_envelope)
+                            return
 
-                        message_envelope.message = temp_message
+                    message_envelope.message = temp_message
                 self._outstanding_tasks.increment()
                 task = asyncio.create_task(self._process_send(message_envelope))
                 self._background_tasks.add(task)
-                task.add_done_callback(self._background_tasks.discard)
+                task.add_done_callback(self._on_background_task_done)
             case PublishMessageEnvelope(
                 message=message,
                 sender=sender,
             ):
-                if self._intervention_handlers is not None:
-                    for handler in self._intervention_handlers:
-                        with self._tracer_helper.trace_block(
-                            "intercept", handler.__class__.__name__, parent=message_envelope.metadata
-                        ):
-                            try:
+                self._metrics_helper.record_message("publish")
+                if message_envelope.cancellation_token.is_cancelled():
+                    await self._ack(message_envelope)
+                    return
+                for handler in self._intervention_chains.get("publish", message):
+                    with self._tracer_helper.trace_block(
+                        "intercept", handler.__class__.__name__, parent=message_envelope.metadata
+                    ):
+                        try:
+                            with self._metrics_helper.measure_intervention(handler, "publish"):
                                 temp_message = await handler.on_publish(message, sender=sender)
-                            except BaseException as e:
-                                # TODO: we should raise the intervention exception to the publisher.
-                                logger.error(f"Exception raised in in intervention handler: {e}", exc_info=True)
-                                return
-                            if temp_message is DropMessage or isinstance(temp_message, DropMessage):
-                                # TODO log message dropped
-                                return
-
-                        message_envelope.message = temp_message
+                        except BaseException as e:
+                            # TODO: we should raise the intervention exception to the publisher.
+                            logger.error(f"Exception raised in in intervention handler: {e}", exc_info=True)
+                            await self._ack(message_envelope)
+                            return
+                        if temp_message is DropMessage or isinstance(temp_message, DropMessage):
+                            # TODO log message dropped
+                            await self._ack(message_envelope)
+                            return
+
+                    message_envelope.message = temp_message
                 self._outstanding_tasks.increment()
                 task = asyncio.create_task(self._process_publish(message_envelope))
                 self._background_tasks.add(task)
-                task.add_done_callback(self._background_tasks.discard)
+                task.add_done_callback(self._on_background_task_done)
             case ResponseMessageEnvelope(message=message, sender=sender, recipient=recipient, future=future):
-                if self._intervention_handlers is not None:
-                    for handler in self._intervention_handlers:
-                        try:
+                self._metrics_helper.record_message("response")
+                for handler in self._intervention_chains.get("response", message):
+                    try:
+                        with self._metrics_helper.measure_intervention(handler, "response"):
                             temp_message = await handler.on_response(message, sender=sender, recipient=recipient)
-                        except BaseException as e:
-                            # TODO: should we raise the exception to sender of the response instead?
+                    except BaseException as e:
+                        # TODO: should we raise the exception to sender of the response instead?
+                        if not future.done():
                             future.set_exception(e)
-                            return
-                        if temp_message is DropMessage or isinstance(temp_message, DropMessage):
+                        return
+                    if temp_message is DropMessage or isinstance(temp_message, DropMessage):
+                        if not future.done():
                             future.set_exception(MessageDroppedException())
-                            return
-                        message_envelope.message = temp_message
+                        return
+                    message_envelope.message = temp_message
                 self._outstanding_tasks.increment()
                 task = asyncio.create_task(self._process_response(message_envelope))
                 self._background_tasks.add(task)
-                task.add_done_callback(self._background_tasks.discard)
+                task.add_done_callback(self._on_background_task_done)
 
         # Yield control to the message loop to allow other tasks to run
         await asyncio.sleep(0)
@@ -499,6 +885,9 @@ class SingleThreadedAgentRuntime(AgentRuntime):
         if self._run_context is not None:
             raise RuntimeError("Runtime is already started")
         self._run_context = RunContext(self)
+        self._warm_up(self._warm_agents)
+        if self._message_store is not None:
+            self._start_recovery()
 
     async def stop(self) -> None:
         """Stop the runtime message processing loop."""
@@ -516,7 +905,10 @@ class SingleThreadedAgentRuntime(AgentRuntime):
         self._run_context = None
 
     async def stop_when(self, condition: Callable[[], bool]) -> None:
-        """Stop the runtime message processing loop when the condition is met."""
+        """Stop the runtime message processing loop when the condition is met.
+
+        The condition is checked whenever the runtime's state changes, i.e. when a message is queued or
+        a message handler finishes, rather than continuously."""
         if self._run_context is None:
             raise RuntimeError("Runtime is not started")
         await self._run_context.stop_when(condition)
@@ -530,6 +922,7 @@ class SingleThreadedAgentRuntime(AgentRuntime):
 
     async def agent_load_state(self, agent: AgentId, state: Mapping[str, Any]) -> None:
         await (await self._get_agent(agent)).load_state(state)
+        self._agent_instances.mark_dirty(agent)
 
     @deprecated(
         "Use your agent's `register` method directly instead of this method. See documentation for latest usage."
@@ -559,7 +952,9 @@ class SingleThreadedAgentRuntime(AgentRuntime):
             for subscription in subscriptions_list:
                 await self.add_subscription(subscription)
 
-        self._agent_factories[type] = agent_factory
+        self._agent_factories[type] = (agent_factory, len(inspect.signature(agent_factory).parameters))
+        if self._run_context is not None:
+            self._warm_up(agent_id for agent_id in self._warm_agents if agent_id.type == type)
         return AgentType(type)
 
     async def register_factory(
@@ -584,20 +979,23 @@ class SingleThreadedAgentRuntime(AgentRuntime):
 
             return agent_instance
 
-        self._agent_factories[type.type] = factory_wrapper
+        self._agent_factories[type.type] = (factory_wrapper, 0)
+        if self._run_context is not None:
+            self._warm_up(agent_id for agent_id in self._warm_agents if agent_id.type == type.type)
 
         return type
 
     async def _invoke_agent_factory(
         self,
         agent_factory: Callable[[], T | Awaitable[T]] | Callable[[AgentRuntime, AgentId], T | Awaitable[T]],
+        parameter_count: int,
         agent_id: AgentId,
     ) -> T:
         with AgentInstantiationContext.populate_context((self, agent_id)):
-            if len(inspect.signature(agent_factory).parameters) == 0:
+            if parameter_count == 0:
                 factory_one = cast(Callable[[], T], agent_factory)
                 agent = factory_one()
-            elif len(inspect.signature(agent_factory).parameters) == 2:
+            elif parameter_count == 2:
                 warnings.warn(
                     "Agent factories that take two arguments are deprecated. Use AgentInstantiationContext instead. Two arg factories will be removed in a future version.",
                     stacklevel=2,
@@ -613,16 +1011,22 @@ class SingleThreadedAgentRuntime(AgentRuntime):
             return agent
 
     async def _get_agent(self, agent_id: AgentId) -> Agent:
-        if agent_id in self._instantiated_agents:
-            return self._instantiated_agents[agent_id]
+        return await self._agent_instances.get_or_create(agent_id, self._create_agent)
 
+    async def _create_agent(self, agent_id: AgentId) -> Agent:
         if agent_id.type not in self._agent_factories:
             raise LookupError(f"Agent with name {agent_id.type} not found.")
 
-        agent_factory = self._agent_factories[agent_id.type]
-        agent = await self._invoke_agent_factory(agent_factory, agent_id)
-        self._instantiated_agents[agent_id] = agent
-        return agent
+        agent_factory, parameter_count = self._agent_factories[agent_id.type]
+        return await self._invoke_agent_factory(agent_factory, parameter_count, agent_id)
+
+    def _warm_up(self, agent_ids: Iterable[AgentId]) -> None:
+        agent_ids = [agent_id for agent_id in agent_ids if agent_id.type in self._agent_factories]
+        if len(agent_ids) == 0:
+            return
+        task = asyncio.create_task(self._agent_instances.warm_up(agent_ids, self._create_agent))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
 
     # TODO: uncomment out the following type ignore when this is fixed in mypy: https://github.com/python/mypy/issues/3737
     async def try_get_underlying_agent_instance(self, id: AgentId, type: Type[T] = Agent) -> T:  # type: ignore[assignment]
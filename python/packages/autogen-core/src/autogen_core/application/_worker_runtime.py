@@ -1,8 +1,11 @@
 import asyncio
+import contextlib
+import functools
 import inspect
 import json
 import logging
 import signal
+import time
 import warnings
 from asyncio import Future, Task
 from collections import defaultdict
@@ -16,12 +19,15 @@ from typing import (
     ClassVar,
     DefaultDict,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Literal,
     Mapping,
     ParamSpec,
     Sequence,
     Set,
+    Tuple,
     Type,
     TypeVar,
     cast,
@@ -29,11 +35,13 @@ from typing import (
 
 import grpc
 from grpc.aio import StreamStreamCall
+from opentelemetry.metrics import MeterProvider
 from opentelemetry.trace import TracerProvider
 from typing_extensions import Self, deprecated
 
 from autogen_core.base import JSON_DATA_CONTENT_TYPE
-from autogen_core.base._serialization import MessageSerializer, SerializationRegistry
+from autogen_core.base._blob_references import blob_id, reading_blob_references, writing_blob_references
+from autogen_core.base._serialization import JsonCodec, MessageSerializer, SerializationRegistry
 from autogen_core.base._type_helpers import ChannelArgumentType
 
 from ..base import (
@@ -43,6 +51,7 @@ from ..base import (
     AgentMetadata,
     AgentRuntime,
     AgentType,
+    BaseAgent,
     CancellationToken,
     MessageContext,
     MessageHandlerContext,
@@ -50,10 +59,25 @@ from ..base import (
     SubscriptionInstantiationContext,
     TopicId,
 )
-from ..components import TypeSubscription
-from ._helpers import SubscriptionManager, get_impl
+from ..base.exceptions import MessageQueueFullException
+from ..components import TypePrefixSubscription, TypeSubscription
+from ._agent_instance_cache import AgentEvictionPolicy, AgentInstanceCache
+from ._agent_state_store import AgentStateStore
+from ._blob_store import BlobStore, BlobTransportPolicy, InMemoryBlobStore
+from ._helpers import SubscriptionManager, call_at_deadline, get_deadline, get_impl
+from ._message_batching import MESSAGE_BATCHING_METADATA_KEY, MessageBatcher, MessageBatchingPolicy, unbatch
+from ._payload_compression import (
+    PAYLOAD_ENCODINGS_METADATA_KEY,
+    PayloadCompressionPolicy,
+    available_payload_encodings,
+    compress_payload,
+    decompress_payload,
+)
+from ._peer_requests import PEER_ADDRESS_METADATA_KEY, PeerConnections, PeerRequestServicer
+from ._worker_runtime_host import WorkerAgentRuntimeHost
+from .logging.events import DeliveryStage, MessageEvent, MessageKind
 from .protos import agent_worker_pb2, agent_worker_pb2_grpc
-from .telemetry import MessageRuntimeTracingConfig, TraceHelper, get_telemetry_grpc_metadata
+from .telemetry import MessageRuntimeTracingConfig, MetricsHelper, TraceHelper, get_telemetry_grpc_metadata
 
 if TYPE_CHECKING:
     from .protos.agent_worker_pb2_grpc import AgentRpcAsyncStub
@@ -67,16 +91,12 @@ T = TypeVar("T", bound=Agent)
 
 type_func_alias = type
 
-
-class QueueAsyncIterable(AsyncIterator[Any], AsyncIterable[Any]):
-    def __init__(self, queue: asyncio.Queue[Any]) -> None:
-        self._queue = queue
-
-    async def __anext__(self) -> Any:
-        return await self._queue.get()
-
-    def __aiter__(self) -> AsyncIterator[Any]:
-        return self
+_DEFAULT_PAYLOAD_COMPRESSION = PayloadCompressionPolicy()
+_DEFAULT_MESSAGE_BATCHING = MessageBatchingPolicy()
+# Maximum number of peer endpoints kept for single agents, of agent types hosted by several workers.
+_MAX_AGENT_PEER_ENDPOINTS = 10_000
+# Weight of the latest request in the request latency reported to the host.
+_REQUEST_LATENCY_SMOOTHING = 0.2
 
 
 class HostConnection:
@@ -99,17 +119,48 @@ class HostConnection:
                     ],
                 }
             ),
-        )
+        ),
+        # Serialized LLM histories and images are often larger than the default limit of 4 MiB.
+        ("grpc.max_send_message_length", 64 * 1024 * 1024),
+        ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+        # Detect a dead connection to the host even while no messages are exchanged.
+        ("grpc.keepalive_time_ms", 30_000),
+        ("grpc.keepalive_timeout_ms", 10_000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
     ]
 
-    def __init__(self, channel: grpc.aio.Channel) -> None:  # type: ignore
+    def __init__(  # type: ignore
+        self,
+        channel: grpc.aio.Channel,
+        *,
+        log_message_payloads: bool = True,
+        message_batching: MessageBatchingPolicy | None = None,
+        peer_address: str | None = None,
+    ) -> None:
         self._channel = channel
+        self._stub: AgentRpcAsyncStub = agent_worker_pb2_grpc.AgentRpcStub(channel)  # type: ignore
         self._send_queue = asyncio.Queue[agent_worker_pb2.Message]()
+        self._message_batching = message_batching
+        # Messages are sent one at a time until the host has stated that it can receive batches.
+        self._batcher = MessageBatcher(self._send_queue)
         self._recv_queue = asyncio.Queue[agent_worker_pb2.Message]()
         self._connection_task: Task[None] | None = None
+        self._log_message_payloads = log_message_payloads
+        self._peer_address = peer_address
+        # Payload encodings the host can decode, known once the channel is open.
+        self._host_payload_encodings: List[str] = []
 
     @classmethod
-    def from_host_address(cls, host_address: str, extra_grpc_config: ChannelArgumentType = DEFAULT_GRPC_CONFIG) -> Self:
+    def from_host_address(
+        cls,
+        host_address: str,
+        extra_grpc_config: ChannelArgumentType = DEFAULT_GRPC_CONFIG,
+        *,
+        log_message_payloads: bool = True,
+        message_batching: MessageBatchingPolicy | None = None,
+        peer_address: str | None = None,
+    ) -> Self:
         logger.info("Connecting to %s", host_address)
         #  Always use DEFAULT_GRPC_CONFIG and override it with provided grpc_config
         merged_options = [
@@ -120,44 +171,76 @@ class HostConnection:
             host_address,
             options=merged_options,
         )
-        instance = cls(channel)
-        instance._connection_task = asyncio.create_task(
-            instance._connect(channel, instance._send_queue, instance._recv_queue)
+        instance = cls(
+            channel,
+            log_message_payloads=log_message_payloads,
+            message_batching=message_batching,
+            peer_address=peer_address,
         )
+        instance._connection_task = asyncio.create_task(instance._connect())
         return instance
 
+    @property
+    def send_queue_size(self) -> int:
+        return self._send_queue.qsize()
+
+    @property
+    def receive_queue_size(self) -> int:
+        return self._recv_queue.qsize()
+
     async def close(self) -> None:
         if self._connection_task is None:
             raise RuntimeError("Connection is not open.")
         await self._channel.close()
         await self._connection_task
 
-    @staticmethod
-    async def _connect(  # type: ignore
-        channel: grpc.aio.Channel,
-        send_queue: asyncio.Queue[agent_worker_pb2.Message],
-        receive_queue: asyncio.Queue[agent_worker_pb2.Message],
-    ) -> None:
-        stub: AgentRpcAsyncStub = agent_worker_pb2_grpc.AgentRpcStub(channel)  # type: ignore
-
+    def payload_encoding(self, preferred: Sequence[str]) -> str | None:
+        """The first of the `preferred` payload encodings that the host can decode, if any."""
+        for encoding in preferred:
+            if encoding in self._host_payload_encodings:
+                return encoding
+        return None
+
+    async def _connect(self) -> None:
+        metadata = [
+            (PAYLOAD_ENCODINGS_METADATA_KEY, ",".join(available_payload_encodings())),
+            (MESSAGE_BATCHING_METADATA_KEY, "1"),
+        ]
+        if self._peer_address is not None:
+            metadata.append((PEER_ADDRESS_METADATA_KEY, self._peer_address))
         # TODO: where do exceptions from reading the iterable go? How do we recover from those?
-        recv_stream: StreamStreamCall[agent_worker_pb2.Message, agent_worker_pb2.Message] = stub.OpenChannel(  # type: ignore
-            QueueAsyncIterable(send_queue)
+        recv_stream: StreamStreamCall[agent_worker_pb2.Message, agent_worker_pb2.Message] = self._stub.OpenChannel(  # type: ignore
+            self._batcher, metadata=metadata
         )  # type: ignore
+        # The host lists the payload encodings it can decode, and whether it can receive batches, in the initial
+        # metadata of the channel.
+        initial_metadata = await recv_stream.initial_metadata()  # type: ignore
+        for key, value in initial_metadata or ():  # type: ignore
+            if key == PAYLOAD_ENCODINGS_METADATA_KEY and value:
+                self._host_payload_encodings = str(value).split(",")  # type: ignore
+            elif key == MESSAGE_BATCHING_METADATA_KEY and value == "1":
+                self._batcher.policy = self._message_batching
 
         while True:
             logger.info("Waiting for message from host")
-            message = await recv_stream.read()  # type: ignore
-            if message == grpc.aio.EOF:  # type: ignore
+            received = await recv_stream.read()  # type: ignore
+            if received == grpc.aio.EOF:  # type: ignore
                 logger.info("EOF")
                 break
-            message = cast(agent_worker_pb2.Message, message)
-            logger.info(f"Received a message from host: {message}")
-            await receive_queue.put(message)
-            logger.info("Put message in receive queue")
+            for message in unbatch(cast(agent_worker_pb2.Message, received)):
+                # Lazily formatted: the message is only rendered if a handler is enabled for INFO.
+                if self._log_message_payloads:
+                    logger.info("Received a message from host: %s", message)
+                else:
+                    logger.info("Received a %s message from host", message.WhichOneof("message"))
+                await self._recv_queue.put(message)
+                logger.info("Put message in receive queue")
 
     async def send(self, message: agent_worker_pb2.Message) -> None:
-        logger.info(f"Send message to host: {message}")
+        if self._log_message_payloads:
+            logger.info("Send message to host: %s", message)
+        else:
+            logger.info("Send %s message to host", message.WhichOneof("message"))
         await self._send_queue.put(message)
         logger.info("Put message in send queue")
 
@@ -165,47 +248,254 @@ class HostConnection:
         logger.info("Getting message from queue")
         return await self._recv_queue.get()
 
+    async def put_blob(self, id: str, data: bytes) -> None:
+        await self._stub.PutBlob(agent_worker_pb2.Blob(id=id, data=data))  # type: ignore
+
+    async def get_blob(self, id: str) -> bytes:
+        blob: agent_worker_pb2.Blob = await self._stub.GetBlob(agent_worker_pb2.GetBlobRequest(id=id))  # type: ignore
+        return blob.data
+
+    async def find_missing_blobs(self, ids: Sequence[str]) -> Sequence[str]:
+        response: agent_worker_pb2.FindMissingBlobsResponse = await self._stub.FindMissingBlobs(  # type: ignore
+            agent_worker_pb2.FindMissingBlobsRequest(ids=ids)
+        )
+        return response.missing_ids
+
+
+class _UnsupportedDataContentType(Exception):
+    """The recipient of a request cannot decode the content type it was sent in."""
+
+    def __init__(self, message: str, accepted: Sequence[str]) -> None:
+        super().__init__(message)
+        self.accepted = accepted
+
 
 class WorkerAgentRuntime(AgentRuntime):
+    """An agent runtime that connects to a :class:`WorkerAgentRuntimeHost` and exchanges messages with
+    agents hosted by other workers through it.
+
+    Args:
+        host_address (str): Address of the host runtime.
+        tracer_provider (TracerProvider, optional): The tracer provider to use for tracing. Defaults to None.
+        extra_grpc_config (ChannelArgumentType, optional): Extra options for the gRPC channel. Defaults to None.
+        log_message_payloads (bool, optional): Whether message payloads are included in the per-message records
+            logged by the runtime and its host connection. Set to False to never render payloads. Defaults to True.
+        meter_provider (MeterProvider, optional): The meter provider used to report the runtime's metrics: messages
+            received from the host by envelope kind, message handler durations, the number of instantiated agents,
+            and the sizes of the host connection's send and receive queues. Defaults to None.
+        metrics_agent_keys (bool, optional): Whether message handler durations are also reported per agent key,
+            rather than per agent type only. Every key adds a time series, so only enable this when the number of
+            agent keys is small. Defaults to False.
+        eviction_policy (AgentEvictionPolicy, optional): Limits on the number of agent instances kept in memory and
+            on how long they may stay idle. Evicted agents have their state saved to `state_store` and are
+            re-created with that state on their next message. Defaults to never evicting agents.
+        state_store (AgentStateStore, optional): Where the state of evicted agents is saved. Defaults to an
+            :class:`InMemoryAgentStateStore`.
+        warm_agents (Sequence[AgentId], optional): Agents to instantiate ahead of their first message. They are
+            created concurrently as soon as their agent type is registered. Defaults to creating every agent on its
+            first message.
+        json_codec (JsonCodec, optional): The codec used by the dataclass JSON serializers added to the runtime,
+            for example :class:`~autogen_core.base.OrjsonCodec`. Defaults to the standard library's :mod:`json`.
+        blob_transport (BlobTransportPolicy, optional): Send large binary values in messages, such as images, out of
+            band as blobs that are uploaded to the host and referenced by ID. A blob the runtime has sent or received
+            before is only uploaded again if the host no longer stores it. Blobs referenced by received messages are
+            always resolved. Defaults to sending every value inline.
+        blob_store (BlobStore, optional): A store shared with the other workers on the same machine, for example a
+            :class:`FileSystemBlobStore`. Blobs sent by the runtime are written to it, and blobs referenced by
+            received messages are read from it before they are fetched from the host. Defaults to None.
+        payload_compression (PayloadCompressionPolicy, optional): How serialized messages are compressed before
+            they are sent to the host. Set to None to never compress them. Compressed messages received from the
+            host are always decompressed. Defaults to :class:`PayloadCompressionPolicy` with its defaults.
+        message_batching (MessageBatchingPolicy, optional): How the messages queued for the host are coalesced into
+            batches, each sent in a single write. Set to None to send every message on its own. Batches received
+            from the host are always unpacked. Defaults to :class:`MessageBatchingPolicy` with its defaults.
+        peer_address (str, optional): Address to accept requests from other workers on, which must be reachable by
+            them, for example ``"10.0.0.5:0"`` to listen on any free port. Workers that send requests to the
+            runtime's agents through the host are then given this address, and send their next requests for the same
+            agent types to it directly. Defaults to only receiving requests through the host.
+        stateless_agent_types (Sequence[str], optional): Agent types whose agents keep no state between messages, such
+            as a model client used as a pure function. Requests to a stateless agent type registered by several
+            workers are dispatched by the host to the least loaded of them, whatever their agent key. Every worker
+            registering such an agent type must list it. Defaults to none.
+        heartbeat_interval (float, optional): Time in seconds between the reports of the runtime's load to the
+            host: the number of requests it is handling and the recent time it took to handle one. The host only
+            uses the load to dispatch requests to stateless agent types, so it is only reported once the runtime has
+            registered one of them. Set to None to never report it. Defaults to 1 second.
+
+    Messages are sent in the cheapest content type that both the runtime and the recipient have a serializer for,
+    protobuf before JSON. A request sent in a content type its recipient cannot decode is sent again in one it can,
+    and that content type is used for later requests of the same message type to the same agent type. Published
+    messages are sent as JSON when the message type has a JSON serializer, since every subscriber must decode them.
+
+    Requests to an agent type hosted by a worker that accepts requests directly are sent to that worker, once a
+    response relayed by the host has given its address. If the worker is unreachable or no longer hosts the agent
+    type, the request is sent through the host instead. Events, registrations and subscriptions always go through
+    the host.
+
+    Several workers may register the same agent type. The host then routes the requests and events for each agent
+    to one of them by consistent hashing of its key, and a worker joining or leaving only moves the agents whose keys
+    it takes or gives up. Agents that move are re-created on their new worker, and only keep their state if it was
+    saved to a `state_store` shared by the workers when they were evicted. The agents of stateless agent types are
+    not placed by key, and each request goes to the worker with the fewest requests in flight, weighted by its
+    recent request latency.
+    """
+
     def __init__(
         self,
         host_address: str,
         tracer_provider: TracerProvider | None = None,
         extra_grpc_config: ChannelArgumentType | None = None,
+        *,
+        log_message_payloads: bool = True,
+        meter_provider: MeterProvider | None = None,
+        metrics_agent_keys: bool = False,
+        eviction_policy: AgentEvictionPolicy | None = None,
+        state_store: AgentStateStore | None = None,
+        warm_agents: Sequence[AgentId] | None = None,
+        json_codec: JsonCodec | None = None,
+        blob_transport: BlobTransportPolicy | None = None,
+        blob_store: BlobStore | None = None,
+        payload_compression: PayloadCompressionPolicy | None = _DEFAULT_PAYLOAD_COMPRESSION,
+        message_batching: MessageBatchingPolicy | None = _DEFAULT_MESSAGE_BATCHING,
+        peer_address: str | None = None,
+        stateless_agent_types: Sequence[str] | None = None,
+        heartbeat_interval: float | None = 1.0,
     ) -> None:
         self._host_address = host_address
         self._trace_helper = TraceHelper(tracer_provider, MessageRuntimeTracingConfig("Worker Runtime"))
         self._per_type_subscribers: DefaultDict[tuple[str, str], Set[AgentId]] = defaultdict(set)
+        # Agent type -> factory and its number of parameters, which is only inspected once.
         self._agent_factories: Dict[
-            str, Callable[[], Agent | Awaitable[Agent]] | Callable[[AgentRuntime, AgentId], Agent | Awaitable[Agent]]
+            str,
+            Tuple[
+                Callable[[], Agent | Awaitable[Agent]] | Callable[[AgentRuntime, AgentId], Agent | Awaitable[Agent]],
+                int,
+            ],
         ] = {}
-        self._instantiated_agents: Dict[AgentId, Agent] = {}
+        self._agent_instances = AgentInstanceCache(eviction_policy, state_store)
+        self._warm_agents = list(warm_agents or [])
+        self._stateless_agent_types = set(stateless_agent_types or [])
+        self._heartbeat_interval = heartbeat_interval
+        self._heartbeat_task: Task[None] | None = None
+        # Load reported to the host: requests being handled and exponentially weighted request latency in seconds.
+        self._requests_in_flight = 0
+        self._request_latency = 0.0
         self._known_namespaces: set[str] = set()
         self._read_task: None | Task[None] = None
         self._running = False
         self._pending_requests: Dict[str, Future[Any]] = {}
+        # Request ID -> cancellation token of its handler, for the requests relayed by the host that are being handled.
+        self._request_cancellation_tokens: Dict[str, CancellationToken] = {}
         self._pending_requests_lock = asyncio.Lock()
         self._next_request_id = 0
         self._host_connection: HostConnection | None = None
         self._background_tasks: Set[Task[Any]] = set()
         self._subscription_manager = SubscriptionManager()
-        self._serialization_registry = SerializationRegistry()
+        self._serialization_registry = SerializationRegistry(json_codec)
+        # (recipient agent type, message type) -> content types the recipient can decode the message type from.
+        self._accepted_content_types: Dict[tuple[str, str], Sequence[str]] = {}
+        self._blob_transport = blob_transport
+        self._blob_store = blob_store
+        # Blobs known to be stored by the host, because the runtime has sent or received them.
+        self._blob_cache = InMemoryBlobStore((blob_transport or BlobTransportPolicy()).cache_size)
+        self._blob_fetches: Dict[str, Future[bytes]] = {}
+        self._payload_compression = payload_compression
+        self._message_batching = message_batching
         self._extra_grpc_config = extra_grpc_config or []
+        self._peer_address = peer_address
+        self._peer_server: grpc.aio.Server | None = None  # type: ignore
+        self._peer_server_task: Task[None] | None = None
+        # (agent type, agent key or None for every key) -> endpoint of the worker hosting the agents, given by the
+        # host in a relayed response. Keys are only given for agent types that several workers host.
+        self._peer_endpoints: Dict[tuple[str, str | None], agent_worker_pb2.PeerEndpoint] = {}
+        self._peer_connections = PeerConnections(
+            list({**dict(HostConnection.DEFAULT_GRPC_CONFIG), **dict(self._extra_grpc_config)}.items())
+        )
+        self._log_message_payloads = log_message_payloads
+        self._metrics_helper = MetricsHelper(meter_provider, "Worker Runtime", record_agent_keys=metrics_agent_keys)
+        self._metrics_helper.observe_gauge(
+            "runtime.agent_instances",
+            lambda: len(self._agent_instances),
+            unit="{agent}",
+            description="Number of instantiated agents.",
+        )
+        self._metrics_helper.observe_gauge(
+            "grpc.send_queue.size",
+            lambda: self._host_connection.send_queue_size if self._host_connection is not None else 0,
+            unit="{message}",
+            description="Number of messages waiting to be sent to the host.",
+        )
+        self._metrics_helper.observe_gauge(
+            "grpc.receive_queue.size",
+            lambda: self._host_connection.receive_queue_size if self._host_connection is not None else 0,
+            unit="{message}",
+            description="Number of messages received from the host and waiting to be processed.",
+        )
 
     def start(self) -> None:
         """Start the runtime in a background task."""
         if self._running:
             raise ValueError("Runtime is already running.")
+        advertised_peer_address: str | None = None
+        if self._peer_address is not None:
+            self._peer_server = grpc.aio.server(options=WorkerAgentRuntimeHost.DEFAULT_GRPC_CONFIG)
+            agent_worker_pb2_grpc.add_AgentPeerServicer_to_server(
+                PeerRequestServicer(self._handle_peer_request), self._peer_server
+            )
+            port = self._peer_server.add_insecure_port(self._peer_address)
+            # The address is advertised with the port actually bound, which differs when it is given as 0.
+            advertised_peer_address = f"{self._peer_address.rpartition(':')[0]}:{port}"
+            self._peer_server_task = asyncio.create_task(self._peer_server.start())
+            logger.info(f"Accepting requests from other workers at {advertised_peer_address}")
         logger.info(f"Connecting to host: {self._host_address}")
         self._host_connection = HostConnection.from_host_address(
-            self._host_address, extra_grpc_config=self._extra_grpc_config
+            self._host_address,
+            extra_grpc_config=self._extra_grpc_config,
+            log_message_payloads=self._log_message_payloads,
+            message_batching=self._message_batching,
+            peer_address=advertised_peer_address,
         )
         logger.info("Connection established")
         if self._read_task is None:
             self._read_task = asyncio.create_task(self._run_read_loop())
+        if self._stateless_agent_types & self._agent_factories.keys():
+            self._start_heartbeats()
         self._running = True
 
+    def _start_heartbeats(self) -> None:
+        if self._heartbeat_interval is not None and self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._send_heartbeats(self._heartbeat_interval))
+
+    async def _send_heartbeats(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            assert self._host_connection is not None
+            await self._host_connection.send(
+                agent_worker_pb2.Message(
+                    heartbeat=agent_worker_pb2.Heartbeat(
+                        in_flight_requests=self._requests_in_flight, request_latency=self._request_latency
+                    )
+                )
+            )
+
+    @contextlib.contextmanager
+    def _measure_load(self) -> Iterator[None]:
+        self._requests_in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._requests_in_flight -= 1
+            latency = time.perf_counter() - start
+            self._request_latency = (
+                latency
+                if self._request_latency == 0
+                else (1 - _REQUEST_LATENCY_SMOOTHING) * self._request_latency + _REQUEST_LATENCY_SMOOTHING * latency
+            )
+
     def _raise_on_exception(self, task: Task[Any]) -> None:
+        if task.cancelled():
+            return
         exception = task.exception()
         if exception is not None:
             raise exception
@@ -218,13 +508,17 @@ class WorkerAgentRuntime(AgentRuntime):
                 message = await self._host_connection.recv()  # type: ignore
                 oneofcase = agent_worker_pb2.Message.WhichOneof(message, "message")
                 match oneofcase:
-                    case "registerAgentTypeRequest" | "addSubscriptionRequest":
+                    case "registerAgentTypeRequest" | "addSubscriptionRequest" | "heartbeat":
                         logger.warning(f"Cant handle {oneofcase}, skipping.")
                     case "request":
                         task = asyncio.create_task(self._process_request(message.request))
                         self._background_tasks.add(task)
                         task.add_done_callback(self._raise_on_exception)
                         task.add_done_callback(self._background_tasks.discard)
+                    case "cancel":
+                        token = self._request_cancellation_tokens.get(message.cancel.request_id)
+                        if token is not None:
+                            token.cancel()
                     case "response":
                         task = asyncio.create_task(self._process_response(message.response))
                         self._background_tasks.add(task)
@@ -249,6 +543,12 @@ class WorkerAgentRuntime(AgentRuntime):
                         self._background_tasks.add(task)
                         task.add_done_callback(self._raise_on_exception)
                         task.add_done_callback(self._background_tasks.discard)
+                    case "removePeerEndpoints":
+                        # The workers hosting the agent type have changed, so its requests go through the host again.
+                        agent_type = message.removePeerEndpoints.agent_type
+                        self._peer_endpoints = {
+                            key: endpoint for key, endpoint in self._peer_endpoints.items() if key[0] != agent_type
+                        }
                     case None:
                         logger.warning("No message")
                     case other:
@@ -261,6 +561,13 @@ class WorkerAgentRuntime(AgentRuntime):
         if not self._running:
             raise RuntimeError("Runtime is not running.")
         self._running = False
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
         # Wait for all background tasks to finish.
         final_tasks_results = await asyncio.gather(*self._background_tasks, return_exceptions=True)
         for task_result in final_tasks_results:
@@ -272,6 +579,13 @@ class WorkerAgentRuntime(AgentRuntime):
                 await self._host_connection.close()
             except asyncio.CancelledError:
                 pass
+        await self._peer_connections.close()
+        if self._peer_server is not None:
+            if self._peer_server_task is not None:
+                await self._peer_server_task
+            await self._peer_server.stop(grace=None)
+            self._peer_server = None
+            self._peer_server_task = None
         # Cancel the read task.
         if self._read_task is not None:
             self._read_task.cancel()
@@ -302,6 +616,26 @@ class WorkerAgentRuntime(AgentRuntime):
     def _known_agent_names(self) -> Set[str]:
         return set(self._agent_factories.keys())
 
+    def _log_message_event(
+        self,
+        message: Any,
+        *,
+        sender: AgentId | None,
+        receiver: AgentId | None,
+        kind: MessageKind,
+        delivery_stage: DeliveryStage,
+    ) -> None:
+        if event_logger.isEnabledFor(logging.INFO):
+            event_logger.info(
+                MessageEvent(
+                    payload=message if self._log_message_payloads else None,
+                    sender=sender,
+                    receiver=receiver,
+                    kind=kind,
+                    delivery_stage=delivery_stage,
+                )
+            )
+
     async def _send_message(
         self,
         runtime_message: agent_worker_pb2.Message,
@@ -321,43 +655,159 @@ class WorkerAgentRuntime(AgentRuntime):
         *,
         sender: AgentId | None = None,
         cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
     ) -> Any:
         if not self._running:
             raise ValueError("Runtime must be running when sending message.")
         if self._host_connection is None:
             raise RuntimeError("Host connection is not set.")
+        self._log_message_event(
+            message, sender=sender, receiver=recipient, kind=MessageKind.DIRECT, delivery_stage=DeliveryStage.SEND
+        )
         data_type = self._serialization_registry.type_name(message)
         with self._trace_helper.trace_block(
             "create", recipient, parent=None, extraAttributes={"message_type": data_type}
         ):
-            # create a new future for the result
-            future = asyncio.get_event_loop().create_future()
-            request_id = await self._get_new_request_id()
-            self._pending_requests[request_id] = future
-            serialized_message = self._serialization_registry.serialize(
-                message, type_name=data_type, data_content_type=JSON_DATA_CONTENT_TYPE
-            )
-            telemetry_metadata = get_telemetry_grpc_metadata()
-            runtime_message = agent_worker_pb2.Message(
-                request=agent_worker_pb2.RpcRequest(
-                    request_id=request_id,
-                    target=agent_worker_pb2.AgentId(type=recipient.type, key=recipient.key),
-                    source=agent_worker_pb2.AgentId(type=sender.type, key=sender.key) if sender is not None else None,
-                    metadata=telemetry_metadata,
-                    payload=agent_worker_pb2.Payload(
-                        data_type=data_type,
-                        data=serialized_message,
-                        data_content_type=JSON_DATA_CONTENT_TYPE,
-                    ),
+            deadline = get_deadline(timeout)
+            accepted_key = (recipient.type, data_type)
+            if cancellation_token is None:
+                cancellation_token = CancellationToken()
+            try:
+                return await self._send_request(
+                    message,
+                    data_type,
+                    recipient,
+                    sender,
+                    deadline,
+                    self._accepted_content_types.get(accepted_key),
+                    cancellation_token,
+                )
+            except _UnsupportedDataContentType as e:
+                # Send the message again in a content type the recipient can decode, and use it from now on.
+                self._accepted_content_types[accepted_key] = e.accepted
+                return await self._send_request(
+                    message, data_type, recipient, sender, deadline, e.accepted, cancellation_token
                 )
-            )
 
-            # TODO: Find a way to handle timeouts/errors
+    async def _send_request(
+        self,
+        message: Any,
+        data_type: str,
+        recipient: AgentId,
+        sender: AgentId | None,
+        deadline: float | None,
+        accepted: Sequence[str] | None,
+        cancellation_token: CancellationToken,
+    ) -> Any:
+        data_content_type = self._serialization_registry.preferred_content_type(data_type, accepted)
+        endpoint = self._peer_endpoints.get((recipient.type, recipient.key)) or self._peer_endpoints.get(
+            (recipient.type, None)
+        )
+        payload = await self._serialize_payload(
+            message, data_type, data_content_type, endpoint.data_encodings if endpoint is not None else None
+        )
+        # create a new future for the result
+        future = asyncio.get_event_loop().create_future()
+        request_id = await self._get_new_request_id()
+        self._pending_requests[request_id] = future
+        telemetry_metadata = get_telemetry_grpc_metadata()
+        runtime_message = agent_worker_pb2.Message(
+            request=agent_worker_pb2.RpcRequest(
+                request_id=request_id,
+                target=agent_worker_pb2.AgentId(type=recipient.type, key=recipient.key),
+                source=agent_worker_pb2.AgentId(type=sender.type, key=sender.key) if sender is not None else None,
+                metadata=telemetry_metadata,
+                payload=payload,
+                accepted_data_content_types=self._serialization_registry.all_content_types,
+            )
+        )
+        deadline_timer: asyncio.TimerHandle | None = None
+        if deadline is not None:
+            # The receiving worker cancels the handler itself once the deadline passes.
+            runtime_message.request.deadline.FromNanoseconds(int(deadline * 1e9))
+            deadline_timer = call_at_deadline(deadline, functools.partial(self._expire, request_id, recipient))
+
+        if endpoint is not None:
+            runtime_message.request.accepted_data_encodings.extend(available_payload_encodings())
+            task = asyncio.create_task(
+                self._send_direct_request(runtime_message, endpoint, recipient, deadline, telemetry_metadata)
+            )
+        else:
             task = asyncio.create_task(self._send_message(runtime_message, "send", recipient, telemetry_metadata))
-            self._background_tasks.add(task)
-            task.add_done_callback(self._raise_on_exception)
-            task.add_done_callback(self._background_tasks.discard)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._raise_on_exception)
+        task.add_done_callback(self._background_tasks.discard)
+
+        def cancel() -> None:
+            if self._pending_requests.pop(request_id, None) is None:
+                return
+            future.cancel()
+            if endpoint is None or task.done():
+                # The request went through the host, which tells the worker handling it to cancel its handler.
+                cancel_task = asyncio.create_task(self._send_cancel(request_id))
+                self._background_tasks.add(cancel_task)
+                cancel_task.add_done_callback(self._raise_on_exception)
+                cancel_task.add_done_callback(self._background_tasks.discard)
+            # Cancelling a direct request cancels its call, and with it the handler of the worker it was sent to.
+            task.cancel()
+
+        cancellation_token.add_callback(cancel)
+        try:
             return await future
+        finally:
+            cancellation_token.remove_callback(cancel)
+            if deadline_timer is not None:
+                deadline_timer.cancel()
+
+    async def _send_cancel(self, request_id: str) -> None:
+        if self._host_connection is not None:
+            await self._host_connection.send(
+                agent_worker_pb2.Message(cancel=agent_worker_pb2.RpcCancel(request_id=request_id))
+            )
+
+    async def _send_direct_request(
+        self,
+        runtime_message: agent_worker_pb2.Message,
+        endpoint: agent_worker_pb2.PeerEndpoint,
+        recipient: AgentId,
+        deadline: float | None,
+        telemetry_metadata: Mapping[str, str],
+    ) -> None:
+        request = runtime_message.request
+        try:
+            with self._trace_helper.trace_block("send", recipient, parent=telemetry_metadata):
+                response = await self._peer_connections.send_request(
+                    endpoint.address, request, timeout=deadline - time.time() if deadline is not None else None
+                )
+        except grpc.aio.AioRpcError as e:
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                # The caller is told by the request's deadline timer.
+                return
+            endpoint_key = (endpoint.agent_type, endpoint.agent_key or None)
+            if self._peer_endpoints.get(endpoint_key) is endpoint:
+                del self._peer_endpoints[endpoint_key]
+            if e.code() not in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.NOT_FOUND):
+                # The request may have been handled, so it is not sent again.
+                future = self._pending_requests.pop(request.request_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(Exception(f"Failed to send request to {recipient}: {e.details()}"))
+                return
+            # The request was not handled, so it is sent through the host instead, in an encoding the host can decode.
+            logger.info(f"Sending request to {recipient} through the host, {endpoint.address} failed: {e.details()}")
+            assert self._host_connection is not None
+            payload = request.payload
+            if payload.data_encoding and self._host_connection.payload_encoding([payload.data_encoding]) is None:
+                payload.data = decompress_payload(payload.data, payload.data_encoding)
+                payload.data_encoding = ""
+            request.ClearField("accepted_data_encodings")
+            await self._send_message(runtime_message, "send", recipient, telemetry_metadata)
+            return
+        await self._process_response(response)
+
+    def _expire(self, request_id: str, recipient: AgentId) -> None:
+        future = self._pending_requests.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_exception(TimeoutError(f"No response from {recipient} before the deadline."))
 
     async def publish_message(
         self,
@@ -371,13 +821,20 @@ class WorkerAgentRuntime(AgentRuntime):
             raise ValueError("Runtime must be running when publishing message.")
         if self._host_connection is None:
             raise RuntimeError("Host connection is not set.")
+        self._log_message_event(
+            message, sender=sender, receiver=None, kind=MessageKind.PUBLISH, delivery_stage=DeliveryStage.SEND
+        )
         message_type = self._serialization_registry.type_name(message)
         with self._trace_helper.trace_block(
             "create", topic_id, parent=None, extraAttributes={"message_type": message_type}
         ):
-            serialized_message = self._serialization_registry.serialize(
-                message, type_name=message_type, data_content_type=JSON_DATA_CONTENT_TYPE
+            # Every subscriber must decode the message, so JSON is preferred as the most widely supported.
+            data_content_type = (
+                JSON_DATA_CONTENT_TYPE
+                if JSON_DATA_CONTENT_TYPE in self._serialization_registry.content_types(message_type)
+                else self._serialization_registry.preferred_content_type(message_type)
             )
+            payload = await self._serialize_payload(message, message_type, data_content_type)
             telemetry_metadata = get_telemetry_grpc_metadata()
             runtime_message = agent_worker_pb2.Message(
                 event=agent_worker_pb2.Event(
@@ -385,11 +842,7 @@ class WorkerAgentRuntime(AgentRuntime):
                     topic_source=topic_id.source,
                     source=agent_worker_pb2.AgentId(type=sender.type, key=sender.key) if sender is not None else None,
                     metadata=telemetry_metadata,
-                    payload=agent_worker_pb2.Payload(
-                        data_type=message_type,
-                        data=serialized_message,
-                        data_content_type=JSON_DATA_CONTENT_TYPE,
-                    ),
+                    payload=payload,
                 )
             )
 
@@ -420,19 +873,79 @@ class WorkerAgentRuntime(AgentRuntime):
 
     async def _process_request(self, request: agent_worker_pb2.RpcRequest) -> None:
         assert self._host_connection is not None
+        # The sender can cancel the request through the host while it is being handled.
+        cancellation_token = CancellationToken()
+        self._request_cancellation_tokens[request.request_id] = cancellation_token
+        try:
+            response = await self._handle_request(request, cancellation_token=cancellation_token)
+        finally:
+            self._request_cancellation_tokens.pop(request.request_id, None)
+        await self._host_connection.send(agent_worker_pb2.Message(response=response))
+
+    async def _handle_peer_request(self, request: agent_worker_pb2.RpcRequest) -> agent_worker_pb2.RpcResponse | None:
+        if request.target.type not in self._agent_factories:
+            return None
+        # The response is sent back directly, so it is compressed in an encoding the sender can decode.
+        return await self._handle_request(request, request.accepted_data_encodings)
+
+    async def _handle_request(
+        self,
+        request: agent_worker_pb2.RpcRequest,
+        data_encodings: Sequence[str] | None = None,
+        cancellation_token: CancellationToken | None = None,
+    ) -> agent_worker_pb2.RpcResponse:
+        self._metrics_helper.record_message("send")
         recipient = AgentId(request.target.type, request.target.key)
         sender: AgentId | None = None
         if request.HasField("source"):
             sender = AgentId(request.source.type, request.source.key)
-            logging.info(f"Processing request from {sender} to {recipient}")
+            logger.info("Processing request from %s to %s", sender, recipient)
         else:
-            logging.info(f"Processing request from unknown source to {recipient}")
+            logger.info("Processing request from unknown source to %s", recipient)
+
+        deadline: float | None = None
+        deadline_timer: asyncio.TimerHandle | None = None
+        if cancellation_token is None:
+            cancellation_token = CancellationToken()
+        if request.HasField("deadline"):
+            deadline = request.deadline.ToNanoseconds() / 1e9
+            if deadline <= time.time():
+                # The sender has stopped waiting for the response, so the request is dropped without being handled.
+                logger.info("Dropping request %s to %s past its deadline", request.request_id, recipient)
+                return agent_worker_pb2.RpcResponse(
+                    request_id=request.request_id,
+                    error="Deadline exceeded",
+                    metadata=get_telemetry_grpc_metadata(),
+                )
+            deadline_timer = call_at_deadline(deadline, cancellation_token.cancel)
+
+        accepted = self._serialization_registry.content_types(request.payload.data_type)
+        if accepted and request.payload.data_content_type not in accepted:
+            # Tell the sender which content types it can send the message in instead.
+            if deadline_timer is not None:
+                deadline_timer.cancel()
+            return agent_worker_pb2.RpcResponse(
+                request_id=request.request_id,
+                error=f"Unsupported content type {request.payload.data_content_type} for {request.payload.data_type}",
+                metadata=get_telemetry_grpc_metadata(),
+                accepted_data_content_types=accepted,
+            )
 
         # Deserialize the message.
-        message = self._serialization_registry.deserialize(
-            request.payload.data,
-            type_name=request.payload.data_type,
-            data_content_type=request.payload.data_content_type,
+        try:
+            message = await self._deserialize_payload(request.payload)
+        except Exception as e:
+            # The sender is told, instead of waiting for a response that never comes.
+            logger.error("Failed to deserialize request %s to %s", request.request_id, recipient, exc_info=True)
+            if deadline_timer is not None:
+                deadline_timer.cancel()
+            return agent_worker_pb2.RpcResponse(
+                request_id=request.request_id,
+                error=f"Failed to deserialize the message: {e}",
+                metadata=get_telemetry_grpc_metadata(),
+            )
+        self._log_message_event(
+            message, sender=sender, receiver=recipient, kind=MessageKind.DIRECT, delivery_stage=DeliveryStage.DELIVER
         )
 
         # Get the receiving agent and prepare the message context.
@@ -441,12 +954,17 @@ class WorkerAgentRuntime(AgentRuntime):
             sender=sender,
             topic_id=None,
             is_rpc=True,
-            cancellation_token=CancellationToken(),
+            cancellation_token=cancellation_token,
+            deadline=deadline,
         )
 
         # Call the receiving agent.
         try:
-            with MessageHandlerContext.populate_context(rec_agent.id):
+            with (
+                self._agent_instances.in_use(recipient),
+                MessageHandlerContext.populate_context(rec_agent.id, deadline),
+                self._measure_load(),
+            ):
                 with self._trace_helper.trace_block(
                     "process",
                     rec_agent.id,
@@ -454,42 +972,137 @@ class WorkerAgentRuntime(AgentRuntime):
                     attributes={"request_id": request.request_id},
                     extraAttributes={"message_type": request.payload.data_type},
                 ):
-                    result = await rec_agent.on_message(message, ctx=message_context)
+                    with self._metrics_helper.measure_handler(recipient, message):
+                        result = await rec_agent.on_message(message, ctx=message_context)
         except BaseException as e:
-            response_message = agent_worker_pb2.Message(
-                response=agent_worker_pb2.RpcResponse(
-                    request_id=request.request_id,
-                    error=str(e),
-                    metadata=get_telemetry_grpc_metadata(),
-                ),
+            return agent_worker_pb2.RpcResponse(
+                request_id=request.request_id,
+                error=str(e),
+                metadata=get_telemetry_grpc_metadata(),
             )
-            # Send the error response.
-            await self._host_connection.send(response_message)
-            return
+        finally:
+            if deadline_timer is not None:
+                deadline_timer.cancel()
 
         # Serialize the result.
         result_type = self._serialization_registry.type_name(result)
-        serialized_result = self._serialization_registry.serialize(
-            result, type_name=result_type, data_content_type=JSON_DATA_CONTENT_TYPE
+        result_content_type = self._response_content_type(result_type, request.accepted_data_content_types)
+        payload = await self._serialize_payload(result, result_type, result_content_type, data_encodings)
+
+        return agent_worker_pb2.RpcResponse(
+            request_id=request.request_id,
+            payload=payload,
+            metadata=get_telemetry_grpc_metadata(),
         )
 
-        # Create the response message.
-        response_message = agent_worker_pb2.Message(
-            response=agent_worker_pb2.RpcResponse(
-                request_id=request.request_id,
-                payload=agent_worker_pb2.Payload(
-                    data_type=result_type,
-                    data=serialized_result,
-                    data_content_type=JSON_DATA_CONTENT_TYPE,
-                ),
-                metadata=get_telemetry_grpc_metadata(),
+    def _response_content_type(self, result_type: str, accepted: Sequence[str]) -> str:
+        # Senders that do not list the content types they accept expect JSON.
+        content_types = self._serialization_registry.content_types(result_type)
+        for content_type in content_types:
+            if content_type in (accepted or (JSON_DATA_CONTENT_TYPE,)):
+                return content_type
+        # The sender receives a result it cannot decode as an unknown payload rather than no response at all.
+        return content_types[0] if content_types else JSON_DATA_CONTENT_TYPE
+
+    async def _serialize_payload(
+        self, message: Any, data_type: str, data_content_type: str, data_encodings: Sequence[str] | None = None
+    ) -> agent_worker_pb2.Payload:
+        if self._blob_transport is None:
+            data = self._serialization_registry.serialize(
+                message, type_name=data_type, data_content_type=data_content_type
             )
-        )
+            payload = agent_worker_pb2.Payload(data_type=data_type, data_content_type=data_content_type, data=data)
+        else:
+            with writing_blob_references(self._blob_transport.threshold) as blobs:
+                data = self._serialization_registry.serialize(
+                    message, type_name=data_type, data_content_type=data_content_type
+                )
+            # Blobs are stored before the message is sent, so that its recipients can always resolve them.
+            await self._put_blobs(blobs)
+            payload = agent_worker_pb2.Payload(
+                data_type=data_type, data_content_type=data_content_type, data=data, blob_ids=list(blobs)
+            )
+        self._compress_payload(payload, data_encodings)
+        return payload
 
-        # Send the response.
-        await self._host_connection.send(response_message)
+    def _compress_payload(self, payload: agent_worker_pb2.Payload, data_encodings: Sequence[str] | None) -> None:
+        # The payload is compressed in an encoding its recipient can decode: the host, unless `data_encodings` lists
+        # those of a worker it is sent to directly.
+        if self._payload_compression is None or len(payload.data) < self._payload_compression.threshold:
+            return
+        if data_encodings is None:
+            assert self._host_connection is not None
+            encoding = self._host_connection.payload_encoding(self._payload_compression.encodings)
+        else:
+            encoding = next((e for e in self._payload_compression.encodings if e in data_encodings), None)
+        if encoding is None:
+            return
+        compressed = compress_payload(payload.data, encoding)
+        # Data that does not compress, such as an already compressed image, is sent as is.
+        if len(compressed) < len(payload.data):
+            payload.data = compressed
+            payload.data_encoding = encoding
+
+    async def _put_blobs(self, blobs: Mapping[str, bytes]) -> None:
+        assert self._host_connection is not None
+        missing = [id for id in blobs if await self._blob_cache.get(id) is None]
+        # Blobs sent or received before are only uploaded again if the host has evicted them from its store since.
+        known = [id for id in blobs if id not in missing]
+        if known:
+            missing.extend(await self._host_connection.find_missing_blobs(known))
+        await asyncio.gather(*(self._put_blob(id, blobs[id]) for id in missing))
+
+    async def _put_blob(self, id: str, data: bytes) -> None:
+        assert self._host_connection is not None
+        if self._blob_store is not None:
+            await asyncio.gather(self._blob_store.put(id, data), self._host_connection.put_blob(id, data))
+        else:
+            await self._host_connection.put_blob(id, data)
+        await self._blob_cache.put(id, data)
+
+    async def _deserialize_payload(self, payload: agent_worker_pb2.Payload) -> Any:
+        data = decompress_payload(payload.data, payload.data_encoding) if payload.data_encoding else payload.data
+        if not payload.blob_ids:
+            return self._serialization_registry.deserialize(
+                data, type_name=payload.data_type, data_content_type=payload.data_content_type
+            )
+        blobs = await asyncio.gather(*(self._get_blob(id) for id in payload.blob_ids))
+        with reading_blob_references(dict(zip(payload.blob_ids, blobs, strict=True))):
+            return self._serialization_registry.deserialize(
+                data, type_name=payload.data_type, data_content_type=payload.data_content_type
+            )
+
+    async def _get_blob(self, id: str) -> bytes:
+        data = await self._blob_cache.get(id)
+        if data is not None:
+            return data
+        # Messages received together often reference the same blob, which is only fetched once.
+        fetch = self._blob_fetches.get(id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_blob(id))
+            self._blob_fetches[id] = fetch
+            fetch.add_done_callback(lambda _: self._blob_fetches.pop(id, None))
+        return await asyncio.shield(fetch)
+
+    async def _fetch_blob(self, id: str) -> bytes:
+        data = await self._blob_store.get(id) if self._blob_store is not None else None
+        if data is None or blob_id(data) != id:
+            assert self._host_connection is not None
+            data = await self._host_connection.get_blob(id)
+            if blob_id(data) != id:
+                raise ValueError(f"Blob {id} received from the host does not match its data.")
+        await self._blob_cache.put(id, data)
+        return data
 
     async def _process_response(self, response: agent_worker_pb2.RpcResponse) -> None:
+        self._metrics_helper.record_message("response")
+        if response.HasField("target_endpoint"):
+            # The next requests for the target agent type, or only for the target agent, are sent directly to the
+            # worker hosting it.
+            endpoint = response.target_endpoint
+            if endpoint.agent_key and len(self._peer_endpoints) >= _MAX_AGENT_PEER_ENDPOINTS:
+                del self._peer_endpoints[next(iter(self._peer_endpoints))]
+            self._peer_endpoints[(endpoint.agent_type, endpoint.agent_key or None)] = endpoint
         with self._trace_helper.trace_block(
             "ack",
             None,
@@ -498,58 +1111,86 @@ class WorkerAgentRuntime(AgentRuntime):
             extraAttributes={"message_type": response.payload.data_type},
         ):
             # Deserialize the result.
-            result = self._serialization_registry.deserialize(
-                response.payload.data,
-                type_name=response.payload.data_type,
-                data_content_type=response.payload.data_content_type,
+            try:
+                result = await self._deserialize_payload(response.payload)
+            except Exception as e:
+                logger.error("Failed to deserialize the response to request %s", response.request_id, exc_info=True)
+                future = self._pending_requests.pop(response.request_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                return
+            self._log_message_event(
+                result, sender=None, receiver=None, kind=MessageKind.RESPOND, delivery_stage=DeliveryStage.DELIVER
             )
-            # Get the future and set the result.
-            future = self._pending_requests.pop(response.request_id)
-            if len(response.error) > 0:
+            # Get the future and set the result. It is gone if the request's deadline has passed.
+            future = self._pending_requests.pop(response.request_id, None)
+            if future is None or future.done():
+                return
+            if len(response.error) > 0 and response.accepted_data_content_types:
+                future.set_exception(
+                    _UnsupportedDataContentType(response.error, list(response.accepted_data_content_types))
+                )
+            elif response.overloaded:
+                future.set_exception(MessageQueueFullException(response.error))
+            elif len(response.error) > 0:
                 future.set_exception(Exception(response.error))
             else:
                 future.set_result(result)
 
     async def _process_event(self, event: agent_worker_pb2.Event) -> None:
-        message = self._serialization_registry.deserialize(
-            event.payload.data, type_name=event.payload.data_type, data_content_type=event.payload.data_content_type
-        )
+        self._metrics_helper.record_message("publish")
+        message = await self._deserialize_payload(event.payload)
         sender: AgentId | None = None
         if event.HasField("source"):
             sender = AgentId(event.source.type, event.source.key)
         topic_id = TopicId(event.topic_type, event.topic_source)
-        # Get the recipients for the topic.
-        recipients = await self._subscription_manager.get_subscribed_recipients(topic_id)
+        # Get the recipients for the topic, chosen by the host when other workers host agents of the same types.
+        recipients = (
+            [AgentId(recipient.type, recipient.key) for recipient in event.recipients]
+            if event.recipients
+            else await self._subscription_manager.get_subscribed_recipients(topic_id)
+        )
         # Send the message to each recipient.
         responses: List[Awaitable[Any]] = []
-        for agent_id in recipients:
-            if agent_id == sender:
-                continue
-            message_context = MessageContext(
-                sender=sender,
-                topic_id=topic_id,
-                is_rpc=False,
-                cancellation_token=CancellationToken(),
-            )
-            agent = await self._get_agent(agent_id)
-            with MessageHandlerContext.populate_context(agent.id):
-
-                async def send_message(agent: Agent, message_context: MessageContext) -> Any:
-                    with self._trace_helper.trace_block(
-                        "process",
-                        agent.id,
-                        parent=event.metadata,
-                        extraAttributes={"message_type": event.payload.data_type},
-                    ):
-                        await agent.on_message(message, ctx=message_context)
-
-                future = send_message(agent, message_context)
-            responses.append(future)
-        # Wait for all responses.
-        try:
-            await asyncio.gather(*responses)
-        except BaseException as e:
-            logger.error("Error handling event", exc_info=e)
+        # Recipients are kept from being evicted until every one of them has handled the message.
+        with contextlib.ExitStack() as pinned_agents:
+            for agent_id in recipients:
+                if agent_id == sender:
+                    continue
+                self._log_message_event(
+                    message,
+                    sender=sender,
+                    receiver=agent_id,
+                    kind=MessageKind.PUBLISH,
+                    delivery_stage=DeliveryStage.DELIVER,
+                )
+                message_context = MessageContext(
+                    sender=sender,
+                    topic_id=topic_id,
+                    is_rpc=False,
+                    cancellation_token=CancellationToken(),
+                )
+                agent = await self._get_agent(agent_id)
+                pinned_agents.enter_context(self._agent_instances.in_use(agent_id))
+                with MessageHandlerContext.populate_context(agent.id):
+
+                    async def send_message(agent: Agent, message_context: MessageContext) -> Any:
+                        with self._trace_helper.trace_block(
+                            "process",
+                            agent.id,
+                            parent=event.metadata,
+                            extraAttributes={"message_type": event.payload.data_type},
+                        ):
+                            with self._metrics_helper.measure_handler(agent.id, message):
+                                await agent.on_message(message, ctx=message_context)
+
+                    future = send_message(agent, message_context)
+                responses.append(future)
+            # Wait for all responses.
+            try:
+                await asyncio.gather(*responses)
+            except BaseException as e:
+                logger.error("Error handling event", exc_info=e)
 
     @deprecated(
         "Use your agent's `register` method directly instead of this method. See documentation for latest usage."
@@ -564,7 +1205,7 @@ class WorkerAgentRuntime(AgentRuntime):
     ) -> AgentType:
         if type in self._agent_factories:
             raise ValueError(f"Agent with type {type} already exists.")
-        self._agent_factories[type] = agent_factory
+        self._agent_factories[type] = (agent_factory, len(inspect.signature(agent_factory).parameters))
 
         if self._host_connection is None:
             raise RuntimeError("Host connection is not set.")
@@ -576,12 +1217,16 @@ class WorkerAgentRuntime(AgentRuntime):
 
         # Send the registration request message to the host.
         message = agent_worker_pb2.Message(
-            registerAgentTypeRequest=agent_worker_pb2.RegisterAgentTypeRequest(request_id=request_id, type=type)
+            registerAgentTypeRequest=agent_worker_pb2.RegisterAgentTypeRequest(
+                request_id=request_id, type=type, stateless=type in self._stateless_agent_types
+            )
         )
         await self._host_connection.send(message)
 
         # Wait for the registration response.
         await future
+        if type in self._stateless_agent_types:
+            self._start_heartbeats()
 
         if subscriptions is not None:
             if callable(subscriptions):
@@ -597,6 +1242,7 @@ class WorkerAgentRuntime(AgentRuntime):
             for subscription in subscriptions_list:
                 await self.add_subscription(subscription)
 
+        self._warm_up(agent_id for agent_id in self._warm_agents if agent_id.type == type)
         return AgentType(type)
 
     async def register_factory(
@@ -623,7 +1269,7 @@ class WorkerAgentRuntime(AgentRuntime):
 
             return agent_instance
 
-        self._agent_factories[type.type] = factory_wrapper
+        self._agent_factories[type.type] = (factory_wrapper, 0)
 
         # Create a future for the registration response.
         future = asyncio.get_event_loop().create_future()
@@ -632,13 +1278,18 @@ class WorkerAgentRuntime(AgentRuntime):
 
         # Send the registration request message to the host.
         message = agent_worker_pb2.Message(
-            registerAgentTypeRequest=agent_worker_pb2.RegisterAgentTypeRequest(request_id=request_id, type=type.type)
+            registerAgentTypeRequest=agent_worker_pb2.RegisterAgentTypeRequest(
+                request_id=request_id, type=type.type, stateless=type.type in self._stateless_agent_types
+            )
         )
         await self._host_connection.send(message)
 
         # Wait for the registration response.
         await future
+        if type.type in self._stateless_agent_types:
+            self._start_heartbeats()
 
+        self._warm_up(agent_id for agent_id in self._warm_agents if agent_id.type == type.type)
         return type
 
     async def _process_register_agent_type_response(self, response: agent_worker_pb2.RegisterAgentTypeResponse) -> None:
@@ -651,13 +1302,14 @@ class WorkerAgentRuntime(AgentRuntime):
     async def _invoke_agent_factory(
         self,
         agent_factory: Callable[[], T | Awaitable[T]] | Callable[[AgentRuntime, AgentId], T | Awaitable[T]],
+        parameter_count: int,
         agent_id: AgentId,
     ) -> T:
         with AgentInstantiationContext.populate_context((self, agent_id)):
-            if len(inspect.signature(agent_factory).parameters) == 0:
+            if parameter_count == 0:
                 factory_one = cast(Callable[[], T], agent_factory)
                 agent = factory_one()
-            elif len(inspect.signature(agent_factory).parameters) == 2:
+            elif parameter_count == 2:
                 warnings.warn(
                     "Agent factories that take two arguments are deprecated. Use AgentInstantiationContext instead. Two arg factories will be removed in a future version.",
                     stacklevel=2,
@@ -673,16 +1325,22 @@ class WorkerAgentRuntime(AgentRuntime):
         return agent
 
     async def _get_agent(self, agent_id: AgentId) -> Agent:
-        if agent_id in self._instantiated_agents:
-            return self._instantiated_agents[agent_id]
+        return await self._agent_instances.get_or_create(agent_id, self._create_agent)
 
+    async def _create_agent(self, agent_id: AgentId) -> Agent:
         if agent_id.type not in self._agent_factories:
             raise ValueError(f"Agent with name {agent_id.type} not found.")
 
-        agent_factory = self._agent_factories[agent_id.type]
-        agent = await self._invoke_agent_factory(agent_factory, agent_id)
-        self._instantiated_agents[agent_id] = agent
-        return agent
+        agent_factory, parameter_count = self._agent_factories[agent_id.type]
+        return await self._invoke_agent_factory(agent_factory, parameter_count, agent_id)
+
+    def _warm_up(self, agent_ids: Iterable[AgentId]) -> None:
+        agent_ids = [agent_id for agent_id in agent_ids if agent_id.type in self._agent_factories]
+        if len(agent_ids) == 0:
+            return
+        task = asyncio.create_task(self._agent_instances.warm_up(agent_ids, self._create_agent))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     # TODO: uncomment out the following type ignore when this is fixed in mypy: https://github.com/python/mypy/issues/3737
     async def try_get_underlying_agent_instance(self, id: AgentId, type: Type[T] = Agent) -> T:  # type: ignore[assignment]
@@ -700,8 +1358,20 @@ class WorkerAgentRuntime(AgentRuntime):
     async def add_subscription(self, subscription: Subscription) -> None:
         if self._host_connection is None:
             raise RuntimeError("Host connection is not set.")
-        if not isinstance(subscription, TypeSubscription):
-            raise ValueError("Only TypeSubscription is supported.")
+        if isinstance(subscription, TypeSubscription):
+            subscription_msg = agent_worker_pb2.Subscription(
+                typeSubscription=agent_worker_pb2.TypeSubscription(
+                    topic_type=subscription.topic_type, agent_type=subscription.agent_type
+                )
+            )
+        elif isinstance(subscription, TypePrefixSubscription):
+            subscription_msg = agent_worker_pb2.Subscription(
+                typePrefixSubscription=agent_worker_pb2.TypePrefixSubscription(
+                    topic_type_prefix=subscription.topic_type_prefix, agent_type=subscription.agent_type
+                )
+            )
+        else:
+            raise ValueError("Only TypeSubscription and TypePrefixSubscription are supported.")
         # Add to local subscription manager.
         await self._subscription_manager.add_subscription(subscription)
 
@@ -714,11 +1384,7 @@ class WorkerAgentRuntime(AgentRuntime):
         message = agent_worker_pb2.Message(
             addSubscriptionRequest=agent_worker_pb2.AddSubscriptionRequest(
                 request_id=request_id,
-                subscription=agent_worker_pb2.Subscription(
-                    typeSubscription=agent_worker_pb2.TypeSubscription(
-                        topic_type=subscription.topic_type, agent_type=subscription.agent_type
-                    )
-                ),
+                subscription=subscription_msg,
             )
         )
         await self._host_connection.send(message)
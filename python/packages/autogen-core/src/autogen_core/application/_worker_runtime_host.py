@@ -1,22 +1,85 @@
 import asyncio
 import logging
 import signal
-from typing import Optional, Sequence
+from typing import ClassVar, Optional, Sequence
 
 import grpc
+from opentelemetry.metrics import MeterProvider
 
 from autogen_core.base._type_helpers import ChannelArgumentType
 
+from ._blob_store import BlobStore
+from ._message_batching import MessageBatchingPolicy
 from ._worker_runtime_host_servicer import WorkerAgentRuntimeHostServicer
 from .protos import agent_worker_pb2_grpc
 
 logger = logging.getLogger("autogen_core")
 
+_DEFAULT_MESSAGE_BATCHING = MessageBatchingPolicy()
+
 
 class WorkerAgentRuntimeHost:
-    def __init__(self, address: str, extra_grpc_config: Optional[ChannelArgumentType] = None) -> None:
-        self._server = grpc.aio.server(options=extra_grpc_config)
-        self._servicer = WorkerAgentRuntimeHostServicer()
+    """A host that delivers messages between worker runtimes.
+
+    An agent type registered by several workers is sharded between them: each agent is hosted by the worker that its
+    key is assigned to by consistent hashing, so a worker joining or leaving only moves the agents it takes or gives
+    up.
+
+    Args:
+        address (str): Address to listen on.
+        extra_grpc_config (ChannelArgumentType, optional): Options of the gRPC server, which override
+            :attr:`DEFAULT_GRPC_CONFIG`.
+        log_message_payloads (bool, optional): Whether to log the payloads of the delivered messages.
+        meter_provider (MeterProvider, optional): Meter provider to record metrics with.
+        blob_store (BlobStore, optional): Store of the blobs that workers send out of band. Defaults to an
+            :class:`InMemoryBlobStore` holding at most 1 GiB.
+        message_batching (MessageBatchingPolicy, optional): How the messages queued for each worker are coalesced
+            into batches, each sent in a single write. Set to None to send every message on its own. Defaults to
+            :class:`MessageBatchingPolicy` with its defaults.
+        max_send_queue_size (int, optional): Maximum number of requests and events queued for each worker. While a
+            worker's queue is full, the requests and events for it wait in a backlog of the same size, without holding
+            up the messages for other workers. If less than or equal to zero, the queues are unbounded.
+            Defaults to 10000.
+        send_queue_full_timeout (float, optional): Time in seconds a request or event waits in the backlog for room
+            in the queue. A request that finds no room fails with
+            :class:`~autogen_core.base.exceptions.MessageQueueFullException` in the sending worker, and an event is
+            not delivered to the worker. Defaults to 5.
+    """
+
+    DEFAULT_GRPC_CONFIG: ClassVar[ChannelArgumentType] = [
+        # Serialized LLM histories and images are often larger than the default limit of 4 MiB.
+        ("grpc.max_send_message_length", 64 * 1024 * 1024),
+        ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+        # Detect dead workers, and allow the keepalive pings of the workers.
+        ("grpc.keepalive_time_ms", 60_000),
+        ("grpc.keepalive_timeout_ms", 10_000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_ping_interval_without_data_ms", 10_000),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+    def __init__(
+        self,
+        address: str,
+        extra_grpc_config: Optional[ChannelArgumentType] = None,
+        *,
+        log_message_payloads: bool = True,
+        meter_provider: MeterProvider | None = None,
+        blob_store: BlobStore | None = None,
+        message_batching: MessageBatchingPolicy | None = _DEFAULT_MESSAGE_BATCHING,
+        max_send_queue_size: int = 10_000,
+        send_queue_full_timeout: float = 5.0,
+    ) -> None:
+        options = {**dict(self.DEFAULT_GRPC_CONFIG), **dict(extra_grpc_config or [])}
+        self._server = grpc.aio.server(options=list(options.items()))
+        self._servicer = WorkerAgentRuntimeHostServicer(
+            log_message_payloads=log_message_payloads,
+            meter_provider=meter_provider,
+            blob_store=blob_store,
+            message_batching=message_batching,
+            max_send_queue_size=max_send_queue_size,
+            send_queue_full_timeout=send_queue_full_timeout,
+        )
         agent_worker_pb2_grpc.add_AgentRpcServicer_to_server(self._servicer, self._server)
         self._server.add_insecure_port(address)
         self._address = address
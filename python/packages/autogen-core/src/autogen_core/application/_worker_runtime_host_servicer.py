@@ -1,33 +1,133 @@
 import asyncio
+import functools
+import itertools
 import logging
+import time
 from _collections_abc import AsyncIterator, Iterator
 from asyncio import Future, Task
-from typing import Any, Dict, Set
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Set, Tuple
 
 import grpc
+from opentelemetry.metrics import MeterProvider
 
-from ..base import TopicId
-from ..components import TypeSubscription
+from ..base import AgentId, TopicId
+from ..base._blob_references import blob_id
+from ..components import TypePrefixSubscription, TypeSubscription
+from ._blob_store import BlobStore, InMemoryBlobStore
+from ._consistent_hashing import ConsistentHashRing
 from ._helpers import SubscriptionManager
+from ._message_batching import MESSAGE_BATCHING_METADATA_KEY, MessageBatcher, MessageBatchingPolicy, unbatch
+from ._payload_compression import PAYLOAD_ENCODINGS_METADATA_KEY, available_payload_encodings, decompress_payload
+from ._peer_requests import PEER_ADDRESS_METADATA_KEY
 from .protos import agent_worker_pb2, agent_worker_pb2_grpc
+from .telemetry import MetricsHelper
 
 logger = logging.getLogger("autogen_core")
 event_logger = logging.getLogger("autogen_core.events")
 
 
+class _SendWindow:
+    """The room left for requests and events in the send queue of a client, and the backlog of those waiting for it.
+
+    Args:
+        size (int): Maximum number of requests and events in the send queue, and in the backlog.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.room = size
+        # Message, called if it is dropped, and loop time at which it stops waiting for room.
+        self.backlog: asyncio.Queue[Tuple[agent_worker_pb2.Message, Callable[[], None], float]] = asyncio.Queue(size)
+        self.freed = asyncio.Event()
+
+    def release(self, count: int) -> None:
+        self.room += count
+        self.freed.set()
+
+
 class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
-    """A gRPC servicer that hosts message delivery service for agents."""
+    """A gRPC servicer that hosts message delivery service for agents.
+
+    An agent type may be registered by several clients. Requests and events for its agents are then routed to one
+    of them by consistent hashing of the agent key, so each agent lives on a single client, and a client joining or
+    leaving only moves the agents whose keys it takes or gives up. Requests and events for stateless agent types are
+    instead dispatched to the least loaded of the clients, by the load they report in their heartbeats.
+
+    The routing tables are replaced rather than changed in place when clients register agent types or disconnect, so
+    requests and events are routed without taking a lock. Each client may have at most `max_send_queue_size`
+    requests and events queued for it. Requests and events for a client whose queue is full wait in a backlog of the
+    same size, for up to `send_queue_full_timeout` seconds, without holding up the messages for other clients. A
+    request that finds no room is answered with an overload error, and an event is dropped for that client.
+    """
 
-    def __init__(self) -> None:
+    # Kinds of messages that count against the limit of the send queues. Responses complete requests that were
+    # already admitted, and the other messages are few, so they are always queued.
+    FLOW_CONTROLLED_MESSAGES = frozenset(("request", "event"))
+
+    # Lower bound of the request latency used to compare the loads of clients, which also stands for the latency of
+    # clients that have not handled any request yet.
+    MIN_REQUEST_LATENCY = 0.001
+
+    DEFAULT_BLOB_STORE_SIZE = 1024 * 1024 * 1024
+
+    def __init__(
+        self,
+        *,
+        log_message_payloads: bool = True,
+        meter_provider: MeterProvider | None = None,
+        blob_store: BlobStore | None = None,
+        message_batching: MessageBatchingPolicy | None = None,
+        max_send_queue_size: int = 0,
+        send_queue_full_timeout: float = 5.0,
+    ) -> None:
+        self._log_message_payloads = log_message_payloads
+        self._max_send_queue_size = max_send_queue_size
+        self._send_queue_full_timeout = send_queue_full_timeout
+        self._message_batching = message_batching
+        self._blob_store = blob_store if blob_store is not None else InMemoryBlobStore(self.DEFAULT_BLOB_STORE_SIZE)
+        self._metrics_helper = MetricsHelper(meter_provider, "Worker Runtime Host")
+        self._metrics_helper.observe_gauge(
+            "grpc.send_queue.size",
+            lambda: sum(queue.qsize() for queue in self._send_queues.values())
+            + sum(window.backlog.qsize() for window in self._send_windows.values()),
+            unit="{message}",
+            description="Number of messages waiting to be sent to the connected workers.",
+        )
+        self._metrics_helper.observe_gauge(
+            "grpc.clients",
+            lambda: len(self._send_queues),
+            unit="{client}",
+            description="Number of connected workers.",
+        )
         self._client_id = 0
         self._client_id_lock = asyncio.Lock()
         self._send_queues: Dict[int, asyncio.Queue[agent_worker_pb2.Message]] = {}
+        # Room left in the send queue of each client for requests and events, if it is bounded.
+        self._send_windows: Dict[int, _SendWindow] = {}
+        # Payload encodings each client can decode.
+        self._payload_encodings: Dict[int, Set[str]] = {}
+        # Addresses that clients accept requests from other clients on, directly.
+        self._peer_addresses: Dict[int, str] = {}
+        # Serializes the changes to the routing tables and subscriptions. Routing reads the current tables without it.
         self._agent_type_to_client_id_lock = asyncio.Lock()
-        self._agent_type_to_client_id: Dict[str, int] = {}
+        # Agent type -> clients that registered it, on a ring that the agent keys are hashed onto. Neither the mapping
+        # nor its rings are changed once set, they are replaced by changed copies.
+        self._agent_type_to_client_ids: Mapping[str, ConsistentHashRing[int]] = {}
+        # Agent types whose agents keep no state, and are dispatched to the least loaded of their clients.
+        self._stateless_agent_types: FrozenSet[str] = frozenset()
+        # Client -> requests in flight and request latency in seconds, from its last heartbeat.
+        self._client_loads: Dict[int, Tuple[int, float]] = {}
+        # Agent type -> clients that were given peer endpoints for it.
+        self._peer_endpoint_holders: Dict[str, Set[int]] = {}
         self._pending_responses: Dict[int, Dict[str, Future[Any]]] = {}
+        # Request IDs are only unique per sending client, so requests are forwarded under an ID unique to the host.
+        self._forwarded_request_ids = itertools.count(1)
+        # (sending client, request ID) -> (target client, forwarded request ID), for the requests awaiting responses.
+        self._forwarded_requests: Dict[Tuple[int, str], Tuple[int, str]] = {}
         self._background_tasks: Set[Task[Any]] = set()
         self._subscription_manager = SubscriptionManager()
-        self._client_id_to_subscription_id_mapping: Dict[int, set[str]] = {}
+        # Subscriptions added by several clients that host the same agent type are added once, and removed once
+        # none of those clients is connected: (kind, topic type or prefix, agent type) -> subscription id and clients.
+        self._subscription_clients: Dict[Tuple[str, str, str], Tuple[str, Set[int]]] = {}
 
     async def OpenChannel(  # type: ignore
         self,
@@ -42,6 +142,29 @@ class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
         # Register the client with the server and create a send queue for the client.
         send_queue: asyncio.Queue[agent_worker_pb2.Message] = asyncio.Queue()
         self._send_queues[client_id] = send_queue
+        window: _SendWindow | None = None
+        backlog_task: Task[None] | None = None
+        if self._max_send_queue_size > 0:
+            window = _SendWindow(self._max_send_queue_size)
+            self._send_windows[client_id] = window
+            backlog_task = asyncio.create_task(self._forward_backlog(send_queue, window))
+        # Clients that do not list the payload encodings they can decode are sent uncompressed payloads, and
+        # clients that do not state that they can receive batches are sent one message at a time.
+        self._payload_encodings[client_id] = set()
+        batcher = MessageBatcher(send_queue)
+        for key, value in context.invocation_metadata() or ():
+            if key == PAYLOAD_ENCODINGS_METADATA_KEY and value:
+                self._payload_encodings[client_id] = set(str(value).split(","))
+            elif key == MESSAGE_BATCHING_METADATA_KEY and value == "1":
+                batcher.policy = self._message_batching
+            elif key == PEER_ADDRESS_METADATA_KEY and value:
+                self._peer_addresses[client_id] = str(value)
+        await context.send_initial_metadata(
+            [
+                (PAYLOAD_ENCODINGS_METADATA_KEY, ",".join(available_payload_encodings())),
+                (MESSAGE_BATCHING_METADATA_KEY, "1"),
+            ]
+        )
         logger.info(f"Client {client_id} connected.")
 
         try:
@@ -51,37 +174,138 @@ class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
 
             # Return an async generator that will yield messages from the send queue to the client.
             while True:
-                message = await send_queue.get()
+                message = await batcher.next()
                 # Yield the message to the client.
                 try:
                     yield message
                 except Exception as e:
                     logger.error(f"Failed to send message to client {client_id}: {e}", exc_info=True)
                     break
-                logger.info(f"Sent message to client {client_id}: {message}")
+                if window is not None:
+                    # The messages are written to the stream, so they no longer take room in the queue.
+                    window.release(
+                        sum(
+                            1
+                            for sent in unbatch(message)
+                            if sent.WhichOneof("message") in self.FLOW_CONTROLLED_MESSAGES
+                        )
+                    )
+                if self._log_message_payloads:
+                    logger.info("Sent message to client %s: %s", client_id, message)
+                else:
+                    logger.info("Sent %s message to client %s", message.WhichOneof("message"), client_id)
             # Wait for the receiving task to finish.
             await receiving_task
 
         finally:
             # Clean up the client connection.
             del self._send_queues[client_id]
-            # Cancel pending requests sent to this client.
+            self._send_windows.pop(client_id, None)
+            if backlog_task is not None:
+                backlog_task.cancel()
+            del self._payload_encodings[client_id]
+            self._peer_addresses.pop(client_id, None)
+            self._client_loads.pop(client_id, None)
+            # Fail the pending requests sent to this client, so that their senders are not left waiting.
             for future in self._pending_responses.pop(client_id, {}).values():
-                future.cancel()
+                if not future.done():
+                    future.set_result(
+                        agent_worker_pb2.RpcResponse(error="Worker hosting the target agent disconnected.")
+                    )
             # Remove the client id from the agent type to client id mapping.
             await self._on_client_disconnect(client_id)
 
     async def _on_client_disconnect(self, client_id: int) -> None:
         async with self._agent_type_to_client_id_lock:
-            agent_types = [agent_type for agent_type, id_ in self._agent_type_to_client_id.items() if id_ == client_id]
+            for holders in self._peer_endpoint_holders.values():
+                holders.discard(client_id)
+            agent_types = [
+                agent_type for agent_type, ring in self._agent_type_to_client_ids.items() if client_id in ring
+            ]
+            agent_type_to_client_ids = dict(self._agent_type_to_client_ids)
+            stateless_agent_types = set(self._stateless_agent_types)
             for agent_type in agent_types:
-                logger.info(f"Removing agent type {agent_type} from agent type to client id mapping")
-                del self._agent_type_to_client_id[agent_type]
-            for sub_id in self._client_id_to_subscription_id_mapping.get(client_id, []):
-                logger.info(f"Client id {client_id} disconnected. Removing corresponding subscription with id {id}")
+                logger.info(f"Removing client {client_id} from the clients of agent type {agent_type}")
+                ring = agent_type_to_client_ids[agent_type].copy()
+                ring.remove(client_id)
+                if ring:
+                    agent_type_to_client_ids[agent_type] = ring
+                else:
+                    del agent_type_to_client_ids[agent_type]
+                    stateless_agent_types.discard(agent_type)
+            self._agent_type_to_client_ids = agent_type_to_client_ids
+            self._stateless_agent_types = frozenset(stateless_agent_types)
+            for agent_type in agent_types:
+                self._remove_peer_endpoints(agent_type)
+            for key, (sub_id, clients) in list(self._subscription_clients.items()):
+                clients.discard(client_id)
+                if clients:
+                    continue
+                logger.info(f"Client id {client_id} disconnected. Removing corresponding subscription with id {sub_id}")
+                del self._subscription_clients[key]
                 await self._subscription_manager.remove_subscription(sub_id)
         logger.info(f"Client {client_id} disconnected successfully")
 
+    def _remove_peer_endpoints(self, agent_type: str) -> None:
+        # The agent keys of the type have moved between clients, so the endpoints given for it may be stale.
+        for holder in self._peer_endpoint_holders.pop(agent_type, set()):
+            send_queue = self._send_queues.get(holder)
+            if send_queue is not None:
+                send_queue.put_nowait(
+                    agent_worker_pb2.Message(
+                        removePeerEndpoints=agent_worker_pb2.RemovePeerEndpoints(agent_type=agent_type)
+                    )
+                )
+
+    def _send(self, client_id: int, message: agent_worker_pb2.Message, on_dropped: Callable[[], None]) -> None:
+        """Queue a request or event for the client.
+
+        While the client's send queue is full, the message waits in the client's backlog for up to
+        `send_queue_full_timeout` seconds. `on_dropped` is called instead if the client is not connected, its backlog
+        is full too, or the wait times out.
+        """
+        send_queue = self._send_queues.get(client_id)
+        if send_queue is None:
+            on_dropped()
+            return
+        window = self._send_windows.get(client_id)
+        if window is None:
+            send_queue.put_nowait(message)
+        elif window.room > 0 and window.backlog.empty():
+            window.room -= 1
+            send_queue.put_nowait(message)
+        else:
+            expires_at = asyncio.get_running_loop().time() + self._send_queue_full_timeout
+            try:
+                window.backlog.put_nowait((message, on_dropped, expires_at))
+            except asyncio.QueueFull:
+                on_dropped()
+
+    async def _forward_backlog(self, send_queue: asyncio.Queue[agent_worker_pb2.Message], window: _SendWindow) -> None:
+        """Move the messages in a client's backlog to its send queue as room is freed in it, in order."""
+        loop = asyncio.get_running_loop()
+        while True:
+            message, on_dropped, expires_at = await window.backlog.get()
+            while window.room <= 0:
+                window.freed.clear()
+                try:
+                    await asyncio.wait_for(window.freed.wait(), expires_at - loop.time())
+                except asyncio.TimeoutError:
+                    break
+            if window.room <= 0:
+                on_dropped()
+                continue
+            window.room -= 1
+            send_queue.put_nowait(message)
+
+    def _send_response(self, client_id: int, response: agent_worker_pb2.RpcResponse) -> None:
+        """Queue a response for the client. Responses do not count against the limit of its send queue."""
+        send_queue = self._send_queues.get(client_id)
+        if send_queue is None:
+            logger.error(f"Client {client_id} not found, failed to send response message.")
+            return
+        send_queue.put_nowait(agent_worker_pb2.Message(response=response))
+
     def _raise_on_exception(self, task: Task[Any]) -> None:
         exception = task.exception()
         if exception is not None:
@@ -91,116 +315,266 @@ class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
         self, client_id: int, request_iterator: AsyncIterator[agent_worker_pb2.Message]
     ) -> None:
         # Receive messages from the client and process them.
-        async for message in request_iterator:
-            logger.info(f"Received message from client {client_id}: {message}")
-            oneofcase = message.WhichOneof("message")
-            match oneofcase:
-                case "request":
-                    request: agent_worker_pb2.RpcRequest = message.request
-                    task = asyncio.create_task(self._process_request(request, client_id))
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._raise_on_exception)
-                    task.add_done_callback(self._background_tasks.discard)
-                case "response":
-                    response: agent_worker_pb2.RpcResponse = message.response
-                    task = asyncio.create_task(self._process_response(response, client_id))
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._raise_on_exception)
-                    task.add_done_callback(self._background_tasks.discard)
-                case "event":
-                    event: agent_worker_pb2.Event = message.event
-                    task = asyncio.create_task(self._process_event(event))
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._raise_on_exception)
-                    task.add_done_callback(self._background_tasks.discard)
-                case "registerAgentTypeRequest":
-                    register_agent_type: agent_worker_pb2.RegisterAgentTypeRequest = message.registerAgentTypeRequest
-                    task = asyncio.create_task(
-                        self._process_register_agent_type_request(register_agent_type, client_id)
-                    )
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._raise_on_exception)
-                    task.add_done_callback(self._background_tasks.discard)
-                case "addSubscriptionRequest":
-                    add_subscription: agent_worker_pb2.AddSubscriptionRequest = message.addSubscriptionRequest
-                    task = asyncio.create_task(self._process_add_subscription_request(add_subscription, client_id))
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._raise_on_exception)
-                    task.add_done_callback(self._background_tasks.discard)
-                case "registerAgentTypeResponse" | "addSubscriptionResponse":
-                    logger.warning(f"Received unexpected message type: {oneofcase}")
-                case None:
-                    logger.warning("Received empty message")
-                case other:
-                    logger.error(f"Received unexpected message: {other}")
+        async for received in request_iterator:
+            for message in unbatch(received):
+                try:
+                    await self._process_message(client_id, message)
+                except Exception as e:
+                    logger.error(f"Failed to process message from client {client_id}: {e}", exc_info=True)
+
+    async def _process_message(self, client_id: int, message: agent_worker_pb2.Message) -> None:
+        oneofcase = message.WhichOneof("message")
+        if self._log_message_payloads:
+            logger.info("Received message from client %s: %s", client_id, message)
+        else:
+            logger.info("Received %s message from client %s", oneofcase, client_id)
+        match oneofcase:
+            case "request":
+                request: agent_worker_pb2.RpcRequest = message.request
+                self._metrics_helper.record_message("send")
+                # Requests and events are queued for their recipients in the order they are read. They never wait for
+                # room, so a recipient that is behind does not hold up the sender's messages for other recipients.
+                await self._process_request(request, client_id)
+            case "response":
+                response: agent_worker_pb2.RpcResponse = message.response
+                self._metrics_helper.record_message("response")
+                task = asyncio.create_task(self._process_response(response, client_id))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._raise_on_exception)
+                task.add_done_callback(self._background_tasks.discard)
+            case "event":
+                event: agent_worker_pb2.Event = message.event
+                self._metrics_helper.record_message("publish")
+                await self._process_event(event)
+            case "cancel":
+                self._process_cancel(message.cancel, client_id)
+            case "heartbeat":
+                heartbeat: agent_worker_pb2.Heartbeat = message.heartbeat
+                self._client_loads[client_id] = (heartbeat.in_flight_requests, heartbeat.request_latency)
+            case "registerAgentTypeRequest":
+                register_agent_type: agent_worker_pb2.RegisterAgentTypeRequest = message.registerAgentTypeRequest
+                task = asyncio.create_task(self._process_register_agent_type_request(register_agent_type, client_id))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._raise_on_exception)
+                task.add_done_callback(self._background_tasks.discard)
+            case "addSubscriptionRequest":
+                add_subscription: agent_worker_pb2.AddSubscriptionRequest = message.addSubscriptionRequest
+                task = asyncio.create_task(self._process_add_subscription_request(add_subscription, client_id))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._raise_on_exception)
+                task.add_done_callback(self._background_tasks.discard)
+            case "registerAgentTypeResponse" | "addSubscriptionResponse" | "removePeerEndpoints":
+                logger.warning(f"Received unexpected message type: {oneofcase}")
+            case None:
+                logger.warning("Received empty message")
+            case other:
+                logger.error(f"Received unexpected message: {other}")
 
     async def _process_request(self, request: agent_worker_pb2.RpcRequest, client_id: int) -> None:
-        # Deliver the message to a client given the target agent type.
-        async with self._agent_type_to_client_id_lock:
-            target_client_id = self._agent_type_to_client_id.get(request.target.type)
-        if target_client_id is None:
+        if request.HasField("deadline") and request.deadline.ToNanoseconds() <= time.time_ns():
+            # The sender has stopped waiting for the response, so the request is not forwarded.
+            logger.info(f"Dropping request {request.request_id} to {request.target.type} past its deadline.")
+            self._send_response(
+                client_id, agent_worker_pb2.RpcResponse(request_id=request.request_id, error="Deadline exceeded")
+            )
+            return
+        # Deliver the message to the client hosting the target agent.
+        ring = self._agent_type_to_client_ids.get(request.target.type)
+        if ring is None:
             logger.error(f"Agent {request.target.type} not found, failed to deliver message.")
             return
-        target_send_queue = self._send_queues.get(target_client_id)
-        if target_send_queue is None:
+        target_client_id = self._client_for(request.target.type, request.target.key, ring)
+        if target_client_id not in self._send_queues:
             logger.error(f"Client {target_client_id} not found, failed to deliver message.")
             return
-        await target_send_queue.put(agent_worker_pb2.Message(request=request))
+        forwarded = agent_worker_pb2.RpcRequest()
+        forwarded.CopyFrom(request)
+        forwarded.request_id = str(next(self._forwarded_request_ids))
+        self._decode_payload_for(target_client_id, forwarded.payload)
 
         # Create a future to wait for the response from the target.
         future = asyncio.get_event_loop().create_future()
-        self._pending_responses.setdefault(target_client_id, {})[request.request_id] = future
+        self._pending_responses.setdefault(target_client_id, {})[forwarded.request_id] = future
+        self._send(
+            target_client_id,
+            agent_worker_pb2.Message(request=forwarded),
+            functools.partial(
+                self._reject_request, target_client_id, forwarded.request_id, request.target.type, future
+            ),
+        )
 
         # Create a task to wait for the response and send it back to the client.
-        send_response_task = asyncio.create_task(self._wait_and_send_response(future, client_id))
+        self._forwarded_requests[(client_id, request.request_id)] = (target_client_id, forwarded.request_id)
+        send_response_task = asyncio.create_task(
+            self._wait_and_send_response(future, client_id, request.request_id, request.target, target_client_id)
+        )
         self._background_tasks.add(send_response_task)
         send_response_task.add_done_callback(self._raise_on_exception)
         send_response_task.add_done_callback(self._background_tasks.discard)
 
-    async def _wait_and_send_response(self, future: Future[agent_worker_pb2.RpcResponse], client_id: int) -> None:
-        response = await future
-        message = agent_worker_pb2.Message(response=response)
-        send_queue = self._send_queues.get(client_id)
-        if send_queue is None:
-            logger.error(f"Client {client_id} not found, failed to send response message.")
-            return
-        await send_queue.put(message)
+    def _reject_request(
+        self, target_client_id: int, request_id: str, agent_type: str, future: Future[agent_worker_pb2.RpcResponse]
+    ) -> None:
+        logger.error(f"Send queue of client {target_client_id} is full, failed to deliver request.")
+        self._pending_responses.get(target_client_id, {}).pop(request_id, None)
+        if not future.done():
+            # The sender is answered with the overload error as the response to the request.
+            future.set_result(
+                agent_worker_pb2.RpcResponse(error=f"Worker hosting {agent_type} is overloaded.", overloaded=True)
+            )
+
+    async def _wait_and_send_response(
+        self,
+        future: Future[agent_worker_pb2.RpcResponse],
+        client_id: int,
+        request_id: str,
+        target: agent_worker_pb2.AgentId,
+        target_client_id: int,
+    ) -> None:
+        try:
+            response = await future
+        finally:
+            self._forwarded_requests.pop((client_id, request_id), None)
+        response.request_id = request_id
+        self._decode_payload_for(client_id, response.payload)
+        peer_address = self._peer_addresses.get(target_client_id)
+        ring = self._agent_type_to_client_ids.get(target.type)
+        # No endpoint is given if the target agent has moved to another client since the request was forwarded.
+        if (
+            peer_address is not None
+            and not response.overloaded
+            and target_client_id != client_id
+            and ring is not None
+            and target.type not in self._stateless_agent_types
+            and ring.get(target.key) == target_client_id
+        ):
+            # The sender sends its next requests for the agent type, or only for the target agent if the type is
+            # hosted by several clients, directly to the client hosting it.
+            response.target_endpoint.CopyFrom(
+                agent_worker_pb2.PeerEndpoint(
+                    agent_type=target.type,
+                    address=peer_address,
+                    data_encodings=sorted(self._payload_encodings.get(target_client_id, ())),
+                    agent_key=target.key if len(ring) > 1 else "",
+                )
+            )
+            self._peer_endpoint_holders.setdefault(target.type, set()).add(client_id)
+        self._send_response(client_id, response)
 
     async def _process_response(self, response: agent_worker_pb2.RpcResponse, client_id: int) -> None:
         # Setting the result of the future will send the response back to the original sender.
-        future = self._pending_responses[client_id].pop(response.request_id)
+        future = self._pending_responses.get(client_id, {}).pop(response.request_id, None)
+        if future is None or future.done():
+            # The request was rejected, timed out or its sender disconnected before the response arrived.
+            logger.warning(
+                f"Dropping response to unknown or completed request {response.request_id} from client {client_id}."
+            )
+            return
         future.set_result(response)
 
+    def _process_cancel(self, cancel: agent_worker_pb2.RpcCancel, client_id: int) -> None:
+        forwarded = self._forwarded_requests.get((client_id, cancel.request_id))
+        if forwarded is None:
+            # The response has already been sent, or the request was never forwarded.
+            return
+        target_client_id, forwarded_request_id = forwarded
+        send_queue = self._send_queues.get(target_client_id)
+        if send_queue is not None:
+            # Like responses, cancellations do not count against the limit of the send queue.
+            send_queue.put_nowait(
+                agent_worker_pb2.Message(cancel=agent_worker_pb2.RpcCancel(request_id=forwarded_request_id))
+            )
+
     async def _process_event(self, event: agent_worker_pb2.Event) -> None:
         topic_id = TopicId(type=event.topic_type, source=event.topic_source)
         recipients = await self._subscription_manager.get_subscribed_recipients(topic_id)
-        # Get the client ids of the recipients.
-        async with self._agent_type_to_client_id_lock:
-            client_ids: Set[int] = set()
-            for recipient in recipients:
-                client_id = self._agent_type_to_client_id.get(recipient.type)
-                if client_id is not None:
-                    client_ids.add(client_id)
-                else:
-                    logger.error(f"Agent {recipient.type} and its client not found for topic {topic_id}.")
-        # Deliver the event to clients.
-        for client_id in client_ids:
-            await self._send_queues[client_id].put(agent_worker_pb2.Message(event=event))
+        # Get the client ids of the recipients, each hosted by the client its key is hashed to.
+        client_recipients: Dict[int, List[AgentId]] = {}
+        sharded = False
+        agent_type_to_client_ids = self._agent_type_to_client_ids
+        for recipient in recipients:
+            ring = agent_type_to_client_ids.get(recipient.type)
+            if ring is None:
+                logger.error(f"Agent {recipient.type} and its client not found for topic {topic_id}.")
+                continue
+            sharded = sharded or len(ring) > 1
+            client_id = self._client_for(recipient.type, recipient.key, ring)
+            client_recipients.setdefault(client_id, []).append(recipient)
+        # Deliver the event to clients, decompressed once for all the clients that cannot decode its payload.
+        decoded_event: agent_worker_pb2.Event | None = None
+        for client_id, agent_ids in client_recipients.items():
+            client_event = event
+            if not self._can_decode(client_id, event.payload):
+                if decoded_event is None:
+                    decoded_event = agent_worker_pb2.Event()
+                    decoded_event.CopyFrom(event)
+                    self._decode_payload_for(client_id, decoded_event.payload)
+                client_event = decoded_event
+            if sharded:
+                # Other clients host agents of the same types, so the client is told which agents are its own.
+                shared_event, client_event = client_event, agent_worker_pb2.Event()
+                client_event.CopyFrom(shared_event)
+                client_event.recipients.extend(
+                    agent_worker_pb2.AgentId(type=agent_id.type, key=agent_id.key) for agent_id in agent_ids
+                )
+            self._send(
+                client_id,
+                agent_worker_pb2.Message(event=client_event),
+                functools.partial(
+                    logger.error, "Client %s not found or its send queue is full, failed to deliver event.", client_id
+                ),
+            )
+
+    def _client_for(self, agent_type: str, agent_key: str, ring: ConsistentHashRing[int]) -> int:
+        """The client that a message to an agent is delivered to, among the clients of its agent type."""
+        if agent_type not in self._stateless_agent_types or len(ring) == 1:
+            return ring.get(agent_key)
+        return min(ring, key=self._client_load)
+
+    def _client_load(self, client_id: int) -> float:
+        """The expected time for the client to handle a new request, given the requests it is handling."""
+        in_flight, latency = self._client_loads.get(client_id, (0, 0.0))
+        # Requests forwarded to the client since its last heartbeat are not counted in it yet.
+        in_flight = max(in_flight, len(self._pending_responses.get(client_id, ())))
+        return (in_flight + 1) * max(latency, self.MIN_REQUEST_LATENCY)
+
+    def _can_decode(self, client_id: int, payload: agent_worker_pb2.Payload) -> bool:
+        return not payload.data_encoding or payload.data_encoding in self._payload_encodings.get(client_id, ())
+
+    def _decode_payload_for(self, client_id: int, payload: agent_worker_pb2.Payload) -> None:
+        """Decompress `payload` in place if the client cannot decode it."""
+        if self._can_decode(client_id, payload):
+            return
+        payload.data = decompress_payload(payload.data, payload.data_encoding)
+        payload.data_encoding = ""
 
     async def _process_register_agent_type_request(
         self, register_agent_type_req: agent_worker_pb2.RegisterAgentTypeRequest, client_id: int
     ) -> None:
-        # Register the agent type with the host runtime.
+        # Register the agent type with the host runtime, alongside the other clients hosting it.
+        agent_type = register_agent_type_req.type
         async with self._agent_type_to_client_id_lock:
-            if register_agent_type_req.type in self._agent_type_to_client_id:
-                existing_client_id = self._agent_type_to_client_id[register_agent_type_req.type]
-                logger.error(
-                    f"Agent type {register_agent_type_req.type} already registered with client {existing_client_id}."
-                )
+            ring = self._agent_type_to_client_ids.get(agent_type) or ConsistentHashRing[int]()
+            if client_id in ring:
+                logger.error(f"Agent type {agent_type} already registered with client {client_id}.")
                 success = False
-                error = f"Agent type {register_agent_type_req.type} already registered."
+                error = f"Agent type {agent_type} already registered."
+            elif ring and register_agent_type_req.stateless != (agent_type in self._stateless_agent_types):
+                logger.error(f"Agent type {agent_type} registered as both stateful and stateless.")
+                success = False
+                error = (
+                    f"Agent type {agent_type} already registered as "
+                    f"{'stateless' if agent_type in self._stateless_agent_types else 'stateful'}."
+                )
             else:
-                self._agent_type_to_client_id[register_agent_type_req.type] = client_id
+                if register_agent_type_req.stateless:
+                    self._stateless_agent_types = self._stateless_agent_types | {agent_type}
+                ring = ring.copy()
+                ring.add(client_id)
+                self._agent_type_to_client_ids = {**self._agent_type_to_client_ids, agent_type: ring}
+                if len(ring) > 1:
+                    logger.info(f"Agent type {agent_type} is now hosted by {len(ring)} clients.")
+                    self._remove_peer_endpoints(agent_type)
                 success = True
                 error = None
         # Send a response back to the client.
@@ -216,33 +590,55 @@ class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
         self, add_subscription_req: agent_worker_pb2.AddSubscriptionRequest, client_id: int
     ) -> None:
         oneofcase = add_subscription_req.subscription.WhichOneof("subscription")
+        subscription: TypeSubscription | TypePrefixSubscription
         match oneofcase:
             case "typeSubscription":
                 type_subscription_msg: agent_worker_pb2.TypeSubscription = (
                     add_subscription_req.subscription.typeSubscription
                 )
-                type_subscription = TypeSubscription(
+                subscription = TypeSubscription(
                     topic_type=type_subscription_msg.topic_type, agent_type=type_subscription_msg.agent_type
                 )
-                try:
-                    await self._subscription_manager.add_subscription(type_subscription)
-                    subscription_ids = self._client_id_to_subscription_id_mapping.setdefault(client_id, set())
-                    subscription_ids.add(type_subscription.id)
-                    success = True
-                    error = None
-                except ValueError as e:
-                    success = False
-                    error = str(e)
-                # Send a response back to the client.
-                await self._send_queues[client_id].put(
-                    agent_worker_pb2.Message(
-                        addSubscriptionResponse=agent_worker_pb2.AddSubscriptionResponse(
-                            request_id=add_subscription_req.request_id, success=success, error=error
-                        )
-                    )
+            case "typePrefixSubscription":
+                type_prefix_subscription_msg: agent_worker_pb2.TypePrefixSubscription = (
+                    add_subscription_req.subscription.typePrefixSubscription
+                )
+                subscription = TypePrefixSubscription(
+                    topic_type_prefix=type_prefix_subscription_msg.topic_type_prefix,
+                    agent_type=type_prefix_subscription_msg.agent_type,
                 )
             case None:
                 logger.warning("Received empty subscription message")
+                return
+        key = (oneofcase, *self._subscription_key(subscription))
+        try:
+            async with self._agent_type_to_client_id_lock:
+                existing = self._subscription_clients.get(key)
+                if existing is not None and client_id not in existing[1]:
+                    # Another client hosting the agent type has added the same subscription.
+                    existing[1].add(client_id)
+                else:
+                    await self._subscription_manager.add_subscription(subscription)
+                    self._subscription_clients[key] = (subscription.id, {client_id})
+            success = True
+            error = None
+        except ValueError as e:
+            success = False
+            error = str(e)
+        # Send a response back to the client.
+        await self._send_queues[client_id].put(
+            agent_worker_pb2.Message(
+                addSubscriptionResponse=agent_worker_pb2.AddSubscriptionResponse(
+                    request_id=add_subscription_req.request_id, success=success, error=error
+                )
+            )
+        )
+
+    @staticmethod
+    def _subscription_key(subscription: TypeSubscription | TypePrefixSubscription) -> Tuple[str, str]:
+        if isinstance(subscription, TypeSubscription):
+            return subscription.topic_type, subscription.agent_type
+        return subscription.topic_type_prefix, subscription.agent_type
 
     async def GetState(  # type: ignore
         self,
@@ -257,3 +653,40 @@ class WorkerAgentRuntimeHostServicer(agent_worker_pb2_grpc.AgentRpcServicer):
         context: grpc.aio.ServicerContext[agent_worker_pb2.AgentId, agent_worker_pb2.SaveStateResponse],
     ) -> agent_worker_pb2.SaveStateResponse:  # type: ignore
         raise NotImplementedError("Method not implemented!")
+
+    async def PutBlob(  # type: ignore
+        self,
+        request: agent_worker_pb2.Blob,
+        context: grpc.aio.ServicerContext[agent_worker_pb2.Blob, agent_worker_pb2.PutBlobResponse],
+    ) -> agent_worker_pb2.PutBlobResponse:  # type: ignore
+        if blob_id(request.data) != request.id:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Blob {request.id} does not match its data.")
+            return agent_worker_pb2.PutBlobResponse()
+        await self._blob_store.put(request.id, request.data)
+        return agent_worker_pb2.PutBlobResponse()
+
+    async def GetBlob(  # type: ignore
+        self,
+        request: agent_worker_pb2.GetBlobRequest,
+        context: grpc.aio.ServicerContext[agent_worker_pb2.GetBlobRequest, agent_worker_pb2.Blob],
+    ) -> agent_worker_pb2.Blob:  # type: ignore
+        data = await self._blob_store.get(request.id)
+        if data is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Blob {request.id} not found.")
+            return agent_worker_pb2.Blob()
+        return agent_worker_pb2.Blob(id=request.id, data=data)
+
+    async def FindMissingBlobs(  # type: ignore
+        self,
+        request: agent_worker_pb2.FindMissingBlobsRequest,
+        context: grpc.aio.ServicerContext[
+            agent_worker_pb2.FindMissingBlobsRequest, agent_worker_pb2.FindMissingBlobsResponse
+        ],
+    ) -> agent_worker_pb2.FindMissingBlobsResponse:  # type: ignore
+        # Looking the blobs up also marks them as recently used, so they are kept for the message about to use them.
+        blobs = await asyncio.gather(*(self._blob_store.get(id) for id in request.ids))
+        return agent_worker_pb2.FindMissingBlobsResponse(
+            missing_ids=[id for id, data in zip(request.ids, blobs, strict=True) if data is None]
+        )
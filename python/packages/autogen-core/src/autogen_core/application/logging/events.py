@@ -79,6 +79,7 @@ class MessageEvent:
     def completion_tokens(self) -> int:
         return cast(int, self.kwargs["completion_tokens"])
 
-    # This must output the event in a json serializable format
+    # This must output the event in a json serializable format.
+    # The payload is only rendered here, so it costs nothing unless the record is emitted.
     def __str__(self) -> str:
-        return json.dumps(self.kwargs)
+        return json.dumps(self.kwargs, default=str)
@@ -14,9 +14,10 @@ _sym_db = _symbol_database.Default()
 
 import cloudevent_pb2 as cloudevent__pb2
 from google.protobuf import any_pb2 as google_dot_protobuf_dot_any__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x61gent_worker.proto\x12\x06\x61gents\x1a\x10\x63loudevent.proto\x1a\x19google/protobuf/any.proto\"\'\n\x07TopicId\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0e\n\x06source\x18\x02 \x01(\t\"$\n\x07\x41gentId\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\"E\n\x07Payload\x12\x11\n\tdata_type\x18\x01 \x01(\t\x12\x19\n\x11\x64\x61ta_content_type\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"\x89\x02\n\nRpcRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12$\n\x06source\x18\x02 \x01(\x0b\x32\x0f.agents.AgentIdH\x00\x88\x01\x01\x12\x1f\n\x06target\x18\x03 \x01(\x0b\x32\x0f.agents.AgentId\x12\x0e\n\x06method\x18\x04 \x01(\t\x12 \n\x07payload\x18\x05 \x01(\x0b\x32\x0f.agents.Payload\x12\x32\n\x08metadata\x18\x06 \x03(\x0b\x32 .agents.RpcRequest.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\t\n\x07_source\"\xb8\x01\n\x0bRpcResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12 \n\x07payload\x18\x02 \x01(\x0b\x32\x0f.agents.Payload\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x33\n\x08metadata\x18\x04 \x03(\x0b\x32!.agents.RpcResponse.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xe4\x01\n\x05\x45vent\x12\x12\n\ntopic_type\x18\x01 \x01(\t\x12\x14\n\x0ctopic_source\x18\x02 \x01(\t\x12$\n\x06source\x18\x03 \x01(\x0b\x32\x0f.agents.AgentIdH\x00\x88\x01\x01\x12 \n\x07payload\x18\x04 \x01(\x0b\x32\x0f.agents.Payload\x12-\n\x08metadata\x18\x05 \x03(\x0b\x32\x1b.agents.Event.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\t\n\x07_source\"<\n\x18RegisterAgentTypeRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\"^\n\x19RegisterAgentTypeResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\":\n\x10TypeSubscription\x12\x12\n\ntopic_type\x18\x01 \x01(\t\x12\x12\n\nagent_type\x18\x02 \x01(\t\"T\n\x0cSubscription\x12\x34\n\x10typeSubscription\x18\x01 \x01(\x0b\x32\x18.agents.TypeSubscriptionH\x00\x42\x0e\n\x0csubscription\"X\n\x16\x41\x64\x64SubscriptionRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12*\n\x0csubscription\x18\x02 \x01(\x0b\x32\x14.agents.Subscription\"\\\n\x17\x41\x64\x64SubscriptionResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"\x9d\x01\n\nAgentState\x12!\n\x08\x61gent_id\x18\x01 \x01(\x0b\x32\x0f.agents.AgentId\x12\x0c\n\x04\x65Tag\x18\x02 \x01(\t\x12\x15\n\x0b\x62inary_data\x18\x03 \x01(\x0cH\x00\x12\x13\n\ttext_data\x18\x04 \x01(\tH\x00\x12*\n\nproto_data\x18\x05 \x01(\x0b\x32\x14.google.protobuf.AnyH\x00\x42\x06\n\x04\x64\x61ta\"j\n\x10GetStateResponse\x12\'\n\x0b\x61gent_state\x18\x01 \x01(\x0b\x32\x12.agents.AgentState\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"B\n\x11SaveStateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\x05\x65rror\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"\xc6\x03\n\x07Message\x12%\n\x07request\x18\x01 \x01(\x0b\x32\x12.agents.RpcRequestH\x00\x12\'\n\x08response\x18\x02 \x01(\x0b\x32\x13.agents.RpcResponseH\x00\x12\x1e\n\x05\x65vent\x18\x03 \x01(\x0b\x32\r.agents.EventH\x00\x12\x44\n\x18registerAgentTypeRequest\x18\x04 \x01(\x0b\x32 .agents.RegisterAgentTypeRequestH\x00\x12\x46\n\x19registerAgentTypeResponse\x18\x05 \x01(\x0b\x32!.agents.RegisterAgentTypeResponseH\x00\x12@\n\x16\x61\x64\x64SubscriptionRequest\x18\x06 \x01(\x0b\x32\x1e.agents.AddSubscriptionRequestH\x00\x12\x42\n\x17\x61\x64\x64SubscriptionResponse\x18\x07 \x01(\x0b\x32\x1f.agents.AddSubscriptionResponseH\x00\x12,\n\ncloudEvent\x18\x08 \x01(\x0b\x32\x16.cloudevent.CloudEventH\x00\x42\t\n\x07message2\xb2\x01\n\x08\x41gentRpc\x12\x33\n\x0bOpenChannel\x12\x0f.agents.Message\x1a\x0f.agents.Message(\x01\x30\x01\x12\x35\n\x08GetState\x12\x0f.agents.AgentId\x1a\x18.agents.GetStateResponse\x12:\n\tSaveState\x12\x12.agents.AgentState\x1a\x19.agents.SaveStateResponseB!\xaa\x02\x1eMicrosoft.AutoGen.Abstractionsb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x61gent_worker.proto\x12\x06\x61gents\x1a\x10\x63loudevent.proto\x1a\x19google/protobuf/any.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\'\n\x07TopicId\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0e\n\x06source\x18\x02 \x01(\t\"$\n\x07\x41gentId\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\"n\n\x07Payload\x12\x11\n\tdata_type\x18\x01 \x01(\t\x12\x19\n\x11\x64\x61ta_content_type\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\x10\n\x08\x62lob_ids\x18\x04 \x03(\t\x12\x15\n\rdata_encoding\x18\x05 \x01(\t\"\xfd\x02\n\nRpcRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12$\n\x06source\x18\x02 \x01(\x0b\x32\x0f.agents.AgentIdH\x00\x88\x01\x01\x12\x1f\n\x06target\x18\x03 \x01(\x0b\x32\x0f.agents.AgentId\x12\x0e\n\x06method\x18\x04 \x01(\t\x12 \n\x07payload\x18\x05 \x01(\x0b\x32\x0f.agents.Payload\x12\x32\n\x08metadata\x18\x06 \x03(\x0b\x32 .agents.RpcRequest.MetadataEntry\x12,\n\x08\x64\x65\x61\x64line\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12#\n\x1b\x61\x63\x63\x65pted_data_content_types\x18\x08 \x03(\t\x12\x1f\n\x17\x61\x63\x63\x65pted_data_encodings\x18\t \x03(\t\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\t\n\x07_source\"\x1f\n\tRpcCancel\x12\x12\n\nrequest_id\x18\x01 \x01(\t\"^\n\x0cPeerEndpoint\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x0f\n\x07\x61\x64\x64ress\x18\x02 \x01(\t\x12\x16\n\x0e\x64\x61ta_encodings\x18\x03 \x03(\t\x12\x11\n\tagent_key\x18\x04 \x01(\t\")\n\x13RemovePeerEndpoints\x12\x12\n\nagent_type\x18\x01 \x01(\t\"\xa0\x02\n\x0bRpcResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12 \n\x07payload\x18\x02 \x01(\x0b\x32\x0f.agents.Payload\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x33\n\x08metadata\x18\x04 \x03(\x0b\x32!.agents.RpcResponse.MetadataEntry\x12#\n\x1b\x61\x63\x63\x65pted_data_content_types\x18\x05 \x03(\t\x12-\n\x0ftarget_endpoint\x18\x06 \x01(\x0b\x32\x14.agents.PeerEndpoint\x12\x12\n\noverloaded\x18\x07 \x01(\x08\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x89\x02\n\x05\x45vent\x12\x12\n\ntopic_type\x18\x01 \x01(\t\x12\x14\n\x0ctopic_source\x18\x02 \x01(\t\x12$\n\x06source\x18\x03 \x01(\x0b\x32\x0f.agents.AgentIdH\x00\x88\x01\x01\x12 \n\x07payload\x18\x04 \x01(\x0b\x32\x0f.agents.Payload\x12-\n\x08metadata\x18\x05 \x03(\x0b\x32\x1b.agents.Event.MetadataEntry\x12#\n\nrecipients\x18\x06 \x03(\x0b\x32\x0f.agents.AgentId\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\t\n\x07_source\"O\n\x18RegisterAgentTypeRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x11\n\tstateless\x18\x03 \x01(\x08\"^\n\x19RegisterAgentTypeResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\":\n\x10TypeSubscription\x12\x12\n\ntopic_type\x18\x01 \x01(\t\x12\x12\n\nagent_type\x18\x02 \x01(\t\"G\n\x16TypePrefixSubscription\x12\x19\n\x11topic_type_prefix\x18\x01 \x01(\t\x12\x12\n\nagent_type\x18\x02 \x01(\t\"\x96\x01\n\x0cSubscription\x12\x34\n\x10typeSubscription\x18\x01 \x01(\x0b\x32\x18.agents.TypeSubscriptionH\x00\x12@\n\x16typePrefixSubscription\x18\x02 \x01(\x0b\x32\x1e.agents.TypePrefixSubscriptionH\x00\x42\x0e\n\x0csubscription\"X\n\x16\x41\x64\x64SubscriptionRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12*\n\x0csubscription\x18\x02 \x01(\x0b\x32\x14.agents.Subscription\"\\\n\x17\x41\x64\x64SubscriptionResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"\x9d\x01\n\nAgentState\x12!\n\x08\x61gent_id\x18\x01 \x01(\x0b\x32\x0f.agents.AgentId\x12\x0c\n\x04\x65Tag\x18\x02 \x01(\t\x12\x15\n\x0b\x62inary_data\x18\x03 \x01(\x0cH\x00\x12\x13\n\ttext_data\x18\x04 \x01(\tH\x00\x12*\n\nproto_data\x18\x05 \x01(\x0b\x32\x14.google.protobuf.AnyH\x00\x42\x06\n\x04\x64\x61ta\"j\n\x10GetStateResponse\x12\'\n\x0b\x61gent_state\x18\x01 \x01(\x0b\x32\x12.agents.AgentState\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x12\n\x05\x65rror\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"B\n\x11SaveStateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\x05\x65rror\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\x08\n\x06_error\"\xf6\x04\n\x07Message\x12%\n\x07request\x18\x01 \x01(\x0b\x32\x12.agents.RpcRequestH\x00\x12\'\n\x08response\x18\x02 \x01(\x0b\x32\x13.agents.RpcResponseH\x00\x12\x1e\n\x05\x65vent\x18\x03 \x01(\x0b\x32\r.agents.EventH\x00\x12\x44\n\x18registerAgentTypeRequest\x18\x04 \x01(\x0b\x32 .agents.RegisterAgentTypeRequestH\x00\x12\x46\n\x19registerAgentTypeResponse\x18\x05 \x01(\x0b\x32!.agents.RegisterAgentTypeResponseH\x00\x12@\n\x16\x61\x64\x64SubscriptionRequest\x18\x06 \x01(\x0b\x32\x1e.agents.AddSubscriptionRequestH\x00\x12\x42\n\x17\x61\x64\x64SubscriptionResponse\x18\x07 \x01(\x0b\x32\x1f.agents.AddSubscriptionResponseH\x00\x12,\n\ncloudEvent\x18\x08 \x01(\x0b\x32\x16.cloudevent.CloudEventH\x00\x12%\n\x05\x62\x61tch\x18\t \x01(\x0b\x32\x14.agents.MessageBatchH\x00\x12:\n\x13removePeerEndpoints\x18\n \x01(\x0b\x32\x1b.agents.RemovePeerEndpointsH\x00\x12&\n\theartbeat\x18\x0b \x01(\x0b\x32\x11.agents.HeartbeatH\x00\x12#\n\x06\x63\x61ncel\x18\x0c \x01(\x0b\x32\x11.agents.RpcCancelH\x00\x42\t\n\x07message\"@\n\tHeartbeat\x12\x1a\n\x12in_flight_requests\x18\x01 \x01(\r\x12\x17\n\x0frequest_latency\x18\x02 \x01(\x01\"1\n\x0cMessageBatch\x12!\n\x08messages\x18\x01 \x03(\x0b\x32\x0f.agents.Message\" \n\x04\x42lob\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\"\x1c\n\x0eGetBlobRequest\x12\n\n\x02id\x18\x01 \x01(\t\"\x11\n\x0fPutBlobResponse\"&\n\x17\x46indMissingBlobsRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"/\n\x18\x46indMissingBlobsResponse\x12\x13\n\x0bmissing_ids\x18\x01 \x03(\t2\xec\x02\n\x08\x41gentRpc\x12\x33\n\x0bOpenChannel\x12\x0f.agents.Message\x1a\x0f.agents.Message(\x01\x30\x01\x12\x35\n\x08GetState\x12\x0f.agents.AgentId\x1a\x18.agents.GetStateResponse\x12:\n\tSaveState\x12\x12.agents.AgentState\x1a\x19.agents.SaveStateResponse\x12\x30\n\x07PutBlob\x12\x0c.agents.Blob\x1a\x17.agents.PutBlobResponse\x12/\n\x07GetBlob\x12\x16.agents.GetBlobRequest\x1a\x0c.agents.Blob\x12U\n\x10\x46indMissingBlobs\x12\x1f.agents.FindMissingBlobsRequest\x1a .agents.FindMissingBlobsResponse2C\n\tAgentPeer\x12\x36\n\x0bSendRequest\x12\x12.agents.RpcRequest\x1a\x13.agents.RpcResponseB!\xaa\x02\x1eMicrosoft.AutoGen.Abstractionsb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -30,44 +31,68 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _globals['_RPCRESPONSE_METADATAENTRY']._serialized_options = b'8\001'
   _globals['_EVENT_METADATAENTRY']._options = None
   _globals['_EVENT_METADATAENTRY']._serialized_options = b'8\001'
-  _globals['_TOPICID']._serialized_start=75
-  _globals['_TOPICID']._serialized_end=114
-  _globals['_AGENTID']._serialized_start=116
-  _globals['_AGENTID']._serialized_end=152
-  _globals['_PAYLOAD']._serialized_start=154
-  _globals['_PAYLOAD']._serialized_end=223
-  _globals['_RPCREQUEST']._serialized_start=226
-  _globals['_RPCREQUEST']._serialized_end=491
-  _globals['_RPCREQUEST_METADATAENTRY']._serialized_start=433
-  _globals['_RPCREQUEST_METADATAENTRY']._serialized_end=480
-  _globals['_RPCRESPONSE']._serialized_start=494
-  _globals['_RPCRESPONSE']._serialized_end=678
-  _globals['_RPCRESPONSE_METADATAENTRY']._serialized_start=433
-  _globals['_RPCRESPONSE_METADATAENTRY']._serialized_end=480
-  _globals['_EVENT']._serialized_start=681
-  _globals['_EVENT']._serialized_end=909
-  _globals['_EVENT_METADATAENTRY']._serialized_start=433
-  _globals['_EVENT_METADATAENTRY']._serialized_end=480
-  _globals['_REGISTERAGENTTYPEREQUEST']._serialized_start=911
-  _globals['_REGISTERAGENTTYPEREQUEST']._serialized_end=971
-  _globals['_REGISTERAGENTTYPERESPONSE']._serialized_start=973
-  _globals['_REGISTERAGENTTYPERESPONSE']._serialized_end=1067
-  _globals['_TYPESUBSCRIPTION']._serialized_start=1069
-  _globals['_TYPESUBSCRIPTION']._serialized_end=1127
-  _globals['_SUBSCRIPTION']._serialized_start=1129
-  _globals['_SUBSCRIPTION']._serialized_end=1213
-  _globals['_ADDSUBSCRIPTIONREQUEST']._serialized_start=1215
-  _globals['_ADDSUBSCRIPTIONREQUEST']._serialized_end=1303
-  _globals['_ADDSUBSCRIPTIONRESPONSE']._serialized_start=1305
-  _globals['_ADDSUBSCRIPTIONRESPONSE']._serialized_end=1397
-  _globals['_AGENTSTATE']._serialized_start=1400
-  _globals['_AGENTSTATE']._serialized_end=1557
-  _globals['_GETSTATERESPONSE']._serialized_start=1559
-  _globals['_GETSTATERESPONSE']._serialized_end=1665
-  _globals['_SAVESTATERESPONSE']._serialized_start=1667
-  _globals['_SAVESTATERESPONSE']._serialized_end=1733
-  _globals['_MESSAGE']._serialized_start=1736
-  _globals['_MESSAGE']._serialized_end=2190
-  _globals['_AGENTRPC']._serialized_start=2193
-  _globals['_AGENTRPC']._serialized_end=2371
+  _globals['_TOPICID']._serialized_start=108
+  _globals['_TOPICID']._serialized_end=147
+  _globals['_AGENTID']._serialized_start=149
+  _globals['_AGENTID']._serialized_end=185
+  _globals['_PAYLOAD']._serialized_start=187
+  _globals['_PAYLOAD']._serialized_end=297
+  _globals['_RPCREQUEST']._serialized_start=300
+  _globals['_RPCREQUEST']._serialized_end=681
+  _globals['_RPCREQUEST_METADATAENTRY']._serialized_start=623
+  _globals['_RPCREQUEST_METADATAENTRY']._serialized_end=670
+  _globals['_RPCCANCEL']._serialized_start=683
+  _globals['_RPCCANCEL']._serialized_end=714
+  _globals['_PEERENDPOINT']._serialized_start=716
+  _globals['_PEERENDPOINT']._serialized_end=810
+  _globals['_REMOVEPEERENDPOINTS']._serialized_start=812
+  _globals['_REMOVEPEERENDPOINTS']._serialized_end=853
+  _globals['_RPCRESPONSE']._serialized_start=856
+  _globals['_RPCRESPONSE']._serialized_end=1144
+  _globals['_RPCRESPONSE_METADATAENTRY']._serialized_start=623
+  _globals['_RPCRESPONSE_METADATAENTRY']._serialized_end=670
+  _globals['_EVENT']._serialized_start=1147
+  _globals['_EVENT']._serialized_end=1412
+  _globals['_EVENT_METADATAENTRY']._serialized_start=623
+  _globals['_EVENT_METADATAENTRY']._serialized_end=670
+  _globals['_REGISTERAGENTTYPEREQUEST']._serialized_start=1414
+  _globals['_REGISTERAGENTTYPEREQUEST']._serialized_end=1493
+  _globals['_REGISTERAGENTTYPERESPONSE']._serialized_start=1495
+  _globals['_REGISTERAGENTTYPERESPONSE']._serialized_end=1589
+  _globals['_TYPESUBSCRIPTION']._serialized_start=1591
+  _globals['_TYPESUBSCRIPTION']._serialized_end=1649
+  _globals['_TYPEPREFIXSUBSCRIPTION']._serialized_start=1651
+  _globals['_TYPEPREFIXSUBSCRIPTION']._serialized_end=1722
+  _globals['_SUBSCRIPTION']._serialized_start=1725
+  _globals['_SUBSCRIPTION']._serialized_end=1875
+  _globals['_ADDSUBSCRIPTIONREQUEST']._serialized_start=1877
+  _globals['_ADDSUBSCRIPTIONREQUEST']._serialized_end=1965
+  _globals['_ADDSUBSCRIPTIONRESPONSE']._serialized_start=1967
+  _globals['_ADDSUBSCRIPTIONRESPONSE']._serialized_end=2059
+  _globals['_AGENTSTATE']._serialized_start=2062
+  _globals['_AGENTSTATE']._serialized_end=2219
+  _globals['_GETSTATERESPONSE']._serialized_start=2221
+  _globals['_GETSTATERESPONSE']._serialized_end=2327
+  _globals['_SAVESTATERESPONSE']._serialized_start=2329
+  _globals['_SAVESTATERESPONSE']._serialized_end=2395
+  _globals['_MESSAGE']._serialized_start=2398
+  _globals['_MESSAGE']._serialized_end=3028
+  _globals['_HEARTBEAT']._serialized_start=3030
+  _globals['_HEARTBEAT']._serialized_end=3094
+  _globals['_MESSAGEBATCH']._serialized_start=3096
+  _globals['_MESSAGEBATCH']._serialized_end=3145
+  _globals['_BLOB']._serialized_start=3147
+  _globals['_BLOB']._serialized_end=3179
+  _globals['_GETBLOBREQUEST']._serialized_start=3181
+  _globals['_GETBLOBREQUEST']._serialized_end=3209
+  _globals['_PUTBLOBRESPONSE']._serialized_start=3211
+  _globals['_PUTBLOBRESPONSE']._serialized_end=3228
+  _globals['_FINDMISSINGBLOBSREQUEST']._serialized_start=3230
+  _globals['_FINDMISSINGBLOBSREQUEST']._serialized_end=3268
+  _globals['_FINDMISSINGBLOBSRESPONSE']._serialized_start=3270
+  _globals['_FINDMISSINGBLOBSRESPONSE']._serialized_end=3317
+  _globals['_AGENTRPC']._serialized_start=3320
+  _globals['_AGENTRPC']._serialized_end=3684
+  _globals['_AGENTPEER']._serialized_start=3686
+  _globals['_AGENTPEER']._serialized_end=3753
 # @@protoc_insertion_point(module_scope)
@@ -10,6 +10,7 @@ import google.protobuf.any_pb2
 import google.protobuf.descriptor
 import google.protobuf.internal.containers
 import google.protobuf.message
+import google.protobuf.timestamp_pb2
 import typing
 
 DESCRIPTOR: google.protobuf.descriptor.FileDescriptor
@@ -57,17 +58,27 @@ class Payload(google.protobuf.message.Message):
     DATA_TYPE_FIELD_NUMBER: builtins.int
     DATA_CONTENT_TYPE_FIELD_NUMBER: builtins.int
     DATA_FIELD_NUMBER: builtins.int
+    BLOB_IDS_FIELD_NUMBER: builtins.int
+    DATA_ENCODING_FIELD_NUMBER: builtins.int
     data_type: builtins.str
     data_content_type: builtins.str
     data: builtins.bytes
+    data_encoding: builtins.str
+    """Compression applied to data, "gzip" or "zstd", or empty if it is not compressed."""
+    @property
+    def blob_ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """IDs of the blobs that the data references, sent out of band with PutBlob and fetched with GetBlob."""
+
     def __init__(
         self,
         *,
         data_type: builtins.str = ...,
         data_content_type: builtins.str = ...,
         data: builtins.bytes = ...,
+        blob_ids: collections.abc.Iterable[builtins.str] | None = ...,
+        data_encoding: builtins.str = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["data", b"data", "data_content_type", b"data_content_type", "data_type", b"data_type"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["blob_ids", b"blob_ids", "data", b"data", "data_content_type", b"data_content_type", "data_encoding", b"data_encoding", "data_type", b"data_type"]) -> None: ...
 
 global___Payload = Payload
 
@@ -97,6 +108,9 @@ class RpcRequest(google.protobuf.message.Message):
     METHOD_FIELD_NUMBER: builtins.int
     PAYLOAD_FIELD_NUMBER: builtins.int
     METADATA_FIELD_NUMBER: builtins.int
+    DEADLINE_FIELD_NUMBER: builtins.int
+    ACCEPTED_DATA_CONTENT_TYPES_FIELD_NUMBER: builtins.int
+    ACCEPTED_DATA_ENCODINGS_FIELD_NUMBER: builtins.int
     request_id: builtins.str
     method: builtins.str
     @property
@@ -107,6 +121,20 @@ class RpcRequest(google.protobuf.message.Message):
     def payload(self) -> global___Payload: ...
     @property
     def metadata(self) -> google.protobuf.internal.containers.ScalarMap[builtins.str, builtins.str]: ...
+    @property
+    def deadline(self) -> google.protobuf.timestamp_pb2.Timestamp:
+        """Time after which the request is no longer handled and its handler is cancelled."""
+
+    @property
+    def accepted_data_content_types(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Content types the sender can decode the response from. When empty, the response is sent as JSON."""
+
+    @property
+    def accepted_data_encodings(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Set when the request is sent directly to the worker hosting the target: the data encodings the sender can
+        decode the response from. Requests relayed by the host get responses in the encodings it negotiated.
+        """
+
     def __init__(
         self,
         *,
@@ -116,13 +144,82 @@ class RpcRequest(google.protobuf.message.Message):
         method: builtins.str = ...,
         payload: global___Payload | None = ...,
         metadata: collections.abc.Mapping[builtins.str, builtins.str] | None = ...,
+        deadline: google.protobuf.timestamp_pb2.Timestamp | None = ...,
+        accepted_data_content_types: collections.abc.Iterable[builtins.str] | None = ...,
+        accepted_data_encodings: collections.abc.Iterable[builtins.str] | None = ...,
     ) -> None: ...
-    def HasField(self, field_name: typing.Literal["_source", b"_source", "payload", b"payload", "source", b"source", "target", b"target"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["_source", b"_source", "metadata", b"metadata", "method", b"method", "payload", b"payload", "request_id", b"request_id", "source", b"source", "target", b"target"]) -> None: ...
+    def HasField(self, field_name: typing.Literal["_source", b"_source", "deadline", b"deadline", "payload", b"payload", "source", b"source", "target", b"target"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["_source", b"_source", "accepted_data_content_types", b"accepted_data_content_types", "accepted_data_encodings", b"accepted_data_encodings", "deadline", b"deadline", "metadata", b"metadata", "method", b"method", "payload", b"payload", "request_id", b"request_id", "source", b"source", "target", b"target"]) -> None: ...
     def WhichOneof(self, oneof_group: typing.Literal["_source", b"_source"]) -> typing.Literal["source"] | None: ...
 
 global___RpcRequest = RpcRequest
 
+@typing.final
+class RpcCancel(google.protobuf.message.Message):
+    """Sent by a worker that stops waiting for the response to a request it sent through the host, and forwarded by the
+    host to the worker handling the request, which cancels the request's handler.
+    """
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    REQUEST_ID_FIELD_NUMBER: builtins.int
+    request_id: builtins.str
+    def __init__(
+        self,
+        *,
+        request_id: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["request_id", b"request_id"]) -> None: ...
+
+global___RpcCancel = RpcCancel
+
+@typing.final
+class PeerEndpoint(google.protobuf.message.Message):
+    """Where a worker accepts requests for an agent type directly from other workers."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    AGENT_TYPE_FIELD_NUMBER: builtins.int
+    ADDRESS_FIELD_NUMBER: builtins.int
+    DATA_ENCODINGS_FIELD_NUMBER: builtins.int
+    AGENT_KEY_FIELD_NUMBER: builtins.int
+    agent_type: builtins.str
+    address: builtins.str
+    agent_key: builtins.str
+    """Set when the agent type is hosted by several workers: the endpoint only applies to the agent with this key."""
+    @property
+    def data_encodings(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Data encodings the worker can decode requests from."""
+
+    def __init__(
+        self,
+        *,
+        agent_type: builtins.str = ...,
+        address: builtins.str = ...,
+        data_encodings: collections.abc.Iterable[builtins.str] | None = ...,
+        agent_key: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["address", b"address", "agent_key", b"agent_key", "agent_type", b"agent_type", "data_encodings", b"data_encodings"]) -> None: ...
+
+global___PeerEndpoint = PeerEndpoint
+
+@typing.final
+class RemovePeerEndpoints(google.protobuf.message.Message):
+    """Sent by the host when the workers hosting an agent type change: the endpoints given for it no longer apply."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    AGENT_TYPE_FIELD_NUMBER: builtins.int
+    agent_type: builtins.str
+    def __init__(
+        self,
+        *,
+        agent_type: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["agent_type", b"agent_type"]) -> None: ...
+
+global___RemovePeerEndpoints = RemovePeerEndpoints
+
 @typing.final
 class RpcResponse(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
@@ -147,12 +244,31 @@ class RpcResponse(google.protobuf.message.Message):
     PAYLOAD_FIELD_NUMBER: builtins.int
     ERROR_FIELD_NUMBER: builtins.int
     METADATA_FIELD_NUMBER: builtins.int
+    ACCEPTED_DATA_CONTENT_TYPES_FIELD_NUMBER: builtins.int
+    TARGET_ENDPOINT_FIELD_NUMBER: builtins.int
+    OVERLOADED_FIELD_NUMBER: builtins.int
     request_id: builtins.str
     error: builtins.str
+    overloaded: builtins.bool
+    """Set by the host when it did not forward the request because the messages queued for the worker hosting the
+    target agent stayed over its limit.
+    """
     @property
     def payload(self) -> global___Payload: ...
     @property
     def metadata(self) -> google.protobuf.internal.containers.ScalarMap[builtins.str, builtins.str]: ...
+    @property
+    def accepted_data_content_types(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Set when the recipient cannot decode the content type of the request: the content types it can decode
+        the request's data type from. The sender may send the request again in one of them.
+        """
+
+    @property
+    def target_endpoint(self) -> global___PeerEndpoint:
+        """Set by the host on the responses it relays from a worker that accepts requests directly, so that the sender
+        can send its next requests for the target agent type to that worker.
+        """
+
     def __init__(
         self,
         *,
@@ -160,9 +276,12 @@ class RpcResponse(google.protobuf.message.Message):
         payload: global___Payload | None = ...,
         error: builtins.str = ...,
         metadata: collections.abc.Mapping[builtins.str, builtins.str] | None = ...,
+        accepted_data_content_types: collections.abc.Iterable[builtins.str] | None = ...,
+        target_endpoint: global___PeerEndpoint | None = ...,
+        overloaded: builtins.bool = ...,
     ) -> None: ...
-    def HasField(self, field_name: typing.Literal["payload", b"payload"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["error", b"error", "metadata", b"metadata", "payload", b"payload", "request_id", b"request_id"]) -> None: ...
+    def HasField(self, field_name: typing.Literal["payload", b"payload", "target_endpoint", b"target_endpoint"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["accepted_data_content_types", b"accepted_data_content_types", "error", b"error", "metadata", b"metadata", "overloaded", b"overloaded", "payload", b"payload", "request_id", b"request_id", "target_endpoint", b"target_endpoint"]) -> None: ...
 
 global___RpcResponse = RpcResponse
 
@@ -191,6 +310,7 @@ class Event(google.protobuf.message.Message):
     SOURCE_FIELD_NUMBER: builtins.int
     PAYLOAD_FIELD_NUMBER: builtins.int
     METADATA_FIELD_NUMBER: builtins.int
+    RECIPIENTS_FIELD_NUMBER: builtins.int
     topic_type: builtins.str
     topic_source: builtins.str
     @property
@@ -199,6 +319,12 @@ class Event(google.protobuf.message.Message):
     def payload(self) -> global___Payload: ...
     @property
     def metadata(self) -> google.protobuf.internal.containers.ScalarMap[builtins.str, builtins.str]: ...
+    @property
+    def recipients(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___AgentId]:
+        """Set by the host when a subscribed agent type is hosted by several workers: the agents that the receiving worker
+        delivers the event to, instead of all its subscribed agents.
+        """
+
     def __init__(
         self,
         *,
@@ -207,9 +333,10 @@ class Event(google.protobuf.message.Message):
         source: global___AgentId | None = ...,
         payload: global___Payload | None = ...,
         metadata: collections.abc.Mapping[builtins.str, builtins.str] | None = ...,
+        recipients: collections.abc.Iterable[global___AgentId] | None = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["_source", b"_source", "payload", b"payload", "source", b"source"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["_source", b"_source", "metadata", b"metadata", "payload", b"payload", "source", b"source", "topic_source", b"topic_source", "topic_type", b"topic_type"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["_source", b"_source", "metadata", b"metadata", "payload", b"payload", "recipients", b"recipients", "source", b"source", "topic_source", b"topic_source", "topic_type", b"topic_type"]) -> None: ...
     def WhichOneof(self, oneof_group: typing.Literal["_source", b"_source"]) -> typing.Literal["source"] | None: ...
 
 global___Event = Event
@@ -220,15 +347,21 @@ class RegisterAgentTypeRequest(google.protobuf.message.Message):
 
     REQUEST_ID_FIELD_NUMBER: builtins.int
     TYPE_FIELD_NUMBER: builtins.int
+    STATELESS_FIELD_NUMBER: builtins.int
     request_id: builtins.str
     type: builtins.str
+    stateless: builtins.bool
+    """Whether the agents of the type keep no state between messages. The requests for a stateless agent type
+    registered by several workers are dispatched to the least loaded of them, instead of by agent key.
+    """
     def __init__(
         self,
         *,
         request_id: builtins.str = ...,
         type: builtins.str = ...,
+        stateless: builtins.bool = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["request_id", b"request_id", "type", b"type"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["request_id", b"request_id", "stateless", b"stateless", "type", b"type"]) -> None: ...
 
 global___RegisterAgentTypeRequest = RegisterAgentTypeRequest
 
@@ -273,21 +406,43 @@ class TypeSubscription(google.protobuf.message.Message):
 
 global___TypeSubscription = TypeSubscription
 
+@typing.final
+class TypePrefixSubscription(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    TOPIC_TYPE_PREFIX_FIELD_NUMBER: builtins.int
+    AGENT_TYPE_FIELD_NUMBER: builtins.int
+    topic_type_prefix: builtins.str
+    agent_type: builtins.str
+    def __init__(
+        self,
+        *,
+        topic_type_prefix: builtins.str = ...,
+        agent_type: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["agent_type", b"agent_type", "topic_type_prefix", b"topic_type_prefix"]) -> None: ...
+
+global___TypePrefixSubscription = TypePrefixSubscription
+
 @typing.final
 class Subscription(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
 
     TYPESUBSCRIPTION_FIELD_NUMBER: builtins.int
+    TYPEPREFIXSUBSCRIPTION_FIELD_NUMBER: builtins.int
     @property
     def typeSubscription(self) -> global___TypeSubscription: ...
+    @property
+    def typePrefixSubscription(self) -> global___TypePrefixSubscription: ...
     def __init__(
         self,
         *,
         typeSubscription: global___TypeSubscription | None = ...,
+        typePrefixSubscription: global___TypePrefixSubscription | None = ...,
     ) -> None: ...
-    def HasField(self, field_name: typing.Literal["subscription", b"subscription", "typeSubscription", b"typeSubscription"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["subscription", b"subscription", "typeSubscription", b"typeSubscription"]) -> None: ...
-    def WhichOneof(self, oneof_group: typing.Literal["subscription", b"subscription"]) -> typing.Literal["typeSubscription"] | None: ...
+    def HasField(self, field_name: typing.Literal["subscription", b"subscription", "typePrefixSubscription", b"typePrefixSubscription", "typeSubscription", b"typeSubscription"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["subscription", b"subscription", "typePrefixSubscription", b"typePrefixSubscription", "typeSubscription", b"typeSubscription"]) -> None: ...
+    def WhichOneof(self, oneof_group: typing.Literal["subscription", b"subscription"]) -> typing.Literal["typeSubscription", "typePrefixSubscription"] | None: ...
 
 global___Subscription = Subscription
 
@@ -421,6 +576,10 @@ class Message(google.protobuf.message.Message):
     ADDSUBSCRIPTIONREQUEST_FIELD_NUMBER: builtins.int
     ADDSUBSCRIPTIONRESPONSE_FIELD_NUMBER: builtins.int
     CLOUDEVENT_FIELD_NUMBER: builtins.int
+    BATCH_FIELD_NUMBER: builtins.int
+    REMOVEPEERENDPOINTS_FIELD_NUMBER: builtins.int
+    HEARTBEAT_FIELD_NUMBER: builtins.int
+    CANCEL_FIELD_NUMBER: builtins.int
     @property
     def request(self) -> global___RpcRequest: ...
     @property
@@ -437,6 +596,14 @@ class Message(google.protobuf.message.Message):
     def addSubscriptionResponse(self) -> global___AddSubscriptionResponse: ...
     @property
     def cloudEvent(self) -> cloudevent_pb2.CloudEvent: ...
+    @property
+    def batch(self) -> global___MessageBatch: ...
+    @property
+    def removePeerEndpoints(self) -> global___RemovePeerEndpoints: ...
+    @property
+    def heartbeat(self) -> global___Heartbeat: ...
+    @property
+    def cancel(self) -> global___RpcCancel: ...
     def __init__(
         self,
         *,
@@ -448,9 +615,131 @@ class Message(google.protobuf.message.Message):
         addSubscriptionRequest: global___AddSubscriptionRequest | None = ...,
         addSubscriptionResponse: global___AddSubscriptionResponse | None = ...,
         cloudEvent: cloudevent_pb2.CloudEvent | None = ...,
+        batch: global___MessageBatch | None = ...,
+        removePeerEndpoints: global___RemovePeerEndpoints | None = ...,
+        heartbeat: global___Heartbeat | None = ...,
+        cancel: global___RpcCancel | None = ...,
     ) -> None: ...
-    def HasField(self, field_name: typing.Literal["addSubscriptionRequest", b"addSubscriptionRequest", "addSubscriptionResponse", b"addSubscriptionResponse", "cloudEvent", b"cloudEvent", "event", b"event", "message", b"message", "registerAgentTypeRequest", b"registerAgentTypeRequest", "registerAgentTypeResponse", b"registerAgentTypeResponse", "request", b"request", "response", b"response"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["addSubscriptionRequest", b"addSubscriptionRequest", "addSubscriptionResponse", b"addSubscriptionResponse", "cloudEvent", b"cloudEvent", "event", b"event", "message", b"message", "registerAgentTypeRequest", b"registerAgentTypeRequest", "registerAgentTypeResponse", b"registerAgentTypeResponse", "request", b"request", "response", b"response"]) -> None: ...
-    def WhichOneof(self, oneof_group: typing.Literal["message", b"message"]) -> typing.Literal["request", "response", "event", "registerAgentTypeRequest", "registerAgentTypeResponse", "addSubscriptionRequest", "addSubscriptionResponse", "cloudEvent"] | None: ...
+    def HasField(self, field_name: typing.Literal["addSubscriptionRequest", b"addSubscriptionRequest", "addSubscriptionResponse", b"addSubscriptionResponse", "batch", b"batch", "cancel", b"cancel", "cloudEvent", b"cloudEvent", "event", b"event", "heartbeat", b"heartbeat", "message", b"message", "registerAgentTypeRequest", b"registerAgentTypeRequest", "registerAgentTypeResponse", b"registerAgentTypeResponse", "removePeerEndpoints", b"removePeerEndpoints", "request", b"request", "response", b"response"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["addSubscriptionRequest", b"addSubscriptionRequest", "addSubscriptionResponse", b"addSubscriptionResponse", "batch", b"batch", "cancel", b"cancel", "cloudEvent", b"cloudEvent", "event", b"event", "heartbeat", b"heartbeat", "message", b"message", "registerAgentTypeRequest", b"registerAgentTypeRequest", "registerAgentTypeResponse", b"registerAgentTypeResponse", "removePeerEndpoints", b"removePeerEndpoints", "request", b"request", "response", b"response"]) -> None: ...
+    def WhichOneof(self, oneof_group: typing.Literal["message", b"message"]) -> typing.Literal["request", "response", "event", "registerAgentTypeRequest", "registerAgentTypeResponse", "addSubscriptionRequest", "addSubscriptionResponse", "cloudEvent", "batch", "removePeerEndpoints", "heartbeat", "cancel"] | None: ...
 
 global___Message = Message
+
+@typing.final
+class Heartbeat(google.protobuf.message.Message):
+    """Sent periodically by a worker to report its load to the host."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    IN_FLIGHT_REQUESTS_FIELD_NUMBER: builtins.int
+    REQUEST_LATENCY_FIELD_NUMBER: builtins.int
+    in_flight_requests: builtins.int
+    """Number of requests the worker is handling."""
+    request_latency: builtins.float
+    """Recent time in seconds the worker took to handle a request, or 0 if it has not handled any."""
+    def __init__(
+        self,
+        *,
+        in_flight_requests: builtins.int = ...,
+        request_latency: builtins.float = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["in_flight_requests", b"in_flight_requests", "request_latency", b"request_latency"]) -> None: ...
+
+global___Heartbeat = Heartbeat
+
+@typing.final
+class MessageBatch(google.protobuf.message.Message):
+    """Messages sent in a single write to the stream, in the order they were sent."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    MESSAGES_FIELD_NUMBER: builtins.int
+    @property
+    def messages(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___Message]: ...
+    def __init__(
+        self,
+        *,
+        messages: collections.abc.Iterable[global___Message] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["messages", b"messages"]) -> None: ...
+
+global___MessageBatch = MessageBatch
+
+@typing.final
+class Blob(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ID_FIELD_NUMBER: builtins.int
+    DATA_FIELD_NUMBER: builtins.int
+    id: builtins.str
+    """Hex encoded SHA-256 digest of the data."""
+    data: builtins.bytes
+    def __init__(
+        self,
+        *,
+        id: builtins.str = ...,
+        data: builtins.bytes = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["data", b"data", "id", b"id"]) -> None: ...
+
+global___Blob = Blob
+
+@typing.final
+class GetBlobRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ID_FIELD_NUMBER: builtins.int
+    id: builtins.str
+    def __init__(
+        self,
+        *,
+        id: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["id", b"id"]) -> None: ...
+
+global___GetBlobRequest = GetBlobRequest
+
+@typing.final
+class PutBlobResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    def __init__(
+        self,
+    ) -> None: ...
+
+global___PutBlobResponse = PutBlobResponse
+
+@typing.final
+class FindMissingBlobsRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    IDS_FIELD_NUMBER: builtins.int
+    @property
+    def ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]: ...
+    def __init__(
+        self,
+        *,
+        ids: collections.abc.Iterable[builtins.str] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["ids", b"ids"]) -> None: ...
+
+global___FindMissingBlobsRequest = FindMissingBlobsRequest
+
+@typing.final
+class FindMissingBlobsResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    MISSING_IDS_FIELD_NUMBER: builtins.int
+    @property
+    def missing_ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """IDs of the requested blobs that the host does not store."""
+
+    def __init__(
+        self,
+        *,
+        missing_ids: collections.abc.Iterable[builtins.str] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["missing_ids", b"missing_ids"]) -> None: ...
+
+global___FindMissingBlobsResponse = FindMissingBlobsResponse
@@ -29,6 +29,21 @@ class AgentRpcStub(object):
                 request_serializer=agent__worker__pb2.AgentState.SerializeToString,
                 response_deserializer=agent__worker__pb2.SaveStateResponse.FromString,
                 )
+        self.PutBlob = channel.unary_unary(
+                '/agents.AgentRpc/PutBlob',
+                request_serializer=agent__worker__pb2.Blob.SerializeToString,
+                response_deserializer=agent__worker__pb2.PutBlobResponse.FromString,
+                )
+        self.GetBlob = channel.unary_unary(
+                '/agents.AgentRpc/GetBlob',
+                request_serializer=agent__worker__pb2.GetBlobRequest.SerializeToString,
+                response_deserializer=agent__worker__pb2.Blob.FromString,
+                )
+        self.FindMissingBlobs = channel.unary_unary(
+                '/agents.AgentRpc/FindMissingBlobs',
+                request_serializer=agent__worker__pb2.FindMissingBlobsRequest.SerializeToString,
+                response_deserializer=agent__worker__pb2.FindMissingBlobsResponse.FromString,
+                )
 
 
 class AgentRpcServicer(object):
@@ -52,6 +67,24 @@ class AgentRpcServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def PutBlob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBlob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FindMissingBlobs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AgentRpcServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -70,6 +103,21 @@ def add_AgentRpcServicer_to_server(servicer, server):
                     request_deserializer=agent__worker__pb2.AgentState.FromString,
                     response_serializer=agent__worker__pb2.SaveStateResponse.SerializeToString,
             ),
+            'PutBlob': grpc.unary_unary_rpc_method_handler(
+                    servicer.PutBlob,
+                    request_deserializer=agent__worker__pb2.Blob.FromString,
+                    response_serializer=agent__worker__pb2.PutBlobResponse.SerializeToString,
+            ),
+            'GetBlob': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBlob,
+                    request_deserializer=agent__worker__pb2.GetBlobRequest.FromString,
+                    response_serializer=agent__worker__pb2.Blob.SerializeToString,
+            ),
+            'FindMissingBlobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.FindMissingBlobs,
+                    request_deserializer=agent__worker__pb2.FindMissingBlobsRequest.FromString,
+                    response_serializer=agent__worker__pb2.FindMissingBlobsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'agents.AgentRpc', rpc_method_handlers)
@@ -130,3 +178,118 @@ class AgentRpc(object):
             agent__worker__pb2.SaveStateResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def PutBlob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/agents.AgentRpc/PutBlob',
+            agent__worker__pb2.Blob.SerializeToString,
+            agent__worker__pb2.PutBlobResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetBlob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/agents.AgentRpc/GetBlob',
+            agent__worker__pb2.GetBlobRequest.SerializeToString,
+            agent__worker__pb2.Blob.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def FindMissingBlobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/agents.AgentRpc/FindMissingBlobs',
+            agent__worker__pb2.FindMissingBlobsRequest.SerializeToString,
+            agent__worker__pb2.FindMissingBlobsResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+
+class AgentPeerStub(object):
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint.
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.SendRequest = channel.unary_unary(
+                '/agents.AgentPeer/SendRequest',
+                request_serializer=agent__worker__pb2.RpcRequest.SerializeToString,
+                response_deserializer=agent__worker__pb2.RpcResponse.FromString,
+                )
+
+
+class AgentPeerServicer(object):
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint.
+    """
+
+    def SendRequest(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AgentPeerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'SendRequest': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendRequest,
+                    request_deserializer=agent__worker__pb2.RpcRequest.FromString,
+                    response_serializer=agent__worker__pb2.RpcResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'agents.AgentPeer', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AgentPeer(object):
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint.
+    """
+
+    @staticmethod
+    def SendRequest(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/agents.AgentPeer/SendRequest',
+            agent__worker__pb2.RpcRequest.SerializeToString,
+            agent__worker__pb2.RpcResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
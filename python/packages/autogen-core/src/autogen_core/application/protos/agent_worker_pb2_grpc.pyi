@@ -34,6 +34,21 @@ class AgentRpcStub:
         agent_worker_pb2.SaveStateResponse,
     ]
 
+    PutBlob: grpc.UnaryUnaryMultiCallable[
+        agent_worker_pb2.Blob,
+        agent_worker_pb2.PutBlobResponse,
+    ]
+
+    GetBlob: grpc.UnaryUnaryMultiCallable[
+        agent_worker_pb2.GetBlobRequest,
+        agent_worker_pb2.Blob,
+    ]
+
+    FindMissingBlobs: grpc.UnaryUnaryMultiCallable[
+        agent_worker_pb2.FindMissingBlobsRequest,
+        agent_worker_pb2.FindMissingBlobsResponse,
+    ]
+
 class AgentRpcAsyncStub:
     OpenChannel: grpc.aio.StreamStreamMultiCallable[
         agent_worker_pb2.Message,
@@ -50,6 +65,21 @@ class AgentRpcAsyncStub:
         agent_worker_pb2.SaveStateResponse,
     ]
 
+    PutBlob: grpc.aio.UnaryUnaryMultiCallable[
+        agent_worker_pb2.Blob,
+        agent_worker_pb2.PutBlobResponse,
+    ]
+
+    GetBlob: grpc.aio.UnaryUnaryMultiCallable[
+        agent_worker_pb2.GetBlobRequest,
+        agent_worker_pb2.Blob,
+    ]
+
+    FindMissingBlobs: grpc.aio.UnaryUnaryMultiCallable[
+        agent_worker_pb2.FindMissingBlobsRequest,
+        agent_worker_pb2.FindMissingBlobsResponse,
+    ]
+
 class AgentRpcServicer(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def OpenChannel(
@@ -72,4 +102,54 @@ class AgentRpcServicer(metaclass=abc.ABCMeta):
         context: _ServicerContext,
     ) -> typing.Union[agent_worker_pb2.SaveStateResponse, collections.abc.Awaitable[agent_worker_pb2.SaveStateResponse]]: ...
 
+    @abc.abstractmethod
+    def PutBlob(
+        self,
+        request: agent_worker_pb2.Blob,
+        context: _ServicerContext,
+    ) -> typing.Union[agent_worker_pb2.PutBlobResponse, collections.abc.Awaitable[agent_worker_pb2.PutBlobResponse]]: ...
+
+    @abc.abstractmethod
+    def GetBlob(
+        self,
+        request: agent_worker_pb2.GetBlobRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[agent_worker_pb2.Blob, collections.abc.Awaitable[agent_worker_pb2.Blob]]: ...
+
+    @abc.abstractmethod
+    def FindMissingBlobs(
+        self,
+        request: agent_worker_pb2.FindMissingBlobsRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[agent_worker_pb2.FindMissingBlobsResponse, collections.abc.Awaitable[agent_worker_pb2.FindMissingBlobsResponse]]: ...
+
 def add_AgentRpcServicer_to_server(servicer: AgentRpcServicer, server: typing.Union[grpc.Server, grpc.aio.Server]) -> None: ...
+
+class AgentPeerStub:
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint."""
+
+    def __init__(self, channel: typing.Union[grpc.Channel, grpc.aio.Channel]) -> None: ...
+    SendRequest: grpc.UnaryUnaryMultiCallable[
+        agent_worker_pb2.RpcRequest,
+        agent_worker_pb2.RpcResponse,
+    ]
+
+class AgentPeerAsyncStub:
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint."""
+
+    SendRequest: grpc.aio.UnaryUnaryMultiCallable[
+        agent_worker_pb2.RpcRequest,
+        agent_worker_pb2.RpcResponse,
+    ]
+
+class AgentPeerServicer(metaclass=abc.ABCMeta):
+    """Served by the workers that accept requests directly from other workers, at the address of their PeerEndpoint."""
+
+    @abc.abstractmethod
+    def SendRequest(
+        self,
+        request: agent_worker_pb2.RpcRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[agent_worker_pb2.RpcResponse, collections.abc.Awaitable[agent_worker_pb2.RpcResponse]]: ...
+
+def add_AgentPeerServicer_to_server(servicer: AgentPeerServicer, server: typing.Union[grpc.Server, grpc.aio.Server]) -> None: ...
@@ -1,3 +1,4 @@
+from ._metrics import MetricsHelper
 from ._propagation import (
     EnvelopeMetadata,
     TelemetryMetadataContainer,
@@ -13,5 +14,6 @@ __all__ = [
     "get_telemetry_grpc_metadata",
     "TelemetryMetadataContainer",
     "TraceHelper",
+    "MetricsHelper",
     "MessageRuntimeTracingConfig",
 ]
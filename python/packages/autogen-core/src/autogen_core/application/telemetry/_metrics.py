@@ -0,0 +1,99 @@
+import contextlib
+import time
+from typing import Any, Callable, Iterable, Iterator, Literal
+
+from opentelemetry.metrics import CallbackOptions, MeterProvider, NoOpMeterProvider, Observation
+
+from ...base import AgentId
+from ._constants import NAMESPACE
+
+EnvelopeKind = Literal["send", "publish", "response"]
+
+
+class MetricsHelper:
+    """
+    MetricsHelper is a utility class to record the metrics of an agent runtime using OpenTelemetry.
+
+    It creates the instruments shared by the runtimes: a counter of processed messages by envelope kind,
+    a histogram of message handler latency per agent type and message type, and a histogram of intervention
+    handler time. Gauges such as queue depths are registered with `observe_gauge` and read when the
+    metrics are collected.
+
+    Handler latency is attributed to agent keys only if `record_agent_keys` is set, since every key
+    creates a separate time series and the number of keys is usually unbounded.
+
+    """
+
+    def __init__(
+        self, meter_provider: MeterProvider | None, runtime_name: str, *, record_agent_keys: bool = False
+    ) -> None:
+        self._record_agent_keys = record_agent_keys
+        self.meter = (meter_provider if meter_provider else NoOpMeterProvider()).get_meter(
+            f"{NAMESPACE} {runtime_name}"
+        )
+        self._messages = self.meter.create_counter(
+            f"{NAMESPACE}.runtime.messages",
+            unit="{message}",
+            description="Number of messages processed by the runtime, by envelope kind.",
+        )
+        self._handler_duration = self.meter.create_histogram(
+            f"{NAMESPACE}.agent.handler.duration",
+            unit="s",
+            description="Time taken by agent message handlers, by agent type and message type.",
+        )
+        self._intervention_duration = self.meter.create_histogram(
+            f"{NAMESPACE}.runtime.intervention.duration",
+            unit="s",
+            description="Time taken by intervention handlers, by handler and envelope kind.",
+        )
+
+    def observe_gauge(self, name: str, read: Callable[[], float], *, description: str, unit: str = "1") -> None:
+        """Register a gauge whose value is read when the metrics are collected.
+
+        Args:
+            name (str): Name of the gauge, without the namespace prefix.
+            read (Callable[[], float]): Returns the current value of the gauge.
+            description (str): Description of the gauge.
+            unit (str, optional): Unit of the gauge. Defaults to "1".
+        """
+
+        def callback(options: CallbackOptions) -> Iterable[Observation]:
+            return [Observation(read())]
+
+        self.meter.create_observable_gauge(
+            f"{NAMESPACE}.{name}", callbacks=[callback], unit=unit, description=description
+        )
+
+    def record_message(self, kind: EnvelopeKind) -> None:
+        """Count a message processed by the runtime."""
+        self._messages.add(1, {f"{NAMESPACE}.envelope.kind": kind})
+
+    @contextlib.contextmanager
+    def measure_handler(self, agent_id: AgentId, message: Any) -> Iterator[None]:
+        """Record the time taken by the message handler of an agent."""
+        attributes = {
+            f"{NAMESPACE}.agent.type": agent_id.type,
+            "messaging.message.type": type(message).__name__,
+        }
+        if self._record_agent_keys:
+            attributes[f"{NAMESPACE}.agent.key"] = agent_id.key
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._handler_duration.record(time.perf_counter() - start, attributes)
+
+    @contextlib.contextmanager
+    def measure_intervention(self, handler: Any, kind: EnvelopeKind) -> Iterator[None]:
+        """Record the time taken by an intervention handler."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._intervention_duration.record(
+                time.perf_counter() - start,
+                {
+                    f"{NAMESPACE}.intervention.handler": type(handler).__name__,
+                    f"{NAMESPACE}.envelope.kind": kind,
+                },
+            )
@@ -16,8 +16,12 @@ from ._message_context import MessageContext
 from ._message_handler_context import MessageHandlerContext
 from ._serialization import (
     JSON_DATA_CONTENT_TYPE,
+    PROTOBUF_DATA_CONTENT_TYPE,
+    JsonCodec,
     MessageSerializer,
+    OrjsonCodec,
     SerializationRegistry,
+    StdlibJsonCodec,
     UnknownPayload,
     try_get_known_serializers_for_type,
 )
@@ -43,6 +47,10 @@ __all__ = [
     "SubscriptionInstantiationContext",
     "MessageHandlerContext",
     "JSON_DATA_CONTENT_TYPE",
+    "PROTOBUF_DATA_CONTENT_TYPE",
+    "JsonCodec",
+    "StdlibJsonCodec",
+    "OrjsonCodec",
     "MessageSerializer",
     "try_get_known_serializers_for_type",
     "UnknownPayload",
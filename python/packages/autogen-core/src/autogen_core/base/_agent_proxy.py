@@ -31,12 +31,14 @@ class AgentProxy:
         *,
         sender: AgentId,
         cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
     ) -> Any:
         return await self._runtime.send_message(
             message,
             recipient=self._agent,
             sender=sender,
             cancellation_token=cancellation_token,
+            timeout=timeout,
         )
 
     async def save_state(self) -> Mapping[str, Any]:
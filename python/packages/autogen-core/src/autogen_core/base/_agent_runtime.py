@@ -28,6 +28,7 @@ class AgentRuntime(Protocol):
         *,
         sender: AgentId | None = None,
         cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
     ) -> Any:
         """Send a message to an agent and get a response.
 
@@ -36,10 +37,14 @@ class AgentRuntime(Protocol):
             recipient (AgentId): The agent to send the message to.
             sender (AgentId | None, optional): Agent which sent the message. Should **only** be None if this was sent from no agent, such as directly to the runtime externally. Defaults to None.
             cancellation_token (CancellationToken | None, optional): Token used to cancel an in progress . Defaults to None.
+            timeout (float | None, optional): Number of seconds to wait for the response. When it elapses the recipient's
+                message handler is cancelled, and a message still queued is dropped without being handled. A message sent
+                from within a message handler never gets a later deadline than the message being handled. Defaults to None.
 
         Raises:
             CantHandleException: If the recipient cannot handle the message.
             UndeliverableException: If the message cannot be delivered.
+            TimeoutError: If the timeout elapses before the response is received.
             Other: Any other exception raised by the recipient.
 
         Returns:
@@ -112,6 +112,7 @@ class BaseAgent(ABC, Agent):
         recipient: AgentId,
         *,
         cancellation_token: CancellationToken | None = None,
+        timeout: float | None = None,
     ) -> Any:
         """See :py:meth:`autogen_core.base.AgentRuntime.send_message` for more information."""
         if cancellation_token is None:
@@ -122,6 +123,7 @@ class BaseAgent(ABC, Agent):
             sender=self.id,
             recipient=recipient,
             cancellation_token=cancellation_token,
+            timeout=timeout,
         )
 
     async def publish_message(
@@ -141,6 +143,14 @@ class BaseAgent(ABC, Agent):
         warnings.warn("load_state not implemented", stacklevel=2)
         pass
 
+    async def on_start(self) -> None:
+        """Called by the runtime after the agent is instantiated and the state saved for it, if any, is loaded, and
+        before it handles its first message.
+
+        Override this method to perform asynchronous initialization, such as network calls, instead of
+        making blocking calls in the constructor."""
+        pass
+
     @classmethod
     async def register(
         cls,
@@ -0,0 +1,67 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Tuple
+
+# Threshold and blobs collected while a runtime serializes a message.
+_writer: ContextVar[Tuple[int, Dict[str, bytes]] | None] = ContextVar("_blob_writer", default=None)
+# Blobs referenced by the message a runtime is deserializing.
+_reader: ContextVar[Mapping[str, bytes] | None] = ContextVar("_blob_reader", default=None)
+
+
+def blob_id(data: bytes) -> str:
+    """The ID of a blob with the given data, the hex encoded SHA-256 digest of the data."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextmanager
+def writing_blob_references(threshold: int) -> Iterator[Dict[str, bytes]]:
+    """Collect the values that are at least `threshold` bytes long and serialized within the context as blobs.
+
+    Yields the blobs collected so far, keyed by ID."""
+    blobs: Dict[str, bytes] = {}
+    token = _writer.set((threshold, blobs))
+    try:
+        yield blobs
+    finally:
+        _writer.reset(token)
+
+
+@contextmanager
+def reading_blob_references(blobs: Mapping[str, bytes]) -> Iterator[None]:
+    """Resolve the blob references deserialized within the context from `blobs`, keyed by ID."""
+    token = _reader.set(blobs)
+    try:
+        yield
+    finally:
+        _reader.reset(token)
+
+
+def write_blob_reference(data: bytes) -> str | None:
+    """Serialize a large binary value as a blob if the runtime serializing the message sends blobs out of band.
+
+    Returns:
+        str | None: The ID of the blob to put in the serialized message, or None if the value must be serialized
+        inline.
+    """
+    writer = _writer.get()
+    if writer is None:
+        return None
+    threshold, blobs = writer
+    if len(data) < threshold:
+        return None
+    id = blob_id(data)
+    blobs[id] = data
+    return id
+
+
+def read_blob_reference(id: str) -> bytes:
+    """Get the data of a blob referenced by a message being deserialized.
+
+    Raises:
+        LookupError: If the blob was not sent with the message.
+    """
+    blobs = _reader.get()
+    if blobs is None or id not in blobs:
+        raise LookupError(f"Blob {id} was not sent with the message")
+    return blobs[id]
@@ -27,6 +27,13 @@ class CancellationToken:
             else:
                 self._callbacks.append(callback)
 
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
     def link_future(self, future: Future[Any]) -> Future[Any]:
         with self._lock:
             if self._cancelled:
@@ -0,0 +1,346 @@
+"""Compiles the functions that convert dataclasses to and from the JSON values their serializers encode.
+
+A dataclass's type hints are walked once and each field gets a converter specialized to its type, so that
+serializing a message does no type inspection. Values that JSON encoders handle as they are, such as strings,
+lists of numbers and dataclasses made only of those, are not converted at all.
+"""
+
+import dataclasses
+import functools
+import types
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, List, Literal, Set, Tuple, Union, get_args, get_origin, get_type_hints
+
+from pydantic import BaseModel, TypeAdapter
+
+from ._type_helpers import is_union
+
+Converter = Callable[[Any], Any]
+
+# Key of the class name in the JSON object of a dataclass in a union with other dataclasses that have no
+# discriminator field.
+TYPE_TAG = "__type__"
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+@dataclasses.dataclass(frozen=True)
+class _Converters:
+    # None when values are encoded, or decoded, as they are.
+    encode: Converter | None
+    decode: Converter | None
+    # The types of the JSON values that values of the type are encoded to.
+    json_types: Tuple[type, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class DataclassCodec:
+    """Converts a dataclass to and from JSON values.
+
+    Args:
+        encode (Callable[[Any], Any] | None): Converts an instance to a value a JSON encoder can encode, or None
+            if JSON encoders that encode dataclasses, like the codecs of the dataclass serializer, can encode
+            instances as they are.
+        decode (Callable[[Any], Any]): Converts a decoded JSON object to an instance.
+    """
+
+    encode: Converter | None
+    decode: Converter
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_dataclass_codec(cls: type[Any]) -> DataclassCodec:
+    """Compile the codec of a dataclass and the types of its fields.
+
+    Supported field types are JSON scalars, `Any`, `Literal`, lists, sequences, tuples, string-keyed dictionaries,
+    nested dataclasses, Pydantic models and types with a Pydantic schema such as
+    :class:`~autogen_core.components.Image`, and unions of those. Values of other types are passed to the JSON
+    encoder as they are.
+
+    In a union, members are told apart by the type of their JSON value. Dataclasses in a union with other
+    dataclasses are told apart by a field with a distinct `Literal` type in each of them, or if they have none,
+    by their class name under the ``"__type__"`` key.
+
+    Raises:
+        ValueError: If the members of a union cannot be told apart.
+    """
+    converters = _Compiler().compile(cls)
+    assert converters.decode is not None
+    return DataclassCodec(encode=converters.encode, decode=converters.decode)
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        # (dataclass, type tag) -> converters
+        self._dataclasses: Dict[Tuple[type[Any], str | None], _Converters] = {}
+        self._compiling: Set[Tuple[type[Any], str | None]] = set()
+
+    def compile(self, tp: Any) -> _Converters:
+        if tp is Any or tp is object:
+            return _Converters(None, None, (dict, list, *_JSON_SCALARS))
+        if tp is None or tp is type(None):
+            return _Converters(None, None, (type(None),))
+        if tp is float:
+            # Floats with an integral value may be encoded without a fraction.
+            return _Converters(None, None, (float, int))
+        if tp in _JSON_SCALARS:
+            return _Converters(None, None, (tp,))
+        if is_union(tp):
+            return self._compile_union(tp)
+        origin = get_origin(tp)
+        if origin is Literal:
+            return _Converters(None, None, tuple({type(value) for value in get_args(tp)}))
+        if origin in (list, List, Sequence, tuple, Tuple) or tp in (list, tuple):
+            return self._compile_sequence(tp, origin)
+        if origin in (dict, Dict, Mapping) or tp is dict:
+            return self._compile_mapping(tp)
+        if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+            return self._compile_dataclass(tp)
+        if isinstance(tp, type) and issubclass(tp, BaseModel):
+            model: type[BaseModel] = tp
+            return _Converters(lambda value: value.model_dump(mode="json"), model.model_validate, (dict,))
+        if hasattr(tp, "__get_pydantic_core_schema__"):
+            # Types that define how Pydantic validates and serializes them are assumed to be JSON objects.
+            adapter: TypeAdapter[Any] = TypeAdapter(tp)
+            return _Converters(lambda value: adapter.dump_python(value, mode="json"), adapter.validate_python, (dict,))
+        # Types the JSON encoder may know how to encode.
+        return _Converters(None, None, (dict, list, *_JSON_SCALARS))
+
+    def _compile_sequence(self, tp: Any, origin: Any) -> _Converters:
+        args = get_args(tp)
+        is_tuple = origin in (tuple, Tuple) or tp is tuple
+        if is_tuple and args and (len(args) != 2 or args[1] is not Ellipsis):
+            # Fixed length tuples.
+            items = [self.compile(arg) for arg in args]
+            item_encoders = [item.encode or _identity for item in items]
+            item_decoders = [item.decode or _identity for item in items]
+
+            def encode_tuple(value: Any) -> Any:
+                return [encode(item) for encode, item in zip(item_encoders, value, strict=True)]
+
+            def decode_tuple(value: Any) -> Any:
+                return tuple(decode(item) for decode, item in zip(item_decoders, value, strict=True))
+
+            needs_encode = any(item.encode is not None for item in items)
+            return _Converters(encode_tuple if needs_encode else None, decode_tuple, (list,))
+
+        item = self.compile(args[0]) if args else self.compile(Any)
+        encode_item, decode_item = item.encode, item.decode
+        encode: Converter | None = None if encode_item is None else lambda value: [encode_item(v) for v in value]
+        decode: Converter | None
+        if is_tuple:
+
+            def decode_tuple(value: Any) -> Any:
+                return tuple(value) if decode_item is None else tuple(decode_item(v) for v in value)
+
+            decode = decode_tuple
+        else:
+            decode = None if decode_item is None else lambda value: [decode_item(v) for v in value]
+        return _Converters(encode, decode, (list,))
+
+    def _compile_mapping(self, tp: Any) -> _Converters:
+        args = get_args(tp)
+        item = self.compile(args[1]) if args else self.compile(Any)
+        encode_item, decode_item = item.encode, item.decode
+        encode = None if encode_item is None else lambda value: {k: encode_item(v) for k, v in value.items()}
+        decode = None if decode_item is None else lambda value: {k: decode_item(v) for k, v in value.items()}
+        return _Converters(encode, decode, (dict,))
+
+    def _compile_dataclass(self, cls: type[Any], tag: str | None = None) -> _Converters:
+        key = (cls, tag)
+        if key in self._dataclasses:
+            return self._dataclasses[key]
+        if key in self._compiling:
+            # A dataclass that contains itself is converted by looking up its converters once they are compiled.
+            def encode_later(value: Any) -> Any:
+                return (self._dataclasses[key].encode or _identity)(value)
+
+            def decode_later(value: Any) -> Any:
+                return (self._dataclasses[key].decode or _identity)(value)
+
+            return _Converters(encode_later, decode_later, (dict,))
+
+        self._compiling.add(key)
+        try:
+            hints = _type_hints(cls)
+            fields = [(field, self.compile(hints.get(field.name, Any))) for field in dataclasses.fields(cls)]
+        finally:
+            self._compiling.discard(key)
+
+        namespace: Dict[str, Any] = {"cls": cls}
+        encoded: List[str] = [] if tag is None else [f"{TYPE_TAG!r}: {tag!r}"]
+        required: List[str] = []
+        optional: List[str] = []
+        for index, (field, converters) in enumerate(fields):
+            value = f"value.{field.name}"
+            if converters.encode is not None:
+                namespace[f"encode_{index}"] = converters.encode
+                value = f"encode_{index}({value})"
+            encoded.append(f"{field.name!r}: {value}")
+            if not field.init:
+                continue
+            item = f"value[{field.name!r}]"
+            if converters.decode is not None:
+                namespace[f"decode_{index}"] = converters.decode
+                item = f"decode_{index}({item})"
+            if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING:
+                required.append(f"{field.name}={item}")
+            else:
+                optional.append(f"    if {field.name!r} in value:\n        kwargs[{field.name!r}] = {item}")
+
+        if optional:
+            decode_body = "\n".join(
+                [f"    kwargs = dict({', '.join(required)})", *optional, "    return cls(**kwargs)"]
+            )
+        else:
+            decode_body = f"    return cls({', '.join(required)})"
+        source = "\n".join(
+            [
+                "def encode(value):",
+                f"    return {{{', '.join(encoded)}}}",
+                "def decode(value):",
+                decode_body,
+            ]
+        )
+        exec(source, namespace)
+
+        # JSON encoders encode dataclasses as objects of their fields, so they need no converting unless a field does.
+        needs_encode = tag is not None or any(converters.encode is not None for _, converters in fields)
+        result = _Converters(namespace["encode"] if needs_encode else None, namespace["decode"], (dict,))
+        self._dataclasses[key] = result
+        return result
+
+    def _compile_union(self, tp: Any) -> _Converters:
+        members = get_args(tp)
+        objects = [member for member in members if dict in self.compile(member).json_types]
+        object_converters: _Converters | None
+        if len(objects) > 1:
+            object_converters = self._compile_dataclass_union(tp, objects)
+            if len(objects) == len(members):
+                return object_converters
+        else:
+            object_converters = self.compile(objects[0]) if objects else None
+
+        decoders: Dict[type, Converter] = {}
+        encoders: Dict[type, Converter] = {}
+        json_types: List[type] = []
+        for member in members:
+            converters = (
+                object_converters if object_converters is not None and member in objects else self.compile(member)
+            )
+            decoder = converters.decode or _identity
+            for json_type in converters.json_types:
+                if decoders.setdefault(json_type, decoder) is not decoder:
+                    raise ValueError(f"Members of {tp} cannot be told apart by their JSON values.")
+                if json_type not in json_types:
+                    json_types.append(json_type)
+            for python_type in _python_types(member):
+                encoders.setdefault(python_type, converters.encode or _identity)
+
+        if all(encoder is _identity for encoder in encoders.values()):
+            encode: Converter | None = None
+        else:
+
+            def encode(value: Any) -> Any:
+                encoder = encoders.get(type(value))
+                if encoder is None:
+                    # Subclasses of the members, such as enums of strings.
+                    encoder = next(
+                        (e for t, e in encoders.items() if t is not Any and isinstance(value, t)),
+                        _identity,
+                    )
+                return encoder(value)
+
+        if all(decoder is _identity for decoder in decoders.values()):
+            decode: Converter | None = None
+        else:
+
+            def decode(value: Any) -> Any:
+                decoder = decoders.get(type(value))
+                if decoder is None:
+                    raise ValueError(f"Unexpected {type(value).__name__} for {tp}")
+                return decoder(value)
+
+        return _Converters(encode, decode, tuple(json_types))
+
+    def _compile_dataclass_union(self, tp: Any, members: List[Any]) -> _Converters:
+        """Converters for the members of a union that are encoded as JSON objects, which must be dataclasses."""
+        if not all(isinstance(member, type) and dataclasses.is_dataclass(member) for member in members):
+            raise ValueError(f"Members of {tp} that are encoded as JSON objects must all be dataclasses.")
+        discriminator = _discriminator(members)
+        encoders: Dict[type, Converter] = {}
+        decoders: Dict[Any, Converter] = {}
+        if discriminator is not None:
+            field_name, values = discriminator
+            for member in members:
+                converters = self._compile_dataclass(member)
+                encoders[member] = converters.encode or _identity
+                assert converters.decode is not None
+                for value in values[member]:
+                    decoders[value] = converters.decode
+            key = field_name
+        else:
+            if len({member.__name__ for member in members}) != len(members):
+                raise ValueError(f"Dataclasses in {tp} must have distinct names or a discriminator field.")
+            for member in members:
+                converters = self._compile_dataclass(member, tag=member.__name__)
+                assert converters.encode is not None and converters.decode is not None
+                encoders[member] = converters.encode
+                decoders[member.__name__] = converters.decode
+            key = TYPE_TAG
+
+        def encode(value: Any) -> Any:
+            return encoders[type(value)](value)
+
+        def decode(value: Any) -> Any:
+            return decoders[value[key]](value)
+
+        needs_encode = any(encoder is not _identity for encoder in encoders.values())
+        return _Converters(encode if needs_encode else None, decode, (dict,))
+
+
+def _type_hints(cls: type[Any]) -> Dict[str, Any]:
+    try:
+        return get_type_hints(cls)
+    except (NameError, TypeError):
+        # Annotations that cannot be resolved are converted as values of any type.
+        return {}
+
+
+def _discriminator(members: List[type[Any]]) -> Tuple[str, Dict[type[Any], Tuple[Any, ...]]] | None:
+    """A field that every dataclass has with a `Literal` type whose values are distinct between them."""
+    hints = [_type_hints(member) for member in members]
+    for name in hints[0]:
+        values: Dict[type[Any], Tuple[Any, ...]] = {}
+        for member, member_hints in zip(members, hints, strict=True):
+            hint = member_hints.get(name)
+            if hint is None or get_origin(hint) is not Literal:
+                break
+            values[member] = get_args(hint)
+        else:
+            all_values = [value for member_values in values.values() for value in member_values]
+            if len(all_values) == len(set(all_values)):
+                return name, values
+    return None
+
+
+def _python_types(tp: Any) -> Tuple[Any, ...]:
+    """The Python types of values of a union member, used to pick its encoder."""
+    if tp is None:
+        return (type(None),)
+    if get_origin(tp) is Literal:
+        return tuple({type(value) for value in get_args(tp)})
+    origin = get_origin(tp)
+    if origin is not None:
+        if origin in (Union, types.UnionType):
+            return tuple(t for arg in get_args(tp) for t in _python_types(arg))
+        if origin is Sequence:
+            return (list, tuple)
+        if origin is Mapping:
+            return (dict,)
+        return (origin,)
+    return (tp,)
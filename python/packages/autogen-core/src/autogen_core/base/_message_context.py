@@ -11,3 +11,6 @@ class MessageContext:
     topic_id: TopicId | None
     is_rpc: bool
     cancellation_token: CancellationToken
+    deadline: float | None = None
+    """Time, in seconds since the epoch, after which the sender no longer waits for the response and the handler is
+    cancelled through `cancellation_token`. None if the message has no deadline."""
@@ -12,14 +12,17 @@ class MessageHandlerContext:
         )
 
     MESSAGE_HANDLER_CONTEXT: ClassVar[ContextVar[AgentId]] = ContextVar("MESSAGE_HANDLER_CONTEXT")
+    MESSAGE_HANDLER_DEADLINE: ClassVar[ContextVar[float | None]] = ContextVar("MESSAGE_HANDLER_DEADLINE", default=None)
 
     @classmethod
     @contextmanager
-    def populate_context(cls, ctx: AgentId) -> Generator[None, Any, None]:
+    def populate_context(cls, ctx: AgentId, deadline: float | None = None) -> Generator[None, Any, None]:
         token = MessageHandlerContext.MESSAGE_HANDLER_CONTEXT.set(ctx)
+        deadline_token = MessageHandlerContext.MESSAGE_HANDLER_DEADLINE.set(deadline)
         try:
             yield
         finally:
+            MessageHandlerContext.MESSAGE_HANDLER_DEADLINE.reset(deadline_token)
             MessageHandlerContext.MESSAGE_HANDLER_CONTEXT.reset(token)
 
     @classmethod
@@ -28,3 +31,9 @@ class MessageHandlerContext:
             return cls.MESSAGE_HANDLER_CONTEXT.get()
         except LookupError as e:
             raise RuntimeError("MessageHandlerContext.agent_id() must be called within a message handler.") from e
+
+    @classmethod
+    def deadline(cls) -> float | None:
+        """The deadline of the message being handled, in seconds since the epoch, or None outside of a message
+        handler or if the message has no deadline. Messages sent by the handler inherit this deadline."""
+        return cls.MESSAGE_HANDLER_DEADLINE.get()
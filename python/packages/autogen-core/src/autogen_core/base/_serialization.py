@@ -1,11 +1,25 @@
+import dataclasses
 import json
-from dataclasses import asdict, dataclass, fields
-from typing import Any, ClassVar, Dict, List, Protocol, Sequence, TypeVar, cast, get_args, get_origin, runtime_checkable
+from dataclasses import dataclass, fields
+from typing import (
+    Any,
+    ClassVar,
+    Collection,
+    Dict,
+    List,
+    Protocol,
+    Sequence,
+    TypeVar,
+    cast,
+    get_args,
+    get_origin,
+    runtime_checkable,
+)
 
 from google.protobuf.message import Message
 from pydantic import BaseModel
 
-from autogen_core.base._type_helpers import is_union
+from ._dataclass_codec import compile_dataclass_codec
 
 T = TypeVar("T")
 
@@ -33,15 +47,6 @@ def is_dataclass(cls: type[Any]) -> bool:
     return hasattr(cls, "__dataclass_fields__")
 
 
-def has_nested_dataclass(cls: type[IsDataclass]) -> bool:
-    # iterate fields and check if any of them are dataclasses
-    return any(is_dataclass(f.type) for f in cls.__dataclass_fields__.values())
-
-
-def contains_a_union(cls: type[IsDataclass]) -> bool:
-    return any(is_union(f.type) for f in cls.__dataclass_fields__.values())
-
-
 def has_nested_base_model(cls: type[IsDataclass]) -> bool:
     for f in fields(cls):
         field_type = f.type
@@ -91,21 +96,96 @@ def has_nested_base_model_in_type(tp: Any) -> bool:
 DataclassT = TypeVar("DataclassT", bound=IsDataclass)
 
 JSON_DATA_CONTENT_TYPE = "application/json"
-# TODO: what's the correct content type? There seems to be some disagreement over what it should be
 PROTOBUF_DATA_CONTENT_TYPE = "application/x-protobuf"
 
+# Content types in the order they are preferred when more than one can be used, cheapest to encode and decode first.
+# Content types that are not listed are preferred least, in the order their serializers were added.
+_DATA_CONTENT_TYPE_PREFERENCE = (PROTOBUF_DATA_CONTENT_TYPE, JSON_DATA_CONTENT_TYPE)
+
+
+class JsonCodec(Protocol):
+    """Encodes and decodes the JSON documents of the JSON message serializers.
+
+    Codecs must encode dataclasses as JSON objects of their fields."""
+
+    def dumps(self, obj: Any) -> bytes: ...
+
+    def loads(self, data: bytes) -> Any: ...
+
+
+def _encode_dataclass(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # A shallow dict, unlike `dataclasses.asdict`: nested values are encoded in place instead of being copied.
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJsonCodec(JsonCodec):
+    """A JSON codec that uses the :mod:`json` module of the standard library."""
+
+    def __init__(self) -> None:
+        self._encoder = json.JSONEncoder(default=_encode_dataclass)
+        self._decoder = json.JSONDecoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return self._decoder.decode(data.decode("utf-8"))
+
+
+class OrjsonCodec(JsonCodec):
+    """A JSON codec that uses `orjson <https://github.com/ijl/orjson>`_, which encodes and decodes several times
+    faster than the standard library and encodes dataclasses natively.
+
+    Requires the ``orjson`` package, installed with the ``orjson`` extra of ``autogen-core``.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("OrjsonCodec requires orjson, install it with `pip install autogen-core[orjson]`.") from e
+        self._orjson = orjson
+        # Like the standard library, allow dictionaries with keys that are not strings.
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, option=self._option)
+
+    def loads(self, data: bytes) -> Any:
+        return self._orjson.loads(data)
+
+
+_DEFAULT_JSON_CODEC = StdlibJsonCodec()
+
 
 class DataclassJsonMessageSerializer(MessageSerializer[DataclassT]):
-    def __init__(self, cls: type[DataclassT]) -> None:
-        if contains_a_union(cls):
-            raise ValueError("Dataclass has a union type, which is not supported. To use a union, use a Pydantic model")
+    """Serializes a dataclass as a JSON object of its fields.
+
+    The fields may be nested dataclasses, Pydantic models, :class:`~autogen_core.components.Image`, lists and
+    dictionaries of those, `Literal` types and unions. The functions that convert the dataclass are compiled from
+    its type hints when the serializer is created. Dataclasses in a union with other dataclasses are told apart by
+    a field with a distinct `Literal` type in each of them, or if they have none, by their class name, which is
+    added to their JSON object under the ``"__type__"`` key.
+
+    Raises:
+        ValueError: If the members of a union in the dataclass cannot be told apart by their JSON values.
 
-        if has_nested_dataclass(cls) or has_nested_base_model(cls):
-            raise ValueError(
-                "Dataclass has nested dataclasses or base models, which are not supported. To use nested types, use a Pydantic model"
-            )
+    Args:
+        cls (type): The dataclass to serialize.
+        json_codec (JsonCodec, optional): The codec that encodes and decodes the JSON. Defaults to the codec of the
+            :class:`SerializationRegistry` the serializer is added to, or :class:`StdlibJsonCodec` when used
+            directly.
+    """
 
+    def __init__(self, cls: type[DataclassT], json_codec: JsonCodec | None = None) -> None:
         self.cls = cls
+        self.json_codec = json_codec
+        self._codec = json_codec or _DEFAULT_JSON_CODEC
+        dataclass_codec = compile_dataclass_codec(cls)
+        self._encode = dataclass_codec.encode
+        self._decode = dataclass_codec.decode
 
     @property
     def data_content_type(self) -> str:
@@ -116,11 +196,12 @@ class DataclassJsonMessageSerializer(MessageSerializer[DataclassT]):
         return _type_name(self.cls)
 
     def deserialize(self, payload: bytes) -> DataclassT:
-        message_str = payload.decode("utf-8")
-        return self.cls(**json.loads(message_str))
+        return cast(DataclassT, self._decode(self._codec.loads(payload)))
 
     def serialize(self, message: DataclassT) -> bytes:
-        return json.dumps(asdict(message)).encode("utf-8")
+        if self._encode is None:
+            return self._codec.dumps(message)
+        return self._codec.dumps(self._encode(message))
 
 
 PydanticT = TypeVar("PydanticT", bound=BaseModel)
@@ -139,8 +220,7 @@ class PydanticJsonMessageSerializer(MessageSerializer[PydanticT]):
         return _type_name(self.cls)
 
     def deserialize(self, payload: bytes) -> PydanticT:
-        message_str = payload.decode("utf-8")
-        return self.cls.model_validate_json(message_str)
+        return self.cls.model_validate_json(payload)
 
     def serialize(self, message: PydanticT) -> bytes:
         return message.model_dump_json().encode("utf-8")
@@ -155,11 +235,7 @@ class ProtobufMessageSerializer(MessageSerializer[ProtobufT]):
 
     @property
     def data_content_type(self) -> str:
-        # TODO: This should be PROTOBUF_DATA_CONTENT_TYPE. There are currently
-        #       a couple of hard coded places where the system assumes the
-        #       content is JSON_DATA_CONTENT_TYPE which will need to be fixed
-        #       first.
-        return JSON_DATA_CONTENT_TYPE
+        return PROTOBUF_DATA_CONTENT_TYPE
 
     @property
     def type_name(self) -> str:
@@ -181,6 +257,13 @@ class UnknownPayload:
     payload: bytes
 
 
+def _content_type_rank(content_type: str) -> int:
+    try:
+        return _DATA_CONTENT_TYPE_PREFERENCE.index(content_type)
+    except ValueError:
+        return len(_DATA_CONTENT_TYPE_PREFERENCE)
+
+
 def _type_name(cls: type[Any] | Any) -> str:
     if isinstance(cls, type):
         return cls.__name__
@@ -204,9 +287,24 @@ def try_get_known_serializers_for_type(cls: type[Any]) -> list[MessageSerializer
 
 
 class SerializationRegistry:
-    def __init__(self) -> None:
+    """The serializers of the message types a runtime can send and receive.
+
+    A message type may have serializers for more than one content type, in which case the cheapest one that the
+    recipient can decode is used, see :meth:`preferred_content_type`.
+
+    Args:
+        json_codec (JsonCodec, optional): The codec used by the :class:`DataclassJsonMessageSerializer` instances
+            added without a codec of their own, for example :class:`OrjsonCodec`. Defaults to
+            :class:`StdlibJsonCodec`.
+    """
+
+    def __init__(self, json_codec: JsonCodec | None = None) -> None:
+        self._json_codec = json_codec
         # type_name, data_content_type -> serializer
         self._serializers: dict[tuple[str, str], MessageSerializer[Any]] = {}
+        # type_name -> content types of its serializers, most preferred first
+        self._content_types: dict[str, List[str]] = {}
+        self._all_content_types: set[str] = set()
 
     def add_serializer(self, serializer: MessageSerializer[Any] | Sequence[MessageSerializer[Any]]) -> None:
         if isinstance(serializer, Sequence):
@@ -214,7 +312,48 @@ class SerializationRegistry:
                 self.add_serializer(c)
             return
 
-        self._serializers[(serializer.type_name, serializer.data_content_type)] = serializer
+        if (
+            self._json_codec is not None
+            and isinstance(serializer, DataclassJsonMessageSerializer)
+            and serializer.json_codec is None
+        ):
+            serializer = DataclassJsonMessageSerializer(serializer.cls, json_codec=self._json_codec)
+        key = (serializer.type_name, serializer.data_content_type)
+        if key not in self._serializers:
+            content_types = self._content_types.setdefault(serializer.type_name, [])
+            content_types.append(serializer.data_content_type)
+            content_types.sort(key=_content_type_rank)
+            self._all_content_types.add(serializer.data_content_type)
+        self._serializers[key] = serializer
+
+    def content_types(self, type_name: str) -> Sequence[str]:
+        """The content types that messages of a type can be serialized to, most preferred first."""
+        return self._content_types.get(type_name, ())
+
+    @property
+    def all_content_types(self) -> Collection[str]:
+        """The content types of all the registered serializers."""
+        return self._all_content_types
+
+    def preferred_content_type(self, type_name: str, accepted: Collection[str] | None = None) -> str:
+        """The cheapest content type that messages of a type can be serialized to.
+
+        Args:
+            type_name (str): The name of the message type.
+            accepted (Collection[str], optional): The content types the recipient can decode. Defaults to any.
+
+        Raises:
+            ValueError: If the type has no serializer, or none for the accepted content types.
+        """
+        content_types = self._content_types.get(type_name)
+        if not content_types:
+            raise ValueError(f"Unknown type {type_name}")
+        if accepted is None:
+            return content_types[0]
+        for content_type in content_types:
+            if content_type in accepted:
+                return content_type
+        raise ValueError(f"Type {type_name} cannot be serialized to any of the content types {sorted(accepted)}")
 
     def deserialize(self, payload: bytes, *, type_name: str, data_content_type: str) -> Any:
         serializer = self._serializers.get((type_name, data_content_type))
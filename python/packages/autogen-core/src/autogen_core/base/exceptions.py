@@ -2,6 +2,7 @@ __all__ = [
     "CantHandleException",
     "UndeliverableException",
     "MessageDroppedException",
+    "MessageQueueFullException",
 ]
 
 
@@ -17,5 +18,9 @@ class MessageDroppedException(Exception):
     """Raised when a message is dropped."""
 
 
+class MessageQueueFullException(Exception):
+    """Raised when a message can't be enqueued because the runtime's message queue is full."""
+
+
 class NotAccessibleError(Exception):
     """Tried to access a value that is not accessible. For example if it is remote cannot be accessed locally."""
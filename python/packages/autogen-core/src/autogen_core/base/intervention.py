@@ -1,4 +1,4 @@
-from typing import Any, Awaitable, Callable, Protocol, final
+from typing import Any, Awaitable, Callable, Literal, Protocol, Sequence, final
 
 from autogen_core.base import AgentId
 
@@ -6,6 +6,7 @@ __all__ = [
     "DropMessage",
     "InterventionFunction",
     "InterventionHandler",
+    "InterventionKind",
     "DefaultInterventionHandler",
 ]
 
@@ -16,8 +17,16 @@ class DropMessage: ...
 
 InterventionFunction = Callable[[Any], Any | Awaitable[type[DropMessage]]]
 
+InterventionKind = Literal["send", "publish", "response"]
+
 
 class InterventionHandler(Protocol):
+    """Intercepts the messages sent, published and responded to through a runtime.
+
+    A handler may restrict what it intercepts by setting a `message_types` attribute to a sequence of message types
+    (subclasses included) and an `envelope_kinds` attribute to a sequence of :data:`InterventionKind`. Runtimes do
+    not call a handler for the messages and kinds of envelope it does not intercept."""
+
     async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any | type[DropMessage]: ...
     async def on_publish(self, message: Any, *, sender: AgentId | None) -> Any | type[DropMessage]: ...
     async def on_response(
@@ -26,6 +35,16 @@ class InterventionHandler(Protocol):
 
 
 class DefaultInterventionHandler(InterventionHandler):
+    """An intervention handler that passes every message through unchanged.
+
+    Kinds of envelope whose method is not overridden are not intercepted, so subclasses only pay for the methods
+    they implement."""
+
+    message_types: Sequence[type[Any]] | None = None
+    """Message types intercepted by the handler, including their subclasses. None intercepts every type."""
+    envelope_kinds: Sequence[InterventionKind] | None = None
+    """Kinds of envelope intercepted by the handler. None intercepts the kinds whose method is overridden."""
+
     async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any | type[DropMessage]:
         return message
 
@@ -13,6 +13,8 @@ from pydantic import GetCoreSchemaHandler, ValidationInfo
 from pydantic_core import core_schema
 from typing_extensions import Literal
 
+from ..base._blob_references import read_blob_reference, write_blob_reference
+
 
 class Image:
     def __init__(self, image: PILImage.Image):
@@ -42,11 +44,18 @@ class Image:
     def from_base64(cls, base64_str: str) -> Image:
         return cls(PILImage.open(BytesIO(base64.b64decode(base64_str))))
 
-    def to_base64(self) -> str:
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Image:
+        return cls(PILImage.open(BytesIO(data)))
+
+    def to_bytes(self) -> bytes:
+        """The image encoded as PNG."""
         buffered = BytesIO()
         self.image.save(buffered, format="PNG")
-        content = buffered.getvalue()
-        return base64.b64encode(content).decode("utf-8")
+        return buffered.getvalue()
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("utf-8")
 
     @classmethod
     def from_file(cls, file_path: Path) -> Image:
@@ -68,9 +77,13 @@ class Image:
         # Custom validation
         def validate(value: Any, validation_info: ValidationInfo) -> Image:
             if isinstance(value, dict):
+                # Large images may be sent out of band by the runtime as a blob.
+                blob_id = cast(str | None, value.get("blob"))  # type: ignore
+                if blob_id is not None:
+                    return cls.from_bytes(read_blob_reference(blob_id))
                 base_64 = cast(str | None, value.get("data"))  # type: ignore
                 if base_64 is None:
-                    raise ValueError("Expected 'data' key in the dictionary")
+                    raise ValueError("Expected 'data' or 'blob' key in the dictionary")
                 return cls.from_base64(base_64)
             elif isinstance(value, cls):
                 return value
@@ -79,7 +92,11 @@ class Image:
 
         # Custom serialization
         def serialize(value: Image) -> dict[str, Any]:
-            return {"data": value.to_base64()}
+            content = value.to_bytes()
+            blob_id = write_blob_reference(content)
+            if blob_id is not None:
+                return {"blob": blob_id}
+            return {"data": base64.b64encode(content).decode("utf-8")}
 
         return core_schema.with_info_after_validator_function(
             validate,
@@ -0,0 +1,62 @@
+import uuid
+
+from ..base import AgentId, Subscription, TopicId
+from ..base.exceptions import CantHandleException
+
+
+class TypePrefixSubscription(Subscription):
+    """This subscription matches on topics whose type starts with a prefix and maps to agents using the source of
+    the topic as the agent key.
+
+    This subscription causes each source to have its own agent instance.
+
+    Example:
+
+        .. code-block:: python
+
+            subscription = TypePrefixSubscription(topic_type_prefix="jira.", agent_type="a1")
+
+        In this case:
+
+        - A topic_id with type `jira.created` and source `s1` will be handled by an agent of type `a1` with key `s1`
+        - A topic_id with type `jira.resolved` and source `s2` will be handled by an agent of type `a1` with key `s2`.
+        - A topic_id with type `github.push` is not matched.
+
+    Args:
+        topic_type_prefix (str): Prefix of the topic types to match against
+        agent_type (str): Agent type to handle this subscription
+    """
+
+    def __init__(self, topic_type_prefix: str, agent_type: str):
+        self._topic_type_prefix = topic_type_prefix
+        self._agent_type = agent_type
+        self._id = str(uuid.uuid4())
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def topic_type_prefix(self) -> str:
+        return self._topic_type_prefix
+
+    @property
+    def agent_type(self) -> str:
+        return self._agent_type
+
+    def is_match(self, topic_id: TopicId) -> bool:
+        return topic_id.type.startswith(self._topic_type_prefix)
+
+    def map_to_agent(self, topic_id: TopicId) -> AgentId:
+        if not self.is_match(topic_id):
+            raise CantHandleException("TopicId does not match the subscription")
+
+        return AgentId(type=self._agent_type, key=topic_id.source)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TypePrefixSubscription):
+            return False
+
+        return self.id == other.id or (
+            self.agent_type == other.agent_type and self.topic_type_prefix == other.topic_type_prefix
+        )
@@ -2,28 +2,32 @@ from typing import Any, List, Mapping
 
 from ..models import FunctionExecutionResultMessage, LLMMessage
 from ._chat_completion_context import ChatCompletionContext
+from ._message_log import MessageLog
 
 
 class BufferedChatCompletionContext(ChatCompletionContext):
     """A buffered chat completion context that keeps a view of the last n messages,
     where n is the buffer size. The buffer size is set at initialization.
 
+    All messages are kept in a :class:`MessageLog`, so saving the state does not re-encode the history and
+    loaded state is only decoded when the messages are first read.
+
     Args:
         buffer_size (int): The size of the buffer.
 
     """
 
     def __init__(self, buffer_size: int, initial_messages: List[LLMMessage] | None = None) -> None:
-        self._messages: List[LLMMessage] = initial_messages or []
+        self._log = MessageLog.from_messages(initial_messages or [])
         self._buffer_size = buffer_size
 
     async def add_message(self, message: LLMMessage) -> None:
         """Add a message to the memory."""
-        self._messages.append(message)
+        self._log.append(message)
 
     async def get_messages(self) -> List[LLMMessage]:
         """Get at most `buffer_size` recent messages."""
-        messages = self._messages[-self._buffer_size :]
+        messages = self._log.messages[-self._buffer_size :]
         # Handle the first message is a function call result message.
         if messages and isinstance(messages[0], FunctionExecutionResultMessage):
             # Remove the first message from the list.
@@ -32,14 +36,18 @@ class BufferedChatCompletionContext(ChatCompletionContext):
 
     async def clear(self) -> None:
         """Clear the message memory."""
-        self._messages = []
+        self._log.clear()
 
     def save_state(self) -> Mapping[str, Any]:
         return {
-            "messages": [message for message in self._messages],
+            "message_log": self._log.save(),
             "buffer_size": self._buffer_size,
         }
 
     def load_state(self, state: Mapping[str, Any]) -> None:
-        self._messages = state["messages"]
+        if "message_log" in state:
+            self._log = MessageLog.load(state["message_log"])
+        else:
+            # State saved before the message log was introduced.
+            self._log = MessageLog.from_messages(state["messages"])
         self._buffer_size = state["buffer_size"]
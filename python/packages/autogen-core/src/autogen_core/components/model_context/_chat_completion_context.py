@@ -1,4 +1,4 @@
-from typing import List, Mapping, Protocol
+from typing import Any, List, Mapping, Protocol
 
 from ..models import LLMMessage
 
@@ -14,6 +14,6 @@ class ChatCompletionContext(Protocol):
 
     async def clear(self) -> None: ...
 
-    def save_state(self) -> Mapping[str, LLMMessage]: ...
+    def save_state(self) -> Mapping[str, Any]: ...
 
-    def load_state(self, state: Mapping[str, LLMMessage]) -> None: ...
+    def load_state(self, state: Mapping[str, Any]) -> None: ...
@@ -3,6 +3,7 @@ from typing import Any, List, Mapping
 from .._types import FunctionCall
 from ..models import AssistantMessage, FunctionExecutionResultMessage, LLMMessage, UserMessage
 from ._chat_completion_context import ChatCompletionContext
+from ._message_log import MessageLog
 
 
 class HeadAndTailChatCompletionContext(ChatCompletionContext):
@@ -16,17 +17,18 @@ class HeadAndTailChatCompletionContext(ChatCompletionContext):
     """
 
     def __init__(self, head_size: int, tail_size: int) -> None:
-        self._messages: List[LLMMessage] = []
+        self._log = MessageLog()
         self._head_size = head_size
         self._tail_size = tail_size
 
     async def add_message(self, message: LLMMessage) -> None:
         """Add a message to the memory."""
-        self._messages.append(message)
+        self._log.append(message)
 
     async def get_messages(self) -> List[LLMMessage]:
         """Get at most `head_size` recent messages and `tail_size` oldest messages."""
-        head_messages = self._messages[: self._head_size]
+        messages = self._log.messages
+        head_messages = messages[: self._head_size]
         # Handle the last message is a function call message.
         if (
             head_messages
@@ -37,35 +39,37 @@ class HeadAndTailChatCompletionContext(ChatCompletionContext):
             # Remove the last message from the head.
             head_messages = head_messages[:-1]
 
-        tail_messages = self._messages[-self._tail_size :]
+        tail_messages = messages[-self._tail_size :]
         # Handle the first message is a function call result message.
         if tail_messages and isinstance(tail_messages[0], FunctionExecutionResultMessage):
             # Remove the first message from the tail.
             tail_messages = tail_messages[1:]
 
-        num_skipped = len(self._messages) - self._head_size - self._tail_size
+        num_skipped = len(messages) - self._head_size - self._tail_size
         if num_skipped <= 0:
             # If there are not enough messages to fill the head and tail,
             # return all messages.
-            return self._messages
+            return messages
 
         placeholder_messages = [UserMessage(content=f"Skipped {num_skipped} messages.", source="System")]
         return head_messages + placeholder_messages + tail_messages
 
     async def clear(self) -> None:
         """Clear the message memory."""
-        self._messages = []
+        self._log.clear()
 
     def save_state(self) -> Mapping[str, Any]:
         return {
-            "messages": [message for message in self._messages],
+            "message_log": self._log.save(),
             "head_size": self._head_size,
             "tail_size": self._tail_size,
-            "placeholder_message": self._placeholder_message,
         }
 
     def load_state(self, state: Mapping[str, Any]) -> None:
-        self._messages = state["messages"]
+        if "message_log" in state:
+            self._log = MessageLog.load(state["message_log"])
+        else:
+            # State saved before the message log was introduced.
+            self._log = MessageLog.from_messages(state["messages"])
         self._head_size = state["head_size"]
         self._tail_size = state["tail_size"]
-        self._placeholder_message = state["placeholder_message"]
@@ -0,0 +1,241 @@
+import hashlib
+from io import BytesIO
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from PIL import Image as PILImage
+
+from .._image import Image
+from .._types import FunctionCall
+from ..models import (
+    AssistantMessage,
+    FunctionExecutionResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+__all__ = ["MessageLog"]
+
+# Record tags.
+_SYSTEM = 0
+_USER = 1
+_ASSISTANT = 2
+_FUNCTION_RESULTS = 3
+
+# Content tags.
+_TEXT = 0
+_PARTS = 1
+_IMAGE = 2
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes | memoryview, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _write_str(buffer: bytearray, value: str) -> None:
+    encoded = value.encode("utf-8")
+    _write_varint(buffer, len(encoded))
+    buffer += encoded
+
+
+def _read_str(data: bytes | memoryview, offset: int) -> Tuple[str, int]:
+    length, offset = _read_varint(data, offset)
+    return bytes(data[offset : offset + length]).decode("utf-8"), offset + length
+
+
+class MessageLog:
+    """An append-only log of LLM messages in a compact binary encoding.
+
+    Each message is encoded once, when it is appended. Saving the log seals the messages appended since the last
+    save into a new segment and returns the list of segments, so the bytes of earlier segments are neither copied
+    nor changed, and a state store only has to write the new ones. Images are stored once per distinct image as PNG
+    bytes, in the order they were first appended, and messages refer to them by SHA-256 digest. Decoding is
+    deferred until the messages are first read.
+
+    Args:
+        segments (Sequence[bytes], optional): Encoded messages, as returned by `save`.
+        images (Sequence[bytes], optional): PNG bytes of the referenced images, as returned by `save`.
+    """
+
+    def __init__(self, segments: Sequence[bytes] = (), images: Sequence[bytes] = ()) -> None:
+        self._segments: List[bytes] = list(segments)
+        # Messages appended since the last save.
+        self._tail = bytearray()
+        self._images: Dict[str, bytes] = {hashlib.sha256(data).hexdigest(): data for data in images}
+        self._decoded_images: Dict[str, Image] = {}
+        self._messages: List[LLMMessage] | None = None if any(self._segments) else []
+
+    @classmethod
+    def from_messages(cls, messages: List[LLMMessage]) -> "MessageLog":
+        log = cls()
+        for message in messages:
+            log.append(message)
+        return log
+
+    @property
+    def messages(self) -> List[LLMMessage]:
+        """The messages in the log, decoded on first access."""
+        if self._messages is None:
+            self._messages = self._decode()
+        return self._messages
+
+    def append(self, message: LLMMessage) -> None:
+        """Encode and append a message."""
+        record = bytearray()
+        self._encode(record, message)
+        _write_varint(self._tail, len(record))
+        self._tail += record
+        if self._messages is not None:
+            self._messages.append(message)
+
+    def clear(self) -> None:
+        self._segments = []
+        self._tail = bytearray()
+        self._images = {}
+        self._decoded_images = {}
+        self._messages = []
+
+    def save(self) -> Dict[str, Any]:
+        """Get the encoded messages, as a list of segments that only grows until the log is cleared, and the
+        images they refer to."""
+        if self._tail:
+            self._segments.append(bytes(self._tail))
+            self._tail = bytearray()
+        return {"segments": list(self._segments), "images": list(self._images.values())}
+
+    @classmethod
+    def load(cls, state: Mapping[str, Any]) -> "MessageLog":
+        """Create a log from the result of `save`. The messages are decoded on first access."""
+        return cls(state["segments"], state["images"])
+
+    def _encode(self, buffer: bytearray, message: LLMMessage) -> None:
+        if isinstance(message, SystemMessage):
+            buffer.append(_SYSTEM)
+            _write_str(buffer, message.content)
+        elif isinstance(message, UserMessage):
+            buffer.append(_USER)
+            _write_str(buffer, message.source)
+            if isinstance(message.content, str):
+                buffer.append(_TEXT)
+                _write_str(buffer, message.content)
+            else:
+                buffer.append(_PARTS)
+                _write_varint(buffer, len(message.content))
+                for part in message.content:
+                    if isinstance(part, str):
+                        buffer.append(_TEXT)
+                        _write_str(buffer, part)
+                    else:
+                        buffer.append(_IMAGE)
+                        buffer += self._add_image(part)
+        elif isinstance(message, AssistantMessage):
+            buffer.append(_ASSISTANT)
+            _write_str(buffer, message.source)
+            if isinstance(message.content, str):
+                buffer.append(_TEXT)
+                _write_str(buffer, message.content)
+            else:
+                buffer.append(_PARTS)
+                _write_varint(buffer, len(message.content))
+                for call in message.content:
+                    _write_str(buffer, call.id)
+                    _write_str(buffer, call.arguments)
+                    _write_str(buffer, call.name)
+        elif isinstance(message, FunctionExecutionResultMessage):
+            buffer.append(_FUNCTION_RESULTS)
+            _write_varint(buffer, len(message.content))
+            for result in message.content:
+                _write_str(buffer, result.content)
+                _write_str(buffer, result.call_id)
+        else:
+            raise TypeError(f"Unsupported message type {type(message).__name__}")
+
+    def _add_image(self, image: Image) -> bytes:
+        png = BytesIO()
+        image.image.save(png, format="PNG")
+        data = png.getvalue()
+        digest = hashlib.sha256(data).digest()
+        self._images.setdefault(digest.hex(), data)
+        self._decoded_images.setdefault(digest.hex(), image)
+        return digest
+
+    def _get_image(self, digest: str) -> Image:
+        image = self._decoded_images.get(digest)
+        if image is None:
+            image = Image(PILImage.open(BytesIO(self._images[digest])))
+            self._decoded_images[digest] = image
+        return image
+
+    def _decode(self) -> List[LLMMessage]:
+        messages: List[LLMMessage] = []
+        # Segments always end at the end of a record.
+        for segment in [*self._segments, self._tail]:
+            data = memoryview(segment)
+            offset = 0
+            while offset < len(data):
+                length, offset = _read_varint(data, offset)
+                messages.append(self._decode_record(data[offset : offset + length]))
+                offset += length
+        return messages
+
+    def _decode_record(self, record: memoryview) -> LLMMessage:
+        tag = record[0]
+        offset = 1
+        if tag == _SYSTEM:
+            content, _ = _read_str(record, offset)
+            return SystemMessage(content=content)
+        if tag == _USER:
+            source, offset = _read_str(record, offset)
+            if record[offset] == _TEXT:
+                text, _ = _read_str(record, offset + 1)
+                return UserMessage(content=text, source=source)
+            count, offset = _read_varint(record, offset + 1)
+            parts: List[str | Image] = []
+            for _ in range(count):
+                if record[offset] == _TEXT:
+                    text, offset = _read_str(record, offset + 1)
+                    parts.append(text)
+                elif record[offset] == _IMAGE:
+                    parts.append(self._get_image(bytes(record[offset + 1 : offset + 33]).hex()))
+                    offset += 33
+                else:
+                    raise ValueError(f"Unknown content tag {record[offset]}")
+            return UserMessage(content=parts, source=source)
+        if tag == _ASSISTANT:
+            source, offset = _read_str(record, offset)
+            if record[offset] == _TEXT:
+                text, _ = _read_str(record, offset + 1)
+                return AssistantMessage(content=text, source=source)
+            count, offset = _read_varint(record, offset + 1)
+            calls: List[FunctionCall] = []
+            for _ in range(count):
+                id, offset = _read_str(record, offset)
+                arguments, offset = _read_str(record, offset)
+                name, offset = _read_str(record, offset)
+                calls.append(FunctionCall(id=id, arguments=arguments, name=name))
+            return AssistantMessage(content=calls, source=source)
+        if tag == _FUNCTION_RESULTS:
+            count, offset = _read_varint(record, offset)
+            results: List[FunctionExecutionResult] = []
+            for _ in range(count):
+                content, offset = _read_str(record, offset)
+                call_id, offset = _read_str(record, offset)
+                results.append(FunctionExecutionResult(content=content, call_id=call_id))
+            return FunctionExecutionResultMessage(content=results)
+        raise ValueError(f"Unknown message record tag {tag}")
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from autogen_core.application import FileSystemBlobStore, InMemoryBlobStore
+from autogen_core.base import JSON_DATA_CONTENT_TYPE, SerializationRegistry, try_get_known_serializers_for_type
+from autogen_core.base._blob_references import blob_id, reading_blob_references, writing_blob_references
+from autogen_core.components import Image
+from PIL import Image as PILImage
+
+
+@dataclass
+class ImageMessage:
+    caption: str
+    image: Image
+
+
+@pytest.mark.asyncio
+async def test_in_memory_blob_store_evicts_least_recently_used() -> None:
+    store = InMemoryBlobStore(max_bytes=10)
+    await store.put("a", b"aaaa")
+    await store.put("b", b"bbbb")
+    assert await store.get("a") == b"aaaa"
+    await store.put("c", b"cccc")
+
+    assert await store.get("b") is None
+    assert await store.get("a") == b"aaaa"
+    assert await store.get("c") == b"cccc"
+    assert len(store) == 2
+    assert store.size == 8
+
+
+@pytest.mark.asyncio
+async def test_file_system_blob_store(tmp_path: Path) -> None:
+    data = b"blob" * 100
+    store = FileSystemBlobStore(tmp_path / "blobs")
+    await store.put(blob_id(data), data)
+    await store.put(blob_id(data), data)
+
+    # Another store on the same directory, as in another worker on the same machine, reads the blob.
+    assert await FileSystemBlobStore(tmp_path / "blobs").get(blob_id(data)) == data
+    assert await store.get(blob_id(b"other")) is None
+    assert [path.name for path in (tmp_path / "blobs").iterdir()] == [blob_id(data)]
+    with pytest.raises(ValueError):
+        await store.get("../outside")
+
+
+def test_image_blob_reference() -> None:
+    registry = SerializationRegistry()
+    registry.add_serializer(try_get_known_serializers_for_type(ImageMessage))
+    message = ImageMessage(caption="red", image=Image(PILImage.new("RGB", (64, 64), color="red")))
+
+    # Outside of a runtime that sends blobs, images are serialized inline.
+    inline = registry.serialize(message, type_name="ImageMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+
+    with writing_blob_references(threshold=0) as blobs:
+        referenced = registry.serialize(message, type_name="ImageMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert list(blobs) == [blob_id(message.image.to_bytes())]
+    assert len(referenced) < len(inline)
+
+    with writing_blob_references(threshold=len(message.image.to_bytes()) + 1) as blobs:
+        assert registry.serialize(message, type_name="ImageMessage", data_content_type=JSON_DATA_CONTENT_TYPE) == inline
+    assert not blobs
+
+    with reading_blob_references({blob_id(message.image.to_bytes()): message.image.to_bytes()}):
+        result = registry.deserialize(referenced, type_name="ImageMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert isinstance(result, ImageMessage)
+    assert result.image.to_bytes() == message.image.to_bytes()
+
+    with pytest.raises(LookupError):
+        registry.deserialize(referenced, type_name="ImageMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
@@ -21,10 +21,12 @@ class LongRunningAgent(RoutedAgent):
         super().__init__("A long running agent")
         self.called = False
         self.cancelled = False
+        self.deadline: float | None = None
 
     @message_handler
     async def on_new_message(self, message: MessageType, ctx: MessageContext) -> MessageType:
         self.called = True
+        self.deadline = ctx.deadline
         sleep = asyncio.ensure_future(asyncio.sleep(100))
         ctx.cancellation_token.link_future(sleep)
         try:
@@ -40,11 +42,13 @@ class NestingLongRunningAgent(RoutedAgent):
         super().__init__("A nesting long running agent")
         self.called = False
         self.cancelled = False
+        self.deadline: float | None = None
         self._nested_agent = nested_agent
 
     @message_handler
     async def on_new_message(self, message: MessageType, ctx: MessageContext) -> MessageType:
         self.called = True
+        self.deadline = ctx.deadline
         response = self.send_message(message, self._nested_agent, cancellation_token=ctx.cancellation_token)
         try:
             val = await response
@@ -150,3 +154,81 @@ async def test_nested_cancellation_inner_called() -> None:
     long_running_agent = await runtime.try_get_underlying_agent_instance(long_running_id, type=LongRunningAgent)
     assert long_running_agent.called
     assert long_running_agent.cancelled
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_handler() -> None:
+    runtime = SingleThreadedAgentRuntime()
+
+    await runtime.register("long_running", LongRunningAgent)
+    agent_id = AgentId("long_running", key="default")
+    runtime.start()
+
+    with pytest.raises(TimeoutError):
+        await runtime.send_message(MessageType(), recipient=agent_id, timeout=0.1)
+
+    await runtime.stop_when_idle()
+    long_running_agent = await runtime.try_get_underlying_agent_instance(agent_id, type=LongRunningAgent)
+    assert long_running_agent.called
+    assert long_running_agent.cancelled
+    assert long_running_agent.deadline is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_message_is_dropped() -> None:
+    runtime = SingleThreadedAgentRuntime()
+
+    await runtime.register("long_running", LongRunningAgent)
+    agent_id = AgentId("long_running", key="default")
+
+    # The runtime is not processing messages yet, so the message expires while queued.
+    with pytest.raises(TimeoutError):
+        await runtime.send_message(MessageType(), recipient=agent_id, timeout=0.01)
+    assert len(runtime.unprocessed_messages) == 1
+
+    await runtime.process_next()
+
+    assert len(runtime.unprocessed_messages) == 0
+    assert runtime.outstanding_tasks == 0
+    long_running_agent = await runtime.try_get_underlying_agent_instance(agent_id, type=LongRunningAgent)
+    assert not long_running_agent.called
+
+
+@pytest.mark.asyncio
+async def test_nested_send_inherits_deadline() -> None:
+    runtime = SingleThreadedAgentRuntime()
+
+    await runtime.register("long_running", LongRunningAgent)
+    nested_id = AgentId("long_running", key="default")
+    await runtime.register("nested", lambda: NestingLongRunningAgent(nested_id))
+    agent_id = AgentId("nested", key="default")
+    runtime.start()
+
+    with pytest.raises(TimeoutError):
+        await runtime.send_message(MessageType(), recipient=agent_id, timeout=0.1)
+
+    await runtime.stop_when_idle()
+    nested_agent = await runtime.try_get_underlying_agent_instance(agent_id, type=NestingLongRunningAgent)
+    long_running_agent = await runtime.try_get_underlying_agent_instance(nested_id, type=LongRunningAgent)
+    assert long_running_agent.cancelled
+    assert nested_agent.deadline is not None
+    assert long_running_agent.deadline == nested_agent.deadline
+
+
+@pytest.mark.asyncio
+async def test_requests_do_not_keep_callbacks_on_token() -> None:
+    runtime = SingleThreadedAgentRuntime()
+
+    await runtime.register("long_running", LongRunningAgent)
+    agent_id = AgentId("long_running", key="default")
+    runtime.start()
+
+    # A token shared by many requests must not keep a callback for each of them once they are done.
+    token = CancellationToken()
+    for _ in range(3):
+        with pytest.raises(TimeoutError):
+            await runtime.send_message(MessageType(), recipient=agent_id, cancellation_token=token, timeout=0.01)
+    await runtime.stop_when_idle()
+
+    assert not token.is_cancelled()
+    assert len(token._callbacks) == 0  # type: ignore[reportPrivateUsage]
@@ -0,0 +1,56 @@
+from collections import Counter
+
+import pytest
+from autogen_core.application._consistent_hashing import ConsistentHashRing
+
+
+def test_consistent_hash_ring_spreads_keys() -> None:
+    ring: ConsistentHashRing[int] = ConsistentHashRing()
+    for node in range(4):
+        ring.add(node)
+    counts = Counter(ring.get(f"key{index}") for index in range(10_000))
+    assert set(counts) == {0, 1, 2, 3}
+    assert all(1_500 < count < 3_500 for count in counts.values())
+
+
+def test_consistent_hash_ring_moves_few_keys() -> None:
+    ring: ConsistentHashRing[int] = ConsistentHashRing()
+    for node in range(4):
+        ring.add(node)
+    keys = [f"key{index}" for index in range(10_000)]
+    before = {key: ring.get(key) for key in keys}
+
+    # A node joining only takes keys from the others.
+    ring.add(4)
+    after_join = {key: ring.get(key) for key in keys}
+    moved = [key for key in keys if after_join[key] != before[key]]
+    assert all(after_join[key] == 4 for key in moved)
+    assert 1_000 < len(moved) < 3_000
+
+    # A node leaving only gives its keys to the others.
+    ring.remove(1)
+    after_leave = {key: ring.get(key) for key in keys}
+    assert all(after_leave[key] == after_join[key] for key in keys if after_join[key] != 1)
+    assert 1 not in after_leave.values()
+
+
+def test_consistent_hash_ring_without_nodes() -> None:
+    ring: ConsistentHashRing[str] = ConsistentHashRing()
+    ring.add("only")
+    assert ring.get("key") == "only"
+    ring.remove("only")
+    assert not ring
+    with pytest.raises(LookupError):
+        ring.get("key")
+
+
+def test_consistent_hash_ring_copy() -> None:
+    ring: ConsistentHashRing[int] = ConsistentHashRing()
+    ring.add(0)
+    ring.add(1)
+    copy = ring.copy()
+    copy.add(2)
+    assert list(ring) == [0, 1]
+    assert list(copy) == [0, 1, 2]
+    keys = [f"key{index}" for index in range(100)]
+    assert all(copy.get(key) in (ring.get(key), 2) for key in keys)
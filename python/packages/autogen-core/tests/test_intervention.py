@@ -1,9 +1,11 @@
+from typing import Any
+
 import pytest
 from autogen_core.application import SingleThreadedAgentRuntime
 from autogen_core.base import AgentId
 from autogen_core.base.exceptions import MessageDroppedException
 from autogen_core.base.intervention import DefaultInterventionHandler, DropMessage
-from test_utils import LoopbackAgent, MessageType
+from test_utils import ContentMessage, LoopbackAgent, MessageType
 
 
 @pytest.mark.asyncio
@@ -127,3 +129,72 @@ async def test_intervention_raise_exception_on_respond() -> None:
 
     long_running_agent = await runtime.try_get_underlying_agent_instance(loopback, type=LoopbackAgent)
     assert long_running_agent.num_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_intervention_filtered_by_message_type() -> None:
+    class ContentInterventionHandler(DefaultInterventionHandler):
+        message_types = [ContentMessage]
+
+        def __init__(self) -> None:
+            self.intercepted: list[Any] = []
+
+        async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any:
+            self.intercepted.append(message)
+            return message
+
+    handler = ContentInterventionHandler()
+    runtime = SingleThreadedAgentRuntime(intervention_handlers=[handler])
+
+    await runtime.register("name", LoopbackAgent)
+    loopback = AgentId("name", key="default")
+    runtime.start()
+
+    await runtime.send_message(MessageType(), recipient=loopback)
+    await runtime.send_message(ContentMessage(content="hello"), recipient=loopback)
+
+    await runtime.stop()
+
+    assert handler.intercepted == [ContentMessage(content="hello")]
+
+
+@pytest.mark.asyncio
+async def test_intervention_filtered_by_envelope_kind() -> None:
+    class ResponseInterventionHandler(DefaultInterventionHandler):
+        envelope_kinds = ["response"]
+
+        def __init__(self) -> None:
+            self.sent = 0
+            self.responses = 0
+
+        async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any:
+            self.sent += 1
+            return message
+
+        async def on_response(self, message: Any, *, sender: AgentId, recipient: AgentId | None) -> Any:
+            self.responses += 1
+            return message
+
+    class SendInterventionHandler(DefaultInterventionHandler):
+        def __init__(self) -> None:
+            self.sent = 0
+
+        async def on_send(self, message: Any, *, sender: AgentId | None, recipient: AgentId) -> Any:
+            self.sent += 1
+            return message
+
+    response_handler = ResponseInterventionHandler()
+    send_handler = SendInterventionHandler()
+    runtime = SingleThreadedAgentRuntime(intervention_handlers=[response_handler, send_handler])
+
+    await runtime.register("name", LoopbackAgent)
+    loopback = AgentId("name", key="default")
+    runtime.start()
+
+    await runtime.send_message(MessageType(), recipient=loopback)
+
+    await runtime.stop()
+
+    assert response_handler.sent == 0
+    assert response_handler.responses == 1
+    assert send_handler.sent == 1
@@ -0,0 +1,178 @@
+from pathlib import Path
+from typing import Any, List, Mapping, Tuple
+
+import pytest
+from autogen_core.application import SingleThreadedAgentRuntime, SqliteMessageStore, StoredEnvelope
+from autogen_core.base import (
+    JSON_DATA_CONTENT_TYPE,
+    AgentId,
+    MessageContext,
+    TopicId,
+    try_get_known_serializers_for_type,
+)
+from autogen_core.components import DefaultTopicId, RoutedAgent, default_subscription, message_handler
+from test_utils import CascadingMessageType, ContentMessage
+
+
+@default_subscription
+class CountingAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Counts the messages it receives.")
+        self.num_calls = 0
+
+    @message_handler
+    async def on_cascading(self, message: CascadingMessageType, ctx: MessageContext) -> None:
+        self.num_calls += 1
+
+    @message_handler
+    async def on_content(self, message: ContentMessage, ctx: MessageContext) -> ContentMessage:
+        self.num_calls += 1
+        return ContentMessage(content=str(self.num_calls))
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return {"num_calls": self.num_calls}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        self.num_calls = state["num_calls"]
+
+
+@pytest.mark.asyncio
+async def test_pending_messages_are_redelivered(tmp_path: Path) -> None:
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    # The runtime is never started, as if the process died before the messages were handled.
+    await runtime.publish_message(CascadingMessageType(round=1), DefaultTopicId())
+    await runtime.publish_message(CascadingMessageType(round=2), DefaultTopicId())
+    assert len(await store.pending()) == 2
+    store.close()
+
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    runtime.start()
+    await runtime.stop_when_idle()
+
+    assert await runtime.agent_save_state(AgentId("counter", "default")) == {"num_calls": 2}
+    assert await store.pending() == []
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_agent_state_is_checkpointed(tmp_path: Path) -> None:
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    runtime.start()
+    for _ in range(3):
+        await runtime.send_message(ContentMessage(content="hello"), AgentId("counter", "default"))
+    # The agent was checkpointed after its last handler and has not changed since.
+    assert await runtime.checkpoint() == 0
+    await runtime.stop()
+    store.close()
+
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    runtime.start()
+    reply = await runtime.send_message(ContentMessage(content="hello"), AgentId("counter", "default"))
+    await runtime.stop()
+    store.close()
+
+    assert reply == ContentMessage(content="4")
+
+
+@pytest.mark.asyncio
+async def test_messages_sent_by_redelivered_messages_are_not_redelivered(tmp_path: Path) -> None:
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    serializer = try_get_known_serializers_for_type(CascadingMessageType)[0]
+
+    def stored(round: int, cause: int | None) -> StoredEnvelope:
+        return StoredEnvelope(
+            kind="publish",
+            sender=None,
+            topic_id=TopicId("default", "default"),
+            data_type=serializer.type_name,
+            data_content_type=JSON_DATA_CONTENT_TYPE,
+            data=serializer.serialize(CascadingMessageType(round=round)),
+            cause=cause,
+        )
+
+    parent = await store.append(stored(1, None))
+    # Published by the handler of the parent, which runs again and publishes it anew.
+    await store.append(stored(2, parent))
+
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    runtime.start()
+    await runtime.stop_when_idle()
+
+    assert await runtime.agent_save_state(AgentId("counter", "default")) == {"num_calls": 1}
+    assert await store.pending() == []
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_messages_that_cannot_be_deserialized_are_skipped(tmp_path: Path) -> None:
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    serializer = try_get_known_serializers_for_type(CascadingMessageType)[0]
+
+    def stored(data: bytes, cause: int | None) -> StoredEnvelope:
+        return StoredEnvelope(
+            kind="publish",
+            sender=None,
+            topic_id=TopicId("default", "default"),
+            data_type=serializer.type_name,
+            data_content_type=JSON_DATA_CONTENT_TYPE,
+            data=data,
+            cause=cause,
+        )
+
+    data = serializer.serialize(CascadingMessageType(round=1))
+    # The first message no longer matches its type.
+    invalid = await store.append(stored(b"{}", None))
+    invalid_child = await store.append(stored(data, invalid))
+    await store.append(stored(data, None))
+
+    runtime = SingleThreadedAgentRuntime(message_store=store)
+    await CountingAgent.register(runtime, "counter", CountingAgent)
+    runtime.start()
+    await runtime.stop_when_idle()
+
+    # The messages after it are still redelivered, and it is left in the store with the message it caused.
+    assert await runtime.agent_save_state(AgentId("counter", "default")) == {"num_calls": 1}
+    assert [envelope_id for envelope_id, _ in await store.pending()] == [invalid, invalid_child]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_state_with_bytes_is_stored(tmp_path: Path) -> None:
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    agent_id = AgentId("agent", "default")
+    segments = [b"\x00\x01", b"\xff"]
+    state = {"message_log": {"segments": segments, "images": [b"png"]}, "raw": b"\x02"}
+    await store.save(agent_id, state)
+    assert await store.load(agent_id) == state
+
+    def chunk_rows() -> List[Tuple[str, int, int]]:
+        connection = store._connection  # type: ignore[reportPrivateUsage]
+        rows = connection.execute("SELECT path, position, rowid FROM agent_state_chunks ORDER BY path, position")
+        return rows.fetchall()
+
+    # Saving appended segments only writes the new ones.
+    rows = chunk_rows()
+    segments.append(b"\x03")
+    await store.save(agent_id, state)
+    assert chunk_rows()[:3] == rows[:3]
+    assert len(chunk_rows()) == 4
+    assert await store.load(agent_id) == state
+
+    # A list whose saved elements changed, such as a cleared log, is written again.
+    state = {"message_log": {"segments": [b"\x04"], "images": []}, "raw": b"\x02"}
+    await store.save(agent_id, state)
+    assert [(path, position) for path, position, _ in chunk_rows()] == [('["message_log", "segments"]', 0)]
+    store.close()
+
+    store = SqliteMessageStore(tmp_path / "runtime.db")
+    assert await store.load(agent_id) == state
+    store.close()
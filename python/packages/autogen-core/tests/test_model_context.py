@@ -1,8 +1,17 @@
 from typing import List
 
 import pytest
+from autogen_core.components import FunctionCall, Image
 from autogen_core.components.model_context import BufferedChatCompletionContext, HeadAndTailChatCompletionContext
-from autogen_core.components.models import AssistantMessage, LLMMessage, UserMessage
+from autogen_core.components.models import (
+    AssistantMessage,
+    FunctionExecutionResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+from PIL import Image as PILImage
 
 
 @pytest.mark.asyncio
@@ -48,3 +57,54 @@ async def test_head_and_tail_model_context() -> None:
     await model_context.clear()
     retrieved = await model_context.get_messages()
     assert len(retrieved) == 0
+
+
+@pytest.mark.asyncio
+async def test_model_context_state_round_trip() -> None:
+    image = Image(PILImage.new("RGB", (8, 8), color="red"))
+    messages: List[LLMMessage] = [
+        SystemMessage(content="You are a helpful assistant."),
+        UserMessage(content=["What is in this picture?", image], source="user"),
+        AssistantMessage(content=[FunctionCall(id="1", arguments='{"x": 1}', name="describe")], source="assistant"),
+        FunctionExecutionResultMessage(content=[FunctionExecutionResult(content="a red square", call_id="1")]),
+        UserMessage(content=["And this one?", image], source="user"),
+        AssistantMessage(content="Another red square.", source="assistant"),
+    ]
+    model_context = BufferedChatCompletionContext(buffer_size=10)
+    for message in messages:
+        await model_context.add_message(message)
+
+    state = model_context.save_state()
+    # The image is stored once and referenced by both messages.
+    assert len(state["message_log"]["images"]) == 1
+
+    restored = BufferedChatCompletionContext(buffer_size=1)
+    restored.load_state(state)
+    retrieved = await restored.get_messages()
+    assert len(retrieved) == len(messages)
+    assert retrieved[0] == messages[0]
+    assert retrieved[2:4] == messages[2:4]
+    assert retrieved[5] == messages[5]
+    user_message = retrieved[1]
+    assert isinstance(user_message, UserMessage) and isinstance(user_message.content, list)
+    assert user_message.content[0] == "What is in this picture?"
+    restored_image = user_message.content[1]
+    assert isinstance(restored_image, Image)
+    assert restored_image.to_base64() == image.to_base64()
+
+    # Messages added after loading are appended to the loaded log, in a new segment.
+    await restored.add_message(UserMessage(content="Thanks!", source="user"))
+    restored_state = restored.save_state()
+    assert len(restored_state["message_log"]["segments"]) == 2
+    assert restored_state["message_log"]["segments"][0] is state["message_log"]["segments"][0]
+    again = HeadAndTailChatCompletionContext(head_size=1, tail_size=1)
+    again.load_state({**restored_state, "head_size": 10, "tail_size": 10})
+    assert len(await again.get_messages()) == len(messages) + 1
+
+
+@pytest.mark.asyncio
+async def test_model_context_loads_legacy_state() -> None:
+    messages: List[LLMMessage] = [UserMessage(content="Hello!", source="user")]
+    model_context = BufferedChatCompletionContext(buffer_size=2)
+    model_context.load_state({"messages": messages, "buffer_size": 2})
+    assert await model_context.get_messages() == messages
@@ -1,26 +1,36 @@
 import asyncio
+import json
 import logging
+from typing import Any, List
 
 import pytest
-from autogen_core.application import SingleThreadedAgentRuntime
+from autogen_core.application import AgentSchedulingPolicy, SingleThreadedAgentRuntime
+from autogen_core.application.logging import EVENT_LOGGER_NAME
+from autogen_core.application.logging.events import MessageEvent
 from autogen_core.base import (
     AgentId,
     AgentInstantiationContext,
     AgentType,
+    BaseAgent,
+    MessageContext,
     Subscription,
     SubscriptionInstantiationContext,
     TopicId,
     try_get_known_serializers_for_type,
 )
+from autogen_core.base.exceptions import MessageQueueFullException
 from autogen_core.components import (
     DefaultTopicId,
     TypeSubscription,
     type_subscription,
 )
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
 from opentelemetry.sdk.trace import TracerProvider
 from test_utils import (
     CascadingAgent,
     CascadingMessageType,
+    ContentMessage,
     LoopbackAgent,
     LoopbackAgentWithDefaultSubscription,
     MessageType,
@@ -31,6 +41,47 @@ from test_utils.telemetry_test_utils import TestExporter, get_test_tracer_provid
 test_exporter = TestExporter()
 
 
+class RecordingAgent(BaseAgent):
+    def __init__(self, handled: List[AgentId]) -> None:
+        super().__init__("An agent that records the messages it handles.")
+        self.handled = handled
+        self.running = 0
+        self.max_running = 0
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> None:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.handled.append(self.id)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+
+class ForwardingAgent(BaseAgent):
+    def __init__(self) -> None:
+        super().__init__("An agent that forwards a message along the agent types listed in its content.")
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> str:
+        assert isinstance(message, ContentMessage)
+        if not message.content:
+            return self.id.type
+        next_type, _, route = message.content.partition(",")
+        response = await self.send_message(ContentMessage(content=route), AgentId(next_type, "default"))
+        return f"{self.id.type},{response}"
+
+
+class SlowStartingAgent(BaseAgent):
+    def __init__(self) -> None:
+        super().__init__("An agent with a slow asynchronous initialization.")
+        self.started = False
+
+    async def on_start(self) -> None:
+        await asyncio.sleep(0.1)
+        self.started = True
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> bool:
+        return self.started
+
+
 @pytest.fixture
 def tracer_provider() -> TracerProvider:
     test_exporter.clear()
@@ -306,3 +357,240 @@ async def test_default_subscription_publish_to_other_source() -> None:
         AgentId("name", key="other"), type=LoopbackAgentWithDefaultSubscription
     )
     assert other_long_running_agent.num_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_blocks_until_space() -> None:
+    runtime = SingleThreadedAgentRuntime(max_queue_size=2)
+    await LoopbackAgentWithDefaultSubscription.register(runtime, "name", LoopbackAgentWithDefaultSubscription)
+
+    await runtime.publish_message(MessageType(), topic_id=DefaultTopicId())
+    await runtime.publish_message(MessageType(), topic_id=DefaultTopicId())
+    blocked = asyncio.create_task(runtime.publish_message(MessageType(), topic_id=DefaultTopicId()))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert len(runtime.unprocessed_messages) == 2
+
+    runtime.start()
+    await blocked
+    await runtime.stop_when_idle()
+
+    agent = await runtime.try_get_underlying_agent_instance(
+        AgentId("name", "default"), type=LoopbackAgentWithDefaultSubscription
+    )
+    assert agent.num_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_reject() -> None:
+    runtime = SingleThreadedAgentRuntime(max_queue_size=1, queue_full_policy="reject")
+    await LoopbackAgentWithDefaultSubscription.register(runtime, "name", LoopbackAgentWithDefaultSubscription)
+
+    await runtime.publish_message(MessageType(), topic_id=DefaultTopicId())
+    with pytest.raises(MessageQueueFullException):
+        await runtime.publish_message(MessageType(), topic_id=DefaultTopicId())
+    assert len(runtime.unprocessed_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_drop_oldest() -> None:
+    runtime = SingleThreadedAgentRuntime(max_queue_size=2, queue_full_policy="drop_oldest")
+    await LoopbackAgentWithDefaultSubscription.register(runtime, "name", LoopbackAgentWithDefaultSubscription)
+
+    for i in range(5):
+        await runtime.publish_message(ContentMessage(content=str(i)), topic_id=DefaultTopicId())
+
+    queued = [envelope.message.content for envelope in runtime.unprocessed_messages]
+    assert queued == ["3", "4"]
+
+    runtime.start()
+    await runtime.stop_when_idle()
+    agent = await runtime.try_get_underlying_agent_instance(
+        AgentId("name", "default"), type=LoopbackAgentWithDefaultSubscription
+    )
+    assert agent.num_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_runtime_does_not_poll() -> None:
+    runtime = SingleThreadedAgentRuntime()
+    await LoopbackAgentWithDefaultSubscription.register(runtime, "name", LoopbackAgentWithDefaultSubscription)
+
+    num_process_next_calls = 0
+    process_next = runtime.process_next
+
+    async def counting_process_next() -> None:
+        nonlocal num_process_next_calls
+        num_process_next_calls += 1
+        await process_next()
+
+    runtime.process_next = counting_process_next  # type: ignore[method-assign]
+
+    runtime.start()
+    await asyncio.sleep(0.05)
+    assert num_process_next_calls == 0
+
+    await runtime.publish_message(MessageType(), topic_id=DefaultTopicId())
+    await runtime.stop_when_idle()
+    assert num_process_next_calls == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("log_message_payloads", [True, False])
+async def test_message_events_logged(caplog: pytest.LogCaptureFixture, log_message_payloads: bool) -> None:
+    runtime = SingleThreadedAgentRuntime(log_message_payloads=log_message_payloads)
+    await LoopbackAgentWithDefaultSubscription.register(runtime, "name", LoopbackAgentWithDefaultSubscription)
+
+    with caplog.at_level(logging.INFO, logger=EVENT_LOGGER_NAME):
+        runtime.start()
+        await runtime.publish_message(ContentMessage(content="secret"), topic_id=DefaultTopicId())
+        await runtime.stop_when_idle()
+
+    events = [json.loads(record.getMessage()) for record in caplog.records if isinstance(record.msg, MessageEvent)]
+    assert [event["delivery_stage"] for event in events] == ["DeliveryStage.SEND", "DeliveryStage.DELIVER"]
+    assert events[1]["receiver"] == "name/default"
+    assert ("secret" in events[0]["payload"]) if log_message_payloads else (events[0]["payload"] is None)
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_per_agent() -> None:
+    runtime = SingleThreadedAgentRuntime(scheduling_policy=AgentSchedulingPolicy(max_concurrency_per_agent=1))
+    handled: List[AgentId] = []
+    await runtime.register("recorder", lambda: RecordingAgent(handled))
+    runtime.start()
+    agent_id = AgentId("recorder", "default")
+    await asyncio.gather(*[runtime.send_message(ContentMessage(content=str(i)), agent_id) for i in range(5)])
+    await runtime.stop()
+
+    agent = await runtime.try_get_underlying_agent_instance(agent_id, type=RecordingAgent)
+    assert len(handled) == 5
+    assert agent.max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_fair_scheduling_across_agents() -> None:
+    runtime = SingleThreadedAgentRuntime(scheduling_policy=AgentSchedulingPolicy(max_concurrent_handlers=1))
+    handled: List[AgentId] = []
+    await runtime.register("recorder", lambda: RecordingAgent(handled))
+    chatty = AgentId("recorder", "chatty")
+    quiet = AgentId("recorder", "quiet")
+    sends = [asyncio.create_task(runtime.send_message(ContentMessage(content=str(i)), chatty)) for i in range(5)]
+    sends.append(asyncio.create_task(runtime.send_message(ContentMessage(content="hello"), quiet)))
+    await asyncio.sleep(0)
+
+    runtime.start()
+    await asyncio.gather(*sends)
+    await runtime.stop()
+
+    # The quiet agent's only message is not stuck behind the backlog of the chatty agent.
+    assert handled.index(quiet) <= 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy",
+    [AgentSchedulingPolicy(max_concurrent_handlers=2), AgentSchedulingPolicy(max_concurrency_per_agent=1)],
+)
+async def test_nested_requests_under_scheduling_limits(policy: AgentSchedulingPolicy) -> None:
+    runtime = SingleThreadedAgentRuntime(scheduling_policy=policy)
+    for agent_type in ("a", "b", "c"):
+        await runtime.register(agent_type, ForwardingAgent)
+    runtime.start()
+    # Deeper than the limit on the handlers running at once, and back to an agent already handling a message.
+    result = await asyncio.wait_for(
+        runtime.send_message(ContentMessage(content="b,c,a,b"), AgentId("a", "default")), timeout=5
+    )
+    await runtime.stop()
+
+    assert result == "a,b,c,a,b"
+
+
+@pytest.mark.asyncio
+async def test_on_start_runs_before_first_message() -> None:
+    runtime = SingleThreadedAgentRuntime()
+    instances: List[SlowStartingAgent] = []
+
+    def factory() -> SlowStartingAgent:
+        agent = SlowStartingAgent()
+        instances.append(agent)
+        return agent
+
+    await runtime.register("slow", factory)
+    runtime.start()
+    agent_id = AgentId("slow", "default")
+    # Concurrent messages to a new agent share a single instance.
+    results = await asyncio.gather(*[runtime.send_message(MessageType(), agent_id) for _ in range(3)])
+    await runtime.stop()
+
+    assert results == [True, True, True]
+    assert len(instances) == 1
+
+
+@pytest.mark.asyncio
+async def test_register_unhashable_factory() -> None:
+    class Factory:
+        __hash__ = None  # type: ignore[assignment]
+
+        def __call__(self) -> NoopAgent:
+            return NoopAgent()
+
+    runtime = SingleThreadedAgentRuntime()
+    await runtime.register("noop", Factory())
+    agent_id = await runtime.get("noop")
+    assert await runtime.agent_metadata(agent_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_warm_agents_are_started_concurrently() -> None:
+    warm_agents = [AgentId("slow", str(i)) for i in range(5)]
+    runtime = SingleThreadedAgentRuntime(warm_agents=warm_agents)
+    instances: List[SlowStartingAgent] = []
+
+    def factory() -> SlowStartingAgent:
+        agent = SlowStartingAgent()
+        instances.append(agent)
+        return agent
+
+    await runtime.register("slow", factory)
+    runtime.start()
+    # Each agent takes 0.1 seconds to start, so they can only all be started by now if started concurrently.
+    await asyncio.sleep(0.3)
+    assert len(instances) == 5
+    assert all(agent.started for agent in instances)
+
+    await runtime.send_message(MessageType(), warm_agents[0])
+    await runtime.stop()
+    assert len(instances) == 5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("metrics_agent_keys", [False, True])
+async def test_runtime_metrics(metrics_agent_keys: bool) -> None:
+    metric_reader = InMemoryMetricReader()
+    runtime = SingleThreadedAgentRuntime(
+        meter_provider=MeterProvider(metric_readers=[metric_reader]), metrics_agent_keys=metrics_agent_keys
+    )
+    await LoopbackAgent.register(runtime, "name", LoopbackAgent)
+    runtime.start()
+    await runtime.send_message(MessageType(), AgentId("name", "default"))
+    await runtime.stop_when_idle()
+
+    metrics_data = metric_reader.get_metrics_data()
+    assert metrics_data is not None
+    points = {
+        metric.name: list(metric.data.data_points)
+        for resource_metrics in metrics_data.resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+    }
+    messages = {point.attributes["autogen.envelope.kind"]: point.value for point in points["autogen.runtime.messages"]}
+    assert messages == {"send": 1, "response": 1}
+    [handler_duration] = points["autogen.agent.handler.duration"]
+    expected_attributes = {"autogen.agent.type": "name", "messaging.message.type": "MessageType"}
+    if metrics_agent_keys:
+        expected_attributes["autogen.agent.key"] = "default"
+    assert handler_duration.attributes == expected_attributes
+    assert handler_duration.count == 1
+    assert points["autogen.runtime.queue.depth"][0].value == 0
+    assert points["autogen.runtime.outstanding_tasks"][0].value == 0
+    assert points["autogen.runtime.agent_instances"][0].value == 1
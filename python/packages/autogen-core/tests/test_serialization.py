@@ -1,15 +1,22 @@
-from dataclasses import dataclass
-from typing import Union
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import pytest
 from autogen_core.base import (
     JSON_DATA_CONTENT_TYPE,
+    PROTOBUF_DATA_CONTENT_TYPE,
+    JsonCodec,
     MessageSerializer,
+    OrjsonCodec,
     SerializationRegistry,
+    StdlibJsonCodec,
     try_get_known_serializers_for_type,
 )
 from autogen_core.base._serialization import DataclassJsonMessageSerializer, PydanticJsonMessageSerializer
-from autogen_core.components import Image
+from autogen_core.components import FunctionCall, Image
+from autogen_core.components.models import AssistantMessage, LLMMessage, SystemMessage, UserMessage
+from google.protobuf.wrappers_pb2 import StringValue
 from PIL import Image as PILImage
 from pydantic import BaseModel
 
@@ -77,10 +84,76 @@ def test_dataclass() -> None:
     assert deserialized == message
 
 
-def test_nesting_dataclass_dataclass() -> None:
+def test_dataclass_with_json_codec() -> None:
+    serde = SerializationRegistry(json_codec=OrjsonCodec())
+    serde.add_serializer(try_get_known_serializers_for_type(DataclassMessage))
+
+    message = DataclassMessage(message="hello")
+    json = serde.serialize(message, type_name="DataclassMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert json == b'{"message":"hello"}'
+    deserialized = serde.deserialize(json, type_name="DataclassMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert deserialized == message
+
+    # A serializer with a codec of its own keeps it.
+    serde.add_serializer(DataclassJsonMessageSerializer(DataclassMessage, json_codec=StdlibJsonCodec()))
+    json = serde.serialize(message, type_name="DataclassMessage", data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert json == b'{"message": "hello"}'
+
+
+def test_protobuf() -> None:
     serde = SerializationRegistry()
+    serde.add_serializer(try_get_known_serializers_for_type(StringValue))
+
+    message = StringValue(value="hello")
+    name = serde.type_name(message)
+    assert serde.content_types(name) == [PROTOBUF_DATA_CONTENT_TYPE]
+    data = serde.serialize(message, type_name=name, data_content_type=PROTOBUF_DATA_CONTENT_TYPE)
+    assert data == message.SerializeToString()
+    deserialized = serde.deserialize(data, type_name=name, data_content_type=PROTOBUF_DATA_CONTENT_TYPE)
+    assert deserialized == message
+
+
+class StringValueJsonSerializer(MessageSerializer[StringValue]):
+    @property
+    def data_content_type(self) -> str:
+        return JSON_DATA_CONTENT_TYPE
+
+    @property
+    def type_name(self) -> str:
+        return "StringValue"
+
+    def deserialize(self, payload: bytes) -> StringValue:
+        return StringValue(value=payload.decode("utf-8"))
+
+    def serialize(self, message: StringValue) -> bytes:
+        return message.value.encode("utf-8")
+
+
+def test_preferred_content_type() -> None:
+    serde = SerializationRegistry()
+    with pytest.raises(ValueError, match="Unknown type StringValue"):
+        serde.preferred_content_type("StringValue")
+
+    serde.add_serializer(StringValueJsonSerializer())
+    serde.add_serializer(try_get_known_serializers_for_type(StringValue))
+    # Protobuf is cheaper than JSON, whatever the order the serializers were added in.
+    assert serde.content_types("StringValue") == [PROTOBUF_DATA_CONTENT_TYPE, JSON_DATA_CONTENT_TYPE]
+    assert serde.preferred_content_type("StringValue") == PROTOBUF_DATA_CONTENT_TYPE
+    assert serde.preferred_content_type("StringValue", [JSON_DATA_CONTENT_TYPE]) == JSON_DATA_CONTENT_TYPE
     with pytest.raises(ValueError):
-        serde.add_serializer(try_get_known_serializers_for_type(NestingDataclassMessage))
+        serde.preferred_content_type("StringValue", ["text/plain"])
+
+
+def test_nesting_dataclass_dataclass() -> None:
+    serde = SerializationRegistry()
+    serde.add_serializer(try_get_known_serializers_for_type(NestingDataclassMessage))
+
+    message = NestingDataclassMessage(message="hello", nested=DataclassMessage(message="world"))
+    name = serde.type_name(message)
+    json = serde.serialize(message, type_name=name, data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert json == b'{"message": "hello", "nested": {"message": "world"}}'
+    deserialized = serde.deserialize(json, type_name=name, data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert deserialized == message
 
 
 @dataclass
@@ -97,14 +170,82 @@ class DataclassNestedUnionSyntaxNewMessage:
 def test_nesting_union_old_syntax_dataclass(
     cls: type[DataclassNestedUnionSyntaxOldMessage | DataclassNestedUnionSyntaxNewMessage],
 ) -> None:
-    with pytest.raises(ValueError):
-        _serializer = DataclassJsonMessageSerializer(cls)
+    serializer = DataclassJsonMessageSerializer(cls)
+    for message in (cls(message="hello"), cls(message=1)):
+        assert serializer.deserialize(serializer.serialize(message)) == message
 
 
 def test_nesting_dataclass_pydantic() -> None:
     serde = SerializationRegistry()
-    with pytest.raises(ValueError):
-        serde.add_serializer(try_get_known_serializers_for_type(NestingPydanticDataclassMessage))
+    serde.add_serializer(try_get_known_serializers_for_type(NestingPydanticDataclassMessage))
+
+    message = NestingPydanticDataclassMessage(message="hello", nested=PydanticMessage(message="world"))
+    name = serde.type_name(message)
+    json = serde.serialize(message, type_name=name, data_content_type=JSON_DATA_CONTENT_TYPE)
+    deserialized = serde.deserialize(json, type_name=name, data_content_type=JSON_DATA_CONTENT_TYPE)
+    assert deserialized == message
+
+
+@dataclass
+class TextPart:
+    kind: Literal["text"]
+    text: str
+
+
+@dataclass
+class ImagePart:
+    kind: Literal["image"]
+    image: Image
+
+
+@dataclass
+class ChatMessage:
+    parts: List[Union[TextPart, ImagePart]]
+    llm_messages: List[LLMMessage]
+    reply_to: Optional["ChatMessage"] = None
+    scores: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+
+
+@pytest.mark.parametrize("json_codec", [StdlibJsonCodec(), OrjsonCodec()])
+def test_nested_dataclass_with_unions(json_codec: JsonCodec) -> None:
+    image = Image(PILImage.new("RGB", (4, 4)))
+    message = ChatMessage(
+        parts=[TextPart(kind="text", text="hello"), ImagePart(kind="image", image=image)],
+        llm_messages=[
+            SystemMessage(content="system"),
+            UserMessage(content=["look", image], source="user"),
+            AssistantMessage(content=[FunctionCall(id="1", arguments="{}", name="f")], source="assistant"),
+            AssistantMessage(content="done", source="assistant"),
+        ],
+        reply_to=ChatMessage(parts=[], llm_messages=[]),
+        scores={"a": (1, 0.5)},
+    )
+    serializer = DataclassJsonMessageSerializer(ChatMessage, json_codec=json_codec)
+
+    deserialized = serializer.deserialize(serializer.serialize(message))
+    assert isinstance(deserialized.parts[1], ImagePart)
+    assert deserialized.parts[1].image.image == image.image
+    user_message = deserialized.llm_messages[1]
+    assert isinstance(user_message, UserMessage) and isinstance(user_message.content, list)
+    assert isinstance(user_message.content[1], Image)
+    # Images are compared by identity, so compare the messages without them.
+    deserialized.parts[1].image = user_message.content[1] = image
+    assert deserialized == message
+
+    # Dataclasses in a union are told apart by a literal field, or by their name if they have none.
+    encoded = json.loads(serializer.serialize(message))
+    assert encoded["parts"][0] == {"kind": "text", "text": "hello"}
+    assert encoded["llm_messages"][0] == {"__type__": "SystemMessage", "content": "system"}
+
+
+@dataclass
+class AmbiguousUnionMessage:
+    content: Union[List[TextPart], List[ImagePart]]
+
+
+def test_ambiguous_union_dataclass() -> None:
+    with pytest.raises(ValueError, match="cannot be told apart"):
+        DataclassJsonMessageSerializer(AmbiguousUnionMessage)
 
 
 def test_invalid_type() -> None:
@@ -0,0 +1,163 @@
+import asyncio
+import os
+from typing import Any, Mapping
+
+import pytest
+from autogen_core.application import ShardedAgentRuntime
+from autogen_core.application._sharded_agent_runtime import shard_for_agent
+from autogen_core.base import AgentId, MessageContext
+from autogen_core.base.exceptions import CantHandleException, NotAccessibleError
+from autogen_core.components import DefaultTopicId, RoutedAgent, default_subscription, message_handler
+from test_utils import CascadingMessageType, ContentMessage
+
+
+class PidAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Replies with the ID of its process.")
+
+    @message_handler
+    async def on_content(self, message: ContentMessage, ctx: MessageContext) -> ContentMessage:
+        return ContentMessage(content=str(os.getpid()))
+
+
+class ForwardingAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Forwards messages to the pid agent with the same key.")
+
+    @message_handler
+    async def on_content(self, message: ContentMessage, ctx: MessageContext) -> ContentMessage:
+        reply: ContentMessage = await self.send_message(message, AgentId("pid", message.content))
+        return reply
+
+
+class FailingAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Fails to handle every message.")
+
+    @message_handler
+    async def on_content(self, message: ContentMessage, ctx: MessageContext) -> ContentMessage:
+        raise CantHandleException(message.content)
+
+
+class ForwardingToFailingAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Forwards messages to the failing agent with the same key.")
+
+    @message_handler
+    async def on_content(self, message: ContentMessage, ctx: MessageContext) -> ContentMessage:
+        reply: ContentMessage = await self.send_message(message, AgentId("fail", message.content))
+        return reply
+
+
+@default_subscription
+class CountingCascadingAgent(RoutedAgent):
+    def __init__(self, max_rounds: int) -> None:
+        super().__init__("A cascading agent that saves its number of calls.")
+        self.num_calls = 0
+        self.max_rounds = max_rounds
+
+    @message_handler
+    async def on_new_message(self, message: CascadingMessageType, ctx: MessageContext) -> None:
+        self.num_calls += 1
+        if message.round == self.max_rounds:
+            return
+        await self.publish_message(CascadingMessageType(round=message.round + 1), topic_id=DefaultTopicId())
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return {"num_calls": self.num_calls}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        self.num_calls = state["num_calls"]
+
+
+def keys_on_distinct_shards(num_shards: int) -> list[str]:
+    keys: dict[int, str] = {}
+    for i in range(100):
+        keys.setdefault(shard_for_agent(AgentId("pid", str(i)), num_shards), str(i))
+    return [keys[index] for index in range(num_shards)]
+
+
+@pytest.mark.asyncio
+async def test_send_message_across_shards() -> None:
+    runtime = ShardedAgentRuntime(num_shards=2)
+    await PidAgent.register(runtime, "pid", PidAgent)
+    await ForwardingAgent.register(runtime, "forward", ForwardingAgent)
+    runtime.start()
+
+    pids = set[str]()
+    for key in keys_on_distinct_shards(2):
+        reply = await runtime.send_message(ContentMessage(content="hello"), AgentId("pid", key))
+        assert isinstance(reply, ContentMessage)
+        pids.add(reply.content)
+        # The forwarding agent may live on another shard than the pid agent it sends to.
+        for forward_key in keys_on_distinct_shards(2):
+            forwarded = await runtime.send_message(ContentMessage(content=key), AgentId("forward", forward_key))
+            assert forwarded == reply
+
+    await runtime.stop()
+
+    assert len(pids) == 2
+    assert str(os.getpid()) not in pids
+
+
+@pytest.mark.asyncio
+async def test_publish_across_shards() -> None:
+    num_agents = 4
+    num_initial_messages = 2
+    max_rounds = 3
+    total_num_calls_expected = 0
+    for i in range(0, max_rounds):
+        total_num_calls_expected += num_initial_messages * ((num_agents - 1) ** i)
+
+    num_shards = 3
+    runtime = ShardedAgentRuntime(num_shards=num_shards)
+    for i in range(num_agents):
+        await CountingCascadingAgent.register(runtime, f"name{i}", lambda: CountingCascadingAgent(max_rounds))
+    runtime.start()
+
+    for _ in range(num_initial_messages):
+        await runtime.publish_message(CascadingMessageType(round=1), DefaultTopicId())
+
+    state = await runtime.save_state()
+    while sum(value["num_calls"] for value in state.values()) < num_agents * total_num_calls_expected:
+        await asyncio.sleep(0.01)
+        state = await runtime.save_state()
+
+    assert set(state) == {f"name{i}/default" for i in range(num_agents)}
+    assert all(value["num_calls"] == total_num_calls_expected for value in state.values())
+    assert len({shard_for_agent(AgentId.from_str(agent_id), num_shards) for agent_id in state}) > 1
+    assert await runtime.agent_save_state(AgentId("name0", "default")) == {"num_calls": total_num_calls_expected}
+
+    await runtime.stop_when_idle()
+
+
+@pytest.mark.asyncio
+async def test_registration_after_start_is_rejected() -> None:
+    runtime = ShardedAgentRuntime(num_shards=1)
+    runtime.start()
+    with pytest.raises(RuntimeError):
+        await PidAgent.register(runtime, "pid", PidAgent)
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_exceptions_keep_their_type_across_shards() -> None:
+    runtime = ShardedAgentRuntime(num_shards=2)
+    await FailingAgent.register(runtime, "fail", FailingAgent)
+    await ForwardingToFailingAgent.register(runtime, "forward", ForwardingToFailingAgent)
+    runtime.start()
+
+    for key in keys_on_distinct_shards(2):
+        with pytest.raises(CantHandleException, match="hello"):
+            await runtime.send_message(ContentMessage(content="hello"), AgentId("fail", key))
+        # The forwarding agent may live on another shard than the failing agent it sends to.
+        for forward_key in keys_on_distinct_shards(2):
+            with pytest.raises(CantHandleException, match=key):
+                await runtime.send_message(ContentMessage(content=key), AgentId("forward", forward_key))
+
+    with pytest.raises(NotAccessibleError):
+        await runtime.try_get_underlying_agent_instance(AgentId("fail", "default"))
+    with pytest.raises(LookupError):
+        await runtime.try_get_underlying_agent_instance(AgentId("unknown", "default"))
+
+    await runtime.stop()
@@ -1,7 +1,9 @@
+import asyncio
+import warnings
 from typing import Any, Mapping
 
 import pytest
-from autogen_core.application import SingleThreadedAgentRuntime
+from autogen_core.application import AgentEvictionPolicy, InMemoryAgentStateStore, SingleThreadedAgentRuntime
 from autogen_core.base import AgentId, BaseAgent, MessageContext
 
 
@@ -20,6 +22,30 @@ class StatefulAgent(BaseAgent):
         self.state = state["state"]
 
 
+class CountingAgent(StatefulAgent):
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        self.state += 1
+        return self.state
+
+
+class UnsavableAgent(CountingAgent):
+    async def save_state(self) -> Mapping[str, Any]:
+        raise RuntimeError("State cannot be saved")
+
+
+class StartingAgent(CountingAgent):
+    async def on_start(self) -> None:
+        self.state_on_start = self.state
+
+
+class StatelessAgent(BaseAgent):
+    def __init__(self) -> None:
+        super().__init__("An agent without state")
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        return self.id.key
+
+
 @pytest.mark.asyncio
 async def test_agent_can_save_state() -> None:
     runtime = SingleThreadedAgentRuntime()
@@ -60,3 +86,172 @@ async def test_runtime_can_save_state() -> None:
 
     await runtime2.load_state(runtime_state)
     assert agent2.state == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_agent_is_evicted() -> None:
+    state_store = InMemoryAgentStateStore()
+    runtime = SingleThreadedAgentRuntime(
+        eviction_policy=AgentEvictionPolicy(max_instances_per_type=2), state_store=state_store
+    )
+    await runtime.register("counter", CountingAgent)
+    runtime.start()
+
+    first = AgentId("counter", "first")
+    assert await runtime.send_message(None, first) == 1
+    assert await runtime.send_message(None, first) == 2
+    first_instance = await runtime.try_get_underlying_agent_instance(first, type=CountingAgent)
+    await runtime.send_message(None, AgentId("counter", "second"))
+    await runtime.send_message(None, AgentId("counter", "third"))
+
+    # The first agent is the least recently used, so its state was spilled to the store.
+    assert await state_store.load(first) == {"state": 2}
+
+    # It is re-created with its saved state on its next message.
+    assert await runtime.send_message(None, first) == 3
+    assert await runtime.try_get_underlying_agent_instance(first, type=CountingAgent) is not first_instance
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_evicted_state_is_removed_from_default_store_once_restored() -> None:
+    runtime = SingleThreadedAgentRuntime(eviction_policy=AgentEvictionPolicy(max_instances_per_type=1))
+    await runtime.register("counter", CountingAgent)
+    runtime.start()
+    state_store = runtime._agent_instances.state_store  # type: ignore[reportPrivateUsage]
+
+    first = AgentId("counter", "first")
+    second = AgentId("counter", "second")
+    await runtime.send_message(None, first)
+    await runtime.send_message(None, second)
+    assert await state_store.agent_ids() == [first]
+
+    # The state of a re-created agent is held by the instance only, until it is evicted again.
+    assert await runtime.send_message(None, first) == 2
+    assert await state_store.agent_ids() == [second]
+    assert await runtime.save_state() == {str(first): {"state": 2}, str(second): {"state": 1}}
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_agent_is_started_after_its_state_is_restored() -> None:
+    runtime = SingleThreadedAgentRuntime(eviction_policy=AgentEvictionPolicy(max_instances_per_type=1))
+    await runtime.register("counter", StartingAgent)
+    runtime.start()
+
+    first = AgentId("counter", "first")
+    await runtime.send_message(None, first)
+    await runtime.send_message(None, first)
+    await runtime.send_message(None, AgentId("counter", "second"))
+    await runtime.send_message(None, first)
+
+    agent = await runtime.try_get_underlying_agent_instance(first, type=StartingAgent)
+    assert agent.state_on_start == 2
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_state_store_copies_state() -> None:
+    state_store = InMemoryAgentStateStore()
+    agent_id = AgentId("agent", "default")
+    messages = ["hello"]
+    log = [b"segment"]
+    await state_store.save(agent_id, {"messages": messages, "log": log})
+    messages.append("changed after saving")
+
+    loaded = await state_store.load(agent_id)
+    assert loaded == {"messages": ["hello"], "log": [b"segment"]}
+    assert loaded is not None and loaded["log"][0] is log[0]
+
+
+@pytest.mark.asyncio
+async def test_idle_agent_is_evicted() -> None:
+    state_store = InMemoryAgentStateStore()
+    runtime = SingleThreadedAgentRuntime(eviction_policy=AgentEvictionPolicy(idle_ttl=0.05), state_store=state_store)
+    await runtime.register("counter", CountingAgent)
+    runtime.start()
+
+    idle = AgentId("counter", "idle")
+    await runtime.send_message(None, idle)
+    await asyncio.sleep(0.1)
+    await runtime.send_message(None, AgentId("counter", "busy"))
+    assert await state_store.agent_ids() == [idle]
+
+    # Saving the runtime state includes the evicted agent.
+    runtime_state = await runtime.save_state()
+    assert runtime_state[str(idle)] == {"state": 1}
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_agent_whose_state_cannot_be_saved_is_kept() -> None:
+    runtime = SingleThreadedAgentRuntime(eviction_policy=AgentEvictionPolicy(idle_ttl=0.05))
+    await runtime.register("unsavable", UnsavableAgent)
+    await runtime.register("counter", CountingAgent)
+    runtime.start()
+
+    unsavable = AgentId("unsavable", "default")
+    assert await runtime.send_message(None, unsavable) == 1
+    await asyncio.sleep(0.1)
+    # The failure to evict the idle agent does not fail the delivery to another agent.
+    assert await runtime.send_message(None, AgentId("counter", "default")) == 1
+    assert await runtime.send_message(None, unsavable) == 2
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_agent_without_state_is_evicted_without_saving() -> None:
+    state_store = InMemoryAgentStateStore()
+    runtime = SingleThreadedAgentRuntime(eviction_policy=AgentEvictionPolicy(idle_ttl=0.05), state_store=state_store)
+    await runtime.register("stateless", StatelessAgent)
+    runtime.start()
+
+    await runtime.send_message(None, AgentId("stateless", "idle"))
+    await asyncio.sleep(0.1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert await runtime.send_message(None, AgentId("stateless", "busy")) == "busy"
+        assert await runtime.send_message(None, AgentId("stateless", "idle")) == "idle"
+    assert await state_store.agent_ids() == []
+    await runtime.stop()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_saves_only_changed_agents() -> None:
+    state_store = InMemoryAgentStateStore()
+    runtime = SingleThreadedAgentRuntime(state_store=state_store)
+    await runtime.register("counter", CountingAgent)
+    runtime.start()
+
+    active = AgentId("counter", "active")
+    idle = AgentId("counter", "idle")
+    await runtime.send_message(None, active)
+    await runtime.send_message(None, idle)
+    assert await runtime.checkpoint() == 2
+    assert await runtime.checkpoint() == 0
+
+    await runtime.send_message(None, active)
+    assert await runtime.checkpoint() == 1
+    assert await state_store.load(active) == {"state": 2}
+    assert await state_store.load(idle) == {"state": 1}
+    await runtime.stop()
+
+    # A new runtime restores each agent from its checkpoint when it is first used.
+    runtime2 = SingleThreadedAgentRuntime(state_store=state_store)
+    await runtime2.register("counter", CountingAgent)
+    runtime2.start()
+    assert await runtime2.send_message(None, active) == 3
+    await runtime2.stop()
+
+
+@pytest.mark.asyncio
+async def test_load_state_is_lazy() -> None:
+    runtime = SingleThreadedAgentRuntime()
+    await runtime.register("name1", StatefulAgent)
+    agent_id = AgentId("name1", "default")
+
+    await runtime.load_state({str(agent_id): {"state": 5}})
+    assert len(list(runtime._agent_instances)) == 0  # type: ignore[reportPrivateUsage]
+
+    agent = await runtime.try_get_underlying_agent_instance(agent_id, type=StatefulAgent)
+    assert agent.state == 5
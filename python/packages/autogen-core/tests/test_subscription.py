@@ -1,8 +1,11 @@
+import uuid
+
 import pytest
 from autogen_core.application import SingleThreadedAgentRuntime
-from autogen_core.base import AgentId, TopicId
+from autogen_core.application._helpers import SubscriptionManager
+from autogen_core.base import AgentId, Subscription, TopicId
 from autogen_core.base.exceptions import CantHandleException
-from autogen_core.components import DefaultSubscription, DefaultTopicId, TypeSubscription
+from autogen_core.components import DefaultSubscription, DefaultTopicId, TypePrefixSubscription, TypeSubscription
 from test_utils import LoopbackAgent, MessageType
 
 
@@ -23,6 +26,23 @@ def test_type_subscription_map() -> None:
         _agent_id = sub.map_to_agent(TopicId(type="t0", source="s1"))
 
 
+def test_type_prefix_subscription_match() -> None:
+    sub = TypePrefixSubscription(topic_type_prefix="jira.", agent_type="a1")
+
+    assert sub.is_match(TopicId(type="jira.created", source="s1")) is True
+    assert sub.is_match(TopicId(type="jira.", source="s1")) is True
+    assert sub.is_match(TopicId(type="jira", source="s1")) is False
+    assert sub.is_match(TopicId(type="github.push", source="s1")) is False
+
+    assert sub.map_to_agent(TopicId(type="jira.created", source="s1")) == AgentId(type="a1", key="s1")
+    with pytest.raises(CantHandleException):
+        _agent_id = sub.map_to_agent(TopicId(type="github.push", source="s1"))
+
+    assert sub == TypePrefixSubscription(topic_type_prefix="jira.", agent_type="a1")
+    assert sub != TypePrefixSubscription(topic_type_prefix="jira", agent_type="a1")
+    assert sub != TypeSubscription(topic_type="jira.", agent_type="a1")
+
+
 @pytest.mark.asyncio
 async def test_non_default_default_subscription() -> None:
     runtime = SingleThreadedAgentRuntime()
@@ -115,3 +135,102 @@ async def test_subscription_deduplication() -> None:
     default_subscription = DefaultSubscription(agent_type=agent_type)
     with pytest.raises(ValueError, match="Subscription already exists"):
         await runtime.add_subscription(default_subscription)
+
+
+class SourcePrefixSubscription(Subscription):
+    """A subscription of a kind the subscription manager does not index."""
+
+    def __init__(self, source_prefix: str, agent_type: str) -> None:
+        self._source_prefix = source_prefix
+        self._agent_type = agent_type
+        self._id = str(uuid.uuid4())
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    def is_match(self, topic_id: TopicId) -> bool:
+        return topic_id.source.startswith(self._source_prefix)
+
+    def map_to_agent(self, topic_id: TopicId) -> AgentId:
+        return AgentId(self._agent_type, topic_id.source)
+
+
+@pytest.mark.asyncio
+async def test_subscription_manager_updates_cached_topics() -> None:
+    manager = SubscriptionManager()
+    topic = TopicId("t1", "s1")
+    assert await manager.get_subscribed_recipients(topic) == []
+
+    sub1 = TypeSubscription("t1", "a1")
+    await manager.add_subscription(sub1)
+    await manager.add_subscription(TypeSubscription("t2", "a2"))
+    sub3 = SourcePrefixSubscription("s", "a3")
+    await manager.add_subscription(sub3)
+    await manager.add_subscription(TypeSubscription("t1", "a4"))
+    recipients = await manager.get_subscribed_recipients(topic)
+    # Recipients are in the order their subscriptions were added.
+    assert recipients == [AgentId("a1", "s1"), AgentId("a3", "s1"), AgentId("a4", "s1")]
+
+    await manager.remove_subscription(sub1.id)
+    await manager.remove_subscription(sub3.id)
+    assert await manager.get_subscribed_recipients(topic) == [AgentId("a4", "s1")]
+    # A list returned earlier is not changed by later subscription changes.
+    assert recipients == [AgentId("a1", "s1"), AgentId("a3", "s1"), AgentId("a4", "s1")]
+    assert await manager.get_subscribed_recipients(TopicId("t2", "s1")) == [AgentId("a2", "s1")]
+
+    with pytest.raises(ValueError, match="Subscription does not exist"):
+        await manager.remove_subscription(sub1.id)
+
+
+@pytest.mark.asyncio
+async def test_subscription_manager_evicts_least_recently_used_topics() -> None:
+    manager = SubscriptionManager(max_cached_topics=2)
+    await manager.add_subscription(TypeSubscription("t1", "a1"))
+    for source in ("s1", "s2", "s1", "s3"):
+        await manager.get_subscribed_recipients(TopicId("t1", source))
+    cached = manager._subscribed_recipients  # type: ignore[reportPrivateUsage]
+    assert list(cached) == [TopicId("t1", "s1"), TopicId("t1", "s3")]
+
+    # Evicted topics are resolved again with the current subscriptions.
+    await manager.add_subscription(TypeSubscription("t1", "a2"))
+    assert await manager.get_subscribed_recipients(TopicId("t1", "s2")) == [AgentId("a1", "s2"), AgentId("a2", "s2")]
+    assert len(cached) == 2
+
+
+@pytest.mark.asyncio
+async def test_subscription_manager_matches_type_prefixes() -> None:
+    manager = SubscriptionManager()
+    created = TopicId("jira.created", "s1")
+    assert await manager.get_subscribed_recipients(created) == []
+    assert await manager.get_subscribed_recipients(TopicId("github.push", "s1")) == []
+
+    await manager.add_subscription(TypeSubscription("jira.created", "a1"))
+    everything = TypePrefixSubscription("", "a2")
+    await manager.add_subscription(everything)
+    jira = TypePrefixSubscription("jira.", "a3")
+    await manager.add_subscription(jira)
+    await manager.add_subscription(TypePrefixSubscription("jira.cr", "a4"))
+    await manager.add_subscription(TypePrefixSubscription("jira.resolved", "a5"))
+    with pytest.raises(ValueError, match="Subscription already exists"):
+        await manager.add_subscription(TypePrefixSubscription("jira.", "a3"))
+
+    # Cached topics are updated, and recipients are in the order their subscriptions were added.
+    expected = [AgentId(agent_type, "s1") for agent_type in ("a1", "a2", "a3", "a4")]
+    assert await manager.get_subscribed_recipients(created) == expected
+    assert await manager.get_subscribed_recipients(TopicId("github.push", "s1")) == [AgentId("a2", "s1")]
+    assert await manager.get_subscribed_recipients(TopicId("jira.resolved", "s2")) == [
+        AgentId("a2", "s2"),
+        AgentId("a3", "s2"),
+        AgentId("a5", "s2"),
+    ]
+
+    await manager.remove_subscription(jira.id)
+    await manager.remove_subscription(everything.id)
+    expected = [AgentId("a1", "s1"), AgentId("a4", "s1")]
+    assert await manager.get_subscribed_recipients(created) == expected
+    assert await manager.get_subscribed_recipients(TopicId("jira.created", "s3")) == [
+        AgentId("a1", "s3"),
+        AgentId("a4", "s3"),
+    ]
+    assert await manager.get_subscribed_recipients(TopicId("jira.updated", "s1")) == []
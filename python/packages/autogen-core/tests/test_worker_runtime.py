@@ -1,22 +1,50 @@
 import asyncio
+import functools
 import logging
 import os
-from typing import List
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
 
 import pytest
-from autogen_core.application import WorkerAgentRuntime, WorkerAgentRuntimeHost
+from autogen_core.application import (
+    BlobTransportPolicy,
+    FileSystemBlobStore,
+    InMemoryBlobStore,
+    MessageBatchingPolicy,
+    PayloadCompressionPolicy,
+    WorkerAgentRuntime,
+    WorkerAgentRuntimeHost,
+)
+from autogen_core.application._consistent_hashing import ConsistentHashRing
+from autogen_core.application._message_batching import MessageBatcher, unbatch
+from autogen_core.application._payload_compression import compress_payload
+from autogen_core.application._worker_runtime_host_servicer import WorkerAgentRuntimeHostServicer, _SendWindow
+from autogen_core.application.protos import agent_worker_pb2
 from autogen_core.base import (
+    JSON_DATA_CONTENT_TYPE,
+    PROTOBUF_DATA_CONTENT_TYPE,
     AgentId,
     AgentType,
+    BaseAgent,
+    CancellationToken,
+    MessageContext,
+    MessageSerializer,
     TopicId,
     try_get_known_serializers_for_type,
 )
+from autogen_core.base._blob_references import blob_id
 from autogen_core.base._subscription import Subscription
 from autogen_core.components import (
     DefaultTopicId,
+    Image,
+    TypePrefixSubscription,
     TypeSubscription,
     type_subscription,
 )
+from google.protobuf.wrappers_pb2 import StringValue
+from PIL import Image as PILImage
 from test_utils import (
     CascadingAgent,
     CascadingMessageType,
@@ -28,6 +56,23 @@ from test_utils import (
 )
 
 
+class SlowAgent(BaseAgent):
+    def __init__(self) -> None:
+        super().__init__("An agent that waits until it is cancelled.")
+        self.deadline: float | None = None
+        self.cancelled = asyncio.Event()
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        self.deadline = ctx.deadline
+        sleep = asyncio.ensure_future(asyncio.sleep(100))
+        ctx.cancellation_token.link_future(sleep)
+        try:
+            await sleep
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+
 @pytest.mark.asyncio
 async def test_agent_types_must_be_unique_single_worker() -> None:
     host_address = "localhost:50051"
@@ -51,7 +96,7 @@ async def test_agent_types_must_be_unique_single_worker() -> None:
 
 
 @pytest.mark.asyncio
-async def test_agent_types_must_be_unique_multiple_workers() -> None:
+async def test_agent_types_shared_by_multiple_workers() -> None:
     host_address = "localhost:50052"
     host = WorkerAgentRuntimeHost(address=host_address)
     host.start()
@@ -63,7 +108,9 @@ async def test_agent_types_must_be_unique_multiple_workers() -> None:
 
     await worker1.register_factory(type=AgentType("name1"), agent_factory=lambda: NoopAgent(), expected_class=NoopAgent)
 
-    with pytest.raises(RuntimeError):
+    # Another worker may host the same agent type, but a worker may not register it twice.
+    await worker2.register_factory(type=AgentType("name1"), agent_factory=lambda: NoopAgent(), expected_class=NoopAgent)
+    with pytest.raises(ValueError):
         await worker2.register_factory(
             type=AgentType("name1"), agent_factory=lambda: NoopAgent(), expected_class=NoopAgent
         )
@@ -318,9 +365,8 @@ async def test_duplicate_subscription() -> None:
 
         worker1_2.start()
 
-        # Note: This passes because worker1 is still running
-        with pytest.raises(RuntimeError, match="Agent type worker1 already registered"):
-            await NoopAgent.register(worker1_2, "worker1", lambda: NoopAgent())
+        # Several workers may host the same agent type.
+        await NoopAgent.register(worker1_2, "worker1", lambda: NoopAgent())
 
         # This is somehow covered in test_disconnected_agent as well as a stop will also disconnect the agent.
         #  Will keep them both for now as we might replace the way we simulate a disconnect
@@ -348,7 +394,7 @@ async def test_disconnected_agent() -> None:
     # to some private properties. This needs to be updated once they are available publicly
 
     def get_current_subscriptions() -> List[Subscription]:
-        return host._servicer._subscription_manager._subscriptions  # type: ignore[reportPrivateUsage]
+        return list(host._servicer._subscription_manager._subscriptions.values())  # type: ignore[reportPrivateUsage]
 
     async def get_subscribed_recipients() -> List[AgentId]:
         return await host._servicer._subscription_manager.get_subscribed_recipients(DefaultTopicId())  # type: ignore[reportPrivateUsage]
@@ -414,8 +460,13 @@ async def test_grpc_max_message_size() -> None:
     ]
     host_address = "localhost:50061"
     host = WorkerAgentRuntimeHost(address=host_address, extra_grpc_config=extra_grpc_config)
-    worker1 = WorkerAgentRuntime(host_address=host_address, extra_grpc_config=extra_grpc_config)
-    worker2 = WorkerAgentRuntime(host_address=host_address)
+    # The big message would be sent compressed, well within the limits.
+    worker1 = WorkerAgentRuntime(
+        host_address=host_address, extra_grpc_config=extra_grpc_config, payload_compression=None
+    )
+    worker2 = WorkerAgentRuntime(
+        host_address=host_address, extra_grpc_config=[("grpc.max_receive_message_length", default_max_size)]
+    )
     worker3 = WorkerAgentRuntime(host_address=host_address, extra_grpc_config=extra_grpc_config)
 
     try:
@@ -466,3 +517,718 @@ if __name__ == "__main__":
 
     asyncio.run(test_disconnected_agent())
     asyncio.run(test_grpc_max_message_size())
+
+
+@pytest.mark.asyncio
+async def test_send_message_timeout() -> None:
+    host_address = "localhost:50062"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+
+    worker1 = WorkerAgentRuntime(host_address=host_address)
+    worker1.start()
+    worker1.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    await worker1.register_factory(type=AgentType("slow"), agent_factory=lambda: SlowAgent(), expected_class=SlowAgent)
+
+    worker2 = WorkerAgentRuntime(host_address=host_address)
+    worker2.start()
+    worker2.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+
+    with pytest.raises(TimeoutError):
+        await worker2.send_message(ContentMessage(content="hello"), AgentId("slow", "default"), timeout=0.5)
+
+    # The receiving worker cancels the handler at the deadline carried by the request.
+    agent = await worker1.try_get_underlying_agent_instance(AgentId("slow", "default"), SlowAgent)
+    await asyncio.wait_for(agent.cancelled.wait(), timeout=5)
+    assert agent.deadline is not None
+
+    await worker1.stop()
+    await worker2.stop()
+    await host.stop()
+
+
+class PingableSlowAgent(SlowAgent):
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        if message == ContentMessage(content="ping"):
+            return message
+        return await super().on_message(message, ctx)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("host_address, direct", [("localhost:50074", False), ("localhost:50075", True)])
+async def test_send_message_cancellation(host_address: str, direct: bool) -> None:
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+
+    worker1 = WorkerAgentRuntime(host_address=host_address, peer_address="localhost:0" if direct else None)
+    worker1.start()
+    worker1.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    await worker1.register_factory(
+        type=AgentType("slow"), agent_factory=lambda: PingableSlowAgent(), expected_class=PingableSlowAgent
+    )
+
+    worker2 = WorkerAgentRuntime(host_address=host_address)
+    worker2.start()
+    worker2.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    recipient = AgentId("slow", "default")
+    # The response to the first request gives the sender the address of the worker, if it accepts direct requests.
+    await worker2.send_message(ContentMessage(content="ping"), recipient)
+    assert (("slow", None) in worker2._peer_endpoints) == direct  # type: ignore[reportPrivateUsage]
+
+    cancellation_token = CancellationToken()
+    request = asyncio.ensure_future(
+        worker2.send_message(ContentMessage(content="hello"), recipient, cancellation_token=cancellation_token)
+    )
+    agent = await worker1.try_get_underlying_agent_instance(recipient, PingableSlowAgent)
+    await asyncio.sleep(0.5)
+    cancellation_token.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    # The worker handling the request is told to cancel its handler.
+    await asyncio.wait_for(agent.cancelled.wait(), timeout=5)
+    assert worker2._pending_requests == {}  # type: ignore[reportPrivateUsage]
+
+    await worker1.stop()
+    await worker2.stop()
+    await host.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_from_multiple_workers() -> None:
+    host_address = "localhost:50063"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+
+    target = WorkerAgentRuntime(host_address=host_address)
+    target.start()
+    target.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    await target.register_factory(
+        type=AgentType("loopback"), agent_factory=lambda: LoopbackAgent(), expected_class=LoopbackAgent
+    )
+
+    senders: List[WorkerAgentRuntime] = []
+    for _ in range(2):
+        sender = WorkerAgentRuntime(host_address=host_address)
+        sender.start()
+        sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+        senders.append(sender)
+
+    # Both senders number their requests from 1, so the host must not mix up the responses.
+    replies = await asyncio.wait_for(
+        asyncio.gather(
+            *(
+                sender.send_message(ContentMessage(content=f"{index}-{i}"), AgentId("loopback", "default"))
+                for index, sender in enumerate(senders)
+                for i in range(5)
+            )
+        ),
+        timeout=10,
+    )
+    assert [reply.content for reply in replies] == [f"{index}-{i}" for index in range(2) for i in range(5)]
+
+    for sender in senders:
+        await sender.stop()
+    await target.stop()
+    await host.stop()
+
+
+@pytest.mark.asyncio
+async def test_type_prefix_subscription() -> None:
+    host_address = "localhost:50064"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    worker = WorkerAgentRuntime(host_address=host_address)
+    worker.start()
+    publisher = WorkerAgentRuntime(host_address=host_address)
+    publisher.add_message_serializer(try_get_known_serializers_for_type(MessageType))
+    publisher.start()
+
+    await LoopbackAgent.register(worker, "name", LoopbackAgent)
+    await worker.add_subscription(TypePrefixSubscription("jira.", "name"))
+
+    await publisher.publish_message(MessageType(), topic_id=TopicId(type="jira.created", source="default"))
+    await publisher.publish_message(MessageType(), topic_id=TopicId(type="jira.resolved", source="default"))
+    await publisher.publish_message(MessageType(), topic_id=TopicId(type="github.push", source="default"))
+
+    await asyncio.sleep(2)
+
+    # Only the topics whose type starts with the prefix are delivered to the agent.
+    agent = await worker.try_get_underlying_agent_instance(AgentId("name", "default"), type=LoopbackAgent)
+    assert agent.num_calls == 2
+
+    await worker.stop()
+    await publisher.stop()
+    await host.stop()
+
+
+class EchoAgent(BaseAgent):
+    def __init__(self) -> None:
+        super().__init__("Replies with the message it receives.")
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        return message
+
+
+@pytest.mark.asyncio
+async def test_protobuf_message() -> None:
+    host_address = "localhost:50065"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    worker = WorkerAgentRuntime(host_address=host_address)
+    worker.add_message_serializer(try_get_known_serializers_for_type(StringValue))
+    worker.start()
+    sender = WorkerAgentRuntime(host_address=host_address)
+    sender.add_message_serializer(try_get_known_serializers_for_type(StringValue))
+    sender.start()
+
+    await EchoAgent.register(worker, "echo", EchoAgent)
+    # Neither runtime has a JSON serializer for the message, so it is sent and answered as protobuf.
+    result = await sender.send_message(StringValue(value="hello"), AgentId("echo", "default"))
+    assert result == StringValue(value="hello")
+
+    await worker.stop()
+    await sender.stop()
+    await host.stop()
+
+
+class ContentMessageProtobufSerializer(MessageSerializer[ContentMessage]):
+    """Stands in for a protobuf serializer, which is preferred over JSON."""
+
+    @property
+    def data_content_type(self) -> str:
+        return PROTOBUF_DATA_CONTENT_TYPE
+
+    @property
+    def type_name(self) -> str:
+        return "ContentMessage"
+
+    def deserialize(self, payload: bytes) -> ContentMessage:
+        return ContentMessage(content=payload.decode("utf-8"))
+
+    def serialize(self, message: ContentMessage) -> bytes:
+        return message.content.encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_content_type_negotiation() -> None:
+    host_address = "localhost:50066"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    worker = WorkerAgentRuntime(host_address=host_address)
+    worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    worker.start()
+    sender = WorkerAgentRuntime(host_address=host_address)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    sender.add_message_serializer(ContentMessageProtobufSerializer())
+    sender.start()
+
+    await LoopbackAgent.register(worker, "name", LoopbackAgent)
+    recipient = AgentId("name", "default")
+    # The recipient cannot decode the preferred content type, so the request is sent again as JSON.
+    assert await sender.send_message(ContentMessage(content="first"), recipient) == ContentMessage(content="first")
+    accepted_content_types = sender._accepted_content_types  # type: ignore[reportPrivateUsage]
+    assert accepted_content_types == {("name", "ContentMessage"): [JSON_DATA_CONTENT_TYPE]}
+    assert await sender.send_message(ContentMessage(content="second"), recipient) == ContentMessage(content="second")
+
+    agent = await worker.try_get_underlying_agent_instance(recipient, type=LoopbackAgent)
+    assert agent.num_calls == 2
+
+    await worker.stop()
+    await sender.stop()
+    await host.stop()
+
+
+@dataclass
+class ImageMessage:
+    image: Image
+
+
+class CountingBlobStore(InMemoryBlobStore):
+    def __init__(self, max_bytes: int | None = None) -> None:
+        super().__init__(max_bytes)
+        self.puts: List[str] = []
+
+    async def put(self, blob_id: str, data: bytes) -> None:
+        self.puts.append(blob_id)
+        await super().put(blob_id, data)
+
+
+@pytest.mark.asyncio
+async def test_blob_transport(tmp_path: Path) -> None:
+    host_address = "localhost:50067"
+    host_blob_store = CountingBlobStore()
+    host = WorkerAgentRuntimeHost(address=host_address, blob_store=host_blob_store)
+    host.start()
+    blob_transport = BlobTransportPolicy(threshold=1024)
+    worker = WorkerAgentRuntime(host_address=host_address, blob_transport=blob_transport)
+    worker.add_message_serializer(try_get_known_serializers_for_type(ImageMessage))
+    worker.start()
+    # The sender shares a blob store with a worker on the same machine.
+    blob_store = FileSystemBlobStore(tmp_path)
+    sender = WorkerAgentRuntime(host_address=host_address, blob_transport=blob_transport, blob_store=blob_store)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ImageMessage))
+    sender.start()
+    local_worker = WorkerAgentRuntime(host_address=host_address, blob_store=blob_store)
+    local_worker.add_message_serializer(try_get_known_serializers_for_type(ImageMessage))
+    local_worker.start()
+
+    await EchoAgent.register(worker, "echo", EchoAgent)
+    await EchoAgent.register(local_worker, "local_echo", EchoAgent)
+    image = Image(PILImage.effect_noise((64, 64), 100))
+    id = blob_id(image.to_bytes())
+
+    for recipient in (AgentId("echo", "1"), AgentId("echo", "2"), AgentId("local_echo", "1")):
+        result = await sender.send_message(ImageMessage(image=image), recipient)
+        assert isinstance(result, ImageMessage)
+        assert result.image.to_bytes() == image.to_bytes()
+
+    # The image is uploaded to the host once, by the sender, and each worker fetched it from the host at most once.
+    assert host_blob_store.puts == [id]
+    assert len(host_blob_store) == 1
+    assert await host_blob_store.get(id) == image.to_bytes()
+    assert await blob_store.get(id) == image.to_bytes()
+    for runtime in (worker, sender, local_worker):
+        assert await runtime._blob_cache.get(id) == image.to_bytes()  # type: ignore[reportPrivateUsage]
+
+    await worker.stop()
+    await sender.stop()
+    await local_worker.stop()
+    await host.stop()
+
+
+@pytest.mark.asyncio
+async def test_blob_evicted_by_host() -> None:
+    host_address = "localhost:50073"
+    # The host only keeps the last blob it received.
+    host_blob_store = CountingBlobStore(max_bytes=1)
+    host = WorkerAgentRuntimeHost(address=host_address, blob_store=host_blob_store)
+    host.start()
+    blob_transport = BlobTransportPolicy(threshold=1024)
+    runtimes = [WorkerAgentRuntime(host_address=host_address, blob_transport=blob_transport) for _ in range(3)]
+    for runtime in runtimes:
+        runtime.add_message_serializer(try_get_known_serializers_for_type(ImageMessage))
+        runtime.start()
+    sender, worker1, worker2 = runtimes
+    await EchoAgent.register(worker1, "echo1", EchoAgent)
+    await EchoAgent.register(worker2, "echo2", EchoAgent)
+    first = Image(PILImage.effect_noise((64, 64), 100))
+    second = Image(PILImage.effect_noise((64, 64), 50))
+
+    await sender.send_message(ImageMessage(image=first), AgentId("echo1", "default"))
+    await sender.send_message(ImageMessage(image=second), AgentId("echo1", "default"))
+    # The first image was evicted by the host, and is uploaded again for a worker that has not fetched it.
+    result = await sender.send_message(ImageMessage(image=first), AgentId("echo2", "default"))
+    assert isinstance(result, ImageMessage)
+    assert result.image.to_bytes() == first.to_bytes()
+    assert host_blob_store.puts.count(blob_id(first.to_bytes())) == 2
+
+    # A request referencing a blob the host does not have is answered with an error.
+    response = await worker2._handle_request(  # type: ignore[reportPrivateUsage]
+        agent_worker_pb2.RpcRequest(
+            request_id="1",
+            target=agent_worker_pb2.AgentId(type="echo2", key="default"),
+            payload=agent_worker_pb2.Payload(
+                data_type=worker2._serialization_registry.type_name(ImageMessage(image=first)),  # type: ignore[reportPrivateUsage]
+                data_content_type=JSON_DATA_CONTENT_TYPE,
+                data=b"{}",
+                blob_ids=["missing"],
+            ),
+        )
+    )
+    assert response.error.startswith("Failed to deserialize the message")
+
+    for runtime in runtimes:
+        await runtime.stop()
+    await host.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_payload_compression(encoding: str) -> None:
+    host_address = "localhost:50068"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    payload_compression = PayloadCompressionPolicy(encodings=[encoding], threshold=1024)
+    worker = WorkerAgentRuntime(host_address=host_address, payload_compression=payload_compression)
+    worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    worker.start()
+    sender = WorkerAgentRuntime(host_address=host_address, payload_compression=payload_compression)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    sender.start()
+
+    await EchoAgent.register(worker, "echo", EchoAgent)
+    recipient = AgentId("echo", "default")
+    assert await sender.send_message(ContentMessage(content="small"), recipient) == ContentMessage(content="small")
+    # Compressed payloads are only sent once the host has listed the encodings it can decode, before any message.
+    assert sender._host_connection is not None  # type: ignore[reportPrivateUsage]
+    assert sender._host_connection.payload_encoding([encoding]) == encoding  # type: ignore[reportPrivateUsage]
+
+    # The request and the response are compressed.
+    large = ContentMessage(content="large " * 1000)
+    assert await sender.send_message(large, recipient) == large
+
+    await worker.stop()
+    await sender.stop()
+    await host.stop()
+
+
+def test_host_decompresses_payloads_for_clients() -> None:
+    servicer = WorkerAgentRuntimeHostServicer()
+    servicer._payload_encodings = {1: {"gzip"}, 2: set()}  # type: ignore[reportPrivateUsage]
+    data = b"data" * 1000
+    payload = agent_worker_pb2.Payload(data=compress_payload(data, "gzip"), data_encoding="gzip")
+
+    servicer._decode_payload_for(1, payload)  # type: ignore[reportPrivateUsage]
+    assert payload.data_encoding == "gzip"
+    servicer._decode_payload_for(2, payload)  # type: ignore[reportPrivateUsage]
+    assert payload.data_encoding == ""
+    assert payload.data == data
+
+
+@pytest.mark.asyncio
+async def test_host_drops_late_responses() -> None:
+    servicer = WorkerAgentRuntimeHostServicer()
+    # A response from a client with no pending requests, e.g. after the request was rejected.
+    await servicer._process_response(agent_worker_pb2.RpcResponse(request_id="1"), 1)  # type: ignore[reportPrivateUsage]
+
+    # A response to a request whose sender has given up on it.
+    future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+    future.cancel()
+    servicer._pending_responses[1] = {"2": future}  # type: ignore[reportPrivateUsage]
+    await servicer._process_response(agent_worker_pb2.RpcResponse(request_id="2"), 1)  # type: ignore[reportPrivateUsage]
+    assert servicer._pending_responses[1] == {}  # type: ignore[reportPrivateUsage]
+
+
+@pytest.mark.asyncio
+async def test_host_send_queue_flow_control() -> None:
+    servicer = WorkerAgentRuntimeHostServicer(max_send_queue_size=1, send_queue_full_timeout=0.1)
+    # Client 1 sends requests to client 2, which does not read its messages, and to client 3, which does.
+    queues: Dict[int, asyncio.Queue[agent_worker_pb2.Message]] = {client_id: asyncio.Queue() for client_id in (1, 2, 3)}
+    windows = {client_id: _SendWindow(1) for client_id in (1, 2, 3)}
+    servicer._send_queues = queues  # type: ignore[reportPrivateUsage]
+    servicer._send_windows = windows  # type: ignore[reportPrivateUsage]
+    backlog_tasks = [
+        asyncio.create_task(servicer._forward_backlog(queues[client_id], window))  # type: ignore[reportPrivateUsage]
+        for client_id, window in windows.items()
+    ]
+    slow_ring: ConsistentHashRing[int] = ConsistentHashRing()
+    slow_ring.add(2)
+    fast_ring: ConsistentHashRing[int] = ConsistentHashRing()
+    fast_ring.add(3)
+    servicer._agent_type_to_client_ids = {"slow": slow_ring, "fast": fast_ring}  # type: ignore[reportPrivateUsage]
+    # The sender's own queue is full, which does not hold up the responses to its requests.
+    windows[1].room = 0
+
+    async def send_request(agent_type: str, request_id: str) -> None:
+        await servicer._process_message(  # type: ignore[reportPrivateUsage]
+            1,
+            agent_worker_pb2.Message(
+                request=agent_worker_pb2.RpcRequest(
+                    request_id=request_id, target=agent_worker_pb2.AgentId(type=agent_type, key="default")
+                )
+            ),
+        )
+
+    # The first request takes the room in the slow client's queue and the second waits in its backlog. The third
+    # finds no room in either, and is rejected without waiting.
+    for request_id in ("1", "2", "3"):
+        await send_request("slow", request_id)
+    assert queues[2].qsize() == 1
+    # The requests for the fast client are not held up by the slow one.
+    await send_request("fast", "4")
+    assert queues[3].get_nowait().request.target.type == "fast"
+    windows[3].release(1)
+    await send_request("fast", "5")
+    assert queues[3].get_nowait().request.target.type == "fast"
+
+    await asyncio.sleep(0.01)
+    rejected = queues[1].get_nowait().response
+    assert (rejected.request_id, rejected.overloaded) == ("3", True)
+    # The backlogged request is rejected once it has waited for `send_queue_full_timeout`.
+    await asyncio.sleep(0.15)
+    rejected = queues[1].get_nowait().response
+    assert (rejected.request_id, rejected.overloaded) == ("2", True)
+    assert queues[2].qsize() == 1
+
+    # A backlogged request is queued once the slow client catches up.
+    await send_request("slow", "6")
+    forwarded = queues[2].get_nowait().request
+    windows[2].release(1)
+    await asyncio.sleep(0.01)
+    assert queues[2].get_nowait().request.target.type == "slow"
+    assert queues[1].empty()
+
+    # The response to the admitted request is sent, although the sender's queue is full.
+    await servicer._process_response(agent_worker_pb2.RpcResponse(request_id=forwarded.request_id), 2)  # type: ignore[reportPrivateUsage]
+    await asyncio.sleep(0.01)
+    response = queues[1].get_nowait().response
+    assert (response.request_id, response.overloaded) == ("1", False)
+
+    for task in [*backlog_tasks, *servicer._background_tasks]:  # type: ignore[reportPrivateUsage]
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_message_batcher() -> None:
+    queue: asyncio.Queue[agent_worker_pb2.Message] = asyncio.Queue()
+    messages = [
+        agent_worker_pb2.Message(event=agent_worker_pb2.Event(topic_type=str(index), topic_source="default"))
+        for index in range(5)
+    ]
+    for message in messages:
+        queue.put_nowait(message)
+
+    # Queued messages are coalesced up to the maximum number of messages.
+    batcher = MessageBatcher(queue, MessageBatchingPolicy(max_messages=3))
+    assert list(unbatch(await batcher.next())) == messages[:3]
+    assert list(unbatch(await batcher.next())) == messages[3:]
+
+    # A message that would make the batch too large is sent in the next one.
+    for message in messages:
+        queue.put_nowait(message)
+    batcher.policy = MessageBatchingPolicy(max_bytes=2 * messages[0].ByteSize())
+    assert list(unbatch(await batcher.next())) == messages[:2]
+    assert list(unbatch(await batcher.next())) == messages[2:4]
+
+    # A lone message is sent as is, unless another one is queued within the linger time.
+    assert await batcher.next() == messages[4]
+    batcher.policy = MessageBatchingPolicy(max_messages=2, linger=10)
+    queue.put_nowait(messages[0])
+    asyncio.get_running_loop().call_later(0.01, queue.put_nowait, messages[1])
+    batch = await asyncio.wait_for(batcher.next(), timeout=1)
+    assert batch.WhichOneof("message") == "batch"
+    assert list(unbatch(batch)) == messages[:2]
+
+    batcher.policy = None
+    for message in messages[:2]:
+        queue.put_nowait(message)
+    assert await batcher.next() == messages[0]
+
+
+@pytest.mark.asyncio
+async def test_message_batching() -> None:
+    host_address = "localhost:50069"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    publisher = WorkerAgentRuntime(host_address=host_address)
+    publisher.add_message_serializer(try_get_known_serializers_for_type(MessageType))
+    publisher.start()
+    batching_worker = WorkerAgentRuntime(host_address=host_address)
+    batching_worker.add_message_serializer(try_get_known_serializers_for_type(MessageType))
+    batching_worker.start()
+    unbatched_worker = WorkerAgentRuntime(host_address=host_address, message_batching=None)
+    unbatched_worker.add_message_serializer(try_get_known_serializers_for_type(MessageType))
+    unbatched_worker.start()
+
+    await LoopbackAgentWithDefaultSubscription.register(
+        batching_worker, "batching", LoopbackAgentWithDefaultSubscription
+    )
+    await LoopbackAgentWithDefaultSubscription.register(
+        unbatched_worker, "unbatched", LoopbackAgentWithDefaultSubscription
+    )
+    # A burst of publishes is queued faster than it is sent, so it goes out in batches.
+    await asyncio.gather(*(publisher.publish_message(MessageType(), DefaultTopicId()) for _ in range(100)))
+    await asyncio.sleep(1)
+
+    for runtime, agent_type in ((batching_worker, "batching"), (unbatched_worker, "unbatched")):
+        agent = await runtime.try_get_underlying_agent_instance(AgentId(agent_type, "default"), type=LoopbackAgent)
+        assert agent.num_calls == 100
+
+    await publisher.stop()
+    await batching_worker.stop()
+    await unbatched_worker.stop()
+    await host.stop()
+
+
+@pytest.mark.asyncio
+async def test_direct_requests() -> None:
+    host_address = "localhost:50070"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    relayed: List[agent_worker_pb2.RpcRequest] = []
+    process_request = host._servicer._process_request  # type: ignore[reportPrivateUsage]
+
+    async def count_relayed(request: agent_worker_pb2.RpcRequest, client_id: int) -> None:
+        relayed.append(request)
+        await process_request(request, client_id)
+
+    host._servicer._process_request = count_relayed  # type: ignore
+    worker = WorkerAgentRuntime(host_address=host_address, peer_address="localhost:0")
+    worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    worker.start()
+    sender = WorkerAgentRuntime(host_address=host_address)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    sender.start()
+
+    await EchoAgent.register(worker, "echo", EchoAgent)
+    recipient = AgentId("echo", "default")
+    # The first request is relayed by the host, which gives the sender the address of the worker.
+    assert await sender.send_message(ContentMessage(content="first"), recipient) == ContentMessage(content="first")
+    assert len(relayed) == 1
+    endpoint = sender._peer_endpoints[("echo", None)]  # type: ignore[reportPrivateUsage]
+    assert endpoint.address.startswith("localhost:") and not endpoint.address.endswith(":0")
+
+    # The next ones, including compressed ones, are sent to the worker directly.
+    large = ContentMessage(content="large " * 1000)
+    assert await sender.send_message(large, recipient) == large
+    assert await sender.send_message(ContentMessage(content="third"), recipient) == ContentMessage(content="third")
+    assert len(relayed) == 1
+
+    # Once the worker is gone and another one hosts the agent type, requests go through the host again.
+    await worker.stop()
+    await asyncio.sleep(0.5)
+    other_worker = WorkerAgentRuntime(host_address=host_address)
+    other_worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    other_worker.start()
+    await EchoAgent.register(other_worker, "echo", EchoAgent)
+    assert await sender.send_message(large, recipient) == large
+    assert len(relayed) == 2
+    assert ("echo", None) not in sender._peer_endpoints  # type: ignore[reportPrivateUsage]
+
+    await other_worker.stop()
+    await sender.stop()
+    await host.stop()
+
+
+class KeyRecordingAgent(BaseAgent):
+    def __init__(self, worker: str, handled: List[tuple[str, str]]) -> None:
+        super().__init__("Records which worker handled the messages of each key.")
+        self._worker = worker
+        self._handled = handled
+
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        self._handled.append((self.id.key, self._worker))
+        return message
+
+
+@pytest.mark.asyncio
+async def test_sharded_agent_type() -> None:
+    host_address = "localhost:50071"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    sender = WorkerAgentRuntime(host_address=host_address)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    sender.start()
+    handled: List[tuple[str, str]] = []
+    workers: List[WorkerAgentRuntime] = []
+
+    async def start_worker(name: str) -> None:
+        worker = WorkerAgentRuntime(host_address=host_address, peer_address="localhost:0")
+        worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+        worker.start()
+        await KeyRecordingAgent.register(worker, "shard", lambda: KeyRecordingAgent(name, handled))
+        await worker.add_subscription(TypeSubscription("shard_topic", "shard"))
+        workers.append(worker)
+
+    async def owners() -> dict[str, str]:
+        handled.clear()
+        for key in keys:
+            message = ContentMessage(content=key)
+            assert await sender.send_message(message, AgentId("shard", key)) == message
+            await sender.publish_message(message, TopicId("shard_topic", key))
+        await asyncio.sleep(0.5)
+        # Each agent handles its request and its event once, on a single worker.
+        assert sorted(key for key, _ in handled) == sorted(keys * 2)
+        owners = dict(handled)
+        assert set(handled) == set(owners.items())
+        return owners
+
+    keys = [f"conversation{index}" for index in range(40)]
+    await start_worker("a")
+    await start_worker("b")
+    first_owners = await owners()
+    assert set(first_owners.values()) == {"a", "b"}
+    # The sender has learnt where each agent is hosted, and sends its next requests there directly.
+    assert ("shard", keys[0]) in sender._peer_endpoints  # type: ignore[reportPrivateUsage]
+
+    # A worker joining only takes agents from the others, and the endpoints the sender was given are dropped.
+    await start_worker("c")
+    await asyncio.sleep(0.5)
+    assert not sender._peer_endpoints  # type: ignore[reportPrivateUsage]
+    second_owners = await owners()
+    assert "c" in second_owners.values()
+    assert all(second_owners[key] in (first_owners[key], "c") for key in keys)
+
+    # A worker leaving only gives its agents to the others.
+    await workers[0].stop()
+    await asyncio.sleep(0.5)
+    third_owners = await owners()
+    assert set(third_owners.values()) == {"b", "c"}
+    assert all(third_owners[key] == second_owners[key] for key in keys if second_owners[key] != "a")
+
+    for worker in workers[1:]:
+        await worker.stop()
+    await sender.stop()
+    await host.stop()
+
+
+class SlowKeyRecordingAgent(KeyRecordingAgent):
+    async def on_message(self, message: Any, ctx: MessageContext) -> Any:
+        await asyncio.sleep(0.1)
+        return await super().on_message(message, ctx)
+
+
+@pytest.mark.asyncio
+async def test_stateless_agent_type() -> None:
+    host_address = "localhost:50072"
+    host = WorkerAgentRuntimeHost(address=host_address)
+    host.start()
+    sender = WorkerAgentRuntime(host_address=host_address)
+    sender.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+    sender.start()
+    handled: List[tuple[str, str]] = []
+    workers: List[WorkerAgentRuntime] = []
+    for name in ("a", "b", "c"):
+        worker = WorkerAgentRuntime(
+            host_address=host_address,
+            peer_address="localhost:0",
+            stateless_agent_types=["stateless"],
+            heartbeat_interval=0.05,
+        )
+        worker.add_message_serializer(try_get_known_serializers_for_type(ContentMessage))
+        worker.start()
+        await SlowKeyRecordingAgent.register(
+            worker, "stateless", functools.partial(SlowKeyRecordingAgent, name, handled)
+        )
+        workers.append(worker)
+
+    # Concurrent requests to the same agent are spread over the workers, rather than all sent to one of them.
+    messages = [ContentMessage(content=str(index)) for index in range(30)]
+    recipient = AgentId("stateless", "default")
+    results = await asyncio.gather(*(sender.send_message(message, recipient) for message in messages))
+    assert results == messages
+    counts = Counter(worker for _, worker in handled)
+    assert set(counts) == {"a", "b", "c"}
+    assert all(count == 10 for count in counts.values())
+    # Requests to stateless agent types always go through the host, which dispatches them.
+    assert not sender._peer_endpoints  # type: ignore[reportPrivateUsage]
+
+    # The workers report their load, and requests go to the least loaded of them. The sender hosts no stateless
+    # agent type, so it does not report its load.
+    await asyncio.sleep(0.2)
+    loads = host._servicer._client_loads.values()  # type: ignore[reportPrivateUsage]
+    assert len(loads) == 3
+    assert sender._heartbeat_task is None  # type: ignore[reportPrivateUsage]
+    assert sorted(in_flight for in_flight, latency in loads if latency > 0) == [0, 0, 0]
+    assert all(latency == pytest.approx(0.1, abs=0.05) for _, latency in loads if latency > 0)
+    handled.clear()
+    busy = [asyncio.ensure_future(sender.send_message(message, recipient)) for message in messages[:2]]
+    await asyncio.sleep(0.05)
+    await sender.send_message(messages[2], recipient)
+    await asyncio.gather(*busy)
+    assert len({worker for _, worker in handled}) == 3
+
+    # Every worker registering the agent type must register it as stateless.
+    stateful_worker = WorkerAgentRuntime(host_address=host_address)
+    stateful_worker.start()
+    with pytest.raises(RuntimeError, match="already registered as stateless"):
+        await SlowKeyRecordingAgent.register(
+            stateful_worker, "stateless", functools.partial(SlowKeyRecordingAgent, "d", handled)
+        )
+
+    await stateful_worker.stop()
+    for worker in workers:
+        await worker.stop()
+    await sender.stop()
+    await host.stop()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import List, Tuple
 
@@ -42,12 +43,15 @@ class JiraAgent(BaseWorker):
             TOOL_GET_PROJECT_ISSUES
         ]
         self._jira_api = jira_api or JiraAPI()
-        projects = self._jira_api.get_all_projects()
+        self._autoform_promt = autoform_prompt
+
+    async def on_start(self) -> None:
+        # The Jira client is blocking, so the projects are fetched off the event loop.
+        projects = await asyncio.to_thread(self._jira_api.get_all_projects)
         if "error" in projects:
             print(f"An error occurred while retrieving projects: {projects['error']}")
         else:
             self._chat_history.append(UserMessage(content=f"Current Projects: {projects}", source="system"))
-        self._autoform_promt = autoform_prompt
 
     async def _generate_reply(self, cancellation_token: CancellationToken) -> Tuple[bool, str]:
         history = self._chat_history[0:-1]
@@ -3,7 +3,6 @@ from typing import Any, Dict, List, Union
 
 from autogen_core.components import FunctionCall, Image
 from autogen_core.components.models import FunctionExecutionResult, LLMMessage
-from pydantic import BaseModel
 
 # Convenience type
 UserContent = Union[str, List[Union[str, Image]]]
@@ -15,7 +14,8 @@ SystemContent = str
 
 
 # used by all agents to send messages
-class BroadcastMessage(BaseModel):
+@dataclass
+class BroadcastMessage:
     content: LLMMessage
     request_halt: bool = False
 